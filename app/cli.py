@@ -0,0 +1,172 @@
+"""
+运维命令行
+在不启动 Web 服务的情况下对向量集合执行维护操作，配置与服务一致（读取 .env）
+
+用法:
+    python -m app.cli collection-options            # 比较集合当前配置与 Settings 中的目标配置
+    python -m app.cli collection-options --apply    # 把量化/落盘/HNSW 配置应用到已有集合
+    python -m app.cli backfill-date-fields          # 为已有记录补齐 year/month/day/weekday/month_day
+    python -m app.cli backfill-text-vectors         # 为缺少 caption 向量的记录生成文本向量（需要 Embedding 服务）
+    python -m app.cli backfill-lexical              # 为缺少关键词向量的记录生成 BM25 稀疏向量
+    python -m app.cli snapshot create [--since T] [--portable]   # 备份集合到 SNAPSHOT_PATH
+    python -m app.cli snapshot list                 # 列出已有快照
+    python -m app.cli snapshot restore <path>       # 从快照恢复（校验通过后执行）
+"""
+
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+from dataclasses import replace
+
+from .config import get_settings
+from .services.vector_db_service import VectorDBService, VectorDBConfig, get_vector_db_service
+from .services.vector_backfill import backfill_date_fields, backfill_lexical_vectors
+from .services.embedding_service import get_embedding_service
+from .services.search_service import get_search_service
+from .services.tenancy import tenant_scope
+
+logger = logging.getLogger(__name__)
+
+
+def init_vector_db() -> VectorDBService:
+    """按 Settings 初始化向量数据库（不启用写入缓冲和统计缓存）"""
+    settings = get_settings()
+    service = get_vector_db_service()
+    config = replace(
+        VectorDBConfig.from_settings(settings),
+        upsert_buffer_size=0,
+        stats_cache_ttl=0.0,
+        approximate_count=False
+    )
+    service.initialize(config)
+    return service
+
+
+def cmd_collection_options(args: argparse.Namespace) -> int:
+    service = init_vector_db()
+    try:
+        result = service.apply_collection_options(dry_run=not args.apply)
+    finally:
+        service.close()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not result["changed"]:
+        print("集合配置已与 Settings 一致")
+    elif not args.apply:
+        print("以上为差异，加 --apply 执行迁移")
+    elif result["applied"]:
+        print("已提交配置更新，Qdrant 将在后台重建段（集合状态恢复 green 前检索不受影响）")
+    else:
+        print("配置未生效（本地模式不支持量化和 HNSW 参数）")
+        return 1
+    return 0
+
+
+def cmd_backfill_date_fields(args: argparse.Namespace) -> int:
+    service = init_vector_db()
+    try:
+        stats = backfill_date_fields(service, batch_size=args.batch_size)
+    finally:
+        service.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_backfill_text_vectors(args: argparse.Namespace) -> int:
+    service = init_vector_db()
+    try:
+        if not service.text_vectors:
+            print("集合没有文本向量（VECTOR_CAPTION_ENABLED 只对新建集合生效，已有集合需先迁移）")
+            return 1
+        get_embedding_service().initialize(model_path=get_settings().MODEL_PATH)
+        search_service = get_search_service()
+        search_service.initialize()
+        with tenant_scope(args.tenant):
+            stats = search_service.backfill_text_vectors(batch_size=args.batch_size)
+    finally:
+        service.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_backfill_lexical(args: argparse.Namespace) -> int:
+    service = init_vector_db()
+    try:
+        if not service.has_lexical:
+            print("集合没有关键词向量（VECTOR_LEXICAL_ENABLED 只对新建集合生效，已有集合需先迁移）")
+            return 1
+        with tenant_scope(args.tenant):
+            stats = backfill_lexical_vectors(service, batch_size=args.batch_size)
+    finally:
+        service.close()
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    if args.action == "list":
+        print(json.dumps(VectorDBService.list_snapshots(args.directory or settings.SNAPSHOT_PATH),
+                         ensure_ascii=False, indent=2))
+        return 0
+
+    service = init_vector_db()
+    try:
+        if args.action == "create":
+            result = service.create_snapshot(
+                args.directory or settings.SNAPSHOT_PATH,
+                since=datetime.fromisoformat(args.since) if args.since else None,
+                portable=args.portable,
+                batch_size=args.batch_size
+            )
+        else:
+            if not args.path:
+                print("restore 需要指定快照文件路径")
+                return 2
+            result = service.restore_snapshot(args.path)
+    finally:
+        service.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="LingXi Album 运维命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    options = subparsers.add_parser("collection-options", help="把量化/落盘/HNSW 配置应用到已有集合")
+    options.add_argument("--apply", action="store_true", help="执行更新（默认只显示差异）")
+    options.set_defaults(func=cmd_collection_options)
+
+    backfill = subparsers.add_parser("backfill-date-fields", help="为已有记录补齐派生日期字段并建索引")
+    backfill.add_argument("--batch-size", type=int, default=256, help="每页遍历的记录数")
+    backfill.set_defaults(func=cmd_backfill_date_fields)
+
+    text_vectors = subparsers.add_parser("backfill-text-vectors", help="为缺少文本向量（caption）的记录生成文本向量")
+    text_vectors.add_argument("--batch-size", type=int, default=64, help="每次生成向量的记录数")
+    text_vectors.add_argument("--tenant", help="collection 租户模式下处理的租户，默认为默认租户")
+    text_vectors.set_defaults(func=cmd_backfill_text_vectors)
+
+    lexical = subparsers.add_parser("backfill-lexical", help="为缺少关键词向量的记录生成 BM25 稀疏向量")
+    lexical.add_argument("--batch-size", type=int, default=256, help="每页遍历的记录数")
+    lexical.add_argument("--tenant", help="collection 租户模式下处理的租户，默认为默认租户")
+    lexical.set_defaults(func=cmd_backfill_lexical)
+
+    snapshot = subparsers.add_parser("snapshot", help="备份 / 恢复向量集合")
+    snapshot.add_argument("action", choices=["create", "list", "restore"])
+    snapshot.add_argument("path", nargs="?", help="restore 时的快照文件路径")
+    snapshot.add_argument("--directory", help="快照目录，默认 SNAPSHOT_PATH")
+    snapshot.add_argument("--since", help="增量导出：只包含该时间（ISO 格式）之后写入或修改的记录")
+    snapshot.add_argument("--portable", action="store_true", help="服务端模式下也使用可移植格式")
+    snapshot.add_argument("--batch-size", type=int, default=512, help="portable 导出的每页记录数")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
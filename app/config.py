@@ -4,7 +4,7 @@
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -24,18 +24,58 @@ class Settings(BaseSettings):
     MODEL_PATH: str = str(Path(__file__).parent.parent / "qwen3-vl-embedding-2B")
     CUDA_DEVICE: str = "0"
 
+    # 本地模型 CPU 推理（未检测到 CUDA 时自动启用）
+    LOCAL_CPU_QUANTIZE: bool = True  # Linear 层 int8 动态量化
+    LOCAL_CPU_THREADS: int = 0  # intra-op 线程数，0 表示使用全部可用核心
+    LOCAL_CPU_COMPILE: bool = False  # 使用 torch.compile 编译前向（首次请求前预热编译）
+    LOCAL_CPU_MAX_BATCH: int = 8  # 单次前向的最大批量
+
     MAX_LENGTH: int = 8192
     MIN_PIXELS: int = 4 * 32 * 32  # 4 * IMAGE_FACTOR^2
     MAX_PIXELS: int = 1800 * 32 * 32  # 1800 * IMAGE_FACTOR^2
     DEFAULT_INSTRUCTION: str = "Represent the user's input."
 
     # Embedding Service Configuration (API-based)
-    EMBEDDING_API_PROVIDER: str = "aliyun"  # Options: local, aliyun
+    EMBEDDING_API_PROVIDER: str = "aliyun"  # Options: local, aliyun, offline
     ALIYUN_EMBEDDING_API_KEY: Optional[str] = None
     ALIYUN_EMBEDDING_BASE_URL: Optional[str] = None  # DashScope SDK 不需要
     ALIYUN_EMBEDDING_MODEL_NAME: str = "qwen3-vl-embedding"
     ALIYUN_EMBEDDING_DIMENSION: int = 2560  # 支持 2560, 2048, 1536, 1024, 768, 512, 256
 
+    OFFLINE_EMBEDDING_SEED: int = 0  # offline provider 的随机投影种子，维度取 VECTOR_DIMENSION
+
+    # Embedding 图片预处理（上传前按 MIN_PIXELS/MAX_PIXELS 降采样并重新编码）
+    EMBEDDING_IMAGE_PREPROCESS: bool = True
+    EMBEDDING_IMAGE_QUALITY: int = 85  # JPEG 编码质量
+    EMBEDDING_PREPROCESS_WORKERS: int = 2  # 预处理进程数，0 表示在调用线程内处理
+
+    # async 路由执行阻塞调用的线程池
+    EMBEDDING_EXECUTOR_WORKERS: int = 16  # 向量生成（及依赖它的检索、索引）的并发线程数
+    VECTOR_DB_EXECUTOR_WORKERS: int = 8  # 纯向量库操作的并发线程数
+
+    # 流式批量 Embedding（/embedding/generate/stream）
+    EMBEDDING_STREAM_BATCH_SIZE: int = 4  # 每批输入数
+    EMBEDDING_STREAM_CONCURRENCY: int = 4  # 同时在途的批次数，客户端读取变慢时不再提交新批次
+
+    # 远程图片下载（/embedding/image 的 image_url）
+    IMAGE_FETCH_MAX_BYTES: int = 20 * 1024 * 1024  # 单张图片下载上限
+    IMAGE_FETCH_TIMEOUT: float = 10.0  # 单次下载超时，秒
+    IMAGE_FETCH_MAX_CONNECTIONS: int = 20  # 连接池大小
+    IMAGE_FETCH_CONCURRENCY: int = 8  # 同时进行的下载数
+    IMAGE_FETCH_CACHE_TTL: float = 300.0  # 响应缓存有效期，秒；0 表示不缓存
+    IMAGE_FETCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 响应缓存总字节上限
+
+    # 外部模型调用治理（DashScope / OpenAI 兼容接口共享的限流、并发与熔断）
+    OUTBOUND_MAX_CONCURRENCY: int = 8  # 所有模型合计的同时在途请求数
+    OUTBOUND_MAX_QUEUE: int = 64  # 等待并发名额的最大排队数，超出直接拒绝
+    OUTBOUND_QUEUE_TIMEOUT: float = 30.0  # 排队（含限流等待）的截止时间，秒
+    OUTBOUND_DEFAULT_RPS: float = 5.0  # 每个模型的默认请求速率，0 表示不限速
+    OUTBOUND_BURST: int = 10  # 令牌桶容量（允许的突发请求数）
+    OUTBOUND_RATE_LIMITS: Dict[str, float] = {}  # 按模型覆盖速率，JSON 格式，如 {"qwen3-vl-embedding": 10}
+    OUTBOUND_BREAKER_FAILURES: int = 5  # 连续失败次数达到后熔断
+    OUTBOUND_BREAKER_COOLDOWN: float = 30.0  # 熔断持续时间，秒
+    OUTBOUND_BREAKER_HALF_OPEN_CALLS: int = 1  # 半开状态放行的探测请求数
+
     # Qdrant向量数据库配置
     QDRANT_MODE: str = "local"  # local | docker | cloud
     QDRANT_PATH: str = str(Path(__file__).parent.parent / "qdrant_data")
@@ -43,7 +83,67 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     QDRANT_API_KEY: Optional[str] = None
     QDRANT_COLLECTION_NAME: str = "smart_album"
+    QDRANT_ASYNC_POOL_SIZE: int = 32  # 异步客户端（docker/cloud 模式）的 HTTP 连接池大小
+    # docker/cloud 模式的传输选项：gRPC 以二进制传输向量，避免 REST 对高维向量的 JSON 编解码
+    QDRANT_PREFER_GRPC: bool = False  # 优先使用 gRPC（需服务端开放 gRPC 端口）
+    QDRANT_GRPC_PORT: int = 6334  # gRPC 端口
+    QDRANT_TIMEOUT: int = 0  # 请求超时秒数，0 表示使用 qdrant-client 默认值
+    QDRANT_KEEPALIVE: float = 30.0  # REST 空闲连接保留秒数 / gRPC keepalive ping 间隔，0 表示不复用连接
+    QDRANT_GRPC_COMPRESSION: str = "none"  # none | gzip（仅 gRPC，带宽受限的云服务可开启）
+    # 多租户：none 不区分 | payload 共用集合按 tenant_id 分区（新建集合只建租户内 HNSW 图）| collection 每个租户一个集合
+    TENANT_MODE: str = "none"
+    TENANT_HEADER: str = "X-Tenant-ID"  # 携带租户ID的请求头，须由可信网关在认证后设置；未带时为默认租户
     VECTOR_DIMENSION: int = 2560  # Qwen3-VL embedding维度 (2560 for qwen3-vl-embedding)
+    # Matryoshka 多分辨率：额外存储完整向量的前 N 维用于第一阶段 ANN，完整向量只用于重排
+    # 仅对新建集合生效；0 表示只存储完整向量（与旧集合结构一致）
+    VECTOR_COARSE_DIMENSION: int = 512  # 256 或 512；合成数据上 512 x4 的 Recall@10 约 0.99
+    VECTOR_COARSE_OVERSAMPLING: float = 4.0  # 第一阶段候选数 = top_k * oversampling
+    # 集合存储与索引选项（新建集合生效；已有集合用 python -m app.cli collection-options --apply 迁移）
+    # 作用于建 HNSW 索引的向量：单向量集合的向量 / 多分辨率集合的前缀向量
+    VECTOR_QUANTIZATION: str = "none"  # none | scalar（int8，内存 1/4）| binary（内存 1/32，需配合重打分）
+    VECTOR_QUANTIZATION_ALWAYS_RAM: bool = True  # 量化向量常驻内存
+    VECTOR_ON_DISK: bool = False  # 原始 float32 向量落盘，配合量化使用可大幅降低常驻内存
+    VECTOR_HNSW_M: int = 16  # HNSW 每个节点的边数，越大召回越高、内存越大
+    VECTOR_HNSW_EF_CONSTRUCT: int = 100  # 建图时的候选数
+    VECTOR_SEARCH_EF: int = 0  # 检索时的 hnsw_ef，0 表示服务端默认
+    VECTOR_QUANTIZATION_RESCORE: bool = True  # 量化检索后用原始向量重新打分
+    VECTOR_QUANTIZATION_OVERSAMPLING: float = 2.0  # 量化检索的候选倍数
+    # caption 文本向量：新建集合为每个点额外存储 description + 标签的文本向量，文本检索时与图片向量在服务端融合
+    # 已有集合通过 /vectors/migration 重建后，用 python -m app.cli backfill-text-vectors 补齐
+    VECTOR_CAPTION_ENABLED: bool = False
+    VECTOR_FUSION: str = "rrf"  # rrf（按名次融合）| dbsf（按分数分布归一化后相加）
+    # 关键词稀疏向量：新建集合按文件名、标签和描述生成 BM25 稀疏向量，文本检索时关键词召回与向量召回按 RRF 融合
+    # 已有集合通过 /vectors/migration 重建后，用 python -m app.cli backfill-lexical 补齐
+    VECTOR_LEXICAL_ENABLED: bool = False
+    VECTOR_LEXICAL_WEIGHT: float = 1.0  # 关键词一路在 RRF 中相对向量召回的权重，0 表示不使用关键词
+
+    # 向量写入缓冲：多个调用方的单点 upsert 合并为批量写入
+    UPSERT_BUFFER_SIZE: int = 64  # 每批最多点数，0 表示关闭缓冲、每次直接写入
+    UPSERT_BUFFER_DELAY: float = 0.05  # 最早的待写入点最多等待秒数
+
+    # 集合统计缓存：/status、/vectors/stats/* 读取缓存，过期后后台刷新
+    VECTOR_STATS_CACHE_TTL: float = 10.0  # 缓存有效秒数，0 表示每次直接查询
+    VECTOR_APPROXIMATE_COUNT: bool = True  # 记录数默认返回近似值（总数和单标签计数取缓存）
+    VECTOR_EXPORT_BATCH_SIZE: int = 512  # /vectors/export 每页读取的记录数（附带向量时可调小）
+
+    # 向量集合快照目录（python -m app.cli snapshot create/restore/list）
+    SNAPSHOT_PATH: str = str(Path(__file__).parent.parent / "snapshots")
+
+    # 集合迁移（/vectors/migration）：影子集合回填、校验后切换别名 <集合名>_live
+    MIGRATION_STATE_PATH: str = str(Path(__file__).parent.parent / "migrations" / "state.json")  # 检查点文件
+    MIGRATION_BATCH_SIZE: int = 8  # 每次生成向量的图片数
+    MIGRATION_CONCURRENCY: int = 4  # 同时进行的向量生成批次数（受外部模型调用治理的限流约束）
+    MIGRATION_VERIFY_SAMPLES: int = 50  # 校验时抽样比较近邻的记录数
+    MIGRATION_MIN_RECALL: float = 0.6  # 校验通过所需的近邻召回率（更换模型时近邻本身会变化，不宜过高）
+    MIGRATION_MAX_MISSING_RATIO: float = 0.01  # 校验通过允许的记录缺失比例
+
+    # 向量存储后端：qdrant（按 QDRANT_MODE 连接）| numpy（进程内 NumPy 引擎，替代 Qdrant 本地模式）
+    VECTOR_DB_BACKEND: str = "qdrant"
+    NUMPY_VECTOR_PATH: str = str(Path(__file__).parent.parent / "numpy_vectors")
+    NUMPY_VECTOR_DTYPE: str = "float32"  # float32 | float16；float16 占用减半，但精确检索需逐块转换为 float32，慢约一个数量级
+    NUMPY_IVF_MIN_POINTS: int = 50000  # 点数达到后训练 IVF 分区，0 表示始终精确检索
+    NUMPY_IVF_LISTS: int = 0  # IVF 分桶数，0 表示按 sqrt(点数) 自动选择
+    NUMPY_IVF_PROBES: int = 16  # 每次检索扫描的分桶数，越大召回越高、越慢
 
     # 图片存储配置
     STORAGE_PATH: str = str(
@@ -122,7 +222,7 @@ def ensure_directories():
     storage_path.mkdir(parents=True, exist_ok=True)
 
     # 创建Qdrant本地存储目录
-    if settings.QDRANT_MODE == "local":
+    if settings.VECTOR_DB_BACKEND == "qdrant" and settings.QDRANT_MODE == "local":
         qdrant_path = Path(settings.QDRANT_PATH)
         qdrant_path.mkdir(parents=True, exist_ok=True)
     
@@ -16,11 +16,16 @@ from .config import get_settings, ensure_directories
 from .services import (
     get_embedding_service,
     get_vector_db_service,
+    get_async_vector_db_service,
+    get_migration_service,
     get_storage_service,
     get_search_service,
     get_image_recommendation_service,
     get_image_edit_service,
     get_pointcloud_service,
+    get_outbound_governor,
+    get_image_fetch_service,
+    OutboundRejectedError,
 )
 from .routers import (
     embedding_router,
@@ -36,6 +41,10 @@ from .routers import (
     asr_router,
 )
 from .models import SystemStatus
+from .services.image_preprocess import shutdown_preprocess_pool
+from .services.executors import shutdown_executors
+from .services.vector_db_service import VectorDBConfig
+from .services.tenancy import set_current_tenant, reset_current_tenant
 
 # 配置日志
 logging.basicConfig(
@@ -71,15 +80,9 @@ async def lifespan(app: FastAPI):
     # 初始化向量数据库服务
     logger.info("初始化向量数据库服务...")
     vector_db_service = get_vector_db_service()
-    vector_db_service.initialize(
-        mode=settings.QDRANT_MODE,
-        path=settings.QDRANT_PATH,
-        host=settings.QDRANT_HOST,
-        port=settings.QDRANT_PORT,
-        api_key=settings.QDRANT_API_KEY,
-        collection_name=settings.QDRANT_COLLECTION_NAME,
-        vector_dimension=settings.VECTOR_DIMENSION
-    )
+    vector_db_service.initialize(VectorDBConfig.from_settings(settings))
+    async_vector_db_service = get_async_vector_db_service()
+    async_vector_db_service.initialize(vector_db_service, pool_size=settings.QDRANT_ASYNC_POOL_SIZE)
 
     # 初始化Embedding服务（可选，如果模型路径有效）
     logger.info("初始化Embedding服务...")
@@ -111,6 +114,24 @@ async def lifespan(app: FastAPI):
     search_service = get_search_service()
     search_service.initialize()
 
+    # 初始化集合迁移服务（检查点中有未完成的迁移时继续）
+    migration_service = get_migration_service()
+    if embedding_service.is_initialized:
+        try:
+            migration_service.initialize(
+                vector_db_service,
+                storage_service,
+                embedding_service,
+                state_path=settings.MIGRATION_STATE_PATH,
+                batch_size=settings.MIGRATION_BATCH_SIZE,
+                concurrency=settings.MIGRATION_CONCURRENCY,
+                verify_samples=settings.MIGRATION_VERIFY_SAMPLES,
+                min_recall=settings.MIGRATION_MIN_RECALL,
+                max_missing_ratio=settings.MIGRATION_MAX_MISSING_RATIO
+            )
+        except Exception as e:
+            logger.warning(f"集合迁移服务初始化失败: {e}")
+
     # 初始化图片推荐服务
     logger.info("初始化图片推荐服务...")
     image_recommendation_service = get_image_recommendation_service()
@@ -138,6 +159,12 @@ async def lifespan(app: FastAPI):
 
     # 清理资源
     logger.info("智慧相册后端系统关闭中...")
+    shutdown_executors()
+    shutdown_preprocess_pool()
+    await get_image_fetch_service().close()
+    await async_vector_db_service.close()
+    migration_service.close()
+    vector_db_service.close()
 
 
 def create_app() -> FastAPI:
@@ -221,6 +248,19 @@ def create_app() -> FastAPI:
             "/assets", StaticFiles(directory=str(frontend_dist / "assets")), name="assets")
         logger.info(f"前端静态文件已挂载: {frontend_dist}")
 
+    # 外部模型调用被治理器拒绝（熔断/排队超时），请求未发出，返回 503 便于客户端重试
+    @app.exception_handler(OutboundRejectedError)
+    async def outbound_rejected_handler(request: Request, exc: OutboundRejectedError):
+        logger.warning(f"外部模型调用被拒绝: {exc}")
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "error",
+                "message": str(exc),
+                "detail": "上游模型服务繁忙，请稍后重试"
+            }
+        )
+
     # 全局异常处理
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
@@ -256,6 +296,22 @@ def create_app() -> FastAPI:
         response = await call_next(request)
         return response
 
+    # 多租户：按请求头设置本次请求的租户（向量集合/过滤条件和存储目录据此选择）
+    if settings.TENANT_MODE != "none":
+        @app.middleware("http")
+        async def tenant_context(request: Request, call_next):
+            try:
+                token = set_current_tenant(request.headers.get(settings.TENANT_HEADER))
+            except ValueError as e:
+                return JSONResponse(
+                    status_code=400,
+                    content={"status": "error", "message": str(e), "detail": "租户ID不合法"}
+                )
+            try:
+                return await call_next(request)
+            finally:
+                reset_current_tenant(token)
+
     # 根路由 - 优先返回前端页面
     @app.get("/", tags=["System"], include_in_schema=False)
     async def root():
@@ -306,6 +362,15 @@ def create_app() -> FastAPI:
             total_vectors=total_vectors
         )
 
+    # 外部模型调用治理状态
+    @app.get("/status/outbound", tags=["System"])
+    async def outbound_status():
+        """获取外部模型调用的限流、并发与熔断状态"""
+        return {
+            "status": "success",
+            "data": get_outbound_governor().get_metrics()
+        }
+
     # SPA Fallback - 处理前端路由（必须放在所有路由之后）
     frontend_dist = Path(__file__).parent.parent / "frontend" / "dist"
     if frontend_dist.exists():
@@ -17,6 +17,7 @@ from .schemas import (
     VectorUpsertRequest,
     VectorBatchUpsertRequest,
     VectorUpdateMetadataRequest,
+    MigrationStartRequest,
     VectorQueryResult,
     VectorSearchResponse,
     # 搜索
@@ -24,6 +25,10 @@ from .schemas import (
     SearchRequest,
     SearchResult,
     SearchResponse,
+    SearchBatchQuery,
+    SearchBatchRequest,
+    SearchBatchResult,
+    SearchBatchResponse,
     # 存储
     ImageUploadResponse,
     ImageInfo,
@@ -50,6 +55,21 @@ from .schemas import (
     PointCloudResponse,
     PointCloudListResponse,
 )
+from .point_export import (
+    EXPORT_FORMATS,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    ndjson_chunks,
+    parquet_chunks,
+    parquet_available,
+)
+from .vector_wire import (
+    WireFormat,
+    negotiate_vector_format,
+    vector_response,
+    encode_vectors,
+    decode_vectors,
+)
 
 __all__ = [
     "ResponseStatus",
@@ -63,12 +83,17 @@ __all__ = [
     "VectorUpsertRequest",
     "VectorBatchUpsertRequest",
     "VectorUpdateMetadataRequest",
+    "MigrationStartRequest",
     "VectorQueryResult",
     "VectorSearchResponse",
     "SearchType",
     "SearchRequest",
     "SearchResult",
     "SearchResponse",
+    "SearchBatchQuery",
+    "SearchBatchRequest",
+    "SearchBatchResult",
+    "SearchBatchResponse",
     "ImageUploadResponse",
     "ImageInfo",
     "ImageListResponse",
@@ -88,4 +113,15 @@ __all__ = [
     "PointCloudResult",
     "PointCloudResponse",
     "PointCloudListResponse",
+    "EXPORT_FORMATS",
+    "NDJSON_MEDIA_TYPE",
+    "PARQUET_MEDIA_TYPE",
+    "ndjson_chunks",
+    "parquet_chunks",
+    "parquet_available",
+    "WireFormat",
+    "negotiate_vector_format",
+    "vector_response",
+    "encode_vectors",
+    "decode_vectors",
 ]
@@ -0,0 +1,97 @@
+"""
+向量记录导出格式
+把 VectorDBService.aiter_points 产出的记录页编码为可流式传输的字节块
+
+- NDJSON（application/x-ndjson）：每行一条 {"id", "metadata"?, "vector"?}
+- Parquet（application/vnd.apache.parquet）：每页写为一个 row group，写完即发送；
+  列为 id（string）、payload（JSON 字符串，各记录字段不同也不影响 schema）、vector（list<float32>）。
+  需要安装 pyarrow
+"""
+
+import io
+import json
+from typing import AsyncIterator, Dict, Any, List
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+async def ndjson_chunks(pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """每页记录编码为一个 NDJSON 字节块"""
+    async for records in pages:
+        yield "".join(_dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """收集 ParquetWriter 写出的字节，由调用方逐块取走"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def parquet_available() -> bool:
+    """是否安装了 pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def parquet_chunks(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    with_payload: bool = True,
+    with_vectors: bool = False
+) -> AsyncIterator[bytes]:
+    """每页记录写为一个 row group 并产出新增的字节"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [("id", pa.string())]
+    if with_payload:
+        fields.append(("payload", pa.string()))
+    if with_vectors:
+        fields.append(("vector", pa.list_(pa.float32())))
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for records in pages:
+            columns = {"id": [str(record["id"]) for record in records]}
+            if with_payload:
+                columns["payload"] = [_dumps(record.get("metadata")) for record in records]
+            if with_vectors:
+                columns["vector"] = [record.get("vector") for record in records]
+            writer.write_table(pa.table(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
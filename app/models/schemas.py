@@ -117,6 +117,14 @@ class VectorSearchResponse(BaseResponse):
     total: int = Field(0, description="结果总数")
 
 
+class MigrationStartRequest(BaseModel):
+    """集合迁移请求（模型和维度都不指定时按当前模型重建索引）"""
+    model_name: Optional[str] = Field(None, description="目标 Embedding 模型，默认与当前相同")
+    dimension: Optional[int] = Field(None, description="目标向量维度，默认与当前相同")
+    batch_size: Optional[int] = Field(None, ge=1, description="每次生成向量的图片数")
+    concurrency: Optional[int] = Field(None, ge=1, description="同时进行的向量生成批次数")
+
+
 # ==================== 搜索相关模型 ====================
 
 class SearchType(str, Enum):
@@ -153,6 +161,33 @@ class SearchResponse(BaseResponse):
     total: int = Field(0, description="结果总数")
 
 
+class SearchBatchQuery(BaseModel):
+    """批量搜索中的单个查询"""
+    query_text: str = Field(..., min_length=1, description="文本查询")
+    instruction: Optional[str] = Field(None, description="查询指令")
+    top_k: int = Field(10, ge=1, le=100, description="返回结果数量")
+    score_threshold: Optional[float] = Field(
+        None, ge=0, le=1, description="相似度阈值")
+    filter_tags: Optional[List[str]] = Field(None, description="标签过滤")
+
+
+class SearchBatchRequest(BaseModel):
+    """批量搜索请求模型"""
+    queries: List[SearchBatchQuery] = Field(..., min_length=1, max_length=32, description="查询列表")
+
+
+class SearchBatchResult(BaseModel):
+    """批量搜索中单个查询的结果"""
+    query_text: str = Field(..., description="文本查询")
+    results: List[SearchResult] = Field(default_factory=list, description="搜索结果")
+    total: int = Field(0, description="结果总数")
+
+
+class SearchBatchResponse(BaseResponse):
+    """批量搜索响应（与请求中的查询顺序一致）"""
+    data: Optional[List[SearchBatchResult]] = None
+
+
 # ==================== 图片存储相关模型 ====================
 
 class ImageUploadResponse(BaseResponse):
@@ -0,0 +1,214 @@
+"""
+向量二进制传输格式
+Embedding 和向量读取接口按 Accept 头协商响应格式，默认仍为 JSON
+
+支持的格式：
+- application/octet-stream：SAV1 帧（见下），可附带 ID 和元数据
+- application/x-npy：NumPy .npy 文件，仅包含向量矩阵（ID 见 X-Vector-Ids 响应头）
+
+两种二进制格式都可以通过媒体类型参数选择精度，如 `application/octet-stream; dtype=float16`，默认 float32。
+
+SAV1 帧（小端）：
+    偏移  长度  字段
+    0     4     magic = b"SAV1"
+    4     1     dtype（1 = float32，2 = float16）
+    5     3     保留，置 0
+    8     4     count，向量条数（uint32）
+    12    4     dim，向量维度（uint32）
+    16    4     meta_len，元数据块字节数（uint32）
+    20    n     元数据块：UTF-8 JSON 对象，可含 ids / metadata 两个与向量逐条对应的数组，
+                    以及 vector（命名向量的名称）；n 可为 0
+    ...         补 0 至 8 字节对齐
+    ...         count * dim 个小端浮点数，按行存储
+
+客户端可用 np.frombuffer(payload, dtype, offset=data_offset).reshape(count, dim) 直接得到矩阵，无需解析文本。
+"""
+
+import io
+import json
+import struct
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+from fastapi import Response
+
+SAV1_MAGIC = b"SAV1"
+SAV1_MEDIA_TYPE = "application/octet-stream"
+NPY_MEDIA_TYPE = "application/x-npy"
+JSON_MEDIA_TYPE = "application/json"
+
+_HEADER = struct.Struct("<4sB3xIII")
+_ALIGNMENT = 8
+_DTYPE_CODES = {"float32": 1, "float16": 2}
+_CODE_DTYPES = {code: name for name, code in _DTYPE_CODES.items()}
+
+
+@dataclass(frozen=True)
+class WireFormat:
+    """协商得到的二进制响应格式"""
+    media_type: str
+    dtype: str = "float32"
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, Dict[str, str], float, int]]:
+    """解析 Accept 头为 (媒体类型, 参数, q 值, 出现顺序) 列表"""
+    entries = []
+    for order, part in enumerate(accept.split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        media_type = fields[0].lower()
+        if not media_type:
+            continue
+        params = {}
+        for field in fields[1:]:
+            key, _, value = field.partition("=")
+            params[key.strip().lower()] = value.strip().strip('"').lower()
+        try:
+            q = float(params.pop("q", 1))
+        except ValueError:
+            q = 0.0
+        entries.append((media_type, params, q, order))
+    return entries
+
+
+def negotiate_vector_format(accept: Optional[str]) -> Optional[WireFormat]:
+    """
+    根据 Accept 头选择响应格式
+
+    只有客户端明确列出二进制媒体类型、且其 q 值不低于 JSON 时才返回二进制格式；
+    未携带 Accept、*/* 或只接受 JSON 时返回 None（使用 JSON）。
+
+    Args:
+        accept: 请求的 Accept 头
+
+    Returns:
+        二进制格式，None 表示 JSON
+    """
+    if not accept:
+        return None
+
+    best = None
+    json_q = 0.0
+    for media_type, params, q, order in _parse_accept(accept):
+        if media_type in (JSON_MEDIA_TYPE, "*/*", "application/*"):
+            json_q = max(json_q, q)
+        elif media_type in (SAV1_MEDIA_TYPE, NPY_MEDIA_TYPE) and q > 0:
+            dtype = params.get("dtype", "float32")
+            if dtype not in _DTYPE_CODES:
+                continue
+            if best is None or q > best[0] or (q == best[0] and order < best[1]):
+                best = (q, order, WireFormat(media_type, dtype))
+
+    if best is None or best[0] < json_q:
+        return None
+    return best[2]
+
+
+def _as_wire_matrix(vectors: Any, dtype: str) -> np.ndarray:
+    """转换为 C 连续的小端二维矩阵"""
+    matrix = np.asarray(vectors, dtype=np.dtype(dtype).newbyteorder("<"))
+    if matrix.ndim == 1:
+        # 单个向量视为一行；空列表视为 0 条记录
+        matrix = matrix.reshape(1, -1) if matrix.size else matrix.reshape(0, 0)
+    return np.ascontiguousarray(matrix)
+
+
+def encode_vectors(
+    vectors: Any,
+    dtype: str = "float32",
+    ids: Optional[List[Any]] = None,
+    metadata: Optional[List[Dict[str, Any]]] = None,
+    vector: Optional[str] = None
+) -> bytes:
+    """
+    编码为 SAV1 帧
+
+    Args:
+        vectors: 向量矩阵（或单个向量）
+        dtype: float32 或 float16
+        ids: 与向量逐条对应的 ID（可选）
+        metadata: 与向量逐条对应的元数据（可选）
+        vector: 命名向量的名称（可选）
+
+    Returns:
+        SAV1 字节串
+    """
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"不支持的向量精度: {dtype}")
+    matrix = _as_wire_matrix(vectors, dtype)
+    count, dim = matrix.shape
+
+    meta = {}
+    if ids is not None:
+        meta["ids"] = list(ids)
+    if metadata is not None:
+        meta["metadata"] = list(metadata)
+    if vector is not None:
+        meta["vector"] = vector
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if meta else b""
+
+    header = _HEADER.pack(SAV1_MAGIC, _DTYPE_CODES[dtype], count, dim, len(meta_bytes))
+    padding = -(len(header) + len(meta_bytes)) % _ALIGNMENT
+    return b"".join([header, meta_bytes, b"\0" * padding, matrix.tobytes()])
+
+
+def decode_vectors(payload: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    解码 SAV1 帧（客户端和测试使用）
+
+    Args:
+        payload: SAV1 字节串
+
+    Returns:
+        (向量矩阵（只读，引用 payload 内存）, 元数据块字典)
+    """
+    if len(payload) < _HEADER.size:
+        raise ValueError("SAV1 数据长度不足")
+    magic, code, count, dim, meta_len = _HEADER.unpack_from(payload)
+    if magic != SAV1_MAGIC:
+        raise ValueError("不是 SAV1 格式的数据")
+    if code not in _CODE_DTYPES:
+        raise ValueError(f"未知的向量精度代码: {code}")
+
+    meta_end = _HEADER.size + meta_len
+    meta = json.loads(payload[_HEADER.size:meta_end].decode("utf-8")) if meta_len else {}
+    offset = meta_end + (-meta_end % _ALIGNMENT)
+    dtype = np.dtype(_CODE_DTYPES[code]).newbyteorder("<")
+    matrix = np.frombuffer(payload, dtype=dtype, count=count * dim, offset=offset).reshape(count, dim)
+    return matrix, meta
+
+
+def encode_npy(vectors: Any, dtype: str = "float32") -> bytes:
+    """编码为 .npy 文件内容"""
+    buffer = io.BytesIO()
+    np.save(buffer, _as_wire_matrix(vectors, dtype), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def vector_response(
+    wire_format: WireFormat,
+    vectors: Any,
+    ids: Optional[List[Any]] = None,
+    metadata: Optional[List[Dict[str, Any]]] = None
+) -> Response:
+    """
+    按协商格式构建二进制响应
+
+    Args:
+        wire_format: negotiate_vector_format 的结果
+        vectors: 向量矩阵
+        ids: 与向量逐条对应的 ID（可选）
+        metadata: 与向量逐条对应的元数据（可选，仅 SAV1 携带）
+
+    Returns:
+        FastAPI Response
+    """
+    headers = {"Vary": "Accept"}
+    if wire_format.media_type == NPY_MEDIA_TYPE:
+        if ids is not None:
+            headers["X-Vector-Ids"] = json.dumps([str(i) for i in ids], separators=(",", ":"))
+        content = encode_npy(vectors, wire_format.dtype)
+    else:
+        content = encode_vectors(vectors, wire_format.dtype, ids=ids, metadata=metadata)
+    media_type = f"{wire_format.media_type}; dtype={wire_format.dtype}"
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -25,6 +25,8 @@ from ..services import (
     StorageService,
     get_vector_db_service,
     VectorDBService,
+    get_async_vector_db_service,
+    AsyncVectorDBService,
     get_embedding_service,
     EmbeddingService,
     get_agent_service,
@@ -218,7 +220,11 @@ class AgentInterface:
                 "message": "未提供任何更新内容"
             }
 
-        success = self.vector_db_service.update_metadata(image_id, update_data)
+        if self.search_service.is_initialized:
+            # 描述或标签被修改时同时重新生成文本向量
+            success = self.search_service.update_metadata(image_id, update_data)
+        else:
+            success = self.vector_db_service.update_metadata(image_id, update_data)
 
         return {
             "success": success,
@@ -616,7 +622,7 @@ async def agent_chat(
             raise HTTPException(status_code=503, detail="搜索服务未初始化")
 
         # 调用搜索服务
-        search_results = search_svc.search_by_text(
+        search_results = await search_svc.search_by_text_async(
             query_text=optimized_query,
             top_k=message.top_k,
             score_threshold=message.score_threshold
@@ -810,7 +816,7 @@ async def get_photo_meta_schema():
 async def delete_images_by_recommendation(
     request: DeleteConfirmationRequest,
     storage_svc: StorageService = Depends(get_storage_service),
-    vector_db_svc: VectorDBService = Depends(get_vector_db_service)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db_service)
 ):
     """
     根据推荐删除图片
@@ -853,7 +859,7 @@ async def delete_images_by_recommendation(
     for image_id in request.image_ids:
         try:
             # 1. 从向量数据库删除
-            vector_db_deleted = vector_db_svc.delete(image_id)
+            vector_db_deleted = await async_vector_db.delete(image_id)
             
             if vector_db_deleted:
                 # 2. 从存储服务删除
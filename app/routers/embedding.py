@@ -3,21 +3,34 @@ Embedding API路由
 提供多模态Embedding生成接口
 """
 
+import json
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from pathlib import Path
+from urllib.parse import urlparse
+from typing import List, Dict, Any, AsyncIterator, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from fastapi.responses import StreamingResponse
 
 from ..models import (
     EmbeddingRequest,
     EmbeddingResponse,
     EmbeddingResult,
     ResponseStatus,
+    negotiate_vector_format,
+    vector_response,
 )
+from ..config import get_settings
 from ..services import get_embedding_service, EmbeddingService, get_storage_service, StorageService
+from ..services.image_fetch_service import get_image_fetch_service, ImageFetchError, ImageTooLargeError
 
 router = APIRouter(prefix="/embedding", tags=["Embedding"])
 logger = logging.getLogger(__name__)
 
+ACCEPT_DESCRIPTION = (
+    "响应格式：默认 JSON；application/octet-stream 返回 SAV1 二进制帧，application/x-npy 返回 .npy，"
+    "可附加 dtype=float16 参数"
+)
+
 
 def get_services():
     """获取服务依赖"""
@@ -30,32 +43,8 @@ def get_services():
     return embedding_svc, storage_svc
 
 
-@router.post(
-    "/generate",
-    response_model=EmbeddingResponse,
-    summary="生成Embedding向量",
-    description="""
-    支持多种输入类型的Embedding向量生成：
-    - 纯文本输入
-    - 图片输入（通过图片ID或URL）
-    - 图文混合输入
-    
-    返回归一化的向量表示，可用于后续的相似度计算和检索。
-    """
-)
-async def generate_embedding(
-    request: EmbeddingRequest,
-    services: tuple = Depends(get_services)
-):
-    """
-    生成Embedding向量
-
-    - **inputs**: 输入列表，支持批量处理
-    - **normalize**: 是否对向量进行L2归一化（默认True）
-    """
-    embedding_svc, storage_svc = services
-
-    # 准备输入数据
+def _prepare_inputs(request: EmbeddingRequest, storage_svc: StorageService) -> List[Dict[str, Any]]:
+    """将请求中的输入解析为 EmbeddingService 的输入字典（图片ID解析为本地路径）"""
     processed_inputs = []
     for inp in request.inputs:
         data = {}
@@ -93,20 +82,57 @@ async def generate_embedding(
 
         processed_inputs.append(data)
 
+    return processed_inputs
+
+
+@router.post(
+    "/generate",
+    response_model=EmbeddingResponse,
+    summary="生成Embedding向量",
+    description="""
+    支持多种输入类型的Embedding向量生成：
+    - 纯文本输入
+    - 图片输入（通过图片ID或URL）
+    - 图文混合输入
+    
+    返回归一化的向量表示，可用于后续的相似度计算和检索。
+
+    Accept 为 application/octet-stream 或 application/x-npy 时返回二进制向量矩阵（行号即输入索引）。
+    """
+)
+async def generate_embedding(
+    request: EmbeddingRequest,
+    services: tuple = Depends(get_services),
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION)
+):
+    """
+    生成Embedding向量
+
+    - **inputs**: 输入列表，支持批量处理
+    - **normalize**: 是否对向量进行L2归一化（默认True）
+    """
+    wire_format = negotiate_vector_format(accept)
+    embedding_svc, storage_svc = services
+
+    processed_inputs = _prepare_inputs(request, storage_svc)
+
     # 生成Embedding
-    embeddings = embedding_svc.generate_embeddings_batch(
+    embeddings = await embedding_svc.generate_embeddings_batch_async(
         processed_inputs,
         normalize=request.normalize
     )
 
-    # 构建响应
+    if wire_format:
+        return vector_response(wire_format, embeddings)
+
+    # 构建响应（float32 矩阵仅在此处转换为列表）
     results = [
         EmbeddingResult(
             index=i,
             embedding=emb,
             dimension=len(emb)
         )
-        for i, emb in enumerate(embeddings)
+        for i, emb in enumerate(embeddings.tolist())
     ]
 
     return EmbeddingResponse(
@@ -116,6 +142,62 @@ async def generate_embedding(
     )
 
 
+def _ndjson_lines(indices: range, result) -> str:
+    """将一批结果编码为 NDJSON 行（每个输入一行，失败的输入返回 error 字段）"""
+    if isinstance(result, Exception):
+        error = str(result)
+        return "".join(
+            json.dumps({"index": i, "error": error}, ensure_ascii=False) + "\n" for i in indices
+        )
+    return "".join(
+        json.dumps({"index": i, "dimension": len(vector), "embedding": vector}, separators=(",", ":")) + "\n"
+        for i, vector in zip(indices, result.tolist())
+    )
+
+
+@router.post(
+    "/generate/stream",
+    summary="流式批量生成Embedding向量",
+    description="""
+    与 /generate 相同的输入，以 NDJSON 流式返回（Content-Type: application/x-ndjson）：
+    - 每个输入一行 `{"index": 0, "dimension": 2560, "embedding": [...]}`，按完成顺序输出，用 index 对应输入
+    - 单个输入失败时该行为 `{"index": 3, "error": "..."}`，不影响其他输入
+    - 客户端读取变慢时暂停提交新的批次；客户端断开后停止生成
+    """
+)
+async def generate_embedding_stream(
+    request: EmbeddingRequest,
+    http_request: Request,
+    services: tuple = Depends(get_services)
+):
+    """流式批量生成Embedding向量"""
+    embedding_svc, storage_svc = services
+
+    # 输入校验在开始流式响应之前完成，错误仍以普通 HTTP 状态码返回
+    processed_inputs = _prepare_inputs(request, storage_svc)
+    settings = get_settings()
+
+    async def lines() -> AsyncIterator[str]:
+        batches = embedding_svc.iter_embeddings_async(
+            processed_inputs,
+            normalize=request.normalize,
+            batch_size=settings.EMBEDDING_STREAM_BATCH_SIZE,
+            concurrency=settings.EMBEDDING_STREAM_CONCURRENCY
+        )
+        try:
+            async for indices, result in batches:
+                if isinstance(result, Exception):
+                    logger.warning(f"流式 Embedding 批次失败: {indices.start}-{indices.stop - 1}: {result}")
+                yield _ndjson_lines(indices, result)
+                if await http_request.is_disconnected():
+                    logger.info(f"客户端已断开，停止流式 Embedding（已完成至索引 {indices.stop - 1}）")
+                    break
+        finally:
+            await batches.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.post(
     "/text",
     response_model=EmbeddingResponse,
@@ -126,23 +208,28 @@ async def generate_text_embedding(
     text: str,
     instruction: str = None,
     normalize: bool = True,
-    services: tuple = Depends(get_services)
+    services: tuple = Depends(get_services),
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION)
 ):
     """生成纯文本的Embedding向量"""
     embedding_svc, _ = services
 
-    embedding = embedding_svc.generate_text_embedding(
+    embedding = await embedding_svc.generate_text_embedding_async(
         text=text,
         instruction=instruction,
         normalize=normalize
     )
 
+    wire_format = negotiate_vector_format(accept)
+    if wire_format:
+        return vector_response(wire_format, embedding)
+
     return EmbeddingResponse(
         status=ResponseStatus.SUCCESS,
         message="文本Embedding生成成功",
         data=[EmbeddingResult(
             index=0,
-            embedding=embedding,
+            embedding=embedding.tolist(),
             dimension=len(embedding)
         )]
     )
@@ -162,7 +249,8 @@ async def generate_image_embedding(
     auto_store: bool = False,  # 新增：是否自动存储
     auto_index: bool = False,  # 新增：是否自动索引
     tags: str = None,  # 新增：标签
-    services: tuple = Depends(get_services)
+    services: tuple = Depends(get_services),
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION)
 ):
     """
     生成图片的Embedding向量
@@ -191,34 +279,30 @@ async def generate_image_embedding(
 
     elif image_url:
         if auto_store:
-            # 下载并存储图片
-            import requests
-            import tempfile
-            from pathlib import Path
-
+            # 下载并存储图片（异步下载，带大小上限和短期缓存）
             try:
-                # 下载图片
-                img_response = requests.get(image_url, timeout=10)
-                img_response.raise_for_status()
+                fetched = await get_image_fetch_service().fetch(image_url)
+            except ImageTooLargeError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except ImageFetchError as e:
+                logger.error(f"下载图片失败: {e}")
+                raise HTTPException(status_code=400, detail=str(e))
 
-                # 提取文件名
-                filename = Path(image_url).name or "downloaded_image.jpg"
+            # 扩展名以实际图片格式为准，URL 路径可能没有扩展名
+            filename = (Path(urlparse(image_url).path).stem or "downloaded_image") + fetched.extension
 
-                # 存储图片
+            try:
                 image_info = storage_svc.save_image(
-                    content=img_response.content,
+                    file_content=fetched.content,
                     filename=filename
                 )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
 
-                image_path = image_info["full_path"]
-                stored_image_id = image_info["id"]
-
-                logger.info(f"从 URL 下载并存储图片: {stored_image_id}")
+            image_path = image_info["full_path"]
+            stored_image_id = image_info["id"]
 
-            except Exception as e:
-                logger.error(f"下载图片失败: {e}")
-                raise HTTPException(
-                    status_code=400, detail=f"下载图片失败: {str(e)}")
+            logger.info(f"从 URL 下载并存储图片: {stored_image_id}")
         else:
             # 直接使用URL（不存储）
             image_path = image_url
@@ -227,7 +311,7 @@ async def generate_image_embedding(
         raise HTTPException(status_code=400, detail="必须提供image_id或image_url")
 
     # 生成Embedding
-    embedding = embedding_svc.generate_image_embedding(
+    embedding = await embedding_svc.generate_image_embedding_async(
         image=image_path,
         instruction=instruction,
         normalize=normalize
@@ -258,7 +342,7 @@ async def generate_image_embedding(
             )
 
             # 索引到向量数据库
-            search_svc.index_image(
+            await search_svc.index_image_async(
                 image_id=stored_image_id,
                 image_path=image_path,
                 metadata=metadata.model_dump()
@@ -269,9 +353,14 @@ async def generate_image_embedding(
         except Exception as e:
             logger.error(f"索引图片失败: {e}")
 
+    wire_format = negotiate_vector_format(accept)
+    if wire_format:
+        # 二进制响应中存储后的图片ID放在 ids 中
+        return vector_response(wire_format, embedding, ids=[stored_image_id] if stored_image_id else None)
+
     response_data = EmbeddingResult(
         index=0,
-        embedding=embedding,
+        embedding=embedding.tolist(),
         dimension=len(embedding)
     )
 
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
@@ -20,7 +22,9 @@ class KnowledgeQARequest(BaseModel):
 async def knowledge_qa(request: KnowledgeQARequest) -> Dict[str, Any]:
     """基于图片的知识问答"""
     knowledge_qa_service = get_knowledge_qa_service()
-    result = knowledge_qa_service.knowledge_qa(
+    # 读图和模型调用（含 outbound_governor 的排队等待）都是阻塞的，放到线程中执行，不占住事件循环
+    result = await asyncio.to_thread(
+        knowledge_qa_service.knowledge_qa,
         image_uuid=request.image_uuid,
         question=request.question,
         context=request.context
@@ -10,6 +10,9 @@ from ..models import (
     SearchRequest,
     SearchResponse,
     SearchResult,
+    SearchBatchRequest,
+    SearchBatchResult,
+    SearchBatchResponse,
     SearchType,
     ResponseStatus,
     ImageMetadata,
@@ -57,7 +60,7 @@ async def search(
     - **score_threshold**: 相似度阈值（可选）
     - **filter_tags**: 标签过滤（可选）
     """
-    result = search_svc.search(
+    result = await search_svc.search_async(
         query_text=request.query_text,
         query_image_id=request.query_image_id,
         query_image_url=request.query_image_url,
@@ -88,6 +91,52 @@ async def search(
     )
 
 
+@router.post(
+    "/batch",
+    response_model=SearchBatchResponse,
+    summary="批量文本语义搜索",
+    description="""
+    一次请求执行多个文本语义搜索（如 Agent 连续检索、前端"相关搜索"）：
+    - 所有查询文本并发生成向量
+    - 向量库一次批量请求完成检索，每个查询有独立的 top_k 和标签过滤
+    
+    结果按请求中的查询顺序分组返回。
+    """
+)
+async def search_batch(
+    request: SearchBatchRequest,
+    search_svc: SearchService = Depends(get_service)
+):
+    """批量文本语义搜索"""
+    grouped = await search_svc.search_batch_async(
+        [query.model_dump() for query in request.queries]
+    )
+
+    data = [
+        SearchBatchResult(
+            query_text=query.query_text,
+            results=[
+                SearchResult(
+                    id=r["id"],
+                    score=r["score"],
+                    metadata=ImageMetadata(
+                        **r["metadata"]) if r.get("metadata") else None,
+                    preview_url=r.get("preview_url")
+                )
+                for r in results
+            ],
+            total=len(results)
+        )
+        for query, results in zip(request.queries, grouped)
+    ]
+
+    return SearchBatchResponse(
+        status=ResponseStatus.SUCCESS,
+        message="批量搜索完成",
+        data=data
+    )
+
+
 @router.get(
     "/text",
     response_model=SearchResponse,
@@ -104,7 +153,7 @@ async def search_by_text(
     search_svc: SearchService = Depends(get_service)
 ):
     """文本语义搜索"""
-    results = search_svc.search_by_text(
+    results = await search_svc.search_by_text_async(
         query_text=query,
         instruction=instruction,
         top_k=top_k,
@@ -140,7 +189,7 @@ async def search_by_text(
 )
 async def search_by_image_id(
     image_id: str,
-    instruction: Optional[str] = Query(None, description="自定义指令"),
+    instruction: Optional[str] = Query(None, description="自定义指令（仅在图片未索引、需实时生成向量时使用）"),
     top_k: int = Query(10, ge=1, le=100, description="返回数量"),
     score_threshold: Optional[float] = Query(
         None, ge=0, le=1, description="相似度阈值"),
@@ -148,7 +197,7 @@ async def search_by_image_id(
     search_svc: SearchService = Depends(get_service)
 ):
     """根据图片ID搜索相似图片"""
-    results = search_svc.search_by_image_id(
+    results = await search_svc.search_by_image_id_async(
         image_id=image_id,
         instruction=instruction,
         top_k=top_k,
@@ -209,7 +258,7 @@ async def search_by_uploaded_image(
 
     logger.info(f"图片读取成功: size={image.size}, mode={image.mode}")
 
-    results = search_svc.search_by_image(
+    results = await search_svc.search_by_image_async(
         image=image,
         instruction=instruction,
         top_k=top_k,
@@ -283,7 +332,7 @@ async def search_hybrid(
     else:
         raise HTTPException(status_code=400, detail="必须提供image_id或image_url")
 
-    results = search_svc.search_hybrid(
+    results = await search_svc.search_hybrid_async(
         query_text=query_text,
         image=image_path,
         instruction=instruction,
@@ -326,7 +375,7 @@ async def search_by_meta(
     """按元数据搜索图片"""
     tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
     
-    results = search_svc.search_by_meta(
+    results = await search_svc.search_by_meta_async(
         date_text=date_text,
         tags=tags_list,
         top_k=top_k
@@ -370,7 +419,7 @@ async def search_by_meta_with_text(
     """元数据+语义组合搜索"""
     tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
     
-    results = search_svc.search_by_text_with_meta(
+    results = await search_svc.search_by_text_with_meta_async(
         query_text=query,
         date_text=date_text,
         tags=tags_list,
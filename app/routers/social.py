@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any
@@ -17,7 +19,9 @@ class CaptionRequest(BaseModel):
 @router.post("/caption")
 async def generate_caption(request: CaptionRequest) -> Dict[str, Any]:
     """生成社交媒体文案"""
-    result = social_service.generate_caption(
+    # 读图和模型调用（含 outbound_governor 的排队等待）都是阻塞的，放到线程中执行，不占住事件循环
+    result = await asyncio.to_thread(
+        social_service.generate_caption,
         image_uuid=request.image_uuid,
         style=request.style,
         purpose=request.purpose
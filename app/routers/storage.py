@@ -23,7 +23,9 @@ from ..services import (
     get_search_service,
     SearchService,
     get_vector_db_service,
-    VectorDBService
+    VectorDBService,
+    get_async_vector_db_service,
+    OutboundRejectedError,
 )
 
 router = APIRouter(prefix="/storage", tags=["Storage"])
@@ -41,7 +43,7 @@ def get_services():
     return storage_svc, search_svc, vector_db_svc
 
 
-def _background_index_image(
+async def _background_index_image(
     image_id: str,
     image_path: str,
     metadata: dict,
@@ -49,7 +51,7 @@ def _background_index_image(
 ):
     """
     后台异步索引图片
-    在后台线程中生成Embedding并存入向量数据库
+    在 embedding 线程池中生成Embedding，再由异步向量数据库服务写入
 
     注意：索引失败不会影响图片存储，但会导致该图片无法被搜索到
     """
@@ -59,7 +61,7 @@ def _background_index_image(
     try:
         logger.info(f"开始异步索引图片: {image_id}")
 
-        success = search_svc.index_image(
+        success = await search_svc.index_image_async(
             image_id=image_id,
             image_path=image_path,
             metadata=metadata
@@ -70,6 +72,10 @@ def _background_index_image(
         else:
             logger.error(f"❌ 异步索引失败: {image_id} - index_image返回False")
 
+    except OutboundRejectedError as e:
+        # Embedding 接口熔断或排队超时：请求未发出，记录一行即可，避免连锁刷屏
+        logger.warning(f"异步索引跳过: {image_id} - {e}")
+
     except Exception as e:
         # 关键改进：记录详细的错误信息
         logger.error(f"❌ 异步索引异常: {image_id}", exc_info=True)
@@ -141,7 +147,7 @@ async def upload_image(
         else:
             # 同步索引 - 增强错误处理
             try:
-                success = search_svc.index_image(
+                success = await search_svc.index_image_async(
                     image_id=image_info["id"],
                     image_path=image_info["full_path"],
                     metadata=metadata.model_dump()
@@ -209,7 +215,7 @@ async def upload_images_batch(
                 description=""
             )
 
-            search_svc.index_image(
+            await search_svc.index_image_async(
                 image_id=image_info["id"],
                 image_path=image_info["full_path"],
                 metadata=metadata.model_dump()
@@ -305,8 +311,9 @@ async def delete_image(
         raise HTTPException(status_code=404, detail=f"图片不存在: {image_id}")
 
     # 删除向量索引
-    if delete_vector and vector_db_svc.is_initialized:
-        vector_db_svc.delete(image_id)
+    async_vector_db = get_async_vector_db_service()
+    if delete_vector and async_vector_db.is_initialized:
+        await async_vector_db.delete(image_id)
 
     return BaseResponse(
         status=ResponseStatus.SUCCESS,
@@ -399,11 +406,15 @@ async def index_all_images(
     # 获取所有图片
     images, total = storage_svc.list_images(page=1, page_size=10000)
 
+    # 已索引的ID：只流式读取ID，不逐张查询
+    indexed_ids = set()
+    async for page in vector_db_svc.aiter_points(batch_size=2048, with_payload=False):
+        indexed_ids.update(str(record["id"]) for record in page)
+
     indexed_count = 0
     for img in images:
         # 检查是否已索引
-        existing = vector_db_svc.get(img["id"])
-        if existing:
+        if str(img["id"]) in indexed_ids:
             continue
 
         metadata = ImageMetadata(
@@ -418,7 +429,7 @@ async def index_all_images(
             description=""
         )
 
-        search_svc.index_image(
+        await search_svc.index_image_async(
             image_id=img["id"],
             image_path=img["full_path"],
             metadata=metadata.model_dump()
@@ -472,7 +483,7 @@ async def index_image(
     )
 
     # 索引
-    success = search_svc.index_image(
+    success = await search_svc.index_image_async(
         image_id=image_id,
         image_path=image_info["full_path"],
         metadata=metadata.model_dump()
@@ -3,8 +3,10 @@
 提供向量记录的增删改查操作
 """
 
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from fastapi.responses import StreamingResponse
 
 from ..models import (
     BaseResponse,
@@ -12,18 +14,34 @@ from ..models import (
     VectorUpsertRequest,
     VectorBatchUpsertRequest,
     VectorUpdateMetadataRequest,
+    MigrationStartRequest,
     VectorQueryResult,
     VectorSearchResponse,
     ImageMetadata,
+    negotiate_vector_format,
+    vector_response,
+    EXPORT_FORMATS,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    ndjson_chunks,
+    parquet_chunks,
+    parquet_available,
 )
+from ..config import get_settings
 from ..services import (
     get_vector_db_service,
     VectorDBService,
+    get_async_vector_db_service,
+    AsyncVectorDBService,
     get_embedding_service,
     EmbeddingService,
     get_storage_service,
-    StorageService
+    StorageService,
+    get_migration_service,
+    MigrationService,
+    get_search_service
 )
+from ..services.executors import VECTOR_DB_POOL, run_in_executor
 
 router = APIRouter(prefix="/vectors", tags=["Vector Database"])
 
@@ -40,6 +58,32 @@ def get_services():
     return vector_db_svc, embedding_svc, storage_svc
 
 
+def get_async_vector_db() -> AsyncVectorDBService:
+    """获取异步向量数据库服务依赖（读写接口在事件循环中直接访问向量库）"""
+    async_vector_db = get_async_vector_db_service()
+    if not async_vector_db.is_initialized:
+        raise HTTPException(status_code=503, detail="向量数据库未初始化")
+    return async_vector_db
+
+
+def get_migration() -> MigrationService:
+    """获取集合迁移服务依赖"""
+    migration = get_migration_service()
+    if not migration.is_initialized:
+        raise HTTPException(status_code=503, detail="集合迁移服务未初始化（需要 Embedding 服务）")
+    return migration
+
+
+async def _run_migration_step(fn, *args):
+    """在 vector_db 线程池中执行迁移操作（建集合、校验、切换都是阻塞调用），状态冲突返回 409"""
+    try:
+        return await run_in_executor(VECTOR_DB_POOL, fn, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
 @router.post(
     "/upsert",
     response_model=BaseResponse,
@@ -52,10 +96,11 @@ def get_services():
 )
 async def upsert_vector(
     request: VectorUpsertRequest,
-    services: tuple = Depends(get_services)
+    services: tuple = Depends(get_services),
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db),
 ):
     """插入或更新向量记录"""
-    vector_db_svc, embedding_svc, storage_svc = services
+    _, embedding_svc, storage_svc = services
 
     vector = request.vector
 
@@ -70,9 +115,9 @@ async def upsert_vector(
         if not image_path:
             raise HTTPException(status_code=404, detail=f"图片不存在: {request.id}")
 
-        vector = embedding_svc.generate_image_embedding(str(image_path))
+        vector = await embedding_svc.generate_image_embedding_async(str(image_path))
 
-    success = vector_db_svc.upsert(
+    success = await async_vector_db.upsert(
         id=request.id,
         vector=vector,
         metadata=request.metadata.model_dump()
@@ -95,10 +140,11 @@ async def upsert_vector(
 )
 async def upsert_vectors_batch(
     request: VectorBatchUpsertRequest,
-    services: tuple = Depends(get_services)
+    services: tuple = Depends(get_services),
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db),
 ):
     """批量插入或更新向量记录"""
-    vector_db_svc, embedding_svc, storage_svc = services
+    _, embedding_svc, storage_svc = services
 
     # 准备记录，需要自动生成向量的单独处理
     records_to_embed = []
@@ -126,7 +172,7 @@ async def upsert_vectors_batch(
             raise HTTPException(status_code=503, detail="Embedding服务未初始化")
 
         inputs = [{"image": r["path"]} for r in records_to_embed]
-        vectors = embedding_svc.generate_embeddings_batch(inputs)
+        vectors = await embedding_svc.generate_embeddings_batch_async(inputs)
 
         for record, vector in zip(records_to_embed, vectors):
             final_records.append({
@@ -135,7 +181,7 @@ async def upsert_vectors_batch(
                 "metadata": record["metadata"]
             })
 
-    success = vector_db_svc.upsert_batch(final_records)
+    success = await async_vector_db.upsert_batch(final_records)
 
     if success:
         return BaseResponse(
@@ -146,23 +192,186 @@ async def upsert_vectors_batch(
         raise HTTPException(status_code=500, detail="批量保存失败")
 
 
+@router.get(
+    "/export",
+    summary="流式导出向量记录",
+    description="""
+    按页流式导出集合中的记录，不会一次性加载全部数据：
+    - **format=ndjson**：每行一条 JSON 记录
+    - **format=parquet**：每页一个 row group（需要安装 pyarrow）
+
+    可只导出 ID（ids_only）、指定 payload 字段（fields），或附带完整向量（with_vectors）。
+    """
+)
+async def export_vectors(
+    format: str = Query("ndjson", description="导出格式: ndjson | parquet"),
+    fields: Optional[List[str]] = Query(None, description="只导出这些 payload 字段，默认全部"),
+    ids_only: bool = Query(False, description="只导出ID"),
+    with_vectors: bool = Query(False, description="是否附带完整向量"),
+    tags: Optional[List[str]] = Query(None, description="标签过滤"),
+    created_at_from: Optional[datetime] = Query(None, description="创建时间下限（含）"),
+    created_at_to: Optional[datetime] = Query(None, description="创建时间上限（不含）"),
+    limit: Optional[int] = Query(None, ge=1, description="最多导出条数"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="每页记录数，默认 VECTOR_EXPORT_BATCH_SIZE"),
+    services: tuple = Depends(get_services)
+):
+    """流式导出向量记录"""
+    vector_db_svc, _, _ = services
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}，可选: {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="导出 Parquet 需要安装 pyarrow")
+
+    with_payload = False if ids_only else (fields or True)
+    pages = vector_db_svc.aiter_points(
+        batch_size=batch_size or get_settings().VECTOR_EXPORT_BATCH_SIZE,
+        limit=limit,
+        with_payload=with_payload,
+        with_vectors=with_vectors,
+        filter_tags=tags,
+        filter_created_at_from=created_at_from,
+        filter_created_at_to=created_at_to
+    )
+
+    if format == "parquet":
+        body = parquet_chunks(pages, with_payload=with_payload is not False, with_vectors=with_vectors)
+        media_type, suffix = PARQUET_MEDIA_TYPE, "parquet"
+    else:
+        body = ndjson_chunks(pages)
+        media_type, suffix = NDJSON_MEDIA_TYPE, "ndjson"
+
+    filename = f"{vector_db_svc.collection_name}.{suffix}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# 迁移接口注册在 /{vector_id} 之前，否则 GET /vectors/migration 会被当作读取ID为 migration 的记录
+@router.get(
+    "/migration",
+    summary="集合迁移进度",
+    description="返回最近一次迁移的状态、回填进度、吞吐量（点/秒）、预计剩余时间和校验结果（没有迁移时 data 为 null）"
+)
+async def get_migration_status(
+    migration: MigrationService = Depends(get_migration)
+):
+    """获取集合迁移进度"""
+    return {
+        "status": "success",
+        "data": migration.get_status()
+    }
+
+
+@router.post(
+    "/migration",
+    summary="开始集合迁移",
+    description="创建影子集合，开始双写并在后台从图片存储回填（更换 Embedding 模型 / 维度或重建索引，检索不中断）"
+)
+async def start_migration(
+    request: MigrationStartRequest,
+    migration: MigrationService = Depends(get_migration)
+):
+    """开始集合迁移"""
+    data = await _run_migration_step(
+        migration.start, request.model_name, request.dimension, request.batch_size, request.concurrency
+    )
+    return {
+        "status": "success",
+        "data": data
+    }
+
+
+@router.post(
+    "/migration/verify",
+    summary="校验影子集合",
+    description="比较记录覆盖率和抽样记录的近邻召回率，通过后才能切换"
+)
+async def verify_migration(
+    sample_size: Optional[int] = Query(None, ge=1, description="抽样记录数"),
+    min_recall: Optional[float] = Query(None, ge=0, le=1, description="通过所需的召回率"),
+    migration: MigrationService = Depends(get_migration)
+):
+    """校验影子集合"""
+    data = await _run_migration_step(migration.verify, sample_size, min_recall)
+    return {
+        "status": "success",
+        "data": data
+    }
+
+
+@router.post(
+    "/migration/swap",
+    summary="切换到新集合",
+    description="追平后原子切换别名到影子集合，原集合保留用于回滚"
+)
+async def swap_migration(
+    force: bool = Query(False, description="未通过校验时也切换"),
+    migration: MigrationService = Depends(get_migration)
+):
+    """切换到新集合"""
+    data = await _run_migration_step(migration.swap, force)
+    return {
+        "status": "success",
+        "data": data
+    }
+
+
+@router.post(
+    "/migration/rollback",
+    summary="回滚集合迁移",
+    description="把别名指回原集合（切换后写入的记录只在新集合中）"
+)
+async def rollback_migration(
+    migration: MigrationService = Depends(get_migration)
+):
+    """回滚集合迁移"""
+    data = await _run_migration_step(migration.rollback)
+    return {
+        "status": "success",
+        "data": data
+    }
+
+
+@router.post(
+    "/migration/cancel",
+    summary="取消集合迁移",
+    description="停止回填和双写，默认删除影子集合"
+)
+async def cancel_migration(
+    drop: bool = Query(True, description="是否删除影子集合"),
+    migration: MigrationService = Depends(get_migration)
+):
+    """取消集合迁移"""
+    data = await _run_migration_step(migration.cancel, drop)
+    return {
+        "status": "success",
+        "data": data
+    }
+
+
 @router.get(
     "/{vector_id}",
     summary="获取向量记录",
-    description="根据ID获取向量记录详情"
+    description="根据ID获取向量记录详情（Accept 为 application/octet-stream / application/x-npy 时返回二进制向量）"
 )
 async def get_vector(
     vector_id: str,
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db),
+    accept: Optional[str] = Header(None, description="响应格式，默认 JSON，可附加 dtype=float16")
 ):
     """获取向量记录"""
-    vector_db_svc, _, _ = services
-
-    record = vector_db_svc.get(vector_id)
+    record = await async_vector_db.get(vector_id)
 
     if not record:
         raise HTTPException(status_code=404, detail=f"记录不存在: {vector_id}")
 
+    wire_format = negotiate_vector_format(accept)
+    if wire_format:
+        return vector_response(wire_format, record["vector"], ids=[record["id"]], metadata=[record["metadata"]])
+
     return {
         "status": "success",
         "data": record
@@ -172,16 +381,24 @@ async def get_vector(
 @router.get(
     "/batch/get",
     summary="批量获取向量记录",
-    description="根据ID列表批量获取记录"
+    description="根据ID列表批量获取记录（Accept 为 application/octet-stream / application/x-npy 时返回二进制向量矩阵）"
 )
 async def get_vectors_batch(
     ids: List[str] = Query(..., description="ID列表"),
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db),
+    accept: Optional[str] = Header(None, description="响应格式，默认 JSON，可附加 dtype=float16")
 ):
     """批量获取向量记录"""
-    vector_db_svc, _, _ = services
-
-    records = vector_db_svc.get_batch(ids)
+    records = await async_vector_db.get_batch(ids)
+
+    wire_format = negotiate_vector_format(accept)
+    if wire_format:
+        return vector_response(
+            wire_format,
+            [r["vector"] for r in records],
+            ids=[r["id"] for r in records],
+            metadata=[r["metadata"] for r in records]
+        )
 
     return {
         "status": "success",
@@ -194,16 +411,14 @@ async def get_vectors_batch(
     "/{vector_id}/metadata",
     response_model=BaseResponse,
     summary="更新元数据",
-    description="仅更新向量记录的元数据，不影响向量本身"
+    description="仅更新向量记录的元数据，不影响图片向量；修改描述或标签时重新生成文本向量"
 )
 async def update_vector_metadata(
     vector_id: str,
     request: VectorUpdateMetadataRequest,
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db)
 ):
     """更新向量记录的元数据"""
-    vector_db_svc, _, _ = services
-
     # 构建更新数据
     update_data = {}
     if request.tags is not None:
@@ -216,7 +431,12 @@ async def update_vector_metadata(
     if not update_data:
         raise HTTPException(status_code=400, detail="未提供任何更新内容")
 
-    success = vector_db_svc.update_metadata(vector_id, update_data)
+    search_svc = get_search_service()
+    if search_svc.is_initialized:
+        success = await search_svc.update_metadata_async(vector_id, update_data)
+    else:
+        # 没有 Embedding 服务时失效的文本向量被删除，由 backfill_text_vectors 补齐
+        success = await async_vector_db.update_metadata(vector_id, update_data)
 
     if success:
         return BaseResponse(
@@ -235,12 +455,10 @@ async def update_vector_metadata(
 )
 async def delete_vector(
     vector_id: str,
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db)
 ):
     """删除向量记录"""
-    vector_db_svc, _, _ = services
-
-    success = vector_db_svc.delete(vector_id)
+    success = await async_vector_db.delete(vector_id)
 
     if success:
         return BaseResponse(
@@ -259,12 +477,10 @@ async def delete_vector(
 )
 async def delete_vectors_batch(
     ids: List[str] = Query(..., description="要删除的ID列表"),
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db)
 ):
     """批量删除向量记录"""
-    vector_db_svc, _, _ = services
-
-    success = vector_db_svc.delete_batch(ids)
+    success = await async_vector_db.delete_batch(ids)
 
     if success:
         return BaseResponse(
@@ -285,12 +501,10 @@ async def list_vectors(
     limit: int = Query(100, ge=1, le=1000, description="每页数量"),
     offset: Optional[str] = Query(None, description="分页偏移量"),
     tags: Optional[List[str]] = Query(None, description="标签过滤"),
-    services: tuple = Depends(get_services)
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db)
 ):
     """列出向量记录"""
-    vector_db_svc, _, _ = services
-
-    records, next_offset = vector_db_svc.scroll(
+    records, next_offset = await async_vector_db.scroll(
         limit=limit,
         offset=offset,
         filter_tags=tags
@@ -333,19 +547,35 @@ async def get_collection_stats(
     }
 
 
+@router.get(
+    "/stats/upsert-buffer",
+    summary="写入缓冲指标",
+    description="返回向量写入缓冲的待写入数、批次大小和写入耗时分位数（未启用时 data 为 null）"
+)
+async def get_upsert_buffer_stats(
+    services: tuple = Depends(get_services)
+):
+    """获取写入缓冲指标"""
+    vector_db_svc, _, _ = services
+
+    return {
+        "status": "success",
+        "data": vector_db_svc.get_upsert_buffer_metrics()
+    }
+
+
 @router.get(
     "/stats/count",
     summary="统计记录数量",
-    description="统计向量记录数量，支持标签过滤"
+    description="统计向量记录数量，支持标签过滤；默认按 VECTOR_APPROXIMATE_COUNT 返回近似值，exact=true 时精确计数"
 )
 async def count_vectors(
     tags: Optional[List[str]] = Query(None, description="标签过滤"),
-    services: tuple = Depends(get_services)
+    exact: Optional[bool] = Query(None, description="是否精确计数（较慢）"),
+    async_vector_db: AsyncVectorDBService = Depends(get_async_vector_db)
 ):
     """统计记录数量"""
-    vector_db_svc, _, _ = services
-
-    count = vector_db_svc.count(filter_tags=tags)
+    count = await async_vector_db.count(filter_tags=tags, exact=exact)
 
     return {
         "status": "success",
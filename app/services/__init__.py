@@ -4,6 +4,8 @@
 
 from .embedding_service import EmbeddingService, get_embedding_service
 from .vector_db_service import VectorDBService, get_vector_db_service
+from .async_vector_db_service import AsyncVectorDBService, get_async_vector_db_service
+from .migration_service import MigrationService, get_migration_service
 from .storage_service import StorageService, get_storage_service
 from .search_service import SearchService, get_search_service
 from .agent_service import AgentService, get_agent_service
@@ -12,12 +14,19 @@ from .image_edit_service import ImageEditService, get_image_edit_service
 from .pointcloud_service import PointCloudService, get_pointcloud_service
 from .knowledge_qa_service import KnowledgeQAService, get_knowledge_qa_service
 from .asr_service import ASRService, get_asr_service
+from .outbound_governor import OutboundGovernor, OutboundRejectedError, get_outbound_governor
+from .image_fetch_service import ImageFetchService, ImageFetchError, get_image_fetch_service
+from .tenancy import get_current_tenant, tenant_scope
 
 __all__ = [
     "EmbeddingService",
     "get_embedding_service",
     "VectorDBService",
     "get_vector_db_service",
+    "AsyncVectorDBService",
+    "get_async_vector_db_service",
+    "MigrationService",
+    "get_migration_service",
     "StorageService",
     "get_storage_service",
     "SearchService",
@@ -34,4 +43,12 @@ __all__ = [
     "get_knowledge_qa_service",
     "ASRService",
     "get_asr_service",
+    "OutboundGovernor",
+    "OutboundRejectedError",
+    "get_outbound_governor",
+    "ImageFetchService",
+    "ImageFetchError",
+    "get_image_fetch_service",
+    "get_current_tenant",
+    "tenant_scope",
 ]
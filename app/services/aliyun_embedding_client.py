@@ -7,8 +7,12 @@ import logging
 from typing import Optional, List, Dict, Any
 from http import HTTPStatus
 import dashscope
+import numpy as np
 
 from ..config import get_settings
+from .vector_utils import as_float32, l2_normalize
+from .image_preprocess import prepare_image_for_upload, is_local_image_path
+from .outbound_governor import get_outbound_governor, OutboundRejectedError
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,7 @@ class AliyunEmbeddingClient:
         self._api_key: Optional[str] = None
         self._model_name: Optional[str] = None
         self._dimension: int = 2560  # 默认 2560，初始化时会从配置读取
+        self._preprocess: bool = True
         
     def initialize(self) -> None:
         """初始化 API 客户端"""
@@ -43,6 +48,7 @@ class AliyunEmbeddingClient:
         self._api_key = settings.ALIYUN_EMBEDDING_API_KEY
         self._model_name = settings.ALIYUN_EMBEDDING_MODEL_NAME
         self._dimension = settings.ALIYUN_EMBEDDING_DIMENSION
+        self._preprocess = settings.EMBEDDING_IMAGE_PREPROCESS
         
         if not self._api_key:
             raise ValueError("未配置 ALIYUN_EMBEDDING_API_KEY，无法初始化 API 客户端")
@@ -60,7 +66,7 @@ class AliyunEmbeddingClient:
         image: Optional[str] = None,
         instruction: Optional[str] = None,
         normalize: bool = True
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         通过 API 生成 Embedding 向量（多模态融合向量）
         
@@ -71,7 +77,7 @@ class AliyunEmbeddingClient:
             normalize: 是否归一化（API 默认归一化）
             
         Returns:
-            向量列表（与本地模型格式一致）
+            float32 向量（与本地模型格式一致）
         """
         if not self.is_initialized:
             raise RuntimeError("API 客户端未初始化")
@@ -86,17 +92,26 @@ class AliyunEmbeddingClient:
             input_data["text"] = text
         
         if image:
-            # 如果是本地路径，转换为文件路径（DashScope SDK 会自动处理）
-            # 如果是 URL，直接使用
+            # 本地文件先降采样为 data URI，避免上传远超模型像素预算的原图
+            # URL 和 data URI 直接使用（由 DashScope 自行拉取/解码）
+            if self._preprocess and is_local_image_path(image):
+                prepared = prepare_image_for_upload(image)
+                logger.debug(
+                    f"图片预处理完成: {prepared['original_bytes']} -> {prepared['encoded_bytes']} bytes, "
+                    f"size={prepared['width']}x{prepared['height']}"
+                )
+                image = prepared["data_uri"]
             input_data["image"] = image
         
         # 封装成列表格式
         input_list = [input_data]
         
         try:
-            # 调用 DashScope 多模态 Embedding API
+            # 调用 DashScope 多模态 Embedding API（经由共享的限流/熔断治理）
             # 指定向量维度参数
-            resp = dashscope.MultiModalEmbedding.call(
+            resp = get_outbound_governor().call(
+                self._model_name,
+                dashscope.MultiModalEmbedding.call,
                 api_key=self._api_key,
                 model=self._model_name,
                 input=input_list,
@@ -113,17 +128,18 @@ class AliyunEmbeddingClient:
                 output = resp.output if isinstance(resp.output, dict) else resp.output.__dict__
                 embeddings = output.get('embeddings', [])
                 if len(embeddings) > 0:
-                    embedding = embeddings[0].get('embedding', embeddings[0])
-                    # 转换为列表格式
-                    if hasattr(embedding, '__iter__'):
-                        return list(embedding)
-                    else:
-                        return list(embedding) if isinstance(embedding, (list, tuple)) else [embedding]
+                    embedding = as_float32(embeddings[0].get('embedding', embeddings[0]))
+                    # API 默认已归一化，这里再做一次以兼容 normalize 语义（开销可忽略）
+                    return l2_normalize(embedding, copy=False) if normalize else embedding
                 else:
                     raise RuntimeError(f"API 响应格式异常: {output}")
             else:
                 raise RuntimeError(f"API 响应格式异常: {resp.output}")
             
+        except OutboundRejectedError as e:
+            # 熔断/排队超时：请求未发出，不打印堆栈，原样抛出便于上层区分
+            logger.warning(f"Embedding API 调用被拒绝: {e}")
+            raise
         except Exception as e:
             logger.error(f"API 调用失败: {e}", exc_info=True)
             raise RuntimeError(f"API 调用失败: {str(e)}")
@@ -132,7 +148,7 @@ class AliyunEmbeddingClient:
         self,
         inputs: List[Dict[str, Any]],
         normalize: bool = True
-    ) -> List[List[float]]:
+    ) -> np.ndarray:
         """
         批量生成 Embedding 向量
         
@@ -141,22 +157,21 @@ class AliyunEmbeddingClient:
             normalize: 是否归一化
             
         Returns:
-            向量列表
+            形状为 (len(inputs), dimension) 的 float32 矩阵
         """
         if not self.is_initialized:
             raise RuntimeError("API 客户端未初始化")
         
         # 注意：qwen2.5-vl-embedding 不支持批量调用（每个输入对象只能包含一种类型）
         # 因此这里改为逐个调用
-        embeddings = []
-        for inp in inputs:
-            embedding = self.generate_embedding(
+        embeddings = np.empty((len(inputs), self._dimension), dtype=np.float32)
+        for i, inp in enumerate(inputs):
+            embeddings[i] = self.generate_embedding(
                 text=inp.get("text"),
                 image=inp.get("image"),
                 instruction=inp.get("instruction"),
                 normalize=normalize
             )
-            embeddings.append(embedding)
         
         return embeddings
     
@@ -172,6 +187,23 @@ class AliyunEmbeddingClient:
         """获取当前向量维度"""
         return self._dimension
 
+    def derive(self, model_name: Optional[str] = None, dimension: Optional[int] = None) -> "AliyunEmbeddingClient":
+        """
+        创建使用其他模型或维度的独立客户端（共用 API Key 和预处理配置，不影响当前实例），用于迁移到新模型
+
+        Args:
+            model_name: 模型名，默认与当前相同
+            dimension: 向量维度，默认与当前相同
+        """
+        if not self.is_initialized:
+            raise RuntimeError("API 客户端未初始化")
+        client = object.__new__(AliyunEmbeddingClient)  # 绕过单例
+        client.__dict__.update(self.__dict__)
+        client._model_name = model_name or self._model_name
+        if dimension:
+            client.set_dimension(dimension)
+        return client
+
 
 # 全局实例
 _aliyun_client: Optional[AliyunEmbeddingClient] = None
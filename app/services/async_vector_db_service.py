@@ -0,0 +1,371 @@
+"""
+异步向量数据库服务
+基于 AsyncQdrantClient，供 async 路由和后台任务在事件循环中直接访问向量库
+
+服务端模式（docker/cloud）下所有请求共用一个 AsyncQdrantClient（复用 HTTP 连接池），
+并发的检索和写入在等待 Qdrant 响应时互不阻塞，不再排队等待 vector_db 线程池的空闲线程。
+
+请求参数、过滤条件、payload 处理、统计缓存和写入缓冲都沿用同步的 VectorDBService：
+检索使用其生成的请求，写入执行其写入步骤（upsert_steps 等，含租户检查、统计增量和迁移同步），
+两者访问同一个集合，结果一致。本地模式（存储目录只能由一个客户端打开）和 NumPy 引擎
+没有网络请求可并发，各方法改为在 vector_db 线程池中调用同步服务。
+
+多租户（见 tenancy）：集合名、租户过滤条件和记录归属检查同样取自同步服务，按当前上下文的租户生效。
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Union, Callable, Generator, TypeVar
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qdrant_models
+
+from .executors import VECTOR_DB_POOL, run_in_executor
+from .vector_db_service import (
+    VectorDBService,
+    WriteRequest,
+    get_vector_db_service,
+)
+from .vector_utils import VectorLike
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncVectorDBService:
+    """
+    异步向量数据库服务类
+    方法与 VectorDBService 的同名方法参数和返回值相同
+    """
+
+    _instance: Optional["AsyncVectorDBService"] = None
+
+    def __new__(cls):
+        """单例模式"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        self._sync: Optional[VectorDBService] = getattr(self, '_sync', None)
+        self._client: Optional[AsyncQdrantClient] = getattr(self, '_client', None)
+
+    def initialize(
+        self,
+        vector_db_service: Optional[VectorDBService] = None,
+        pool_size: Optional[int] = None
+    ) -> None:
+        """
+        初始化异步客户端（需在同步服务初始化之后调用），传输方式（REST/gRPC）和超时等选项与同步服务相同
+
+        Args:
+            vector_db_service: 已初始化的同步服务，默认取全局实例
+            pool_size: REST 连接池大小，None 表示不限
+        """
+        sync = vector_db_service or get_vector_db_service()
+        if not sync.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+
+        self._sync = sync
+        connection = sync.connection_params(pool_size)
+        if connection is None:
+            logger.info("异步向量数据库服务使用 vector_db 线程池（本地模式 / NumPy 引擎）")
+            return
+
+        self._client = AsyncQdrantClient(**connection)
+        logger.info(f"异步向量数据库服务初始化完成，连接: {connection['host']}:{connection['port']}"
+                    f" (grpc: {connection['prefer_grpc']}, pool_size: {pool_size or 'unlimited'})")
+
+    @property
+    def is_initialized(self) -> bool:
+        """检查是否已初始化（同步服务关闭后也视为未初始化）"""
+        return self._sync is not None and self._sync.is_initialized
+
+    @property
+    def is_native(self) -> bool:
+        """是否直接使用 AsyncQdrantClient（否则在线程池中调用同步服务）"""
+        return self._client is not None
+
+    async def close(self) -> None:
+        """关闭异步客户端"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        self._sync = None
+        logger.info("异步向量数据库连接已关闭")
+
+    def _check(self) -> VectorDBService:
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+        return self._sync
+
+    @staticmethod
+    async def _in_pool(fn: Callable[..., T], *args, **kwargs) -> T:
+        return await run_in_executor(VECTOR_DB_POOL, fn, *args, **kwargs)
+
+    async def _run_steps(self, steps: Generator[WriteRequest, Any, T]) -> T:
+        """用 AsyncQdrantClient 执行同步服务生成的写入步骤（见 VectorDBService.upsert_steps），返回步骤的结果"""
+        try:
+            method, kwargs = next(steps)
+            while True:
+                try:
+                    response = await getattr(self._client, method)(**kwargs)
+                except Exception as e:
+                    method, kwargs = steps.throw(e)
+                else:
+                    method, kwargs = steps.send(response)
+        except StopIteration as done:
+            return done.value
+
+    @staticmethod
+    def _scored(points: List[qdrant_models.ScoredPoint]) -> List[Dict[str, Any]]:
+        return [{"id": point.id, "score": point.score, "metadata": point.payload} for point in points]
+
+    # ==================== 检索 ====================
+
+    async def search(
+        self,
+        query_vector: VectorLike,
+        top_k: int = 10,
+        score_threshold: Optional[float] = None,
+        filter_tags: Optional[List[str]] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_ids: Optional[List[Union[int, str]]] = None,
+        oversampling: Optional[float] = None,
+        exclude_ids: Optional[List[Union[int, str]]] = None,
+        fuse_text: bool = False,
+        query_text: Optional[str] = None,
+        lexical_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        向量相似度搜索（多分辨率集合同样由服务端两阶段检索，fuse_text / query_text 时由服务端融合
+        文本向量和关键词召回）
+
+        Returns:
+            搜索结果列表
+        """
+        sync = self._check()
+        kwargs = dict(
+            top_k=top_k,
+            score_threshold=score_threshold,
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to,
+            filter_ids=filter_ids,
+            oversampling=oversampling,
+            exclude_ids=exclude_ids,
+            fuse_text=fuse_text,
+            query_text=query_text,
+            lexical_weight=lexical_weight
+        )
+        if self._client is None:
+            return await self._in_pool(sync.search, query_vector, **kwargs)
+
+        request = sync.query_request(query_vector, **kwargs)
+        try:
+            response = await self._client.query_points(
+                collection_name=sync.collection_name,
+                prefetch=request.prefetch,
+                query=request.query,
+                using=request.using,
+                query_filter=request.filter,
+                search_params=request.params,
+                limit=request.limit,
+                score_threshold=request.score_threshold,
+                with_payload=True
+            )
+        except Exception as e:
+            logger.error(f"Qdrant query_points 查询失败: {e}")
+            logger.error(f"参数: collection={sync.collection_name}, limit={top_k}, "
+                         f"score_threshold={score_threshold}, filter={request.filter}")
+            raise
+        return self._scored(response.points)
+
+    async def search_batch(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        批量向量搜索：多个查询合并为一次 query_batch_points 请求
+
+        Args:
+            queries: 查询列表，每个元素的键与 search 的参数相同（query_vector 必填）
+
+        Returns:
+            与 queries 一一对应的搜索结果列表
+        """
+        sync = self._check()
+        if not queries:
+            return []
+        if self._client is None:
+            return await self._in_pool(sync.search_batch, queries)
+
+        requests = [sync.query_request(**query) for query in queries]
+        try:
+            responses = await self._client.query_batch_points(
+                collection_name=sync.collection_name,
+                requests=requests
+            )
+        except Exception as e:
+            logger.error(f"Qdrant query_batch_points 查询失败: {e}")
+            logger.error(f"参数: collection={sync.collection_name}, queries={len(requests)}")
+            raise
+        return [self._scored(response.points) for response in responses]
+
+    async def scroll(
+        self,
+        limit: int = 100,
+        offset: Optional[str] = None,
+        filter_tags: Optional[List[str]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        分页遍历所有记录
+
+        Returns:
+            (记录列表, 下一页偏移量)
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(
+                sync.scroll, limit, offset, filter_tags,
+                filter_created_at_from, filter_created_at_to, filter_conditions
+            )
+
+        query_filter = sync.build_filter(
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to
+        )
+        points, next_offset = await self._client.scroll(**sync.scroll_request(limit, offset, query_filter))
+        return sync.page_records(points), next_offset
+
+    async def retrieve(self, ids: List[Union[int, str]]) -> List[Dict[str, Any]]:
+        """
+        批量获取向量记录（含完整向量），与 VectorDBService.get_batch 相同
+
+        Returns:
+            记录列表
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(sync.get_batch, ids)
+
+        return sync.owned_records(await self._client.retrieve(**sync.retrieve_request(ids)))
+
+    get_batch = retrieve
+
+    async def get(self, id: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """根据ID获取向量记录，不存在时返回 None"""
+        records = await self.retrieve([id])
+        return records[0] if records else None
+
+    async def count(self, filter_tags: Optional[List[str]] = None, exact: Optional[bool] = None) -> int:
+        """
+        统计记录数量（近似模式下优先取统计缓存，见 VectorDBService.count）
+
+        Returns:
+            记录数量
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(sync.count, filter_tags, exact)
+
+        cached = sync.cached_count(filter_tags, exact)
+        if cached is not None:
+            return cached
+        result = await self._client.count(**sync.count_request(filter_tags, exact))
+        return result.count
+
+    # ==================== 写入 ====================
+
+    async def upsert(
+        self,
+        id: Union[int, str],
+        vector: VectorLike,
+        metadata: Dict[str, Any],
+        durable: bool = False,
+        text_vectors: Optional[Dict[str, VectorLike]] = None
+    ) -> bool:
+        """
+        插入或更新单个向量记录
+
+        启用写入缓冲时加入同步服务的缓冲队列，与其他调用方的写入合并提交，
+        等待所在批次完成时不占用线程。
+
+        Returns:
+            操作是否成功
+        """
+        sync = self._check()
+        record = {"id": id, "vector": vector, "metadata": metadata}
+        if text_vectors:
+            record["text_vectors"] = text_vectors
+        if sync.upsert_buffered:
+            return await asyncio.wrap_future(sync.submit_buffered(record, durable=durable))
+        return await self.upsert_batch([record])
+
+    async def upsert_batch(self, records: List[Dict[str, Any]], wait: bool = True) -> bool:
+        """
+        批量插入或更新向量记录
+
+        Args:
+            records: 记录列表，每个记录包含id、vector、metadata，可选 text_vectors
+            wait: 是否等待服务端应用完成；False 时服务端接收即返回
+
+        Returns:
+            操作是否成功
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(sync.upsert_batch, records, wait)
+
+        return await self._run_steps(sync.upsert_steps(records, wait))
+
+    async def update_metadata(
+        self,
+        id: Union[int, str],
+        metadata: Dict[str, Any],
+        text_vectors: Optional[Dict[str, VectorLike]] = None
+    ) -> bool:
+        """
+        更新记录的元数据（仅更新提供的字段），text_vectors 为重新生成的文本向量
+
+        Returns:
+            操作是否成功
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(sync.update_metadata, id, metadata, text_vectors)
+
+        return await self._run_steps(sync.update_metadata_steps(id, metadata, text_vectors))
+
+    async def delete(self, id: Union[int, str]) -> bool:
+        """删除单个向量记录"""
+        return await self.delete_batch([id])
+
+    async def delete_batch(self, ids: List[Union[int, str]]) -> bool:
+        """
+        批量删除向量记录
+
+        Returns:
+            操作是否成功
+        """
+        sync = self._check()
+        if self._client is None:
+            return await self._in_pool(sync.delete_batch, ids)
+
+        return await self._run_steps(sync.delete_steps(ids))
+
+
+# 全局服务实例
+async_vector_db_service = AsyncVectorDBService()
+
+
+def get_async_vector_db_service() -> AsyncVectorDBService:
+    """获取异步向量数据库服务实例"""
+    return async_vector_db_service
@@ -0,0 +1,141 @@
+"""
+集合统计缓存
+状态接口和仪表盘轮询的集合信息、记录数从短 TTL 缓存读取，不再每次请求都访问向量库
+
+- 首次读取同步加载；过期后立即返回旧值，并由后台线程刷新（同一时间只有一个刷新在途）
+- 小批量写入按增量更新总数和标签计数表；批量写入只标记过期，由下一次读取触发后台刷新
+- 刷新期间发生了写入时，刷新结果可能已包含也可能未包含这些写入，结果立即视为过期，下次读取再刷新
+- 标签计数表由 loader 提供（Qdrant facet，即 payload 索引上的计数），两次刷新之间靠写入增量保持最新
+
+多进程同时写入同一集合时，其他进程的写入只在下一次刷新后体现，计数为近似值。
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """某一时刻的集合统计"""
+    info: Dict[str, Any]
+    points_count: int
+    # 标签 -> 记录数；None 表示后端无法提供计数表
+    tag_counts: Optional[Dict[Any, int]] = None
+    # 计数表是否包含全部标签（facet 结果被截断时为 False，表中没有的标签计数未知）
+    tags_complete: bool = True
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+class CollectionStats:
+    """
+    集合统计缓存
+
+    loader() 从向量库读取最新统计，返回 StatsSnapshot；在调用线程或后台刷新线程中执行
+    """
+
+    def __init__(self, loader: Callable[[], StatsSnapshot], ttl: float = 10.0):
+        self._loader = loader
+        self._ttl = max(0.0, ttl)
+
+        self._lock = threading.Lock()
+        self._snapshot: Optional[StatsSnapshot] = None
+        self._expires = 0.0
+        self._generation = 0  # 每次写入增量或标记过期时加一
+        self._refreshing = False
+        self._closed = False
+
+    def get(self) -> StatsSnapshot:
+        """获取统计；过期时返回旧值并在后台刷新，尚无数据时同步加载"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() < self._expires:
+                return snapshot
+
+        if snapshot is None:
+            return self._refresh()
+
+        self._refresh_in_background()
+        return snapshot
+
+    def tag_count(self, tag: Any) -> Optional[int]:
+        """单个标签的记录数，无法从计数表得到时返回 None"""
+        snapshot = self.get()
+        if snapshot.tag_counts is None:
+            return None
+        if tag in snapshot.tag_counts:
+            return snapshot.tag_counts[tag]
+        return 0 if snapshot.tags_complete else None
+
+    def apply_delta(self, points: int, tags: Counter) -> None:
+        """
+        按一次写入调整总数和标签计数
+
+        Args:
+            points: 记录数变化（新增为正，删除为负）
+            tags: 各标签记录数的变化
+        """
+        with self._lock:
+            self._generation += 1
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            tag_counts = snapshot.tag_counts
+            if tag_counts is not None and tags:
+                tag_counts = dict(tag_counts)
+                for tag, delta in tags.items():
+                    if delta == 0 or (tag not in tag_counts and not snapshot.tags_complete):
+                        continue
+                    count = tag_counts.get(tag, 0) + delta
+                    if count > 0:
+                        tag_counts[tag] = count
+                    else:
+                        tag_counts.pop(tag, None)
+            points_count = max(0, snapshot.points_count + points)
+            info = dict(snapshot.info, points_count=points_count)
+            self._snapshot = replace(snapshot, info=info, points_count=points_count, tag_counts=tag_counts)
+
+    def invalidate(self) -> None:
+        """标记过期（批量写入后调用），下一次读取触发后台刷新"""
+        with self._lock:
+            self._generation += 1
+            self._expires = 0.0
+
+    def close(self) -> None:
+        """停止后续的后台刷新"""
+        with self._lock:
+            self._closed = True
+
+    def _refresh(self) -> StatsSnapshot:
+        with self._lock:
+            generation = self._generation
+        snapshot = self._loader()
+        with self._lock:
+            self._snapshot = snapshot
+            # 刷新期间有写入时，结果不一定包含这些写入，下次读取再刷新
+            self._expires = snapshot.loaded_at + self._ttl if generation == self._generation else 0.0
+        return snapshot
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing or self._closed:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"集合统计刷新失败，继续使用旧值: {e}")
+                with self._lock:
+                    self._expires = time.monotonic() + self._ttl
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="collection-stats-refresh", daemon=True).start()
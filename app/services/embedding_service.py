@@ -2,15 +2,25 @@
 Embedding服务模块
 封装Qwen3-VL多模态Embedding模型的调用
 支持本地推理和阿里云 API 服务
+
+所有生成接口返回 float32 NumPy 数组（单个向量为一维，批量为二维），
+仅在 JSON 响应和 Qdrant 请求处转换为列表，见 vector_utils
+
+async 调用方使用 *_async 接口，阻塞调用在 embedding 线程池中执行，见 executors
 """
 
 import sys
+import asyncio
 import logging
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union, TYPE_CHECKING
+from typing import Optional, List, Dict, Any, Union, AsyncIterator, Tuple, TYPE_CHECKING
+import numpy as np
 from PIL import Image
 
 from ..config import get_settings
+from .executors import EMBEDDING_POOL, run_in_executor
+from .image_preprocess import prepare_image_for_upload
+from .vector_utils import as_float32, as_float32_matrix
 
 # 延迟导入：只在类型检查时导入，运行时不导入
 if TYPE_CHECKING:
@@ -19,6 +29,17 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def _use_cpu_engine(device: Optional[str]) -> bool:
+    """本地模型是否使用 CPU 推理引擎：显式指定 cpu 设备，或未指定设备且本机没有可用的 CUDA"""
+    if device is not None:
+        return str(device).startswith("cpu")
+    try:
+        import torch
+    except ImportError:
+        return True
+    return not torch.cuda.is_available()
+
+
 class EmbeddingService:
     """
     Embedding服务类
@@ -61,6 +82,8 @@ class EmbeddingService:
         # 根据配置选择初始化方式
         if self._api_provider == "aliyun":
             self._initialize_api()
+        elif self._api_provider == "offline":
+            self._initialize_offline()
         elif self._api_provider == "local":
             self._initialize_local(model_path, device)
         else:
@@ -80,14 +103,36 @@ class EmbeddingService:
             logger.error(f"阿里云 API 客户端初始化失败: {e}")
             raise
 
+    def _initialize_offline(self):
+        """初始化离线 Embedding 客户端（无网络、无GPU，用于 CI 和压测）"""
+        from .offline_embedding_client import get_offline_client
+        self._api_client = get_offline_client()
+        self._api_client.initialize()
+        logger.info(f"离线 Embedding 客户端初始化成功 (Dimension: {self._api_client.get_vector_dimension()})")
+
     def _initialize_local(
         self,
         model_path: Optional[str] = None,
         device: Optional[str] = None
     ):
-        """初始化本地模型"""
+        """初始化本地模型（显式指定 cpu 设备或本机没有可用的 CUDA 时使用 CPU 推理引擎）"""
         settings = get_settings()
 
+        if _use_cpu_engine(device):
+            from .local_cpu_engine import CPUEmbeddingEngine
+            try:
+                self._embedder = CPUEmbeddingEngine.load(
+                    model_path=model_path or settings.MODEL_PATH,
+                    num_threads=settings.LOCAL_CPU_THREADS,
+                    quantize=settings.LOCAL_CPU_QUANTIZE,
+                    compile_graph=settings.LOCAL_CPU_COMPILE,
+                    max_batch=settings.LOCAL_CPU_MAX_BATCH
+                )
+            except Exception as e:
+                logger.error(f"CPU Embedding 引擎初始化失败: {e}", exc_info=True)
+                raise
+            return
+
         # 添加模型脚本路径到sys.path
         SCRIPTS_PATH = Path(__file__).parent.parent.parent / "qwen3-vl-embedding-2B" / "scripts"
         sys.path.insert(0, str(SCRIPTS_PATH))
@@ -121,20 +166,53 @@ class EmbeddingService:
         if not self.is_initialized:
             raise RuntimeError("Embedding服务未初始化")
         
-        if self._api_provider == "aliyun" and self._api_client:
+        if self._api_provider in ("aliyun", "offline") and self._api_client:
             return self._api_client.get_vector_dimension()
         elif self._api_provider == "local" and self._embedder:
             return self._embedder.model.config.hidden_size
         else:
             raise RuntimeError("未知的 API Provider 或模型未初始化")
 
+    def derive_client(self, model_name: Optional[str] = None, dimension: Optional[int] = None) -> Any:
+        """
+        创建使用其他模型或维度的 API 客户端（不影响当前客户端），用于迁移到新模型
+
+        Args:
+            model_name: 模型名，默认与当前相同
+            dimension: 向量维度，默认与当前相同
+
+        Returns:
+            提供 generate_embeddings_batch / get_vector_dimension 的客户端
+
+        Raises:
+            ValueError: 本地模型不支持切换
+        """
+        if not self.is_initialized:
+            raise RuntimeError("Embedding服务未初始化")
+        if self._api_provider not in ("aliyun", "offline") or self._api_client is None:
+            raise ValueError("本地模型不支持切换模型或维度，只能按当前模型重建索引")
+        return self._api_client.derive(model_name=model_name, dimension=dimension)
+
+    def swap_client(self, client: Any) -> Any:
+        """
+        替换生成向量使用的 API 客户端（迁移切换集合时调用），返回原客户端
+
+        Args:
+            client: derive_client 创建的客户端
+        """
+        if self._api_provider not in ("aliyun", "offline"):
+            raise ValueError("本地模型不支持切换模型或维度")
+        previous, self._api_client = self._api_client, client
+        logger.info(f"Embedding 客户端已切换 (Dimension: {client.get_vector_dimension()})")
+        return previous
+
     def generate_embedding(
         self,
         text: Optional[str] = None,
         image: Optional[Union[str, Image.Image]] = None,
         instruction: Optional[str] = None,
         normalize: bool = True
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         生成单个输入的Embedding向量
 
@@ -145,17 +223,20 @@ class EmbeddingService:
             normalize: 是否归一化向量
 
         Returns:
-            向量列表
+            float32 向量
         """
         if not self.is_initialized:
             raise RuntimeError("Embedding服务未初始化，请先调用initialize()")
 
         # 根据 Provider 选择调用方式
-        if self._api_provider == "aliyun" and self._api_client:
-            # API 调用
+        if self._api_provider in ("aliyun", "offline") and self._api_client:
+            # API 调用（离线客户端与阿里云客户端接口一致）
             image_path = None
             if image:
-                if isinstance(image, Image.Image):
+                if isinstance(image, Image.Image) and get_settings().EMBEDDING_IMAGE_PREPROCESS:
+                    # 内存图片直接降采样编码为 data URI，无需落盘
+                    image_path = prepare_image_for_upload(image)["data_uri"]
+                elif isinstance(image, Image.Image):
                     # 保存临时图片
                     import tempfile
                     with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as f:
@@ -174,12 +255,12 @@ class EmbeddingService:
                 else:
                     image_path = str(image)
             
-            return self._api_client.generate_embedding(
+            return as_float32(self._api_client.generate_embedding(
                 text=text,
                 image=image_path,
                 instruction=instruction,
                 normalize=normalize
-            )
+            ))
         elif self._api_provider == "local" and self._embedder:
             # 本地模型调用
             input_data = {
@@ -188,7 +269,7 @@ class EmbeddingService:
                 "instruction": instruction
             }
             embeddings = self._embedder.process([input_data], normalize=normalize)
-            return embeddings[0].cpu().tolist()
+            return as_float32(embeddings[0])
         else:
             raise RuntimeError("未知的 API Provider 或模型未初始化")
 
@@ -196,7 +277,7 @@ class EmbeddingService:
         self,
         inputs: List[Dict[str, Any]],
         normalize: bool = True
-    ) -> List[List[float]]:
+    ) -> np.ndarray:
         """
         批量生成Embedding向量
 
@@ -205,17 +286,17 @@ class EmbeddingService:
             normalize: 是否归一化向量
 
         Returns:
-            向量列表的列表
+            形状为 (len(inputs), dimension) 的 float32 矩阵
         """
         if not self.is_initialized:
             raise RuntimeError("Embedding服务未初始化，请先调用initialize()")
 
         # 根据 Provider 选择调用方式
-        if self._api_provider == "aliyun" and self._api_client:
-            return self._api_client.generate_embeddings_batch(inputs, normalize=normalize)
+        if self._api_provider in ("aliyun", "offline") and self._api_client:
+            return as_float32_matrix(self._api_client.generate_embeddings_batch(inputs, normalize=normalize))
         elif self._api_provider == "local" and self._embedder:
             embeddings = self._embedder.process(inputs, normalize=normalize)
-            return embeddings.cpu().tolist()
+            return as_float32_matrix(embeddings)
         else:
             raise RuntimeError("未知的 API Provider 或模型未初始化")
 
@@ -224,7 +305,7 @@ class EmbeddingService:
         text: str,
         instruction: Optional[str] = None,
         normalize: bool = True
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         生成纯文本的Embedding向量
 
@@ -234,7 +315,7 @@ class EmbeddingService:
             normalize: 是否归一化向量
 
         Returns:
-            向量列表
+            float32 向量
         """
         return self.generate_embedding(
             text=text,
@@ -247,7 +328,7 @@ class EmbeddingService:
         image: Union[str, Image.Image],
         instruction: Optional[str] = None,
         normalize: bool = True
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         生成图片的Embedding向量
 
@@ -257,7 +338,7 @@ class EmbeddingService:
             normalize: 是否归一化向量
 
         Returns:
-            向量列表
+            float32 向量
         """
         return self.generate_embedding(
             image=image,
@@ -271,7 +352,7 @@ class EmbeddingService:
         image: Union[str, Image.Image],
         instruction: Optional[str] = None,
         normalize: bool = True
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         生成图文混合的Embedding向量
 
@@ -282,7 +363,7 @@ class EmbeddingService:
             normalize: 是否归一化向量
 
         Returns:
-            向量列表
+            float32 向量
         """
         return self.generate_embedding(
             text=text,
@@ -291,6 +372,83 @@ class EmbeddingService:
             normalize=normalize
         )
 
+    # ==================== 异步接口 ====================
+
+    async def generate_embedding_async(self, *args, **kwargs) -> np.ndarray:
+        """generate_embedding 的异步版本（参数相同），在 embedding 线程池中执行"""
+        return await run_in_executor(EMBEDDING_POOL, self.generate_embedding, *args, **kwargs)
+
+    async def generate_embeddings_batch_async(self, *args, **kwargs) -> np.ndarray:
+        """generate_embeddings_batch 的异步版本（参数相同）"""
+        return await run_in_executor(EMBEDDING_POOL, self.generate_embeddings_batch, *args, **kwargs)
+
+    async def generate_text_embedding_async(self, *args, **kwargs) -> np.ndarray:
+        """generate_text_embedding 的异步版本（参数相同）"""
+        return await run_in_executor(EMBEDDING_POOL, self.generate_text_embedding, *args, **kwargs)
+
+    async def generate_image_embedding_async(self, *args, **kwargs) -> np.ndarray:
+        """generate_image_embedding 的异步版本（参数相同）"""
+        return await run_in_executor(EMBEDDING_POOL, self.generate_image_embedding, *args, **kwargs)
+
+    async def generate_multimodal_embedding_async(self, *args, **kwargs) -> np.ndarray:
+        """generate_multimodal_embedding 的异步版本（参数相同）"""
+        return await run_in_executor(EMBEDDING_POOL, self.generate_multimodal_embedding, *args, **kwargs)
+
+    async def iter_embeddings_async(
+        self,
+        inputs: List[Dict[str, Any]],
+        normalize: bool = True,
+        batch_size: int = 4,
+        concurrency: int = 4
+    ) -> AsyncIterator[Tuple[range, Union[np.ndarray, Exception]]]:
+        """
+        分批并发生成向量，按完成顺序逐批产出
+
+        最多 concurrency 个批次同时在途，调用方取走一批结果后才提交下一批（背压）；
+        迭代提前结束（调用方 aclose 或被取消）时取消所有未完成的批次，尚未开始执行的批次不会再调用模型。
+        单个批次失败不影响其他批次，异常作为该批的结果产出。
+
+        Args:
+            inputs: 输入列表，每个元素包含text、image、instruction等字段
+            normalize: 是否归一化向量
+            batch_size: 每批输入数
+            concurrency: 同时在途的批次数
+
+        Yields:
+            (该批在 inputs 中的索引范围, 形状为 (len(range), dimension) 的 float32 矩阵或异常)
+        """
+        batch_size = max(1, batch_size)
+        starts = iter(range(0, len(inputs), batch_size))
+        in_flight: Dict[asyncio.Future, range] = {}
+
+        def submit_next() -> bool:
+            start = next(starts, None)
+            if start is None:
+                return False
+            indices = range(start, min(start + batch_size, len(inputs)))
+            task = asyncio.ensure_future(
+                self.generate_embeddings_batch_async(inputs[indices.start:indices.stop], normalize=normalize)
+            )
+            in_flight[task] = indices
+            return True
+
+        try:
+            while len(in_flight) < max(1, concurrency) and submit_next():
+                pass
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    indices = in_flight.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = e
+                    yield indices, result
+                    submit_next()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
 
 # 全局服务实例
 embedding_service = EmbeddingService()
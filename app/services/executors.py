@@ -0,0 +1,87 @@
+"""
+有界线程池
+为 async 路由执行阻塞的 Embedding 生成和向量库操作，避免同步调用占住事件循环
+
+- embedding 池：图片/文本向量生成（DashScope HTTP、本地模型前向）及依赖它的检索、索引
+- vector_db 池：不需要生成向量的纯向量库读写（元数据检索、删除等）
+
+两类工作分池执行，慢速的外部模型调用不会排在向量库请求前面。
+线程数即并发上限，外部请求的速率和排队仍由 outbound_governor 统一治理。
+"""
+
+import asyncio
+import logging
+import threading
+import contextvars
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EMBEDDING_POOL = "embedding"
+VECTOR_DB_POOL = "vector_db"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def _pool_size(name: str) -> int:
+    """读取线程池大小配置"""
+    settings = get_settings()
+    sizes = {
+        EMBEDDING_POOL: settings.EMBEDDING_EXECUTOR_WORKERS,
+        VECTOR_DB_POOL: settings.VECTOR_DB_EXECUTOR_WORKERS,
+    }
+    if name not in sizes:
+        raise ValueError(f"未知的线程池: {name}")
+    return max(1, sizes[name])
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """获取（按需创建）指定名称的线程池"""
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                workers = _pool_size(name)
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+                _executors[name] = executor
+                logger.info(f"线程池已启动: {name} (workers: {workers})")
+    return executor
+
+
+async def run_in_executor(name: str, fn: Callable[..., T], /, *args, **kwargs) -> T:
+    """
+    在指定线程池中执行阻塞函数并等待结果
+
+    调用方的 contextvars 会复制到工作线程。等待方被取消（如客户端断开）时，
+    已开始执行的函数仍会运行完毕，只是结果被丢弃。
+
+    Args:
+        name: 线程池名称（EMBEDDING_POOL / VECTOR_DB_POOL）
+        fn: 阻塞函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        fn 的返回值
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(name), partial(context.run, fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """关闭所有线程池（等待在途任务完成，丢弃未开始的任务）"""
+    with _lock:
+        executors = list(_executors.items())
+        _executors.clear()
+    for name, executor in executors:
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info(f"线程池已关闭: {name}")
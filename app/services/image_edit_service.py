@@ -3,6 +3,7 @@
 使用 qwen-image-edit-plus 模型进行图片风格转换和编辑
 """
 
+import asyncio
 import logging
 import base64
 import httpx
@@ -13,6 +14,7 @@ from datetime import datetime
 import dashscope
 
 from ..config import get_settings
+from .outbound_governor import get_outbound_governor
 
 logger = logging.getLogger(__name__)
 
@@ -177,8 +179,11 @@ class ImageEditService:
         logger.debug(f"参数: {call_parameters}")
         
         try:
-            # 使用 DashScope SDK 调用 API
-            response = dashscope.MultiModalConversation.call(
+            # 使用 DashScope SDK 调用 API（同步 SDK 放到线程中执行，经由共享的限流/熔断治理）
+            response = await get_outbound_governor().call_async(
+                self._model_name,
+                asyncio.to_thread,
+                dashscope.MultiModalConversation.call,
                 api_key=self._api_key,
                 model=self._model_name,
                 messages=messages,
@@ -0,0 +1,262 @@
+"""
+远程图片下载服务
+为 async 路由下载图片 URL（如 /embedding/image 的 auto_store），不阻塞事件循环
+
+- 连接复用：进程内共享一个 httpx.AsyncClient 连接池
+- 大小限制：流式读取，Content-Length 或累计字节超过上限立即中止
+- 类型识别：按文件头魔数识别图片格式，不信任响应的 Content-Type
+- 响应缓存：短 TTL 的内存缓存（按总字节数 LRU 淘汰），过期后带 ETag 条件请求，304 时直接续期
+- 并发控制：同时下载数有上限；同一 URL 的并发请求合并为一次下载
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+from urllib.parse import urlparse
+
+import httpx
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# (魔数偏移, 魔数, MIME 类型, 扩展名)
+_IMAGE_SIGNATURES = [
+    (0, b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (0, b"GIF87a", "image/gif", ".gif"),
+    (0, b"GIF89a", "image/gif", ".gif"),
+    (8, b"WEBP", "image/webp", ".webp"),
+    (0, b"BM", "image/bmp", ".bmp"),
+]
+_SNIFF_BYTES = 12
+
+
+class ImageFetchError(RuntimeError):
+    """图片下载失败（URL 非法、上游错误、内容不是图片等）"""
+
+
+class ImageTooLargeError(ImageFetchError):
+    """图片超过下载大小上限"""
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """
+    按文件头识别图片格式
+
+    Args:
+        head: 文件开头至少 12 字节
+
+    Returns:
+        (MIME 类型, 扩展名)，无法识别时返回 None
+    """
+    for offset, magic, mime, extension in _IMAGE_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            if mime == "image/webp" and not head.startswith(b"RIFF"):
+                continue
+            return mime, extension
+    return None
+
+
+@dataclass(frozen=True)
+class FetchedImage:
+    """下载得到的图片"""
+    url: str
+    content: bytes
+    content_type: str
+    extension: str
+    etag: Optional[str] = None
+
+
+@dataclass
+class _CacheEntry:
+    image: FetchedImage
+    expires_at: float
+
+
+class ImageFetchService:
+    """远程图片下载服务（单例）"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if getattr(self, "_configured", False):
+            return
+        self._configured = True
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._cache_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "deduplicated": 0, "rejected": 0}
+
+        settings = get_settings()
+        self._max_bytes = settings.IMAGE_FETCH_MAX_BYTES
+        self._timeout = settings.IMAGE_FETCH_TIMEOUT
+        self._max_connections = settings.IMAGE_FETCH_MAX_CONNECTIONS
+        self._concurrency = settings.IMAGE_FETCH_CONCURRENCY
+        self._cache_ttl = settings.IMAGE_FETCH_CACHE_TTL
+        self._cache_max_bytes = settings.IMAGE_FETCH_CACHE_MAX_BYTES
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端（首次使用时创建）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections
+                ),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(max(1, self._concurrency))
+        return self._client
+
+    async def fetch(self, url: str) -> FetchedImage:
+        """
+        下载图片
+
+        同一 URL 的并发调用共享一次下载；调用方被取消不会中断其他调用方正在等待的下载。
+
+        Args:
+            url: http(s) 图片地址
+
+        Returns:
+            FetchedImage
+
+        Raises:
+            ImageTooLargeError: 超过大小上限
+            ImageFetchError: 其他下载失败
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise ImageFetchError(f"仅支持 http/https 图片地址: {url}")
+
+        entry = self._cache.get(url)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._cache.move_to_end(url)
+            self._stats["hits"] += 1
+            return entry.image
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_cache(url, entry))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        else:
+            self._stats["deduplicated"] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, url: str, stale: Optional[_CacheEntry]) -> FetchedImage:
+        """下载（或用 ETag 重新验证）并写入缓存"""
+        client = self._get_client()
+        headers = {}
+        if stale is not None and stale.image.etag:
+            headers["If-None-Match"] = stale.image.etag
+
+        async with self._semaphore:
+            try:
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and stale is not None:
+                        self._stats["revalidated"] += 1
+                        image = stale.image
+                    else:
+                        self._stats["misses"] += 1
+                        image = await self._read_image(url, response)
+            except httpx.HTTPError as e:
+                raise ImageFetchError(f"下载图片失败: {url}: {e}") from e
+
+        self._store(url, image)
+        return image
+
+    async def _read_image(self, url: str, response: httpx.Response) -> FetchedImage:
+        """流式读取响应体，检查大小和图片格式"""
+        if response.status_code != 200:
+            raise ImageFetchError(f"下载图片失败: {url}: HTTP {response.status_code}")
+
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self._max_bytes:
+            self._stats["rejected"] += 1
+            raise ImageTooLargeError(f"图片大小 {declared} 字节超过上限 {self._max_bytes}")
+
+        chunks = []
+        received = 0
+        sniffed = None
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > self._max_bytes:
+                self._stats["rejected"] += 1
+                raise ImageTooLargeError(f"图片大小超过上限 {self._max_bytes} 字节")
+            chunks.append(chunk)
+            if sniffed is None and received >= _SNIFF_BYTES:
+                sniffed = self._sniff_or_reject(url, b"".join(chunks)[:_SNIFF_BYTES])
+
+        content = b"".join(chunks)
+        if sniffed is None:
+            sniffed = self._sniff_or_reject(url, content)
+
+        content_type, extension = sniffed
+        return FetchedImage(
+            url=url,
+            content=content,
+            content_type=content_type,
+            extension=extension,
+            etag=response.headers.get("ETag")
+        )
+
+    def _sniff_or_reject(self, url: str, head: bytes) -> tuple:
+        sniffed = sniff_image_type(head)
+        if sniffed is None:
+            self._stats["rejected"] += 1
+            raise ImageFetchError(f"URL 内容不是支持的图片格式: {url}")
+        return sniffed
+
+    def _store(self, url: str, image: FetchedImage) -> None:
+        """写入缓存并按总字节数淘汰最久未用的条目"""
+        if self._cache_ttl <= 0 or len(image.content) > self._cache_max_bytes:
+            return
+        old = self._cache.pop(url, None)
+        if old is not None:
+            self._cache_bytes -= len(old.image.content)
+        self._cache[url] = _CacheEntry(image, time.monotonic() + self._cache_ttl)
+        self._cache_bytes += len(image.content)
+        while self._cache_bytes > self._cache_max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted.image.content)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存与下载计数"""
+        return {
+            **self._stats,
+            "cached_urls": len(self._cache),
+            "cached_bytes": self._cache_bytes,
+            "inflight": len(self._inflight),
+        }
+
+    def clear_cache(self) -> None:
+        """清空响应缓存"""
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+            logger.info("图片下载连接池已关闭")
+
+
+def get_image_fetch_service() -> ImageFetchService:
+    """获取图片下载服务实例"""
+    return ImageFetchService()
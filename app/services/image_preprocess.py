@@ -0,0 +1,237 @@
+"""
+Embedding 图片预处理模块
+在图片上传到 DashScope 之前完成 EXIF 方向校正、按模型像素预算降采样和重新编码
+
+qwen3-vl-embedding 在服务端会把图片缩放到 MAX_PIXELS 以内，
+手机原图（12MP+、数 MB）多出来的像素只会占用上行带宽，不会提升向量质量。
+"""
+
+import io
+import base64
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Dict, Any, Union, Tuple
+
+from PIL import Image, ImageOps
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 与 qwen-vl-utils 保持一致：宽高需为 IMAGE_FACTOR 的整数倍
+IMAGE_FACTOR = 32
+
+# 无需重新编码即可直接上传的格式
+_PASSTHROUGH_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+_preprocess_pool: Optional[ProcessPoolExecutor] = None
+
+
+def smart_resize(
+    height: int,
+    width: int,
+    min_pixels: int,
+    max_pixels: int,
+    factor: int = IMAGE_FACTOR
+) -> Tuple[int, int]:
+    """
+    计算模型实际使用的分辨率（与 qwen-vl-utils 的 smart_resize 算法一致）
+
+    Args:
+        height: 原始高度
+        width: 原始宽度
+        min_pixels: 最小像素数
+        max_pixels: 最大像素数
+        factor: 宽高对齐因子
+
+    Returns:
+        (目标高度, 目标宽度)
+    """
+    h_bar = max(factor, round(height / factor) * factor)
+    w_bar = max(factor, round(width / factor) * factor)
+    if h_bar * w_bar > max_pixels:
+        beta = math.sqrt((height * width) / max_pixels)
+        h_bar = max(factor, math.floor(height / beta / factor) * factor)
+        w_bar = max(factor, math.floor(width / beta / factor) * factor)
+    elif h_bar * w_bar < min_pixels:
+        beta = math.sqrt(min_pixels / (height * width))
+        h_bar = math.ceil(height * beta / factor) * factor
+        w_bar = math.ceil(width * beta / factor) * factor
+    return h_bar, w_bar
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """转换为 RGB 模式，透明区域填充为白色（与原有临时文件逻辑一致）"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def preprocess_image(
+    image: Image.Image,
+    min_pixels: int,
+    max_pixels: int,
+    quality: int,
+    original_bytes: Optional[bytes] = None
+) -> Dict[str, Any]:
+    """
+    对已打开的图片执行方向校正、降采样和重新编码
+
+    Args:
+        image: PIL Image 对象
+        min_pixels: 最小像素数
+        max_pixels: 最大像素数
+        quality: JPEG 编码质量
+        original_bytes: 原始文件内容（无需处理时直接复用，避免无谓的重新编码）
+
+    Returns:
+        包含 data_uri、原始/编码后字节数、输出尺寸的字典
+    """
+    source_format = image.format
+
+    # EXIF Orientation 标签（0x0112），1 表示无需旋转
+    rotated = image.getexif().get(0x0112, 1) != 1
+    if rotated:
+        image = ImageOps.exif_transpose(image)
+
+    target_h, target_w = smart_resize(image.height, image.width, min_pixels, max_pixels)
+    # 只做降采样：小图交给模型自己放大，放大后上传只会增加字节数
+    needs_resize = target_h * target_w < image.height * image.width
+
+    original_size = len(original_bytes) if original_bytes is not None else None
+
+    if (
+        original_bytes is not None
+        and not needs_resize
+        and not rotated
+        and source_format in _PASSTHROUGH_FORMATS
+    ):
+        mime = Image.MIME.get(source_format, "image/jpeg")
+        payload = original_bytes
+        out_w, out_h = image.size
+    else:
+        if needs_resize:
+            image = image.resize((target_w, target_h), Image.Resampling.BICUBIC)
+        image = _to_rgb(image)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        payload = buffer.getvalue()
+        mime = "image/jpeg"
+        out_w, out_h = image.size
+
+        # 未做几何变换且重新编码反而更大时，保留原文件
+        if (
+            original_bytes is not None
+            and not needs_resize
+            and not rotated
+            and source_format in _PASSTHROUGH_FORMATS
+            and len(payload) >= len(original_bytes)
+        ):
+            payload = original_bytes
+            mime = Image.MIME.get(source_format, "image/jpeg")
+
+    encoded = base64.b64encode(payload).decode("ascii")
+    return {
+        "data_uri": f"data:{mime};base64,{encoded}",
+        "original_bytes": original_size,
+        "encoded_bytes": len(payload),
+        "width": out_w,
+        "height": out_h,
+        "resized": needs_resize,
+    }
+
+
+def preprocess_image_file(
+    path: str,
+    min_pixels: int,
+    max_pixels: int,
+    quality: int
+) -> Dict[str, Any]:
+    """
+    读取本地图片文件并预处理（在进程池 worker 中执行）
+
+    Args:
+        path: 图片文件路径
+        min_pixels: 最小像素数
+        max_pixels: 最大像素数
+        quality: JPEG 编码质量
+
+    Returns:
+        预处理结果字典，见 preprocess_image
+    """
+    content = Path(path).read_bytes()
+    with Image.open(io.BytesIO(content)) as image:
+        return preprocess_image(image, min_pixels, max_pixels, quality, original_bytes=content)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """获取预处理进程池，workers 为 0 时返回 None（在调用线程内处理）"""
+    global _preprocess_pool
+    workers = get_settings().EMBEDDING_PREPROCESS_WORKERS
+    if workers <= 0:
+        return None
+    if _preprocess_pool is None:
+        _preprocess_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.info(f"Embedding 图片预处理进程池已启动 (workers: {workers})")
+    return _preprocess_pool
+
+
+def prepare_image_for_upload(image: Union[str, Image.Image]) -> Dict[str, Any]:
+    """
+    将本地图片路径或 PIL Image 预处理为可直接提交给 DashScope 的 data URI
+
+    文件路径在进程池中处理（解码和缩放是 CPU 密集型操作，不应占用请求线程的 GIL）；
+    PIL Image 已在内存中，直接在当前线程处理，避免跨进程序列化整张位图。
+
+    Args:
+        image: 本地图片路径或 PIL Image 对象
+
+    Returns:
+        预处理结果字典，见 preprocess_image
+    """
+    settings = get_settings()
+    params = (settings.MIN_PIXELS, settings.MAX_PIXELS, settings.EMBEDDING_IMAGE_QUALITY)
+
+    if isinstance(image, Image.Image):
+        return preprocess_image(image, *params)
+
+    path = str(image)
+    if path.startswith("file://"):
+        path = path[len("file://"):]
+
+    global _preprocess_pool
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(preprocess_image_file, path, *params).result()
+        except BrokenProcessPool:
+            logger.warning("图片预处理进程池已损坏，重建后在当前线程处理")
+            _preprocess_pool = None
+    return preprocess_image_file(path, *params)
+
+
+def is_local_image_path(image: str) -> bool:
+    """判断是否为本地文件路径（URL 和 data URI 交由 DashScope 直接处理）"""
+    lowered = image.lower()
+    if lowered.startswith(("http://", "https://", "oss://", "data:")):
+        return False
+    if lowered.startswith("file://"):
+        return True
+    return Path(image).is_file()
+
+
+def shutdown_preprocess_pool() -> None:
+    """关闭预处理进程池"""
+    global _preprocess_pool
+    if _preprocess_pool is not None:
+        _preprocess_pool.shutdown(wait=True, cancel_futures=True)
+        _preprocess_pool = None
+        logger.info("Embedding 图片预处理进程池已关闭")
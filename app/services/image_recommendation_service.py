@@ -12,6 +12,8 @@ from httpx import AsyncClient, TimeoutException, HTTPStatusError
 import asyncio
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from .outbound_governor import get_outbound_governor
+
 logger = logging.getLogger(__name__)
 
 
@@ -266,7 +268,9 @@ class ImageRecommendationService:
         )
         
         try:
-            response = await self._vl_client.post(
+            response = await get_outbound_governor().call_async(
+                self._settings.VISION_MODEL_NAME,
+                self._vl_client.post,
                 "/chat/completions",
                 json=payload
             )
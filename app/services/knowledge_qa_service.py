@@ -9,6 +9,7 @@ from typing import Optional, Dict, Any
 from openai import OpenAI
 from ..config import get_settings
 from .storage_service import get_storage_service
+from .outbound_governor import get_outbound_governor
 
 logger = logging.getLogger(__name__)
 
@@ -117,7 +118,9 @@ class KnowledgeQAService:
 
             # 4. 调用模型
             client = self._get_client()
-            response = client.chat.completions.create(
+            response = get_outbound_governor().call(
+                self.settings.VISION_MODEL_NAME,
+                client.chat.completions.create,
                 model=self.settings.VISION_MODEL_NAME,
                 messages=[
                     {
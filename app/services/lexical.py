@@ -0,0 +1,124 @@
+"""
+关键词检索的稀疏向量（BM25）
+
+文件名、标签和描述切分为词元后按词元哈希映射到稀疏向量的下标，文档侧的值为 BM25 的词频部分
+（按文档长度归一化的饱和词频），IDF 由 Qdrant 在检索时按集合统计（稀疏向量配置 modifier=IDF），
+查询侧每个词元的值为出现次数，两者点积即 BM25 分数。
+
+中文没有空格分词，连续的中日韩字符切分为单字和相邻两字（二元组）：单字保证单字查询（"猫"）能命中，
+二元组让 "海边" 这类词优先于只含 "海" 或 "边" 的记录；不依赖分词词典，新词和人名同样可检索。
+字母数字按原样小写保留，带 _ - . 的整体（"img_2041"）和各段（"img"、"2041"）都作为词元。
+"""
+
+import re
+import zlib
+import unicodedata
+from pathlib import Path
+from collections import Counter
+from typing import Optional, List, Dict, Any
+
+from qdrant_client.http.models import SparseVector
+
+# 生成关键词向量的 payload 字段
+LEXICAL_FIELDS = ("filename", "tags", "description")
+
+# BM25 参数：词频饱和度、文档长度归一化强度、平均文档长度（词元数，相册记录的文本都很短）
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_LENGTH = 24.0
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"  # 假名、中日韩统一表意文字、谚文
+_TOKEN_PATTERN = re.compile(rf"(?P<cjk>[{_CJK}]+)|(?P<word>[0-9a-z]+(?:[_\-.][0-9a-z]+)*)")
+_WORD_SEPARATORS = re.compile(r"[_\-.]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    切分词元（全角字符先按 NFKC 转为半角，字母转为小写）
+
+    Args:
+        text: 文本
+
+    Returns:
+        词元列表（保留重复，用于统计词频）
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        run = match.group("cjk")
+        if run:
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            continue
+        word = match.group("word")
+        tokens.append(word)
+        parts = _WORD_SEPARATORS.split(word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+def token_index(token: str) -> int:
+    """词元在稀疏向量中的下标（CRC32，跨进程稳定）"""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def lexical_tokens(payload: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    由 payload 的文件名（不含扩展名）、标签和描述切分词元
+
+    Args:
+        payload: 记录的元数据
+
+    Returns:
+        词元列表
+    """
+    payload = payload or {}
+    tokens = []
+    filename = payload.get("filename")
+    if filename:
+        tokens.extend(tokenize(Path(str(filename)).stem))
+    tags = payload.get("tags") or []
+    for tag in tags if isinstance(tags, list) else [tags]:
+        tokens.extend(tokenize(tag))
+    tokens.extend(tokenize(payload.get("description")))
+    return tokens
+
+
+def _sparse(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def lexical_vector(payload: Optional[Dict[str, Any]]) -> SparseVector:
+    """
+    文档侧的关键词向量：每个词元的 BM25 词频部分 tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len))
+
+    Args:
+        payload: 记录的元数据
+
+    Returns:
+        稀疏向量，没有可检索的文本时为空向量
+    """
+    tokens = lexical_tokens(payload)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_LENGTH)
+    counts = Counter(token_index(token) for token in tokens)
+    return _sparse({index: tf * (BM25_K1 + 1) / (tf + norm) for index, tf in counts.items()})
+
+
+def lexical_query(text: Optional[str]) -> Optional[SparseVector]:
+    """
+    查询侧的关键词向量：每个词元的值为出现次数
+
+    Args:
+        text: 查询文本
+
+    Returns:
+        稀疏向量，查询中没有可检索的词元时返回 None
+    """
+    counts = Counter(token_index(token) for token in tokenize(text))
+    if not counts:
+        return None
+    return _sparse({index: float(count) for index, count in counts.items()})
@@ -0,0 +1,187 @@
+"""
+本地 Embedding 模型的 CPU 推理引擎
+在没有 CUDA 的边缘设备上运行 Qwen3-VL Embedding 模型
+
+优化手段：
+- 线程控制：按配置设置 intra-op / inter-op 线程数，避免与 Web 进程的其他线程争抢核心
+- int8 动态量化：Linear 层权重量化为 int8，激活在运行时量化（torch.ao.quantization.quantize_dynamic），
+  内存占用约降为 1/4，矩阵乘法走 int8 GEMM
+- 图编译：可选 torch.compile 将模型前向编译为融合后的计算图，编译失败时自动回退到 eager
+- 预分配输出：批量推理按固定大小的微批执行，每次调用按输入条数分配一个 float32 矩阵，
+  各微批结果直接写入对应的行后返回，不拼接张量，也不经 .tolist() 中转
+
+分词和图片切块仍由 Qwen3VLEmbedder 完成，引擎只接管模型前向的执行方式。
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCRIPTS_PATH = Path(__file__).parent.parent.parent / "qwen3-vl-embedding-2B" / "scripts"
+
+
+def configure_cpu_threads(num_threads: int = 0, interop_threads: int = 1) -> int:
+    """
+    设置 PyTorch CPU 线程数
+
+    Args:
+        num_threads: intra-op 线程数，0 表示使用全部可用核心
+        interop_threads: inter-op 线程数（单请求串行前向时 1 即可）
+
+    Returns:
+        实际使用的 intra-op 线程数
+    """
+    import torch
+
+    if num_threads <= 0:
+        num_threads = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(max(1, interop_threads))
+    except RuntimeError:
+        # inter-op 线程池在首次并行计算后不可再修改
+        logger.debug("inter-op 线程数已固定，跳过设置")
+    return num_threads
+
+
+def quantize_linear_int8(model):
+    """对模型中的 Linear 层做 int8 动态量化（原地替换）"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def model_size_bytes(model) -> int:
+    """统计模型参数和缓冲区占用的字节数（量化后的打包权重计入 state_dict）"""
+    total = 0
+    for value in model.state_dict().values():
+        if hasattr(value, "element_size"):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            # 量化 Linear 的 _packed_params 为 (weight, bias)
+            for item in value:
+                if hasattr(item, "element_size"):
+                    total += item.numel() * item.element_size()
+    return total
+
+
+class CPUEmbeddingEngine:
+    """
+    CPU 推理引擎
+
+    对外接口与 Qwen3VLEmbedder 保持一致（process / model），可直接替换 EmbeddingService 中的本地模型
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        max_batch: int = 8,
+        quantized: bool = False,
+        compiled: bool = False
+    ):
+        self._embedder = embedder
+        self._max_batch = max(1, max_batch)
+        self._dimension = embedder.model.config.hidden_size
+        # 前向本身已用满 intra-op 线程，并发请求串行执行
+        self._lock = threading.Lock()
+        self.quantized = quantized
+        self.compiled = compiled
+
+    @classmethod
+    def load(
+        cls,
+        model_path: str,
+        num_threads: int = 0,
+        quantize: bool = True,
+        compile_graph: bool = False,
+        max_batch: int = 8
+    ) -> "CPUEmbeddingEngine":
+        """
+        加载模型并应用 CPU 优化
+
+        Args:
+            model_path: 本地模型路径
+            num_threads: intra-op 线程数，0 表示全部核心
+            quantize: 是否启用 int8 动态量化
+            compile_graph: 是否使用 torch.compile 编译前向计算图
+            max_batch: 单次前向的最大批量
+
+        Returns:
+            CPUEmbeddingEngine 实例
+        """
+        threads = configure_cpu_threads(num_threads)
+
+        sys.path.insert(0, str(SCRIPTS_PATH))
+        from qwen3_vl_embedding import Qwen3VLEmbedder
+
+        logger.info(f"正在以 CPU 模式加载 Embedding 模型: {model_path} (threads: {threads})")
+        start = time.perf_counter()
+        embedder = Qwen3VLEmbedder(model_path=model_path, device="cpu")
+        embedder.model.eval()
+        full_size = model_size_bytes(embedder.model)
+
+        if quantize:
+            quantize_linear_int8(embedder.model)
+            logger.info(
+                f"int8 动态量化完成: {full_size / 2**20:.0f}MB -> "
+                f"{model_size_bytes(embedder.model) / 2**20:.0f}MB"
+            )
+
+        engine = cls(embedder, max_batch=max_batch, quantized=quantize)
+
+        if compile_graph:
+            engine._compile()
+
+        logger.info(f"CPU Embedding 引擎就绪，耗时 {time.perf_counter() - start:.1f}s")
+        return engine
+
+    def _compile(self) -> None:
+        """编译模型前向，预热一次触发编译；失败则回退到 eager 执行"""
+        import torch
+
+        eager_forward = self._embedder.model.forward
+        try:
+            self._embedder.model.forward = torch.compile(eager_forward, dynamic=True)
+            self.process([{"text": "warmup"}])
+            self.compiled = True
+            logger.info("模型前向已编译（torch.compile）")
+        except Exception as e:
+            self._embedder.model.forward = eager_forward
+            self.compiled = False
+            logger.warning(f"torch.compile 编译失败，回退到 eager 执行: {e}")
+
+    @property
+    def model(self):
+        """底层模型（兼容 EmbeddingService 读取 config.hidden_size）"""
+        return self._embedder.model
+
+    def process(self, inputs: List[Dict[str, Any]], normalize: bool = True) -> np.ndarray:
+        """
+        批量生成向量
+
+        Args:
+            inputs: 输入列表，每个元素包含 text、image、instruction 等字段
+            normalize: 是否归一化
+
+        Returns:
+            形状为 (len(inputs), hidden_size) 的 float32 矩阵（每次调用新分配，调用方可自由持有）
+        """
+        import torch
+
+        output = np.empty((len(inputs), self._dimension), dtype=np.float32)
+        with self._lock, torch.inference_mode():
+            for start in range(0, len(inputs), self._max_batch):
+                chunk = inputs[start:start + self._max_batch]
+                embeddings = self._embedder.process(chunk, normalize=normalize)
+                output[start:start + len(chunk)] = embeddings.float().numpy()
+        return output
@@ -0,0 +1,751 @@
+"""
+向量集合迁移服务
+更换 Embedding 模型 / 维度或重建索引时不中断检索：在影子集合中构建新索引，完成后原子切换别名
+
+流程：
+1. start：按目标模型和维度（默认与当前相同，即按当前模型重建）创建影子集合 <集合名>_<时间戳>，
+   开始双写并在后台线程中回填
+2. 双写：迁移期间对当前集合的写入由 VectorDBService 通知本服务（set_shadow）。新增记录按ID
+   从图片存储读取原图，用目标模型生成向量后写入影子集合（影子集合有文本向量时一并生成）；
+   元数据修改和删除直接同步，修改了文本向量的来源字段时按新的元数据重新生成
+3. 回填：按页遍历当前集合（所有租户），从图片存储找到原图，分批并发生成目标向量并写入影子集合；
+   每页完成后把进度（scroll 偏移量）写入检查点文件，进程重启后从检查点继续。
+   回填结束后做一次追平：同步回填期间修改过的元数据，删除回填期间已被删除的记录
+4. verify：比较两个集合的记录数（覆盖率），并对抽样记录比较两个集合中的近邻（召回率）
+5. swap：再次追平后，在一个请求中把别名 <集合名>_live 指向影子集合（Qdrant 原子切换），
+   本进程随即改用目标模型生成查询向量；原集合保留，rollback 可把别名指回原集合
+
+限制：
+- 只支持 Qdrant 后端，不支持 collection 租户模式（每个租户一个集合）
+- 不在图片存储中的记录（直接通过 /vectors 写入的外部向量）无法用新模型重新生成，计为 missing
+- 双写只覆盖运行迁移的进程；多进程部署中其他进程的写入在追平时按 updated_at 补齐，
+  切换后其他进程需要重启（并更新 Embedding 配置）才会改用目标模型
+- 切换后写入的记录只存在于新集合，rollback 后不可见
+"""
+
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, asdict, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from qdrant_client.http.models import (
+    PointStruct,
+    Filter,
+    FieldCondition,
+    HasIdCondition,
+    DatetimeRange,
+)
+
+from .tenancy import TENANT_FIELD, tenant_scope
+from .lexical import lexical_vector
+from .vector_utils import as_float32_matrix
+from .vector_db_service import (
+    VectorDBService,
+    COARSE_VECTOR_NAME,
+    FULL_VECTOR_NAME,
+    TEXT_VECTOR_FIELDS,
+    TEXT_VECTOR_INSTRUCTION,
+    text_vector_input,
+)
+
+logger = logging.getLogger(__name__)
+
+# 进行中的状态（同一时间只允许一个迁移）
+ACTIVE_STATES = ("backfilling", "ready", "verified")
+INDEX_INSTRUCTION = "Represent this image for retrieval."
+# 最多记录的失败ID数
+_MAX_FAILED_IDS = 100
+# 检查近邻时每条抽样记录比较的邻居数
+_RECALL_K = 10
+# 校验抽样时每页读取的ID数
+_SAMPLE_PAGE_SIZE = 4096
+
+
+@dataclass
+class MigrationState:
+    """迁移状态（即检查点，保存为 JSON）"""
+    id: str
+    source: str  # 开始时实际读写的集合
+    target: str  # 影子集合
+    alias: str
+    dimension: int
+    model_name: Optional[str] = None  # None 表示与当前模型相同
+    status: str = "backfilling"  # backfilling | ready | verified | swapped | rolled_back | cancelled | failed
+    started_at: str = ""
+    source_points: int = 0
+    offset: Any = None  # 回填的 scroll 偏移量
+    backfill_done: bool = False
+    caught_up_at: Optional[str] = None
+    processed: int = 0  # 回填遍历的记录数
+    written: int = 0  # 写入影子集合的记录数（回填 + 双写）
+    dual_writes: int = 0
+    missing: int = 0  # 图片存储中找不到原图
+    failed: int = 0  # 生成向量失败
+    failed_ids: List[Any] = field(default_factory=list)
+    elapsed: float = 0.0  # 回填累计耗时，秒
+    verification: Optional[Dict[str, Any]] = None
+    swapped_at: Optional[str] = None
+    error: Optional[str] = None
+
+    def save(self, path: Path) -> None:
+        """先写临时文件再改名，检查点不会只写一半"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".partial")
+        partial.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding="utf-8")
+        partial.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["MigrationState"]:
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+
+class MigrationService:
+    """
+    向量集合迁移服务类
+    负责影子集合的构建、双写、校验和别名切换
+    """
+
+    _instance: Optional["MigrationService"] = None
+
+    def __new__(cls):
+        """单例模式"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        self._initialized = getattr(self, '_initialized', False)
+        self._vector_db = None
+        self._storage = None
+        self._embedding = None
+        self._state_path: Optional[Path] = None
+        self._batch_size: int = 8
+        self._concurrency: int = 4
+        self._verify_samples: int = 50
+        self._min_recall: float = 0.6
+        self._max_missing_ratio: float = 0.01
+        self._state: Optional[MigrationState] = getattr(self, '_state', None)
+        self._client: Any = None  # 目标模型的 Embedding 客户端，None 表示使用当前模型
+        self._previous_client: Any = None  # 切换前的 Embedding 客户端（rollback 使用）
+        self._target_config: Any = None
+        self._target_text_vectors: List[str] = []  # 影子集合包含的文本向量（用目标模型重新生成）
+        self._target_lexical: bool = False  # 影子集合是否有关键词向量
+        self._cond = threading.Condition()
+        self._queue: Dict[Any, Dict[str, Any]] = {}  # 双写待处理：记录ID -> payload
+        self._in_flight: set = set()
+        self._late_deletes: set = set()  # 处理中被删除的记录
+        self._paths: Dict[Optional[str], Dict[str, Path]] = {}  # 租户 -> {图片ID: 路径}
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def initialize(
+        self,
+        vector_db_service: VectorDBService,
+        storage_service: Any,
+        embedding_service: Any,
+        state_path: str,
+        batch_size: int = 8,
+        concurrency: int = 4,
+        verify_samples: int = 50,
+        min_recall: float = 0.6,
+        max_missing_ratio: float = 0.01
+    ) -> None:
+        """
+        初始化迁移服务；检查点中有未完成的迁移时恢复双写并继续回填
+
+        Args:
+            vector_db_service: 向量数据库服务
+            storage_service: 图片存储服务（回填时读取原图）
+            embedding_service: Embedding 服务
+            state_path: 检查点文件路径
+            batch_size: 每次生成向量的图片数
+            concurrency: 同时进行的向量生成批次数
+            verify_samples: 校验时抽样的记录数
+            min_recall: 校验通过所需的近邻召回率
+            max_missing_ratio: 校验通过允许的缺失比例（原图缺失或生成失败）
+        """
+        self._vector_db = vector_db_service
+        self._storage = storage_service
+        self._embedding = embedding_service
+        self._state_path = Path(state_path)
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        self._verify_samples = max(1, verify_samples)
+        self._min_recall = min_recall
+        self._max_missing_ratio = max_missing_ratio
+        self._state = MigrationState.load(self._state_path)
+        self._initialized = True
+
+        state = self._state
+        if state is not None and state.status in ACTIVE_STATES:
+            if not self._vector_db.collection_exists(state.target):
+                logger.warning(f"影子集合 {state.target} 不存在，迁移标记为失败")
+                self._fail("影子集合不存在")
+            else:
+                logger.info(f"从检查点恢复迁移 {state.id}（{state.status}，已遍历 {state.processed} 条）")
+                self._attach(state)
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    # ==================== 控制接口 ====================
+
+    def start(
+        self,
+        model_name: Optional[str] = None,
+        dimension: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        创建影子集合，开始双写和后台回填
+
+        Args:
+            model_name: 目标 Embedding 模型，默认与当前相同
+            dimension: 目标向量维度，默认与当前相同
+            batch_size: 每次生成向量的图片数，默认取初始化配置
+            concurrency: 同时进行的向量生成批次数，默认取初始化配置
+
+        Returns:
+            迁移状态
+
+        Raises:
+            ValueError: 已有进行中的迁移、后端或租户模式不支持、目标模型不可用
+        """
+        self._check()
+        vector_db = self._vector_db
+        if vector_db.backend != "qdrant":
+            raise ValueError("NumPy 引擎不支持集合迁移")
+        if vector_db.tenant_mode == "collection":
+            raise ValueError("collection 租户模式不支持集合迁移")
+        if self._state is not None and self._state.status in ACTIVE_STATES:
+            raise ValueError(f"已有进行中的迁移: {self._state.id}（{self._state.status}）")
+
+        if model_name or dimension:
+            self._client = self._embedding.derive_client(model_name=model_name, dimension=dimension)
+            dimension = self._client.get_vector_dimension()
+        else:
+            self._client = None
+            dimension = self._embedding.vector_dimension
+        self._previous_client = None
+        self._batch_size = max(1, batch_size or self._batch_size)
+        self._concurrency = max(1, concurrency or self._concurrency)
+
+        source = vector_db.physical_collection()
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        target = f"{vector_db.base_collection_name}_{stamp}"
+        vector_db.create_collection(target, dimension=dimension)
+
+        self._state = MigrationState(
+            id=stamp,
+            source=source,
+            target=target,
+            alias=vector_db.live_alias,
+            dimension=dimension,
+            model_name=model_name,
+            started_at=datetime.now().isoformat(),
+            source_points=vector_db.count_collection(source)
+        )
+        self._save()
+        logger.info(f"开始迁移 {source} -> {target} (dimension: {dimension}, model: {model_name or '当前模型'})")
+        self._attach(self._state)
+        return self.get_status()
+
+    def verify(self, sample_size: Optional[int] = None, min_recall: Optional[float] = None) -> Dict[str, Any]:
+        """
+        校验影子集合：记录覆盖率，以及抽样记录在两个集合中的近邻重合度（recall@10）
+
+        按当前模型重建时召回率应接近 1；更换模型时近邻本身会变化，min_recall 应按模型差异设置。
+
+        Args:
+            sample_size: 抽样记录数，默认取初始化配置
+            min_recall: 通过所需的召回率，默认取初始化配置
+
+        Returns:
+            校验结果（passed 为是否通过，通过后状态变为 verified）
+
+        Raises:
+            ValueError: 没有回填完成的迁移
+        """
+        self._check()
+        state = self._state
+        if state is None or state.status not in ("ready", "verified"):
+            raise ValueError("没有回填完成的迁移")
+        self.flush()
+
+        vector_db = self._vector_db
+        source_count = vector_db.count_collection(state.source)
+        target_count = vector_db.count_collection(state.target)
+        coverage = target_count / source_count if source_count else 1.0
+
+        sample = self._sample_ids(state.target, sample_size or self._verify_samples)
+        source_using = self._search_vector(vector_db.collection_layout(state.source)[0])
+        target_using = self._search_vector(self._target_config)
+        recalls = []
+        for id in sample:
+            expected = self._neighbours(state.source, id, source_using)
+            if not expected:
+                continue
+            actual = self._neighbours(state.target, id, target_using)
+            recalls.append(len(expected & actual) / len(expected))
+        recall = float(np.mean(recalls)) if recalls else 1.0
+
+        min_recall = self._min_recall if min_recall is None else min_recall
+        passed = coverage >= 1.0 - self._max_missing_ratio and recall >= min_recall
+        result = {
+            "source_points": source_count,
+            "target_points": target_count,
+            "coverage": round(coverage, 4),
+            "samples": len(recalls),
+            "recall_at_10": round(recall, 4),
+            "min_recall": min_recall,
+            "passed": passed,
+            "verified_at": datetime.now().isoformat()
+        }
+        with self._cond:
+            state.verification = result
+            state.status = "verified" if passed else "ready"
+            self._save()
+        logger.info(f"迁移校验{'通过' if passed else '未通过'}: {result}")
+        return result
+
+    def swap(self, force: bool = False, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        追平后把别名原子切换到影子集合，本进程改用目标模型
+
+        Args:
+            force: 未通过校验时也切换
+            timeout: 等待双写队列清空的最长秒数
+
+        Returns:
+            迁移状态
+
+        Raises:
+            ValueError: 迁移未回填完成，或未通过校验且 force=False
+            RuntimeError: 双写队列未能在超时前清空（别名已切换时保持双写，再次调用 swap 完成切换）
+        """
+        self._check()
+        state = self._state
+        if state is None or state.status not in ("ready", "verified"):
+            raise ValueError("没有回填完成的迁移")
+        if state.status != "verified" and not force:
+            raise ValueError("迁移未通过校验，请先调用 verify（或使用 force）")
+
+        if self._vector_db.physical_collection() != state.target:
+            self._catch_up(state.caught_up_at or state.started_at)
+            if not self.flush(timeout):
+                raise RuntimeError("双写队列未能在超时前清空，请稍后重试")
+            self._vector_db.switch_live_alias(state.target)
+        if self._client is not None and self._previous_client is None:
+            self._previous_client = self._embedding.swap_client(self._client)
+        # 别名切换与改用目标模型之间写入的记录由双写补齐，清空前停止双写会丢失这些记录
+        if not self.flush(timeout):
+            raise RuntimeError("别名已切换，但双写队列未能在超时前清空，请稍后再次调用 swap 完成切换")
+        self._detach()
+        with self._cond:
+            state.status = "swapped"
+            state.swapped_at = datetime.now().isoformat()
+            self._save()
+        logger.info(f"迁移已切换: {state.alias} -> {state.target}（原集合 {state.source} 保留）")
+        return self.get_status()
+
+    def rollback(self) -> Dict[str, Any]:
+        """
+        把别名指回原集合（切换后写入的记录只在新集合中）
+
+        Raises:
+            ValueError: 没有已切换的迁移
+        """
+        self._check()
+        state = self._state
+        if state is None or state.status != "swapped":
+            raise ValueError("没有已切换的迁移")
+        self._vector_db.switch_live_alias(state.source)
+        if self._previous_client is not None:
+            self._embedding.swap_client(self._previous_client)
+            self._previous_client = None
+        elif state.model_name or state.dimension != self._vector_db.vector_dimension:
+            logger.warning("切换前的 Embedding 客户端不在本进程中，请恢复原 Embedding 配置并重启")
+        with self._cond:
+            state.status = "rolled_back"
+            self._save()
+        logger.info(f"迁移已回滚: {state.alias} -> {state.source}")
+        return self.get_status()
+
+    def cancel(self, drop: bool = True) -> Dict[str, Any]:
+        """
+        取消进行中的迁移
+
+        Args:
+            drop: 是否删除影子集合
+
+        Raises:
+            ValueError: 没有进行中的迁移
+        """
+        self._check()
+        state = self._state
+        if state is None or state.status not in ACTIVE_STATES:
+            raise ValueError("没有进行中的迁移")
+        if self._vector_db.physical_collection() == state.target:
+            raise ValueError("别名已切换到影子集合，请先完成 swap 再 rollback")
+        self._detach()
+        if drop:
+            self._vector_db.drop_collection(state.target)
+        with self._cond:
+            state.status = "cancelled"
+            self._save()
+        logger.info(f"迁移已取消: {state.id}")
+        return self.get_status()
+
+    def get_status(self) -> Optional[Dict[str, Any]]:
+        """迁移进度：状态、回填进度、吞吐量（点/秒）、预计剩余时间、双写队列长度"""
+        with self._cond:
+            state = self._state
+            if state is None:
+                return None
+            status = asdict(state)
+            queued = len(self._queue) + len(self._in_flight)
+        throughput = state.written / state.elapsed if state.elapsed > 0 else 0.0
+        remaining = max(0, state.source_points - state.processed)
+        status.update(
+            queued=queued,
+            running=self._worker is not None and self._worker.is_alive(),
+            progress=round(min(1.0, state.processed / state.source_points), 4) if state.source_points else 1.0,
+            throughput=round(throughput, 2),
+            eta_seconds=round(remaining / throughput, 1) if throughput > 0 and not state.backfill_done else None
+        )
+        return status
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待双写队列清空，返回是否在超时前完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                if self._worker is None or not self._worker.is_alive():
+                    return False
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    return False
+                self._cond.wait(wait)
+        return True
+
+    def close(self) -> None:
+        """停止后台线程（进度已在检查点中，下次启动时继续）"""
+        self._stop_worker()
+        if self._vector_db is not None:
+            self._vector_db.set_shadow(None)
+
+    # ==================== VectorDBService 写入通知（双写） ====================
+
+    def on_upsert(self, points: List[PointStruct]) -> None:
+        self._enqueue([(point.id, point.payload or {}) for point in points])
+
+    def on_update(self, ids: List[Any], payload: Dict[str, Any]) -> None:
+        with self._cond:
+            for id in ids:
+                if id in self._queue:
+                    self._queue[id] = {**self._queue[id], **payload}
+        if any(field in payload for name in self._target_text_vectors for field in TEXT_VECTOR_FIELDS[name]):
+            # 文本向量的来源字段被修改：按当前集合中完整的元数据重新生成
+            records, _ = self._vector_db.scroll_page(len(ids), None, Filter(must=[HasIdCondition(has_id=list(ids))]))
+            self._enqueue([(r["id"], r["metadata"] or {}) for r in records])
+        try:
+            self._vector_db.set_points_payload(self._state.target, list(ids), payload,
+                                               lexical=self._target_lexical, wait=False)
+        except Exception as e:
+            # 记录尚未回填时由回填或追平写入最新元数据
+            logger.debug(f"影子集合元数据同步跳过: {e}")
+
+    def on_delete(self, ids: List[Any]) -> None:
+        with self._cond:
+            for id in ids:
+                self._queue.pop(id, None)
+                if id in self._in_flight:
+                    self._late_deletes.add(id)
+        self._vector_db.delete_points(self._state.target, list(ids), wait=False)
+
+    # ==================== 后台线程 ====================
+
+    def _enqueue(self, items: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """加入双写队列（同一记录只保留最新的 payload），由后台线程生成目标向量后写入"""
+        with self._cond:
+            for id, payload in items:
+                self._queue[id] = payload
+                self._late_deletes.discard(id)
+            self._cond.notify_all()
+
+    def _attach(self, state: MigrationState) -> None:
+        """开始双写并启动后台线程"""
+        if self._client is None and (state.model_name or state.dimension != self._embedding.vector_dimension):
+            # 从检查点恢复：按记录的目标模型和维度重新创建客户端
+            self._client = self._embedding.derive_client(model_name=state.model_name, dimension=state.dimension)
+        self._target_config, self._target_text_vectors, self._target_lexical = \
+            self._vector_db.collection_layout(state.target)
+        self._paths = {}
+        self._vector_db.set_shadow(self)
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="vector-migration", daemon=True)
+        self._worker.start()
+
+    def _detach(self) -> None:
+        self._vector_db.set_shadow(None)
+        self._stop_worker()
+        with self._cond:
+            self._queue.clear()
+            self._in_flight.clear()
+            self._late_deletes.clear()
+            self._cond.notify_all()
+
+    def _stop_worker(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=30)
+            self._worker = None
+
+    def _run(self) -> None:
+        executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="migration-embed")
+        try:
+            while not self._stop.is_set():
+                if self._process_queue(executor):
+                    continue
+                state = self._state
+                if not state.backfill_done:
+                    self._backfill_page(executor)
+                elif state.caught_up_at is None:
+                    self._catch_up(state.started_at)
+                    with self._cond:
+                        state.status = "ready"
+                        self._save()
+                    logger.info(f"迁移回填完成: {self.get_status()}")
+                else:
+                    with self._cond:
+                        if not self._queue and not self._stop.is_set():
+                            self._cond.wait(1.0)
+        except Exception as e:
+            logger.error(f"迁移失败: {e}", exc_info=True)
+            self._fail(str(e))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _backfill_page(self, executor: ThreadPoolExecutor) -> None:
+        """回填一页并保存检查点"""
+        state = self._state
+        start = time.perf_counter()
+        page_size = self._batch_size * self._concurrency
+        # 不带租户过滤：payload 租户模式下所有租户共用集合，一起迁移
+        records, next_offset = self._vector_db.scroll_page(page_size, state.offset, None)
+        written = self._write(executor, [(record["id"], record["metadata"] or {}) for record in records])
+        with self._cond:
+            state.processed += len(records)
+            state.written += written
+            state.offset = next_offset
+            state.backfill_done = next_offset is None
+            state.elapsed += time.perf_counter() - start
+            self._save()
+
+    def _process_queue(self, executor: ThreadPoolExecutor) -> bool:
+        """处理一批双写记录，队列为空时返回 False"""
+        with self._cond:
+            if not self._queue:
+                return False
+            ids = list(self._queue)[:self._batch_size * self._concurrency]
+            items = [(id, self._queue.pop(id)) for id in ids]
+            self._in_flight.update(ids)
+        try:
+            written = self._write(executor, items)
+        finally:
+            with self._cond:
+                late = self._late_deletes & self._in_flight
+                self._in_flight.clear()
+                self._late_deletes.clear()
+                self._state.written += written
+                self._state.dual_writes += written
+                self._cond.notify_all()
+        if late:
+            self._vector_db.delete_points(self._state.target, list(late))
+        return True
+
+    def _write(self, executor: ThreadPoolExecutor, items: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """为记录找到原图、分批并发生成目标向量并写入影子集合，返回写入数"""
+        kept, inputs, missing = [], [], 0
+        for id, payload in items:
+            path = self._image_path(id, payload.get(TENANT_FIELD))
+            if path is None:
+                missing += 1
+                continue
+            kept.append((id, payload))
+            inputs.append({"image": str(path), "instruction": INDEX_INSTRUCTION})
+
+        chunks = [range(i, min(i + self._batch_size, len(inputs))) for i in range(0, len(inputs), self._batch_size)]
+        futures = [
+            executor.submit(self._embed_records, inputs[chunk.start:chunk.stop], kept[chunk.start:chunk.stop])
+            for chunk in chunks
+        ]
+        points, failed = [], []
+        for chunk, future in zip(chunks, futures):
+            try:
+                vectors, text_vectors = future.result()
+            except Exception as e:
+                logger.warning(f"迁移生成向量失败（{len(chunk)} 张）: {e}")
+                failed.extend(kept[i][0] for i in chunk)
+                continue
+            for i, vector, texts in zip(chunk, vectors, text_vectors):
+                id, payload = kept[i]
+                points.append(PointStruct(
+                    id=id,
+                    vector=self._vector_db.point_vector(
+                        vector, self._target_config, text_vectors=texts,
+                        lexical=lexical_vector(payload) if self._target_lexical else None
+                    ),
+                    payload=payload
+                ))
+        if points:
+            self._vector_db.upsert_points(self._state.target, points)
+        with self._cond:
+            self._state.missing += missing
+            self._state.failed += len(failed)
+            room = _MAX_FAILED_IDS - len(self._state.failed_ids)
+            if room > 0:
+                self._state.failed_ids.extend(failed[:room])
+        return len(points)
+
+    def _embed_records(
+        self,
+        inputs: List[Dict[str, Any]],
+        items: List[Tuple[Any, Dict[str, Any]]]
+    ) -> Tuple[np.ndarray, List[Dict[str, np.ndarray]]]:
+        """在一次请求中生成一批记录的图片向量和影子集合的文本向量，返回 (图片向量, 每条记录的 {文本向量名: 向量})"""
+        texts = [
+            (i, name, text_vector_input(name, payload))
+            for i, (_, payload) in enumerate(items)
+            for name in self._target_text_vectors
+        ]
+        texts = [item for item in texts if item[2]]
+        vectors = self._embed(inputs + [{"text": text, "instruction": TEXT_VECTOR_INSTRUCTION} for _, _, text in texts])
+        text_vectors = [{} for _ in items]
+        for (i, name, _), vector in zip(texts, vectors[len(inputs):]):
+            text_vectors[i][name] = vector
+        return vectors[:len(inputs)], text_vectors
+
+    def _embed(self, inputs: List[Dict[str, Any]]) -> np.ndarray:
+        if self._client is not None:
+            return as_float32_matrix(self._client.generate_embeddings_batch(inputs))
+        return self._embedding.generate_embeddings_batch(inputs)
+
+    def _image_path(self, id: Any, tenant: Optional[str]) -> Optional[Path]:
+        """按记录ID在其租户的图片存储中找原图（每个租户首次查找时建立索引，之后新增的图片单独查找）"""
+        with tenant_scope(tenant):
+            paths = self._paths.get(tenant)
+            if paths is None:
+                paths = self._paths[tenant] = dict(self._storage.iter_image_files())
+            path = paths.get(str(id))
+            if path is None or not path.exists():
+                path = self._storage.get_image_path(str(id))
+        return path
+
+    def _catch_up(self, since: str) -> None:
+        """
+        追平：同步 since 之后修改过的元数据（影子集合中没有的记录加入双写队列），
+        删除影子集合中已从原集合删除的记录
+        """
+        state = self._state
+        vector_db = self._vector_db
+        caught_up_at = datetime.now().isoformat()
+        changed = Filter(must=[FieldCondition(key="updated_at", range=DatetimeRange(gte=datetime.fromisoformat(since)))])
+        page_size = self._batch_size * self._concurrency * 4
+        offset, synced = None, 0
+        while True:
+            records, offset = vector_db.scroll_page(page_size, offset, changed)
+            if records:
+                # 影子集合有文本向量时无法判断是否修改了其来源字段，修改过的记录整条重新生成
+                existing = set() if self._target_text_vectors else \
+                    vector_db.existing_ids(state.target, [r["id"] for r in records])
+                present = [r for r in records if r["id"] in existing]
+                if present:
+                    vector_db.overwrite_payloads(state.target, present, lexical=self._target_lexical)
+                    synced += len(present)
+                self._enqueue([(r["id"], r["metadata"] or {}) for r in records if r["id"] not in existing])
+            if offset is None:
+                break
+
+        offset, removed = None, 0
+        while True:
+            records, offset = vector_db.scroll_page(page_size, offset, None, with_payload=False,
+                                                    collection=state.target)
+            ids = [record["id"] for record in records]
+            if ids:
+                alive = vector_db.existing_ids(state.source, ids)
+                stale = [id for id in ids if id not in alive]
+                if stale:
+                    vector_db.delete_points(state.target, stale)
+                    removed += len(stale)
+            if offset is None:
+                break
+        with self._cond:
+            state.caught_up_at = caught_up_at
+            self._save()
+        logger.info(f"迁移追平完成：同步元数据 {synced} 条，删除 {removed} 条")
+
+    # ==================== 工具方法 ====================
+
+    @staticmethod
+    def _search_vector(vectors_config: Any) -> Optional[str]:
+        """校验近邻时使用的向量：多分辨率集合用建了索引的前缀向量，其他命名向量集合用图片向量"""
+        if isinstance(vectors_config, dict):
+            return COARSE_VECTOR_NAME if COARSE_VECTOR_NAME in vectors_config else FULL_VECTOR_NAME
+        return None
+
+    def _sample_ids(self, collection: str, size: int) -> List[Any]:
+        """遍历集合的全部ID（只取ID），蓄水池抽样 size 条，每条记录被抽中的概率相同"""
+        rng = np.random.default_rng(0)
+        sample, seen, offset = [], 0, None
+        while True:
+            records, offset = self._vector_db.scroll_page(_SAMPLE_PAGE_SIZE, offset, None, with_payload=False,
+                                                          collection=collection)
+            for record in records:
+                seen += 1
+                if len(sample) < size:
+                    sample.append(record["id"])
+                else:
+                    slot = rng.integers(0, seen)
+                    if slot < size:
+                        sample[slot] = record["id"]
+            if offset is None:
+                return sample
+
+    def _neighbours(self, collection: str, id: Union[int, str], using: Optional[str]) -> set:
+        return self._vector_db.neighbour_ids(collection, id, using, _RECALL_K)
+
+    def _fail(self, error: str) -> None:
+        self._vector_db.set_shadow(None)
+        with self._cond:
+            self._state.status = "failed"
+            self._state.error = error
+            self._save()
+
+    def _save(self) -> None:
+        self._state.save(self._state_path)
+
+    def _check(self) -> None:
+        if not self._initialized or self._vector_db is None or not self._vector_db.is_initialized:
+            raise RuntimeError("迁移服务未初始化")
+
+
+# 全局服务实例
+migration_service = MigrationService()
+
+
+def get_migration_service() -> MigrationService:
+    """获取迁移服务实例"""
+    return migration_service
@@ -0,0 +1,819 @@
+"""
+进程内 NumPy 向量引擎
+实现 VectorDBService 用到的 QdrantClient 接口子集，可替代 Qdrant 本地模式（VECTOR_DB_BACKEND=numpy）
+
+Qdrant 本地模式在 Python 中逐点计算相似度并逐点持久化，数万点以上检索和写入都明显变慢。本引擎：
+- 向量存放在内存映射的 float16/float32 矩阵文件中，写入前归一化，余弦相似度即点积
+- payload 以追加日志（JSON Lines）落盘，打开时重放；内存中维护列式索引（tags 倒排表、created_at 时间戳列）
+- 精确检索：过滤条件先转换为行掩码，再按块做矩阵乘法取 top_k
+- 有效点数达到阈值后自动训练 IVF（球面 k-means），检索只扫描离查询最近的 nprobe 个分桶；
+  过滤后剩余点数较少时仍走精确检索
+- query_points 的 query 可以是点 ID（使用该点已存储的向量，结果不含该点本身）
+- 过滤语义与 Qdrant 一致：直接解释 qdrant_client 的 Filter 模型
+  （must/should/must_not、MatchValue/MatchAny、Range/DatetimeRange、HasIdCondition）
+
+限制：只支持余弦距离的单个匿名向量集合（不支持命名向量和 prefetch）；同一存储目录只能由一个进程打开。
+"""
+
+import os
+import json
+import uuid
+import shutil
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from datetime import datetime, date, timezone, timedelta
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+import numpy as np
+from qdrant_client.http import models as qdrant_models
+from qdrant_client.http.models import (
+    Distance,
+    VectorParams,
+    Filter,
+    HasIdCondition,
+    FieldCondition,
+    MatchValue,
+    MatchAny,
+    Range,
+    DatetimeRange,
+)
+
+from .vector_utils import as_float32, as_float32_matrix, l2_normalize
+
+logger = logging.getLogger(__name__)
+
+# 精确检索每次参与矩阵乘法的行数
+_BLOCK_ROWS = 32768
+# created_at 缺失或无法解析时的占位值
+_MISSING_TIME = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# k-means 训练参数
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLES_PER_LIST = 32
+_KMEANS_MAX_SAMPLES = 50000
+# 追加日志行数超过有效点数的两倍（且超过该值）时，关闭时压缩日志
+_LOG_COMPACT_MIN_LINES = 1024
+
+_DTYPES = {"float16": np.float16, "float32": np.float32}
+
+
+@dataclass
+class IVFConfig:
+    """IVF 分区配置"""
+    min_points: int = 50000  # 有效点数达到后启用 IVF，0 表示始终精确检索
+    lists: int = 0  # 分桶数，0 表示按 sqrt(点数) 自动选择
+    probes: int = 16  # 每次检索扫描的分桶数
+
+
+def _point_id(value: Any) -> Union[int, str]:
+    """规范化点 ID：与 Qdrant 一致，只接受非负整数和 UUID"""
+    if isinstance(value, (bool, np.bool_)):
+        raise ValueError(f"无效的点 ID: {value!r}")
+    if isinstance(value, (int, np.integer)):
+        if value < 0:
+            raise ValueError(f"无效的点 ID: {value!r}")
+        return int(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, str):
+        try:
+            return str(uuid.UUID(value))
+        except ValueError:
+            pass
+    raise ValueError(f"无效的点 ID: {value!r}，只支持非负整数和 UUID")
+
+
+def _to_micros(value: Any) -> Optional[int]:
+    """时间值转换为 UTC 微秒时间戳；无时区的时间按 UTC 处理（与 Qdrant 一致）"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
+
+
+def _range_mask(values: np.ndarray, condition: Union[Range, DatetimeRange], convert) -> np.ndarray:
+    """对数值列应用 gt/gte/lt/lte 区间"""
+    mask = np.ones(len(values), dtype=bool)
+    for bound, compare in (("gt", np.greater), ("gte", np.greater_equal), ("lt", np.less), ("lte", np.less_equal)):
+        limit = getattr(condition, bound)
+        if limit is not None:
+            mask &= compare(values, convert(limit))
+    return mask
+
+
+def _match_payload_value(value: Any, condition: FieldCondition) -> bool:
+    """通用字段的逐点匹配；数组字段任一元素满足即匹配"""
+    values = value if isinstance(value, list) else [value]
+    match = condition.match
+    if isinstance(match, MatchValue):
+        return any(v == match.value for v in values)
+    if isinstance(match, MatchAny):
+        return any(v in match.any for v in values)
+    if condition.range is not None:
+        is_datetime = isinstance(condition.range, DatetimeRange)
+        for v in values:
+            number = _to_micros(v) if is_datetime else (v if isinstance(v, (int, float)) and not isinstance(v, bool) else None)
+            if number is not None and _range_mask(np.array([number]), condition.range,
+                                                  _to_micros if is_datetime else float)[0]:
+                return True
+        return False
+    raise ValueError(f"NumPy 向量引擎不支持的匹配条件: {condition}")
+
+
+def _merge_top(best: Tuple[np.ndarray, np.ndarray], scores: np.ndarray, rows: np.ndarray, k: int):
+    """把一块的得分并入当前 top_k"""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[keep], rows[keep]
+    scores = np.concatenate([best[0], scores])
+    rows = np.concatenate([best[1], rows])
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[keep], rows[keep]
+    return scores, rows
+
+
+def _nearest_centroids(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """按块计算每行最近的质心（向量均已归一化，取内积最大者）"""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    step = max(1, (1 << 24) // max(1, len(centroids)))
+    for start in range(0, len(matrix), step):
+        block = as_float32(matrix[start:start + step])
+        labels[start:start + step] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+class _Collection:
+    """单个集合：向量矩阵文件 + payload 追加日志 + 内存列索引"""
+
+    def __init__(self, directory: Path, ivf: IVFConfig):
+        self.directory = directory
+        self.ivf = ivf
+        self.lock = threading.RLock()
+
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.dimension: int = meta["dimension"]
+        self.dtype = _DTYPES[meta["dtype"]]
+
+        self.size = 0  # 已分配的行数（含已删除的行）
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self.ids: List[Any] = []
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[Any, int] = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.created_at = np.zeros(0, dtype=np.int64)
+        self.tag_index: Dict[Any, set] = {}
+
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_points = 0
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        self.log_lines = 0
+        self.operation_id = 0
+        self._load()
+        self._log = open(directory / "points.log", "a", encoding="utf-8")
+
+    # ---------- 持久化 ----------
+
+    @property
+    def _vector_file(self) -> Path:
+        return self.directory / "vectors.bin"
+
+    def _load(self) -> None:
+        """重放追加日志，恢复 ID、payload 和列索引"""
+        log_path = self.directory / "points.log"
+        records = []
+        if log_path.exists():
+            with open(log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 进程中途退出留下的半行
+                        logger.warning(f"跳过损坏的日志行: {log_path}")
+        self.log_lines = len(records)
+
+        rows = [r["row"] for r in records if r["op"] == "upsert"]
+        self._reserve(max(rows) + 1 if rows else 0)
+        for record in records:
+            op = record["op"]
+            if op == "upsert":
+                self._set_row(record["row"], record["id"], record["payload"])
+            elif op == "payload" and record["id"] in self.rows:
+                row = self.rows[record["id"]]
+                self._set_row(row, record["id"], {**self.payloads[row], **record["payload"]})
+            elif op == "delete" and record["id"] in self.rows:
+                self._delete_row(self.rows[record["id"]])
+
+        ivf_path = self.directory / "ivf.npz"
+        if ivf_path.exists():
+            with np.load(ivf_path) as saved:
+                if len(saved["assign"]) == self.size and saved["centroids"].shape[1] == self.dimension:
+                    self.centroids = saved["centroids"]
+                    self.assign[:self.size] = saved["assign"]
+                    self.trained_points = int(saved["trained_points"])
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        self._log.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+        self._log.flush()
+        self.log_lines += len(records)
+        self.operation_id += 1
+
+    def close(self) -> None:
+        """刷新向量文件、保存 IVF 状态，日志膨胀时压缩"""
+        with self.lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+            self._log.close()
+            live = int(self.alive[:self.size].sum())
+            if self.log_lines > max(2 * live, _LOG_COMPACT_MIN_LINES):
+                tmp = self.directory / "points.log.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for row in np.flatnonzero(self.alive[:self.size]):
+                        f.write(json.dumps({"op": "upsert", "row": int(row), "id": self.ids[row],
+                                            "payload": self.payloads[row]}, ensure_ascii=False, default=str) + "\n")
+                os.replace(tmp, self.directory / "points.log")
+            if self.centroids is not None:
+                np.savez(self.directory / "ivf.npz", centroids=self.centroids,
+                         assign=self.assign[:self.size], trained_points=self.trained_points)
+            self.vectors = None
+
+    def _reserve(self, rows: int) -> None:
+        """保证容量至少为 rows 行，按倍数扩展向量文件和各列"""
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2, 1024)
+        if self.vectors is not None:
+            self.vectors.flush()
+        with open(self._vector_file, "a+b") as f:
+            f.truncate(capacity * self.dimension * np.dtype(self.dtype).itemsize)
+        self.vectors = np.memmap(self._vector_file, dtype=self.dtype, mode="r+", shape=(capacity, self.dimension))
+
+        grow = capacity - self.capacity
+        self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+        self.created_at = np.concatenate([self.created_at, np.full(grow, _MISSING_TIME, dtype=np.int64)])
+        self.assign = np.concatenate([self.assign, np.full(grow, -1, dtype=np.int32)])
+        self.ids.extend([None] * grow)
+        self.payloads.extend([None] * grow)
+        self.capacity = capacity
+
+    # ---------- 行与列索引 ----------
+
+    def _index_tags(self, row: int, payload: Optional[Dict[str, Any]], add: bool) -> None:
+        tags = (payload or {}).get("tags")
+        for tag in _as_list(tags):
+            try:
+                rows = self.tag_index.setdefault(tag, set()) if add else self.tag_index.get(tag)
+            except TypeError:
+                continue  # 不可哈希的值无法进入倒排表，过滤时按通用字段处理
+            if rows is None:
+                continue
+            if add:
+                rows.add(row)
+            else:
+                rows.discard(row)
+
+    def _set_row(self, row: int, point_id: Any, payload: Dict[str, Any]) -> None:
+        if self.alive[row]:
+            self._index_tags(row, self.payloads[row], add=False)
+        self.ids[row] = point_id
+        self.payloads[row] = payload
+        self.rows[point_id] = row
+        self.alive[row] = True
+        micros = _to_micros(payload.get("created_at"))
+        self.created_at[row] = _MISSING_TIME if micros is None else micros
+        self._index_tags(row, payload, add=True)
+        self.size = max(self.size, row + 1)
+
+    def _delete_row(self, row: int) -> None:
+        self._index_tags(row, self.payloads[row], add=False)
+        del self.rows[self.ids[row]]
+        self.ids[row] = None
+        self.payloads[row] = None
+        self.alive[row] = False
+
+    @property
+    def points_count(self) -> int:
+        return len(self.rows)
+
+    # ---------- 写入 ----------
+
+    def upsert(self, points: List[qdrant_models.PointStruct]) -> None:
+        if not points:
+            return
+        for point in points:
+            if isinstance(point.vector, dict):
+                raise ValueError("NumPy 向量引擎只支持单个匿名向量")
+        matrix = l2_normalize(as_float32_matrix([point.vector for point in points]))
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"向量维度不匹配: 期望 {self.dimension}，实际 {matrix.shape[1]}")
+
+        with self.lock:
+            rows = []
+            for point in points:
+                point_id = _point_id(point.id)
+                row = self.rows.get(point_id)
+                if row is None:
+                    row = self.size
+                    self._reserve(row + 1)
+                    self.size = row + 1
+                rows.append(row)
+                self._set_row(row, point_id, dict(point.payload or {}))
+            rows = np.asarray(rows)
+            self.vectors[rows] = matrix
+            if self.centroids is not None:
+                self.assign[rows] = _nearest_centroids(matrix, self.centroids)
+                self._lists = None
+            self._append_log([
+                {"op": "upsert", "row": int(row), "id": self.ids[row], "payload": self.payloads[row]}
+                for row in rows
+            ])
+
+    def set_payload(self, payload: Dict[str, Any], ids: List[Any]) -> None:
+        with self.lock:
+            records = []
+            for point_id in map(_point_id, ids):
+                row = self.rows.get(point_id)
+                if row is not None:
+                    self._set_row(row, point_id, {**self.payloads[row], **payload})
+                    records.append({"op": "payload", "id": point_id, "payload": payload})
+            self._append_log(records)
+
+    def delete(self, ids: List[Any]) -> None:
+        with self.lock:
+            records = []
+            for point_id in map(_point_id, ids):
+                row = self.rows.get(point_id)
+                if row is not None:
+                    self._delete_row(row)
+                    records.append({"op": "delete", "id": point_id})
+            self._append_log(records)
+
+    # ---------- 过滤 ----------
+
+    def filter_mask(self, query_filter: Optional[Filter]) -> np.ndarray:
+        """过滤条件转换为行掩码（调用方持有锁），已删除的行总是排除"""
+        mask = self.alive[:self.size].copy()
+        if query_filter is not None:
+            mask &= self._eval_filter(query_filter)
+        return mask
+
+    def _eval_filter(self, query_filter: Filter) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for condition in _as_list(query_filter.must):
+            mask &= self._eval_condition(condition)
+        should = _as_list(query_filter.should)
+        if should:
+            if query_filter.min_should is not None:
+                raise ValueError("NumPy 向量引擎不支持 min_should")
+            matched = np.zeros(self.size, dtype=bool)
+            for condition in should:
+                matched |= self._eval_condition(condition)
+            mask &= matched
+        for condition in _as_list(query_filter.must_not):
+            mask &= ~self._eval_condition(condition)
+        return mask
+
+    def _eval_condition(self, condition: Any) -> np.ndarray:
+        if isinstance(condition, Filter):
+            return self._eval_filter(condition)
+
+        mask = np.zeros(self.size, dtype=bool)
+        if isinstance(condition, HasIdCondition):
+            rows = [self.rows.get(_point_id(i)) for i in condition.has_id]
+            mask[[row for row in rows if row is not None]] = True
+            return mask
+
+        if not isinstance(condition, FieldCondition) or (condition.match is None and condition.range is None):
+            raise ValueError(f"NumPy 向量引擎不支持的过滤条件: {condition}")
+
+        if condition.key == "tags" and isinstance(condition.match, (MatchValue, MatchAny)):
+            wanted = [condition.match.value] if isinstance(condition.match, MatchValue) else condition.match.any
+            rows = set().union(*(self.tag_index.get(tag, ()) for tag in wanted))
+            mask[list(rows)] = True
+            return mask
+
+        if condition.key == "created_at" and isinstance(condition.range, DatetimeRange):
+            column = self.created_at[:self.size]
+            return (column != _MISSING_TIME) & _range_mask(column, condition.range, _to_micros)
+
+        # 其他字段逐点匹配
+        for row in np.flatnonzero(self.alive[:self.size]):
+            payload = self.payloads[row]
+            if condition.key in payload:
+                mask[row] = _match_payload_value(payload[condition.key], condition)
+        return mask
+
+    # ---------- 检索 ----------
+
+    def _maybe_train(self) -> None:
+        """有效点数达到阈值（或较上次训练翻倍）时训练 IVF（调用方持有锁）"""
+        alive = self.points_count
+        if not self.ivf.min_points or alive < self.ivf.min_points:
+            return
+        if self.centroids is not None and alive <= 2 * self.trained_points:
+            return
+
+        rows = np.flatnonzero(self.alive[:self.size])
+        lists = self.ivf.lists or int(np.clip(np.sqrt(len(rows)), 16, 4096))
+        lists = min(lists, len(rows))
+        rng = np.random.default_rng(0)
+        samples = min(len(rows), max(lists * _KMEANS_SAMPLES_PER_LIST, lists), _KMEANS_MAX_SAMPLES)
+        data = as_float32(self.vectors[np.sort(rng.choice(rows, samples, replace=False))])
+        centroids = data[rng.choice(len(data), lists, replace=False)].copy()
+
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = _nearest_centroids(data, centroids)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=lists)
+            starts = np.searchsorted(labels[order], np.arange(lists))
+            filled = counts > 0
+            centroids[filled] = l2_normalize(np.add.reduceat(data[order], starts[filled], axis=0))
+
+        self.centroids = centroids
+        for start in range(0, len(rows), _BLOCK_ROWS):
+            block = rows[start:start + _BLOCK_ROWS]
+            self.assign[block] = _nearest_centroids(self.vectors[block], centroids)
+        self.trained_points = alive
+        self._lists = None
+        logger.info(f"IVF 训练完成: {lists} 个分桶, {alive} 个点")
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """按分桶排序的行号及各分桶的起始位置（写入后惰性重建）"""
+        if self._lists is None:
+            rows = np.flatnonzero(self.assign[:self.size] >= 0)
+            rows = rows[np.argsort(self.assign[rows], kind="stable")]
+            offsets = np.searchsorted(self.assign[rows], np.arange(len(self.centroids) + 1))
+            self._lists = (rows, offsets)
+        return self._lists
+
+    def search(
+        self,
+        query: Any,
+        limit: int,
+        score_threshold: Optional[float],
+        query_filter: Optional[Filter]
+    ) -> List[Tuple[int, float]]:
+        """
+        检索最相似的行
+
+        Returns:
+            (行号, 相似度) 列表，按相似度降序
+        """
+        q = l2_normalize(as_float32(query))
+        if q.shape != (self.dimension,):
+            raise ValueError(f"查询向量维度不匹配: 期望 {self.dimension}，实际 {q.shape}")
+
+        with self.lock:
+            if self.vectors is None or limit <= 0:
+                return []
+            vectors = self.vectors
+            mask = self.filter_mask(query_filter)
+            matched = int(mask.sum())
+            candidates = None
+            if self.ivf.min_points and matched >= self.ivf.min_points:
+                self._maybe_train()
+            if self.centroids is not None and self.ivf.min_points and matched >= self.ivf.min_points:
+                rows, offsets = self._inverted_lists()
+                probes = np.argsort(-(self.centroids @ q))[:self.ivf.probes]
+                candidates = np.concatenate([rows[offsets[c]:offsets[c + 1]] for c in probes])
+                candidates = np.sort(candidates[mask[candidates]])
+                if len(candidates) < limit:
+                    candidates = None  # 过滤后探测到的点不足，退回精确检索
+
+        if candidates is None and matched < len(mask) // 2:
+            candidates = np.flatnonzero(mask)
+
+        best = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+        k = min(limit, matched)
+        if k == 0:
+            return []
+        if candidates is None:
+            # 大部分行参与：按连续块扫描，屏蔽不满足条件的行
+            for start in range(0, len(mask), _BLOCK_ROWS):
+                block_mask = mask[start:start + _BLOCK_ROWS]
+                scores = as_float32(vectors[start:start + len(block_mask)]) @ q
+                scores[~block_mask] = -np.inf
+                best = _merge_top(best, scores, np.arange(start, start + len(block_mask)), k)
+        else:
+            for start in range(0, len(candidates), _BLOCK_ROWS):
+                block = candidates[start:start + _BLOCK_ROWS]
+                best = _merge_top(best, as_float32(vectors[block]) @ q, block, k)
+
+        order = np.argsort(-best[0], kind="stable")
+        results = []
+        for score, row in zip(best[0][order], best[1][order]):
+            if not np.isfinite(score) or (score_threshold is not None and score < score_threshold):
+                break
+            results.append((int(row), float(score)))
+        return results
+
+    def record(
+        self,
+        row: int,
+        with_payload: Union[bool, List[str]],
+        with_vectors: bool,
+        score: Optional[float] = None
+    ):
+        """构造返回给调用方的 Record / ScoredPoint（调用方持有锁）；with_payload 为字段列表时只返回这些字段"""
+        payload = None
+        if isinstance(with_payload, list):
+            payload = {key: value for key, value in self.payloads[row].items() if key in with_payload}
+        elif with_payload:
+            payload = dict(self.payloads[row])
+        fields = {
+            "id": self.ids[row],
+            "payload": payload,
+            "vector": as_float32(self.vectors[row]).tolist() if with_vectors else None,
+        }
+        if score is None:
+            return qdrant_models.Record(**fields)
+        return qdrant_models.ScoredPoint(version=self.operation_id, score=score, **fields)
+
+
+class NumpyVectorClient:
+    """
+    NumPy 向量引擎客户端
+    方法签名与 QdrantClient 对应方法一致（只实现 VectorDBService 用到的参数），可直接替换
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dtype: str = "float32",
+        ivf_min_points: int = 50000,
+        ivf_lists: int = 0,
+        ivf_probes: int = 16
+    ):
+        """
+        Args:
+            path: 存储目录，每个集合一个子目录
+            dtype: 新建集合的向量存储精度 float16 | float32（VectorParams.datatype 优先）
+            ivf_min_points: 有效点数达到后启用 IVF，0 表示始终精确检索
+            ivf_lists: IVF 分桶数，0 表示自动
+            ivf_probes: 每次检索扫描的分桶数
+        """
+        if dtype not in _DTYPES:
+            raise ValueError(f"不支持的向量存储精度: {dtype}")
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._dtype = dtype
+        self._ivf = IVFConfig(min_points=ivf_min_points, lists=ivf_lists, probes=max(1, ivf_probes))
+        self._lock = threading.Lock()
+        self._collections: Dict[str, _Collection] = {}
+
+    def _collection(self, name: str) -> _Collection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                if not (self._path / name / "meta.json").exists():
+                    raise ValueError(f"集合不存在: {name}")
+                collection = self._collections[name] = _Collection(self._path / name, self._ivf)
+            return collection
+
+    @staticmethod
+    def _completed(collection: _Collection) -> qdrant_models.UpdateResult:
+        return qdrant_models.UpdateResult(
+            operation_id=collection.operation_id,
+            status=qdrant_models.UpdateStatus.COMPLETED
+        )
+
+    # ---------- 集合管理 ----------
+
+    def get_collections(self) -> qdrant_models.CollectionsResponse:
+        names = sorted(p.name for p in self._path.iterdir() if (p / "meta.json").exists())
+        return qdrant_models.CollectionsResponse(
+            collections=[qdrant_models.CollectionDescription(name=name) for name in names]
+        )
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return (self._path / collection_name / "meta.json").exists()
+
+    def create_collection(self, collection_name: str, vectors_config: VectorParams, **kwargs) -> bool:
+        if not isinstance(vectors_config, VectorParams):
+            raise ValueError("NumPy 向量引擎只支持单个匿名向量")
+        if vectors_config.distance != Distance.COSINE:
+            raise ValueError(f"NumPy 向量引擎只支持余弦距离，收到: {vectors_config.distance}")
+        if self.collection_exists(collection_name):
+            raise ValueError(f"集合已存在: {collection_name}")
+
+        dtype = self._dtype
+        if vectors_config.datatype in (qdrant_models.Datatype.FLOAT16, qdrant_models.Datatype.FLOAT32):
+            dtype = vectors_config.datatype.value
+        directory = self._path / collection_name
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "meta.json").write_text(
+            json.dumps({"dimension": vectors_config.size, "dtype": dtype, "distance": "Cosine"}),
+            encoding="utf-8"
+        )
+        return True
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+        if collection is not None:
+            collection.close()
+        directory = self._path / collection_name
+        if not directory.exists():
+            return False
+        shutil.rmtree(directory)
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config: VectorParams, **kwargs) -> bool:
+        self.delete_collection(collection_name)
+        return self.create_collection(collection_name, vectors_config)
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: Any = None, **kwargs):
+        """tags 倒排表和 created_at 时间列总是维护，其他字段逐点匹配，无需显式建索引"""
+        return self._completed(self._collection(collection_name))
+
+    def get_collection(self, collection_name: str) -> SimpleNamespace:
+        collection = self._collection(collection_name)
+        with collection.lock:
+            count = collection.points_count
+            indexed = int((collection.assign[:collection.size][collection.alive[:collection.size]] >= 0).sum())
+        params = VectorParams(
+            size=collection.dimension,
+            distance=Distance.COSINE,
+            datatype=qdrant_models.Datatype(np.dtype(collection.dtype).name)
+        )
+        return SimpleNamespace(
+            status=qdrant_models.CollectionStatus.GREEN,
+            points_count=count,
+            vectors_count=count,
+            indexed_vectors_count=indexed,
+            config=SimpleNamespace(params=SimpleNamespace(vectors=params))
+        )
+
+    # ---------- 点操作 ----------
+
+    def upsert(self, collection_name: str, points: List[qdrant_models.PointStruct], wait: bool = True, **kwargs):
+        collection = self._collection(collection_name)
+        collection.upsert(list(points))
+        return self._completed(collection)
+
+    def retrieve(
+        self,
+        collection_name: str,
+        ids: List[Any],
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs
+    ) -> List[qdrant_models.Record]:
+        collection = self._collection(collection_name)
+        with collection.lock:
+            rows = [collection.rows.get(_point_id(i)) for i in ids]
+            return [collection.record(row, with_payload, bool(with_vectors)) for row in rows if row is not None]
+
+    def set_payload(self, collection_name: str, payload: Dict[str, Any], points: List[Any], wait: bool = True, **kwargs):
+        collection = self._collection(collection_name)
+        collection.set_payload(payload, points)
+        return self._completed(collection)
+
+    def delete(self, collection_name: str, points_selector: Any, wait: bool = True, **kwargs):
+        collection = self._collection(collection_name)
+        if isinstance(points_selector, qdrant_models.PointIdsList):
+            ids = points_selector.points
+        elif isinstance(points_selector, list):
+            ids = points_selector
+        else:
+            raise ValueError(f"NumPy 向量引擎不支持的删除选择器: {type(points_selector).__name__}")
+        collection.delete(ids)
+        return self._completed(collection)
+
+    def query_points(
+        self,
+        collection_name: str,
+        query: Any = None,
+        using: Optional[str] = None,
+        prefetch: Any = None,
+        query_filter: Optional[Filter] = None,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs
+    ) -> qdrant_models.QueryResponse:
+        if prefetch is not None or using is not None:
+            raise ValueError("NumPy 向量引擎不支持命名向量和 prefetch")
+        collection = self._collection(collection_name)
+        if isinstance(query, (int, np.integer, str, uuid.UUID)):
+            # 按已有点的向量检索（与 Qdrant 一致，结果不含该点本身）
+            point_id = _point_id(query)
+            with collection.lock:
+                row = collection.rows.get(point_id)
+                if row is None:
+                    raise ValueError(f"Point {query} is not found in the collection")
+                query = as_float32(collection.vectors[row])
+            exclude = HasIdCondition(has_id=[point_id])
+            query_filter = Filter(must=[query_filter] if query_filter else None, must_not=[exclude])
+        hits = collection.search(query, limit, score_threshold, query_filter)
+        with collection.lock:
+            points = [
+                collection.record(row, with_payload, bool(with_vectors), score)
+                for row, score in hits
+                if collection.alive[row]
+            ]
+        return qdrant_models.QueryResponse(points=points)
+
+    def query_batch_points(
+        self,
+        collection_name: str,
+        requests: List[qdrant_models.QueryRequest],
+        **kwargs
+    ) -> List[qdrant_models.QueryResponse]:
+        """逐个执行批量请求中的查询（进程内没有网络往返，无需合并）"""
+        return [
+            self.query_points(
+                collection_name,
+                query=request.query,
+                using=request.using,
+                prefetch=request.prefetch,
+                query_filter=request.filter,
+                limit=request.limit or 10,
+                score_threshold=request.score_threshold,
+                with_payload=request.with_payload if request.with_payload is not None else True,
+                with_vectors=request.with_vector or False
+            )
+            for request in requests
+        ]
+
+    def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Optional[Filter] = None,
+        limit: int = 10,
+        offset: Any = None,
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs
+    ) -> Tuple[List[qdrant_models.Record], Optional[Any]]:
+        """按写入顺序分页遍历；offset 为上一页返回的下一个点 ID"""
+        if kwargs.get("order_by") is not None:
+            raise ValueError("NumPy 向量引擎不支持 order_by")
+        collection = self._collection(collection_name)
+        with collection.lock:
+            rows = np.flatnonzero(collection.filter_mask(scroll_filter))
+            if offset is not None:
+                start = collection.rows.get(_point_id(offset))
+                if start is None:
+                    raise ValueError(f"无效的分页偏移: {offset}")
+                rows = rows[np.searchsorted(rows, start):]
+            page = [collection.record(row, with_payload, bool(with_vectors)) for row in rows[:limit]]
+            next_offset = collection.ids[rows[limit]] if len(rows) > limit else None
+        return page, next_offset
+
+    def facet(
+        self,
+        collection_name: str,
+        key: str,
+        facet_filter: Optional[Filter] = None,
+        limit: int = 10,
+        exact: bool = False,
+        **kwargs
+    ) -> qdrant_models.FacetResponse:
+        """字段取值计数（按记录数降序）；tags 字段直接使用倒排表"""
+        collection = self._collection(collection_name)
+        with collection.lock:
+            if key == "tags" and facet_filter is None:
+                counts = {tag: len(rows) for tag, rows in collection.tag_index.items() if rows}
+            else:
+                counts: Dict[Any, int] = {}
+                for row in np.flatnonzero(collection.filter_mask(facet_filter)):
+                    for value in set(_as_list((collection.payloads[row] or {}).get(key))):
+                        counts[value] = counts.get(value, 0) + 1
+        hits = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+        return qdrant_models.FacetResponse(
+            hits=[qdrant_models.FacetValueHit(value=value, count=count) for value, count in hits]
+        )
+
+    def count(self, collection_name: str, count_filter: Optional[Filter] = None, exact: bool = True, **kwargs):
+        collection = self._collection(collection_name)
+        with collection.lock:
+            count = collection.points_count if count_filter is None else int(collection.filter_mask(count_filter).sum())
+        return qdrant_models.CountResult(count=count)
+
+    def close(self, **kwargs) -> None:
+        with self._lock:
+            collections, self._collections = list(self._collections.values()), {}
+        for collection in collections:
+            collection.close()
@@ -0,0 +1,275 @@
+"""
+离线 Embedding 客户端
+不依赖网络和 GPU，基于内容哈希与轻量 CPU 图像特征生成确定性的归一化向量
+
+用于 CI 和压测环境下的索引/检索链路测试：
+- 图片：颜色直方图 + 空间颜色网格 + 低分辨率灰度图，经固定随机投影映射到目标维度，
+  相似图片的向量仍然相近（随机投影近似保持内积）
+- 文本：字符 n-gram / 单词的特征哈希，经随机投影映射到目标维度，词面重叠的文本相近
+- 无法解码的输入（如远程 URL）退化为内容哈希向量，保证确定性
+"""
+
+import io
+import re
+import base64
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from ..config import get_settings
+from .vector_utils import l2_normalize
+
+logger = logging.getLogger(__name__)
+
+# 文本特征哈希桶数
+TEXT_HASH_BUCKETS = 1024
+# 颜色直方图每通道分箱数（8 * 8 * 8 = 512 维）
+HISTOGRAM_BINS = 8
+# 空间颜色网格（4 * 4 * 3 = 48 维）
+COLOR_GRID = 4
+# 低分辨率灰度图边长（16 * 16 = 256 维）
+THUMBNAIL_SIZE = 16
+
+IMAGE_FEATURE_DIM = HISTOGRAM_BINS ** 3 + COLOR_GRID * COLOR_GRID * 3 + THUMBNAIL_SIZE * THUMBNAIL_SIZE
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+
+class OfflineEmbeddingClient:
+    """
+    离线 Embedding 客户端
+
+    接口与 AliyunEmbeddingClient 保持一致，可直接替换
+    """
+
+    _instance: Optional["OfflineEmbeddingClient"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        self._initialized = getattr(self, '_initialized', False)
+        self._dimension: int = getattr(self, '_dimension', 2560)
+        self._seed: int = getattr(self, '_seed', 0)
+        self._image_projection: Optional[np.ndarray] = getattr(self, '_image_projection', None)
+        self._text_projection: Optional[np.ndarray] = getattr(self, '_text_projection', None)
+
+    def initialize(self) -> None:
+        """初始化随机投影矩阵（由种子决定，跨进程、跨机器结果一致）"""
+        settings = get_settings()
+        self._dimension = settings.VECTOR_DIMENSION
+        self._seed = settings.OFFLINE_EMBEDDING_SEED
+        self._build_projections()
+        self._initialized = True
+        logger.info(f"离线 Embedding 客户端初始化完成 (Dimension: {self._dimension}, Seed: {self._seed})")
+
+    def _build_projections(self) -> None:
+        """按维度和种子生成随机投影矩阵"""
+        rng = np.random.default_rng(self._seed)
+        scale = 1.0 / np.sqrt(self._dimension)
+        self._image_projection = (
+            rng.standard_normal((IMAGE_FEATURE_DIM, self._dimension), dtype=np.float32) * scale
+        )
+        self._text_projection = (
+            rng.standard_normal((TEXT_HASH_BUCKETS, self._dimension), dtype=np.float32) * scale
+        )
+
+    @property
+    def is_initialized(self) -> bool:
+        """检查是否已初始化"""
+        return self._initialized
+
+    def get_vector_dimension(self) -> int:
+        """获取当前向量维度"""
+        return self._dimension
+
+    def derive(self, model_name: Optional[str] = None, dimension: Optional[int] = None) -> "OfflineEmbeddingClient":
+        """
+        创建其他维度的独立客户端（不影响当前实例），用于迁移演练
+
+        Args:
+            model_name: 离线模式只有一个"模型"，忽略
+            dimension: 向量维度，默认与当前相同
+        """
+        if not self.is_initialized:
+            raise RuntimeError("离线 Embedding 客户端未初始化")
+        client = object.__new__(OfflineEmbeddingClient)  # 绕过单例
+        client.__dict__.update(self.__dict__)
+        if dimension and dimension != self._dimension:
+            client._dimension = dimension
+            client._build_projections()
+        return client
+
+    # ==================== 特征提取 ====================
+
+    @staticmethod
+    def _stable_hash(value: str) -> int:
+        """跨进程稳定的字符串哈希（内置 hash() 受 PYTHONHASHSEED 影响）"""
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _text_features(self, text: str) -> np.ndarray:
+        """文本特征哈希：拉丁字符按单词、中文按单字和相邻双字切分"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        grams = list(tokens)
+        grams.extend(a + b for a, b in zip(tokens, tokens[1:]))
+
+        features = np.zeros(TEXT_HASH_BUCKETS, dtype=np.float32)
+        for gram in grams:
+            h = self._stable_hash(gram)
+            features[h % TEXT_HASH_BUCKETS] += 1.0 if (h >> 32) & 1 else -1.0
+        return features
+
+    @staticmethod
+    def _image_features(image: Image.Image) -> np.ndarray:
+        """颜色直方图 + 空间颜色网格 + 低分辨率灰度图"""
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((128, 128))
+        pixels = np.asarray(image, dtype=np.float32) / 255.0
+
+        # 颜色直方图，开方后（Hellinger 距离）对大面积单色不那么敏感
+        quantized = np.minimum((pixels * HISTOGRAM_BINS).astype(np.int32), HISTOGRAM_BINS - 1)
+        codes = (quantized[..., 0] * HISTOGRAM_BINS + quantized[..., 1]) * HISTOGRAM_BINS + quantized[..., 2]
+        histogram = np.bincount(codes.ravel(), minlength=HISTOGRAM_BINS ** 3).astype(np.float32)
+        histogram = np.sqrt(histogram / max(histogram.sum(), 1.0))
+
+        grid = np.asarray(image.resize((COLOR_GRID, COLOR_GRID), Image.Resampling.BOX), dtype=np.float32)
+        grid = grid.ravel() / 255.0 - 0.5
+
+        gray = np.asarray(
+            image.convert("L").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BOX),
+            dtype=np.float32
+        ).ravel() / 255.0
+        gray = gray - gray.mean()
+
+        return np.concatenate([
+            histogram,
+            grid / max(np.linalg.norm(grid), 1e-6),
+            gray / max(np.linalg.norm(gray), 1e-6),
+        ])
+
+    def _extract_image_features(self, image: Union[str, Image.Image]) -> Optional[np.ndarray]:
+        """解码本地路径、data URI 或 PIL Image 并提取特征，远程 URL 返回 None"""
+        if isinstance(image, Image.Image):
+            return self._image_features(image)
+        if image.startswith("data:"):
+            with Image.open(io.BytesIO(base64.b64decode(image.split(",", 1)[1]))) as img:
+                return self._image_features(img)
+        if image.startswith("file://"):
+            image = image[len("file://"):]
+        if Path(image).is_file():
+            with Image.open(image) as img:
+                return self._image_features(img)
+        return None
+
+    def _hash_vector(self, content: bytes) -> np.ndarray:
+        """内容哈希向量：相同输入得到相同向量，不同输入近似正交"""
+        digest = hashlib.sha256(content).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little") ^ self._seed)
+        return rng.standard_normal(self._dimension, dtype=np.float32)
+
+    @staticmethod
+    def _image_content(image: Union[str, Image.Image]) -> bytes:
+        """无法解码时用于哈希的图片内容：本地文件取文件字节，其余取字符串本身"""
+        if isinstance(image, Image.Image):
+            return image.tobytes()
+        path = image[len("file://"):] if image.startswith("file://") else image
+        if Path(path).is_file():
+            return Path(path).read_bytes()
+        return image.encode("utf-8")
+
+    # ==================== 向量生成 ====================
+
+    def generate_embedding(
+        self,
+        text: Optional[str] = None,
+        image: Optional[Union[str, Image.Image]] = None,
+        instruction: Optional[str] = None,
+        normalize: bool = True
+    ) -> np.ndarray:
+        """
+        生成确定性的 Embedding 向量
+
+        Args:
+            text: 文本内容
+            image: 图片路径、data URI、URL 或 PIL Image
+            instruction: 指令提示词（离线模式忽略）
+            normalize: 是否归一化
+
+        Returns:
+            float32 向量
+        """
+        if not self.is_initialized:
+            raise RuntimeError("离线 Embedding 客户端未初始化")
+
+        if not text and not image:
+            raise ValueError("必须提供 text 或 image 参数")
+
+        vector = np.zeros(self._dimension, dtype=np.float32)
+
+        if text:
+            features = self._text_features(text)
+            if np.any(features):
+                projected = features @ self._text_projection
+                vector += projected / max(np.linalg.norm(projected), 1e-6)
+            else:
+                vector += self._hash_vector(b"text:" + text.encode("utf-8"))
+
+        if image is not None:
+            try:
+                features = self._extract_image_features(image)
+            except Exception as e:
+                logger.warning(f"离线 Embedding 无法解码图片，使用内容哈希向量: {e}")
+                features = None
+
+            if features is not None:
+                projected = features @ self._image_projection
+                vector += projected / max(np.linalg.norm(projected), 1e-6)
+            else:
+                vector += self._hash_vector(b"image:" + self._image_content(image))
+
+        if normalize:
+            l2_normalize(vector, copy=False)
+        return vector
+
+    def generate_embeddings_batch(
+        self,
+        inputs: List[Dict[str, Any]],
+        normalize: bool = True
+    ) -> np.ndarray:
+        """
+        批量生成 Embedding 向量
+
+        Args:
+            inputs: 输入列表，每个元素包含 text、image、instruction 等字段
+            normalize: 是否归一化
+
+        Returns:
+            形状为 (len(inputs), dimension) 的 float32 矩阵
+        """
+        vectors = np.empty((len(inputs), self._dimension), dtype=np.float32)
+        for i, inp in enumerate(inputs):
+            vectors[i] = self.generate_embedding(
+                text=inp.get("text"),
+                image=inp.get("image"),
+                instruction=inp.get("instruction"),
+                normalize=normalize
+            )
+        return vectors
+
+
+# 全局实例
+_offline_client: Optional[OfflineEmbeddingClient] = None
+
+
+def get_offline_client() -> OfflineEmbeddingClient:
+    """获取离线 Embedding 客户端实例"""
+    global _offline_client
+    if _offline_client is None:
+        _offline_client = OfflineEmbeddingClient()
+    return _offline_client
@@ -0,0 +1,518 @@
+"""
+外部模型调用治理模块
+所有发往 DashScope / OpenAI 兼容接口的调用共享同一套准入控制：
+
+- 按模型划分的令牌桶：限制每个模型的请求速率，收到 429 时清空令牌主动退避
+- 全局并发上限：超过上限的调用进入 FIFO 等待队列，队列已满时直接拒绝
+- 截止时间：在队列或令牌桶中等待超过截止时间的调用直接失败，不再发出请求
+- 熔断器：按模型统计连续失败，达到阈值后熔断，冷却后放行少量探测请求（半开），
+  探测成功则恢复，失败则重新熔断
+
+同步调用（dashscope / openai SDK）和异步调用（httpx.AsyncClient）共用同一个并发上限，
+异步调用在等待期间不会阻塞事件循环。
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class OutboundRejectedError(RuntimeError):
+    """调用未被放行（熔断、排队超时或队列已满），请求没有发出"""
+
+
+class CircuitOpenError(OutboundRejectedError):
+    """目标模型处于熔断状态"""
+
+
+class OutboundDeadlineExceeded(OutboundRejectedError):
+    """在截止时间内未获得令牌或并发名额"""
+
+
+class OutboundQueueFullError(OutboundRejectedError):
+    """等待队列已满"""
+
+
+def status_code_of(obj: Any) -> Optional[int]:
+    """提取响应或异常中的 HTTP 状态码（兼容 dashscope / openai / httpx）"""
+    status = getattr(obj, "status_code", None)
+    if status is None:
+        status = getattr(getattr(obj, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_failure_status(status: Optional[int]) -> bool:
+    """限流和服务端错误计入熔断，其余 4xx 是请求本身的问题，不计入"""
+    return status is not None and (status == 429 or status >= 500)
+
+
+def response_failed(response: Any) -> bool:
+    """判断不抛异常的 SDK 响应（如 dashscope）是否为失败"""
+    return is_failure_status(status_code_of(response))
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        预留一个令牌
+
+        Returns:
+            需要等待的秒数（0 表示立即可用）；令牌已从桶中扣除
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def cancel(self) -> None:
+        """归还未使用的令牌（等待超出截止时间时）"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1.0)
+
+    def drain(self) -> None:
+        """清空令牌（收到 429 时退避）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    """熔断器：closed -> open -> half_open -> closed/open"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float, half_open_calls: int):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.half_open_calls = max(1, half_open_calls)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+
+    def allow(self) -> bool:
+        """是否放行本次调用（半开状态下只放行有限个探测请求）"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """放行后未实际发出请求（如排队超时），归还探测名额"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                logger.info("外部调用熔断器恢复: half_open -> closed")
+            self._state = self.CLOSED
+
+    def record_failure(self) -> bool:
+        """
+        记录一次失败
+
+        Returns:
+            本次失败是否触发了熔断
+        """
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                tripped = self._state != self.OPEN
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                return tripped
+            return False
+
+    @property
+    def retry_after(self) -> float:
+        """距离进入半开状态的剩余秒数"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+
+class _Waiter:
+    """并发名额的等待者：同步调用用 threading.Event，异步调用用事件循环中的 Future"""
+
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def grant(self) -> bool:
+        """移交名额，等待者所在事件循环已关闭时返回 False"""
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._resolve)
+            except RuntimeError:
+                return False
+        else:
+            self.event.set()
+        self.granted = True
+        return True
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class OutboundGovernor:
+    """
+    外部模型调用治理器（全局单例）
+
+    用法:
+        governor = get_outbound_governor()
+        resp = governor.call("qwen3-vl-embedding", dashscope.MultiModalEmbedding.call, api_key=..., ...)
+        resp = await governor.call_async("qwen3-vl-plus", client.post, "/chat/completions", json=payload)
+    """
+
+    _instance: Optional["OutboundGovernor"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if getattr(self, "_initialized", False):
+            return
+        settings = get_settings()
+        self._max_concurrency = max(1, settings.OUTBOUND_MAX_CONCURRENCY)
+        self._max_queue = max(0, settings.OUTBOUND_MAX_QUEUE)
+        self._queue_timeout = settings.OUTBOUND_QUEUE_TIMEOUT
+        self._default_rps = settings.OUTBOUND_DEFAULT_RPS
+        self._burst = settings.OUTBOUND_BURST
+        self._rate_limits: Dict[str, float] = dict(settings.OUTBOUND_RATE_LIMITS)
+        self._breaker_failures = settings.OUTBOUND_BREAKER_FAILURES
+        self._breaker_cooldown = settings.OUTBOUND_BREAKER_COOLDOWN
+        self._breaker_half_open_calls = settings.OUTBOUND_BREAKER_HALF_OPEN_CALLS
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._initialized = True
+
+    # ==================== 按模型的状态 ====================
+
+    def _state_for(self, key: str):
+        with self._lock:
+            if key not in self._buckets:
+                rate = self._rate_limits.get(key, self._default_rps)
+                self._buckets[key] = TokenBucket(rate, self._burst)
+                self._breakers[key] = CircuitBreaker(
+                    self._breaker_failures, self._breaker_cooldown, self._breaker_half_open_calls
+                )
+                self._stats[key] = {
+                    "requests": 0, "succeeded": 0, "failed": 0, "throttled": 0,
+                    "rejected_circuit_open": 0, "rejected_queue_full": 0, "deadline_exceeded": 0,
+                    "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+                }
+            return self._buckets[key], self._breakers[key], self._stats[key]
+
+    def _count(self, stats: Dict[str, float], field: str, value: float = 1) -> None:
+        with self._lock:
+            stats[field] += value
+
+    def _record_wait(self, stats: Dict[str, float], waited: float) -> None:
+        with self._lock:
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+    # ==================== 并发名额 ====================
+
+    def _try_acquire_or_enqueue(self, waiter_factory: Callable[[], _Waiter], stats) -> Optional[_Waiter]:
+        """有空闲名额时直接占用并返回 None，否则排队并返回等待者"""
+        with self._lock:
+            if self._in_flight < self._max_concurrency and not self._waiters:
+                self._in_flight += 1
+                return None
+            if len(self._waiters) >= self._max_queue:
+                stats["rejected_queue_full"] += 1
+                raise OutboundQueueFullError(
+                    f"外部调用等待队列已满 (并发上限: {self._max_concurrency}, 队列: {self._max_queue})"
+                )
+            waiter = waiter_factory()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """等待超时：移出队列；若名额恰好已移交给它，则转交下一位"""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return
+            except ValueError:
+                pass
+        if waiter.granted:
+            self._release_slot()
+
+    def _release_slot(self) -> None:
+        """释放名额：队列非空时直接移交给队首等待者（FIFO），否则归还"""
+        with self._lock:
+            while self._waiters:
+                if self._waiters.popleft().grant():
+                    return
+            self._in_flight -= 1
+
+    # ==================== 准入 ====================
+
+    def _admit_checks(self, key: str):
+        bucket, breaker, stats = self._state_for(key)
+        self._count(stats, "requests")
+        if not breaker.allow():
+            self._count(stats, "rejected_circuit_open")
+            raise CircuitOpenError(
+                f"外部模型 {key} 已熔断，{breaker.retry_after:.1f}s 后重试"
+            )
+        return bucket, breaker, stats
+
+    def _deadline_error(self, key: str, stats, stage: str) -> OutboundDeadlineExceeded:
+        self._count(stats, "deadline_exceeded")
+        return OutboundDeadlineExceeded(f"外部模型 {key} 调用在{stage}阶段超过截止时间")
+
+    @staticmethod
+    def _reject_admission(bucket: TokenBucket, breaker: CircuitBreaker) -> None:
+        """准入失败（超时、队列已满、被取消），请求未发出：归还令牌和半开探测名额"""
+        bucket.cancel()
+        breaker.release_probe()
+
+    def _settle(self, key: str, bucket: TokenBucket, breaker: CircuitBreaker, stats, failed: bool, status=None) -> None:
+        if status == 429:
+            bucket.drain()
+            self._count(stats, "throttled")
+        if failed:
+            self._count(stats, "failed")
+            if breaker.record_failure():
+                logger.warning(f"外部模型 {key} 连续失败，熔断 {breaker.cooldown:.0f}s")
+        else:
+            self._count(stats, "succeeded")
+            breaker.record_success()
+
+    def _outcome_of_exception(self, exc: Exception) -> tuple:
+        """异常是否计入熔断：带状态码的按状态码判断，网络层异常一律计入"""
+        status = status_code_of(exc)
+        if status is not None:
+            return is_failure_status(status), status
+        return True, None
+
+    def call(
+        self,
+        key: str,
+        fn: Callable[..., T],
+        /,
+        *args,
+        deadline: Optional[float] = None,
+        is_failure: Optional[Callable[[T], bool]] = None,
+        **kwargs
+    ) -> T:
+        """
+        同步调用（在调用线程中等待名额）
+
+        Args:
+            key: 限流/熔断维度，通常为模型名
+            fn: 实际发起请求的函数
+            deadline: 最长排队秒数，默认 OUTBOUND_QUEUE_TIMEOUT
+            is_failure: 根据返回值判断失败，默认按返回对象的 status_code 判断（429/5xx）
+
+        Returns:
+            fn 的返回值
+        """
+        bucket, breaker, stats = self._admit_checks(key)
+        start = time.monotonic()
+        expires = start + (self._queue_timeout if deadline is None else deadline)
+
+        wait = bucket.reserve()
+        try:
+            if wait > 0:
+                if start + wait > expires:
+                    raise self._deadline_error(key, stats, "限流")
+                time.sleep(wait)
+
+            waiter = self._try_acquire_or_enqueue(_Waiter, stats)
+            if waiter is not None and not waiter.event.wait(max(0.0, expires - time.monotonic())):
+                self._abandon(waiter)
+                raise self._deadline_error(key, stats, "排队")
+        except BaseException:
+            self._reject_admission(bucket, breaker)
+            raise
+        self._record_wait(stats, time.monotonic() - start)
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            failed, status = self._outcome_of_exception(e)
+            self._settle(key, bucket, breaker, stats, failed, status)
+            raise
+        finally:
+            self._release_slot()
+
+        status = status_code_of(result)
+        failed = (is_failure or response_failed)(result)
+        self._settle(key, bucket, breaker, stats, failed, status)
+        return result
+
+    async def call_async(
+        self,
+        key: str,
+        fn: Callable[..., Awaitable[T]],
+        /,
+        *args,
+        deadline: Optional[float] = None,
+        is_failure: Optional[Callable[[T], bool]] = None,
+        **kwargs
+    ) -> T:
+        """
+        异步调用（等待期间让出事件循环），参数同 call，fn 为协程函数
+        """
+        bucket, breaker, stats = self._admit_checks(key)
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        expires = start + (self._queue_timeout if deadline is None else deadline)
+
+        wait = bucket.reserve()
+        try:
+            if wait > 0:
+                if start + wait > expires:
+                    raise self._deadline_error(key, stats, "限流")
+                await asyncio.sleep(wait)
+
+            waiter = self._try_acquire_or_enqueue(lambda: _Waiter(loop), stats)
+            if waiter is not None:
+                try:
+                    await asyncio.wait_for(waiter.future, max(0.0, expires - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self._abandon(waiter)
+                    raise self._deadline_error(key, stats, "排队")
+                except asyncio.CancelledError:
+                    self._abandon(waiter)
+                    raise
+        except BaseException:
+            self._reject_admission(bucket, breaker)
+            raise
+        self._record_wait(stats, time.monotonic() - start)
+
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            failed, status = self._outcome_of_exception(e)
+            self._settle(key, bucket, breaker, stats, failed, status)
+            raise
+        finally:
+            self._release_slot()
+
+        status = status_code_of(result)
+        failed = (is_failure or response_failed)(result)
+        self._settle(key, bucket, breaker, stats, failed, status)
+        return result
+
+    # ==================== 监控 ====================
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取治理器状态和按模型的计数"""
+        with self._lock:
+            keys = list(self._stats)
+            snapshot = {key: dict(self._stats[key]) for key in keys}
+            in_flight = self._in_flight
+            queued = len(self._waiters)
+
+        models = {}
+        for key in keys:
+            stats = snapshot[key]
+            bucket, breaker = self._buckets[key], self._breakers[key]
+            admitted = stats["succeeded"] + stats["failed"]
+            models[key] = {
+                **stats,
+                "wait_seconds_avg": stats["wait_seconds_total"] / admitted if admitted else 0.0,
+                "circuit_state": breaker.state,
+                "circuit_retry_after": round(breaker.retry_after, 3),
+                "rate_limit_rps": bucket.rate,
+                "tokens_available": round(max(bucket.tokens, 0.0), 3),
+            }
+
+        return {
+            "max_concurrency": self._max_concurrency,
+            "in_flight": in_flight,
+            "queued": queued,
+            "max_queue": self._max_queue,
+            "queue_timeout": self._queue_timeout,
+            "models": models,
+        }
+
+
+# 全局实例
+_outbound_governor: Optional[OutboundGovernor] = None
+
+
+def get_outbound_governor() -> OutboundGovernor:
+    """获取外部调用治理器实例"""
+    global _outbound_governor
+    if _outbound_governor is None:
+        _outbound_governor = OutboundGovernor()
+    return _outbound_governor
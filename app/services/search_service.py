@@ -1,6 +1,15 @@
 """
 智能图像检索服务模块
 整合Embedding服务和向量数据库实现语义搜索
+
+async 路由使用 *_async 接口：需要生成向量的检索和索引在 embedding 线程池中执行，
+纯元数据检索在 vector_db 线程池中执行。文本检索、批量检索、索引和删除只把向量生成放进线程池，
+向量库请求由 AsyncVectorDBService 在事件循环中发出，并发请求互不排队
+
+集合有文本向量（caption）时，文本检索同时检索文本向量并由服务端融合；索引图片时按 description 和标签
+生成文本向量一起写入，修改描述或标签时按更新后的内容重新生成（update_metadata），已有记录由 backfill_text_vectors 补齐。
+集合有关键词向量（lexical）时，文本检索把查询原文一并传给向量库，按文件名、标签和描述的关键词召回
+与向量召回融合，"IMG_2041" 这类精确关键词无需经过智能体的元数据工具
 """
 
 import logging
@@ -10,8 +19,17 @@ import re
 
 from PIL import Image
 
+from ..config import get_settings
+from .executors import EMBEDDING_POOL, VECTOR_DB_POOL, run_in_executor
 from .embedding_service import get_embedding_service, EmbeddingService
-from .vector_db_service import get_vector_db_service, VectorDBService
+from .vector_db_service import (
+    get_vector_db_service,
+    VectorDBService,
+    TEXT_VECTOR_INSTRUCTION,
+    text_vector_input,
+)
+from .async_vector_db_service import get_async_vector_db_service, AsyncVectorDBService
+from .vector_backfill import backfill_text_vectors
 from .storage_service import get_storage_service, StorageService
 
 logger = logging.getLogger(__name__)
@@ -34,13 +52,15 @@ class SearchService:
     def __init__(self):
         self._embedding_service: Optional[EmbeddingService] = None
         self._vector_db_service: Optional[VectorDBService] = None
+        self._async_vector_db_service: Optional[AsyncVectorDBService] = None
         self._storage_service: Optional[StorageService] = None
 
     def initialize(
         self,
         embedding_service: Optional[EmbeddingService] = None,
         vector_db_service: Optional[VectorDBService] = None,
-        storage_service: Optional[StorageService] = None
+        storage_service: Optional[StorageService] = None,
+        async_vector_db_service: Optional[AsyncVectorDBService] = None
     ) -> None:
         """
         初始化搜索服务
@@ -49,9 +69,11 @@ class SearchService:
             embedding_service: Embedding服务实例
             vector_db_service: 向量数据库服务实例
             storage_service: 存储服务实例
+            async_vector_db_service: 异步向量数据库服务实例（未初始化时异步接口回退到线程池执行同步方法）
         """
         self._embedding_service = embedding_service or get_embedding_service()
         self._vector_db_service = vector_db_service or get_vector_db_service()
+        self._async_vector_db_service = async_vector_db_service or get_async_vector_db_service()
         self._storage_service = storage_service or get_storage_service()
 
         logger.info("搜索服务初始化完成")
@@ -67,6 +89,18 @@ class SearchService:
             self._vector_db_service.is_initialized
         )
 
+    def _async_vector_db(self) -> Optional[AsyncVectorDBService]:
+        """可用的异步向量数据库服务，未初始化时返回 None"""
+        service = self._async_vector_db_service
+        return service if service is not None and service.is_initialized else None
+
+    @staticmethod
+    def _add_preview_urls(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """为检索结果添加预览URL"""
+        for result in results:
+            result["preview_url"] = f"/api/v1/storage/images/{result['id']}"
+        return results
+
     def _get_query_type(
         self,
         query_text: Optional[str],
@@ -120,12 +154,14 @@ class SearchService:
         logger.info(
             f"查询向量生成完成: dimension={len(query_vector)}, first_3_values={query_vector[:3]}")
 
-        # 向量搜索
+        # 向量搜索（集合有文本向量 / 关键词向量时与图片向量融合）
         results = self._vector_db_service.search(
             query_vector=query_vector,
             top_k=top_k,
             score_threshold=score_threshold,
-            filter_tags=filter_tags
+            filter_tags=filter_tags,
+            fuse_text=True,
+            query_text=query_text
         )
 
         logger.info(f"向量搜索完成: 返回 {len(results)} 条结果")
@@ -134,10 +170,7 @@ class SearchService:
                 logger.info(f"第{i+1}条结果: id={result['id']}, score={result['score']}")
 
         # 添加预览URL
-        for result in results:
-            result["preview_url"] = f"/api/v1/storage/images/{result['id']}"
-
-        return results
+        return self._add_preview_urls(results)
 
     def search_by_date_text(
         self,
@@ -158,51 +191,19 @@ class SearchService:
         if year is not None:
             start = datetime(year, month, day)
             end = start + timedelta(days=1)
-            records, _ = self._vector_db_service.scroll(
-                limit=max(top_k * 5, 50),
-                offset=None,
+            return self._newest_records(
+                top_k,
                 filter_tags=filter_tags,
                 filter_created_at_from=start,
                 filter_created_at_to=end,
             )
-            results = [{"id": r["id"], "score": None, "metadata": r.get("metadata", {})} for r in records]
-        else:
-            results = []
-            offset = None
-            fetched = 0
-            fetch_limit = 256
-            max_fetch = 5000
-            while fetched < max_fetch:
-                records, offset = self._vector_db_service.scroll(
-                    limit=fetch_limit,
-                    offset=offset,
-                    filter_tags=filter_tags,
-                )
-                if not records:
-                    break
-                fetched += len(records)
-                for r in records:
-                    created = (r.get("metadata") or {}).get("created_at")
-                    if not isinstance(created, str):
-                        continue
-                    dt = self._try_parse_iso_datetime(created)
-                    if dt and dt.month == month and dt.day == day:
-                        results.append({"id": r["id"], "score": None, "metadata": r.get("metadata", {})})
-                if offset is None:
-                    break
-
-        def sort_key(item: Dict[str, Any]):
-            created = (item.get("metadata") or {}).get("created_at")
-            dt = self._try_parse_iso_datetime(created) if isinstance(created, str) else None
-            return dt or datetime.min
-
-        results.sort(key=sort_key, reverse=True)
-        results = results[:top_k]
-
-        for result in results:
-            result["preview_url"] = f"/api/v1/storage/images/{result['id']}"
 
-        return results
+        # 不限年份：按派生的 month_day 字段过滤，只遍历当天的照片
+        return self._newest_records(
+            top_k,
+            filter_tags=filter_tags,
+            filter_conditions=self._month_day_condition(month, day),
+        )
 
     def search_by_meta(
         self,
@@ -218,24 +219,28 @@ class SearchService:
             results = self.search_by_date_text(date_text=date_text, top_k=top_k, filter_tags=tags)
             return results
 
-        records, _ = self._vector_db_service.scroll(
-            limit=5000,
-            offset=None,
-            filter_tags=tags,
-        )
+        return self._newest_records(top_k, filter_tags=tags)
 
-        def sort_key(item: Dict[str, Any]):
-            created = (item.get("metadata") or {}).get("created_at")
-            dt = self._try_parse_iso_datetime(created) if isinstance(created, str) else None
-            return dt or datetime.min
+    def _newest_records(self, top_k: int, **filters) -> List[Dict[str, Any]]:
+        """
+        按 created_at 倒序取最新的 top_k 条记录（由 Qdrant 按 created_at 索引排序，只读取 top_k 条）
 
-        records.sort(key=sort_key, reverse=True)
-        records = records[:top_k]
+        Args:
+            top_k: 返回结果数量
+            filters: 传给 VectorDBService.newest 的过滤条件
 
-        results = [{"id": r["id"], "score": None, "metadata": r.get("metadata", {})} for r in records]
-        for result in results:
-            result["preview_url"] = f"/api/v1/storage/images/{result['id']}"
-        return results
+        Returns:
+            搜索结果列表（score 为 None）
+        """
+        return [
+            {
+                "id": record["id"],
+                "score": None,
+                "metadata": record.get("metadata") or {},
+                "preview_url": f"/api/v1/storage/images/{record['id']}"
+            }
+            for record in self._vector_db_service.newest(top_k, **filters)
+        ]
 
     def search_by_text_with_meta(
         self,
@@ -250,7 +255,7 @@ class SearchService:
             raise RuntimeError("搜索服务未初始化")
 
         tags = tags or None
-        filter_ids = None
+        filter_conditions = None
         filter_created_at_from = None
         filter_created_at_to = None
 
@@ -264,7 +269,7 @@ class SearchService:
                     filter_created_at_from = start
                     filter_created_at_to = end
                 else:
-                    filter_ids = self._list_ids_by_month_day(month=month, day=day, tags=tags)
+                    filter_conditions = self._month_day_condition(month, day)
 
         query_vector = self._embedding_service.generate_text_embedding(
             text=query_text,
@@ -278,7 +283,9 @@ class SearchService:
             filter_tags=tags,
             filter_created_at_from=filter_created_at_from,
             filter_created_at_to=filter_created_at_to,
-            filter_ids=filter_ids,
+            filter_conditions=filter_conditions,
+            fuse_text=True,
+            query_text=query_text,
         )
 
         for result in results:
@@ -306,43 +313,10 @@ class SearchService:
 
         return None, s
 
-    def _list_ids_by_month_day(self, month: int, day: int, tags: Optional[List[str]] = None) -> List[str]:
-        ids: List[str] = []
-        offset = None
-        fetched = 0
-        fetch_limit = 256
-        max_fetch = 20000
-        max_ids = 5000
-
-        while fetched < max_fetch and len(ids) < max_ids:
-            records, offset = self._vector_db_service.scroll(
-                limit=fetch_limit,
-                offset=offset,
-                filter_tags=tags,
-            )
-            if not records:
-                break
-            fetched += len(records)
-            for r in records:
-                created = (r.get("metadata") or {}).get("created_at")
-                if not isinstance(created, str):
-                    continue
-                dt = self._try_parse_iso_datetime(created)
-                if dt and dt.month == month and dt.day == day:
-                    ids.append(str(r["id"]))
-                    if len(ids) >= max_ids:
-                        break
-            if offset is None:
-                break
-
-        return ids
-
     @staticmethod
-    def _try_parse_iso_datetime(value: str) -> Optional[datetime]:
-        try:
-            return datetime.fromisoformat(value)
-        except Exception:
-            return None
+    def _month_day_condition(month: int, day: int) -> Dict[str, int]:
+        """不限年份的某月某日：匹配写入时派生的 month_day 字段"""
+        return {"month_day": month * 100 + day}
 
     @staticmethod
     def _parse_date_text(date_text: str) -> Optional[tuple[Optional[int], int, int]]:
@@ -446,9 +420,12 @@ class SearchService:
         """
         根据图片ID搜索相似图片
 
+        直接使用向量库中该图片已存储的向量检索，图片本身在检索阶段排除；
+        仅当图片尚未索引时才读取图片文件、实时生成向量
+
         Args:
             image_id: 图片ID
-            instruction: 查询指令
+            instruction: 查询指令（仅在实时生成向量时使用）
             top_k: 返回结果数量
             score_threshold: 相似度阈值
             filter_tags: 标签过滤
@@ -456,17 +433,31 @@ class SearchService:
         Returns:
             搜索结果列表
         """
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
         logger.info(f"根据图片ID搜索相似图片: image_id={image_id}")
 
-        # 获取图片路径
+        results = self._vector_db_service.search_by_id(
+            image_id,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            filter_tags=filter_tags
+        )
+        if results is not None:
+            for result in results:
+                result["preview_url"] = f"/api/v1/storage/images/{result['id']}"
+            logger.info(f"以已存储向量检索完成，返回 {len(results)} 条结果")
+            return results
+
+        # 图片尚未索引：回退为读取图片并实时生成向量（图片本身不在库中，无需排除）
         image_path = self._storage_service.get_image_path(image_id)
         if not image_path:
             logger.error(f"图片不存在: {image_id}")
             raise ValueError(f"图片不存在: {image_id}")
 
-        logger.info(f"找到图片路径: {image_path}")
-
-        results = self.search_by_image(
+        logger.info(f"图片未索引，实时生成向量: {image_path}")
+        return self.search_by_image(
             image=str(image_path),
             instruction=instruction,
             top_k=top_k,
@@ -474,16 +465,6 @@ class SearchService:
             filter_tags=filter_tags
         )
 
-        # 过滤掉查询图片本身（如果有）
-        filtered_results = [
-            r for r in results if r["id"] != image_id
-        ]
-
-        if len(filtered_results) != len(results):
-            logger.info(f"已过滤掉查询图片本身，返回 {len(filtered_results)} 条结果")
-
-        return filtered_results
-
     def search_hybrid(
         self,
         query_text: str,
@@ -601,6 +582,70 @@ class SearchService:
             "total": len(results)
         }
 
+    def search_batch(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        批量文本语义搜索
+
+        所有查询文本一次批量生成向量，再以一次 query_batch_points 请求完成检索，
+        省去逐个查询的 Embedding 调用和向量库往返。
+
+        Args:
+            queries: 查询列表，每个元素包含 query_text，可选 instruction、top_k、score_threshold、filter_tags
+
+        Returns:
+            与 queries 一一对应的搜索结果列表
+        """
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+        if not queries:
+            return []
+
+        vectors = self._embedding_service.generate_embeddings_batch(self._batch_embedding_inputs(queries))
+        return self._search_batch_vectors(queries, list(vectors))
+
+    @staticmethod
+    def _batch_embedding_inputs(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量检索的 Embedding 输入（指令与 search_by_text 一致）"""
+        inputs = []
+        for query in queries:
+            if not query.get("query_text"):
+                raise ValueError("批量检索的每个查询都必须提供 query_text")
+            inputs.append({
+                "text": query["query_text"],
+                "instruction": query.get("instruction") or "Represent this text for retrieval."
+            })
+        return inputs
+
+    def _search_batch_vectors(
+        self,
+        queries: List[Dict[str, Any]],
+        vectors: List[Any]
+    ) -> List[List[Dict[str, Any]]]:
+        """用已生成的查询向量执行批量检索并添加预览URL"""
+        grouped = self._vector_db_service.search_batch(self._batch_vector_queries(queries, vectors))
+        return self._finish_batch(grouped)
+
+    @staticmethod
+    def _batch_vector_queries(queries: List[Dict[str, Any]], vectors: List[Any]) -> List[Dict[str, Any]]:
+        """批量检索请求转换为向量库的查询列表"""
+        return [
+            {
+                "query_vector": vector,
+                "top_k": query.get("top_k", 10),
+                "score_threshold": query.get("score_threshold"),
+                "filter_tags": query.get("filter_tags"),
+                "fuse_text": True,
+                "query_text": query.get("query_text")
+            }
+            for query, vector in zip(queries, vectors)
+        ]
+
+    def _finish_batch(self, grouped: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        for results in grouped:
+            self._add_preview_urls(results)
+        logger.info(f"批量搜索完成: {len(grouped)} 个查询, 共 {sum(len(r) for r in grouped)} 条结果")
+        return grouped
+
     def index_image(
         self,
         image_id: str,
@@ -638,7 +683,8 @@ class SearchService:
         success = self._vector_db_service.upsert(
             id=image_id,
             vector=vector,
-            metadata=metadata
+            metadata=metadata,
+            text_vectors=self._text_vectors([metadata])[0]
         )
 
         if success:
@@ -677,18 +723,109 @@ class SearchService:
 
         vectors = self._embedding_service.generate_embeddings_batch(inputs)
 
+        text_vectors = self._text_vectors([img["metadata"] for img in images])
+
         # 准备记录
         records = [
             {
                 "id": img["id"],
                 "vector": vec,
-                "metadata": img["metadata"]
+                "metadata": img["metadata"],
+                "text_vectors": texts
             }
-            for img, vec in zip(images, vectors)
+            for img, vec, texts in zip(images, vectors, text_vectors)
         ]
 
         return self._vector_db_service.upsert_batch(records)
 
+    def update_metadata(self, image_id: str, metadata: Dict[str, Any]) -> bool:
+        """
+        更新图片记录的元数据，描述或标签被修改时按更新后的内容重新生成文本向量
+
+        Args:
+            image_id: 图片ID
+            metadata: 新的元数据（仅更新提供的字段）
+
+        Returns:
+            是否成功
+        """
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
+        stale = self._vector_db_service.stale_text_vectors(metadata)
+        record = self._vector_db_service.get(image_id) if stale else None
+        return self._vector_db_service.update_metadata(
+            image_id, metadata, text_vectors=self._updated_text_vectors(record, metadata, stale)
+        )
+
+    def _updated_text_vectors(
+        self,
+        record: Optional[Dict[str, Any]],
+        metadata: Dict[str, Any],
+        names: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """按记录更新后的元数据重新生成失效的文本向量，记录不存在或不需要时返回 None"""
+        if record is None or not names:
+            return None
+        return self._text_vectors([{**(record["metadata"] or {}), **metadata}], names)[0]
+
+    def _text_vectors(
+        self,
+        metadata_list: List[Dict[str, Any]],
+        names: Optional[List[str]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        为待索引的记录生成集合中的文本向量（所有文本一次批量生成）
+
+        Args:
+            metadata_list: 记录的元数据
+            names: 只生成这些文本向量，默认为集合中的全部文本向量
+
+        Returns:
+            与 metadata_list 一一对应的 {文本向量名: 向量}；来源字段为空、集合没有文本向量或生成失败时为 None
+            （生成失败不影响图片索引，由 backfill_text_vectors 补齐）
+        """
+        names = self._vector_db_service.text_vectors if names is None else names
+        inputs = [
+            (i, name, text_vector_input(name, metadata))
+            for i, metadata in enumerate(metadata_list)
+            for name in names
+        ]
+        inputs = [item for item in inputs if item[2]]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(metadata_list)
+        if not inputs:
+            return results
+        try:
+            vectors = self._embedding_service.generate_embeddings_batch(
+                [{"text": text, "instruction": TEXT_VECTOR_INSTRUCTION} for _, _, text in inputs]
+            )
+        except Exception as e:
+            logger.warning(f"文本向量生成失败，稍后由 backfill_text_vectors 补齐: {e}")
+            return results
+        for (i, name, _), vector in zip(inputs, vectors):
+            results[i] = {**(results[i] or {}), name: vector}
+        return results
+
+    def backfill_text_vectors(self, batch_size: int = 64) -> Dict[str, Dict[str, int]]:
+        """
+        为已有记录补齐文本向量（按 description 和标签批量生成）
+
+        Args:
+            batch_size: 每次生成向量的记录数
+
+        Returns:
+            文本向量名 -> {"scanned", "updated", "skipped"}
+        """
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
+        def embed(texts: List[str]):
+            return self._embedding_service.generate_embeddings_batch(
+                [{"text": text, "instruction": TEXT_VECTOR_INSTRUCTION} for text in texts]
+            )
+
+        return backfill_text_vectors(self._vector_db_service, embed, batch_size=batch_size)
+
     def remove_from_index(self, image_id: str) -> bool:
         """
         从索引中删除图片
@@ -701,6 +838,160 @@ class SearchService:
         """
         return self._vector_db_service.delete(image_id)
 
+    # ==================== 异步接口 ====================
+    # 参数与同名同步方法相同。未特别说明的接口整个调用（生成向量 + 向量库检索）在同一个工作线程内完成；
+    # 异步向量数据库服务可用时，文本检索、批量检索、索引和删除的向量库请求在事件循环中发出
+
+    async def search_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """search 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.search, *args, **kwargs)
+
+    async def search_by_text_async(
+        self,
+        query_text: str,
+        instruction: Optional[str] = None,
+        top_k: int = 10,
+        score_threshold: Optional[float] = None,
+        filter_tags: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """search_by_text 的异步版本（只有向量生成在 embedding 线程池中执行）"""
+        async_vector_db = self._async_vector_db()
+        if async_vector_db is None:
+            return await run_in_executor(
+                EMBEDDING_POOL, self.search_by_text, query_text, instruction, top_k, score_threshold, filter_tags
+            )
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
+        query_vector = await run_in_executor(
+            EMBEDDING_POOL,
+            self._embedding_service.generate_text_embedding,
+            text=query_text,
+            instruction=instruction or "Represent this text for retrieval."
+        )
+        results = await async_vector_db.search(
+            query_vector=query_vector,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            filter_tags=filter_tags,
+            fuse_text=True,
+            query_text=query_text
+        )
+        logger.info(f"向量搜索完成: query='{query_text}', 返回 {len(results)} 条结果")
+        return self._add_preview_urls(results)
+
+    async def search_by_image_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """search_by_image 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.search_by_image, *args, **kwargs)
+
+    async def search_by_image_id_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """search_by_image_id 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.search_by_image_id, *args, **kwargs)
+
+    async def search_hybrid_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """search_hybrid 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.search_hybrid, *args, **kwargs)
+
+    async def search_batch_async(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        search_batch 的异步版本
+
+        查询向量按 EMBEDDING_STREAM_BATCH_SIZE 分批后同时提交（外部请求仍受 outbound_governor 限制），
+        全部完成后执行一次批量检索（异步向量数据库服务不可用时在 vector_db 线程池中执行）。
+        """
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+        if not queries:
+            return []
+
+        inputs = self._batch_embedding_inputs(queries)
+        batch_size = max(1, get_settings().EMBEDDING_STREAM_BATCH_SIZE)
+        vectors: List[Any] = [None] * len(inputs)
+        batches = self._embedding_service.iter_embeddings_async(
+            inputs,
+            batch_size=batch_size,
+            concurrency=-(-len(inputs) // batch_size)
+        )
+        try:
+            async for indices, result in batches:
+                if isinstance(result, Exception):
+                    raise result
+                vectors[indices.start:indices.stop] = list(result)
+        finally:
+            await batches.aclose()
+
+        async_vector_db = self._async_vector_db()
+        if async_vector_db is None:
+            return await run_in_executor(VECTOR_DB_POOL, self._search_batch_vectors, queries, vectors)
+        grouped = await async_vector_db.search_batch(self._batch_vector_queries(queries, vectors))
+        return self._finish_batch(grouped)
+
+    async def search_by_text_with_meta_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """search_by_text_with_meta 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.search_by_text_with_meta, *args, **kwargs)
+
+    async def search_by_meta_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """search_by_meta 的异步版本（不生成向量，在 vector_db 线程池中执行）"""
+        return await run_in_executor(VECTOR_DB_POOL, self.search_by_meta, *args, **kwargs)
+
+    async def index_image_async(
+        self,
+        image_id: str,
+        image_path: str,
+        metadata: Dict[str, Any],
+        instruction: Optional[str] = None
+    ) -> bool:
+        """index_image 的异步版本（只有向量生成在 embedding 线程池中执行）"""
+        async_vector_db = self._async_vector_db()
+        if async_vector_db is None:
+            return await run_in_executor(EMBEDDING_POOL, self.index_image, image_id, image_path, metadata, instruction)
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
+        logger.info(f"开始索引图片: id={image_id}, path={image_path}")
+        vector = await run_in_executor(
+            EMBEDDING_POOL,
+            self._embedding_service.generate_image_embedding,
+            image=image_path,
+            instruction=instruction or "Represent this image for retrieval."
+        )
+        text_vectors = (await run_in_executor(EMBEDDING_POOL, self._text_vectors, [metadata]))[0]
+        success = await async_vector_db.upsert(id=image_id, vector=vector, metadata=metadata,
+                                               text_vectors=text_vectors)
+
+        if success:
+            logger.info(f"图片索引成功: {image_id}")
+        else:
+            logger.error(f"图片索引失败: {image_id}")
+
+        return success
+
+    async def update_metadata_async(self, image_id: str, metadata: Dict[str, Any]) -> bool:
+        """update_metadata 的异步版本（只有文本向量生成在 embedding 线程池中执行）"""
+        async_vector_db = self._async_vector_db()
+        if async_vector_db is None:
+            return await run_in_executor(EMBEDDING_POOL, self.update_metadata, image_id, metadata)
+        if not self.is_initialized:
+            raise RuntimeError("搜索服务未初始化")
+
+        stale = self._vector_db_service.stale_text_vectors(metadata)
+        record = await async_vector_db.get(image_id) if stale else None
+        text_vectors = None
+        if record is not None:
+            text_vectors = await run_in_executor(EMBEDDING_POOL, self._updated_text_vectors, record, metadata, stale)
+        return await async_vector_db.update_metadata(image_id, metadata, text_vectors=text_vectors)
+
+    async def index_images_batch_async(self, *args, **kwargs) -> bool:
+        """index_images_batch 的异步版本"""
+        return await run_in_executor(EMBEDDING_POOL, self.index_images_batch, *args, **kwargs)
+
+    async def remove_from_index_async(self, image_id: str) -> bool:
+        """remove_from_index 的异步版本"""
+        async_vector_db = self._async_vector_db()
+        if async_vector_db is None:
+            return await run_in_executor(VECTOR_DB_POOL, self.remove_from_index, image_id)
+        return await async_vector_db.delete(image_id)
+
 
 # 全局服务实例
 search_service = SearchService()
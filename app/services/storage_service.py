@@ -1,20 +1,29 @@
 """
 图片存储服务模块
 管理本地图片文件的存储、索引和读取
+
+多租户：默认租户的图片在存储根目录下，其他租户在 <存储根目录>/_tenants/<租户>/ 下（首次写入时创建），
+查找、列出和统计只在当前租户的目录中进行。
 """
 
 import os
 import uuid
 import shutil
+import fnmatch
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any, BinaryIO, Tuple
+from typing import Optional, List, Dict, Any, BinaryIO, Iterator, Tuple
 
 from PIL import Image
 
+from .tenancy import DEFAULT_TENANT, get_current_tenant
+
 logger = logging.getLogger(__name__)
 
+# 非默认租户的存储目录所在的子目录
+TENANT_DIR = "_tenants"
+
 
 class StorageService:
     """
@@ -78,6 +87,22 @@ class StorageService:
             raise RuntimeError("存储服务未初始化")
         return self._storage_path
 
+    def _root(self) -> Path:
+        """当前租户的存储目录"""
+        tenant = get_current_tenant()
+        if tenant == DEFAULT_TENANT:
+            return self._storage_path
+        return self._storage_path / TENANT_DIR / tenant
+
+    def _find(self, pattern: str) -> Iterator[Path]:
+        """在当前租户的存储目录中按文件名模式递归查找（默认租户跳过其他租户的目录）"""
+        root = str(self._root())
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == root and TENANT_DIR in dirnames:
+                dirnames.remove(TENANT_DIR)
+            for name in fnmatch.filter(filenames, pattern):
+                yield Path(dirpath) / name
+
     def _generate_id(self) -> str:
         """生成标准UUID"""
         return str(uuid.uuid4())
@@ -96,7 +121,7 @@ class StorageService:
         根据ID获取存储子目录（按日期分层存储）
         """
         today = datetime.now().strftime("%Y/%m/%d")
-        subdir = self._storage_path / today
+        subdir = self._root() / today
         subdir.mkdir(parents=True, exist_ok=True)
         return subdir
 
@@ -204,7 +229,7 @@ class StorageService:
             img_format = "unknown"
 
         # 计算相对路径
-        relative_path = str(file_path.relative_to(self._storage_path))
+        relative_path = str(file_path.relative_to(self._root()))
 
         return {
             "id": image_id,
@@ -234,12 +259,26 @@ class StorageService:
 
         # 遍历查找图片
         for ext in self._allowed_extensions:
-            for path in self._storage_path.rglob(f"{image_id}.{ext}"):
+            for path in self._find(f"{image_id}.{ext}"):
                 if path.exists():
                     return path
 
         return None
 
+    def iter_image_files(self) -> Iterator[Tuple[str, Path]]:
+        """
+        遍历当前租户的所有图片文件
+
+        Yields:
+            (图片ID, 路径)
+        """
+        if not self.is_initialized:
+            raise RuntimeError("存储服务未初始化")
+
+        for path in self._find("*.*"):
+            if self._validate_extension(path.name):
+                yield path.stem, path
+
     def get_image(self, image_id: str) -> Optional[Tuple[bytes, str]]:
         """
         读取图片内容
@@ -333,7 +372,7 @@ class StorageService:
         # 收集所有图片
         all_images = []
         for ext in self._allowed_extensions:
-            for path in self._storage_path.rglob(f"*.{ext}"):
+            for path in self._find(f"*.{ext}"):
                 # 提取ID
                 image_id = path.stem
                 # 兼容旧格式(img_前缀)和新格式(标准UUID)
@@ -361,7 +400,7 @@ class StorageService:
         total_count = 0
 
         for ext in self._allowed_extensions:
-            for path in self._storage_path.rglob(f"*.{ext}"):
+            for path in self._find(f"*.{ext}"):
                 total_size += path.stat().st_size
                 total_count += 1
 
@@ -369,7 +408,7 @@ class StorageService:
             "total_images": total_count,
             "total_size": total_size,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
-            "storage_path": str(self._storage_path)
+            "storage_path": str(self._root())
         }
 
     def _is_valid_uuid(self, value: str) -> bool:
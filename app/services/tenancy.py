@@ -0,0 +1,66 @@
+"""
+多租户上下文
+当前请求所属的租户保存在 contextvar 中，由 HTTP 中间件按请求头设置，
+VectorDBService / StorageService 据此选择集合、过滤条件和存储目录。
+
+租户模式（TENANT_MODE）：
+- none：不区分租户（默认），所有数据在同一个集合和存储目录中
+- payload：所有租户共用一个集合，每条记录带 tenant_id 字段（is_tenant 索引），
+  新建集合只为每个租户单独建 HNSW 图（payload_m），检索延迟只取决于本租户的数据量
+- collection：每个租户一个集合（<集合名>__<租户>），首次访问时创建，共用同一个客户端连接
+
+默认租户（未带请求头的请求、命令行工具）使用原有集合和存储目录，升级后已有数据仍然可见。
+run_in_executor 会把 contextvar 复制到工作线程；自行启动的线程需要用 tenant_scope 传递租户。
+"""
+
+import re
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+TENANT_MODES = ("none", "payload", "collection")
+DEFAULT_TENANT = "default"
+TENANT_FIELD = "tenant_id"
+
+_TENANT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_current_tenant: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_tenant", default=None)
+
+
+def normalize_tenant_id(value: Optional[str]) -> str:
+    """
+    校验租户ID（字母、数字、下划线、连字符，最长 64 个字符），空值视为默认租户
+
+    Raises:
+        ValueError: 租户ID不合法
+    """
+    if value is None or not value.strip():
+        return DEFAULT_TENANT
+    value = value.strip()
+    if not _TENANT_ID.match(value):
+        raise ValueError(f"租户ID不合法: {value!r}（只允许字母、数字、下划线和连字符，最长 64 个字符）")
+    return value
+
+
+def get_current_tenant() -> str:
+    """当前上下文的租户，未设置时为默认租户"""
+    return _current_tenant.get() or DEFAULT_TENANT
+
+
+def set_current_tenant(tenant: Optional[str]) -> contextvars.Token:
+    """设置当前上下文的租户，返回用于 reset_current_tenant 的 token"""
+    return _current_tenant.set(normalize_tenant_id(tenant))
+
+
+def reset_current_tenant(token: contextvars.Token) -> None:
+    """恢复 set_current_tenant 之前的租户"""
+    _current_tenant.reset(token)
+
+
+@contextmanager
+def tenant_scope(tenant: Optional[str]) -> Iterator[str]:
+    """在 with 块内切换当前租户"""
+    token = set_current_tenant(tenant)
+    try:
+        yield get_current_tenant()
+    finally:
+        reset_current_tenant(token)
@@ -0,0 +1,208 @@
+"""
+向量写入缓冲（write-behind）
+把多个调用方的单点 upsert 合并为批量写入，减少 Qdrant 往返和段刷新次数
+
+- 按大小或时间触发：待写入点数达到 max_batch，或最早的待写入点等待超过 max_delay 秒
+- 同一批次内相同 ID 只保留最后一次写入
+- 批次默认以 wait=False 提交（服务端接收即返回）；任一调用方要求持久化确认（durable）时，
+  该批次以 wait=True 提交，等服务端应用完成后才返回
+- 每次 submit 返回一个 Future，批次提交完成后给出结果（或异常），调用方可选择是否等待
+- close() 会写完所有待写入的点后再退出，由应用关闭流程调用
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 保留最近多少次批次的耗时用于计算分位数
+_LATENCY_WINDOW = 512
+
+
+@dataclass
+class _Pending:
+    record: Dict[str, Any]
+    futures: List[Future] = field(default_factory=list)
+    durable: bool = False
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class UpsertBuffer:
+    """
+    向量写入缓冲
+
+    flush_fn(records, wait) 负责实际写入，返回是否成功；由后台线程按批调用
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Dict[str, Any]], bool], bool],
+        max_batch: int = 64,
+        max_delay: float = 0.05
+    ):
+        self._flush_fn = flush_fn
+        self._max_batch = max(1, max_batch)
+        self._max_delay = max(0.0, max_delay)
+
+        self._cond = threading.Condition()
+        self._pending: Dict[Any, _Pending] = {}
+        self._oldest: Optional[float] = None
+        self._flushing = 0
+        self._flush_requested = False
+        self._closed = False
+
+        self._stats = {"submitted": 0, "coalesced": 0, "flushes": 0, "points": 0, "errors": 0, "max_batch_size": 0}
+        self._latencies = deque(maxlen=_LATENCY_WINDOW)
+
+        self._thread = threading.Thread(target=self._run, name="upsert-buffer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict[str, Any], durable: bool = False, key: Any = None) -> Future:
+        """
+        加入待写入队列
+
+        Args:
+            record: 记录，包含 id、vector、metadata
+            durable: 是否要求该记录所在批次等待服务端应用完成（wait=True）
+            key: 合并同一记录的键，默认为 record["id"]（多租户时包含租户）
+
+        Returns:
+            批次提交完成后得到写入结果（bool）的 Future
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("写入缓冲已关闭")
+            key = record["id"] if key is None else key
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = _Pending(record, [future], durable)
+            else:
+                # 同一 ID 尚未写出，以最新的记录为准
+                entry.record = record
+                entry.futures.append(future)
+                entry.durable = entry.durable or durable
+                self._stats["coalesced"] += 1
+            self._stats["submitted"] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self._max_batch or durable or len(self._pending) == 1:
+                self._cond.notify_all()
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写出所有待写入的点并等待完成
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            是否在超时前写完
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: not self._pending and not self._flushing, timeout)
+            self._flush_requested = False
+            return done
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """停止接收新的写入，写完剩余的点后结束后台线程"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            pending = len(self._pending)
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        logger.info(f"向量写入缓冲已关闭（关闭时待写入 {pending} 个点）")
+
+    def _due(self) -> bool:
+        """是否应立即写出一批"""
+        if not self._pending:
+            return False
+        if self._closed or self._flush_requested or len(self._pending) >= self._max_batch:
+            return True
+        if any(entry.durable for entry in self._pending.values()):
+            return True
+        return time.monotonic() - self._oldest >= self._max_delay
+
+    def _take_batch(self) -> List[_Pending]:
+        """取出最多 max_batch 个待写入的点（调用方持有锁）"""
+        ids = list(self._pending)[:self._max_batch]
+        batch = [self._pending.pop(i) for i in ids]
+        self._oldest = time.monotonic() if self._pending else None
+        self._flushing += 1
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self._oldest + self._max_delay - time.monotonic())
+                    self._cond.wait(timeout)
+                batch = self._take_batch()
+            self._write(batch)
+
+    def _write(self, batch: List[_Pending]) -> None:
+        """提交一批并通知所有等待方"""
+        records = [entry.record for entry in batch]
+        durable = any(entry.durable for entry in batch)
+        start = time.perf_counter()
+        try:
+            success = self._flush_fn(records, durable)
+            error = None
+        except Exception as e:
+            success, error = False, e
+            logger.error(f"向量批量写入失败（{len(records)} 个点）: {e}")
+        elapsed = time.perf_counter() - start
+
+        with self._cond:
+            self._flushing -= 1
+            self._stats["flushes"] += 1
+            self._stats["points"] += len(records)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(records))
+            if error is not None or not success:
+                self._stats["errors"] += 1
+            self._latencies.append(elapsed)
+            self._cond.notify_all()
+
+        for entry in batch:
+            for future in entry.futures:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(success)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取批次大小、写入耗时等指标"""
+        with self._cond:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            pending = len(self._pending)
+        flushes = stats["flushes"]
+        return {
+            **stats,
+            "pending": pending,
+            "max_batch": self._max_batch,
+            "max_delay": self._max_delay,
+            "avg_batch_size": round(stats["points"] / flushes, 2) if flushes else 0.0,
+            "flush_ms_p50": round(_percentile(latencies, 0.5) * 1000, 3),
+            "flush_ms_p95": round(_percentile(latencies, 0.95) * 1000, 3),
+            "flush_ms_max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        }
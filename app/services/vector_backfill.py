@@ -0,0 +1,148 @@
+"""
+向量集合回填
+为已有记录补齐写入时才会生成的字段和向量，均可重复执行，只处理缺失的记录：
+
+- backfill_date_fields：由 created_at 派生的 year/month/day/weekday/month_day（python -m app.cli backfill-date-fields）
+- backfill_text_vectors：缺少文本向量（caption）的记录，需要 Embedding（python -m app.cli backfill-text-vectors）
+- backfill_lexical_vectors：缺少关键词稀疏向量的记录，不调用 Embedding（python -m app.cli backfill-lexical）
+
+只使用 VectorDBService 的公开接口，作用于当前租户的集合；payload 租户模式下遍历共用集合中所有租户的记录。
+"""
+
+import logging
+from typing import Any, Callable, Dict, List
+
+from qdrant_client.http.models import Filter, HasVectorCondition, PointVectors
+
+from .lexical import LEXICAL_FIELDS, lexical_vector
+from .vector_db_service import (
+    VectorDBService,
+    DATE_PART_FIELDS,
+    LEXICAL_VECTOR_NAME,
+    TEXT_VECTOR_FIELDS,
+    date_part_fields,
+    text_vector_input,
+)
+from .vector_utils import to_list
+
+logger = logging.getLogger(__name__)
+
+
+def _check_initialized(service: VectorDBService) -> None:
+    if not service.is_initialized:
+        raise RuntimeError("向量数据库未初始化")
+
+
+def backfill_date_fields(service: VectorDBService, batch_size: int = 256) -> Dict[str, int]:
+    """
+    为已有记录补齐派生日期字段（只更新缺失或不一致的记录）
+
+    Args:
+        service: 向量数据库服务
+        batch_size: 每页遍历的记录数
+
+    Returns:
+        {"scanned": 遍历数, "updated": 更新数, "skipped": created_at 缺失或无法解析的记录数}
+    """
+    _check_initialized(service)
+
+    collection = service.collection_name
+    service.create_date_part_indexes(collection)
+    stats = {"scanned": 0, "updated": 0, "skipped": 0}
+    offset = None
+    while True:
+        records, offset = service.scroll_page(batch_size, offset, None, ["created_at", *DATE_PART_FIELDS])
+        for record in records:
+            stats["scanned"] += 1
+            metadata = record["metadata"] or {}
+            fields = date_part_fields(metadata.get("created_at"))
+            if not fields:
+                stats["skipped"] += 1
+            elif any(metadata.get(key) != value for key, value in fields.items()):
+                service.set_points_payload(collection, [record["id"]], fields, wait=False)
+                stats["updated"] += 1
+        if offset is None:
+            break
+    logger.info(f"日期字段回填完成: {stats}")
+    return stats
+
+
+def backfill_text_vectors(
+    service: VectorDBService,
+    embed: Callable[[List[str]], Any],
+    batch_size: int = 64
+) -> Dict[str, Dict[str, int]]:
+    """
+    为缺少文本向量的记录生成文本向量（只处理缺少该向量的记录）
+
+    Args:
+        service: 向量数据库服务
+        embed: 批量生成文本向量的函数（文本列表 -> 向量矩阵）
+        batch_size: 每批处理的记录数（一次 embed 调用）
+
+    Returns:
+        文本向量名 -> {"scanned": 遍历数, "updated": 写入数, "skipped": 来源字段为空的记录数}
+    """
+    _check_initialized(service)
+
+    collection = service.collection_name
+    result = {}
+    for name in service.text_vectors:
+        stats = {"scanned": 0, "updated": 0, "skipped": 0}
+        missing = Filter(must_not=[HasVectorCondition(has_vector=name)])
+        offset = None
+        while True:
+            records, offset = service.scroll_page(batch_size, offset, missing, list(TEXT_VECTOR_FIELDS[name]))
+            stats["scanned"] += len(records)
+            inputs = [(record["id"], text_vector_input(name, record["metadata"])) for record in records]
+            inputs = [(id, text) for id, text in inputs if text]
+            stats["skipped"] += len(records) - len(inputs)
+            if inputs:
+                vectors = embed([text for _, text in inputs])
+                service.update_point_vectors(collection, [
+                    PointVectors(id=id, vector={name: to_list(vector)})
+                    for (id, _), vector in zip(inputs, vectors)
+                ])
+                stats["updated"] += len(inputs)
+            if offset is None:
+                break
+        logger.info(f"文本向量 {name} 回填完成: {stats}")
+        result[name] = stats
+    return result
+
+
+def backfill_lexical_vectors(service: VectorDBService, batch_size: int = 256) -> Dict[str, int]:
+    """
+    为缺少关键词向量的记录生成关键词向量（只处理缺少该向量的记录，不调用 Embedding）
+
+    Args:
+        service: 向量数据库服务
+        batch_size: 每批处理的记录数
+
+    Returns:
+        {"scanned": 遍历数, "updated": 写入数}
+
+    Raises:
+        RuntimeError: 未初始化或当前集合没有关键词向量
+    """
+    _check_initialized(service)
+    collection = service.collection_name
+    if not service.has_lexical:
+        raise RuntimeError(f"集合 {collection} 没有关键词向量")
+
+    stats = {"scanned": 0, "updated": 0}
+    missing = Filter(must_not=[HasVectorCondition(has_vector=LEXICAL_VECTOR_NAME)])
+    offset = None
+    while True:
+        records, offset = service.scroll_page(batch_size, offset, missing, list(LEXICAL_FIELDS))
+        stats["scanned"] += len(records)
+        if records:
+            service.update_point_vectors(collection, [
+                PointVectors(id=record["id"], vector={LEXICAL_VECTOR_NAME: lexical_vector(record["metadata"])})
+                for record in records
+            ])
+            stats["updated"] += len(records)
+        if offset is None:
+            break
+    logger.info(f"关键词向量回填完成: {stats}")
+    return stats
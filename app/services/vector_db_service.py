@@ -1,18 +1,91 @@
 """
 Qdrant向量数据库服务模块
 支持本地模式和Docker部署模式的灵活切换
+
+新建集合默认采用 Matryoshka 多分辨率结构（两个命名向量）：
+- image_coarse: 完整向量前 N 维（重新归一化），建 HNSW 索引，用于第一阶段候选召回
+- image: 完整向量，落盘且不建 HNSW 图，仅用于对候选做精确重排
+两者来自同一次 Embedding 调用。旧集合（单个匿名向量）保持原有单阶段检索。
+
+启用文本命名向量（text_vectors，目前为 caption）时，新建集合的每个点还可以有一个由 description 和标签
+生成的文本向量（见 TEXT_VECTOR_FIELDS）。文本检索（fuse_text=True）时图片向量和文本向量各自召回候选，
+由 Qdrant 按 RRF / DBSF 融合，一次请求完成；没有文本向量的点只参与图片向量的召回。
+写入时未提供文本向量的点由 vector_backfill.backfill_text_vectors（python -m app.cli backfill-text-vectors）补齐，
+修改 description / 标签时旧的文本向量被删除，等待重新补齐。
+
+启用关键词向量（lexical）时，新建集合另有一个稀疏向量 lexical：写入时由文件名、标签和描述按 BM25 生成
+（见 lexical，中文按单字 + 二元组切分），IDF 由 Qdrant 统计。检索时传入 query_text 则关键词召回与
+向量召回一起按 RRF 融合，lexical_weight 调整关键词一路的权重；修改元数据时关键词向量随之重新生成，
+已有记录由 vector_backfill.backfill_lexical_vectors（python -m app.cli backfill-lexical）补齐。
+
+启用写入缓冲（upsert_buffer_size > 0）时，upsert 会与其他调用方的写入合并为批量请求，
+见 upsert_buffer。
+
+写入时由 created_at 派生整数字段 year/month/day/weekday/month_day（建 INTEGER 索引），
+"每年 1 月 18 日" 这类查询直接按 month_day 过滤；旧数据用 vector_backfill.backfill_date_fields
+（python -m app.cli backfill-date-fields）补齐。
+
+initialize 的全部参数由 VectorDBConfig 给出（VectorDBConfig.from_settings 按 Settings 构造）。
+新建集合的量化、原始向量落盘和 HNSW 参数由 CollectionOptions 决定，已有集合可通过
+apply_collection_options（python -m app.cli collection-options --apply）迁移。
+docker/cloud 模式的传输方式（REST / gRPC）、超时、keep-alive 和 gRPC 压缩由 ConnectionOptions 决定。
+
+stats_cache_ttl > 0 时集合信息和记录数从短 TTL 缓存读取（见 collection_stats），
+approximate_count 开启后 count() 默认返回缓存中的近似值，单标签计数使用随写入增量维护的标签计数表。
+
+需要遍历大量记录时使用 iter_points / aiter_points：按页流式产出，可只取 ID、指定 payload 字段或附带向量，
+调用方处理当前页时下一页已在请求中。
+
+create_snapshot / restore_snapshot 备份和恢复集合（见 vector_snapshot）：服务端模式使用 Qdrant 原生快照，
+本地模式和 NumPy 引擎使用可移植导出；写入时记录 updated_at，支持只导出某时间点之后的修改。
+
+tenant_mode 为 payload / collection 时按当前租户（见 tenancy）选择集合、附加租户过滤条件，
+统计缓存按租户分别维护；payload 模式下按ID读写只作用于本租户的记录。
+
+存在别名 <集合名>_live 时读写经由该别名（由 migration_service 在新集合构建完成后原子切换），
+否则直接使用配置的集合。迁移期间设置的 shadow 观察者会收到所有写入，用于同步到新集合。
+
+backend="numpy" 时使用进程内 NumPy 向量引擎（见 numpy_vector_store）替代 Qdrant，
+集合固定为单向量结构。
 """
 
+import heapq
+import asyncio
 import logging
+import threading
+import contextvars
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union
-from datetime import datetime
-
+from functools import partial
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Union, Iterator, AsyncIterator, Generator, Tuple, TypeVar
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qdrant_models
 from qdrant_client.http.models import (
     Distance,
     VectorParams,
+    VectorParamsDiff,
+    HnswConfigDiff,
+    SearchParams,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SparseVectorParams,
+    Modifier,
+    Prefetch,
+    QueryRequest,
+    FusionQuery,
+    Fusion,
+    RrfQuery,
+    Rrf,
+    PointVectors,
     PointStruct,
     Filter,
     HasIdCondition,
@@ -20,14 +93,345 @@ from qdrant_client.http.models import (
     MatchValue,
     MatchAny,
     DatetimeRange,
+    IsEmptyCondition,
+    PayloadField,
+    KeywordIndexParams,
+    OrderBy,
+    Direction,
     UpdateResult,
     ScoredPoint,
 )
 
+from .upsert_buffer import UpsertBuffer
+from .executors import VECTOR_DB_POOL, run_in_executor
+from .collection_stats import CollectionStats, StatsSnapshot
+from .vector_snapshot import SnapshotMixin
+from .numpy_vector_store import NumpyVectorClient
+from .lexical import LEXICAL_FIELDS, lexical_vector, lexical_query
+from .tenancy import TENANT_MODES, DEFAULT_TENANT, TENANT_FIELD, get_current_tenant, tenant_scope
+from .vector_utils import VectorLike, as_float32, as_float32_matrix, l2_normalize, cosine_similarity, to_list
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 多分辨率集合中的命名向量
+FULL_VECTOR_NAME = "image"
+COARSE_VECTOR_NAME = "image_coarse"
+# 单向量集合中匿名向量在 vectors_config 里的键
+DEFAULT_VECTOR_NAME = ""
+# 迁移切换使用的别名后缀（<集合名>_live）
+LIVE_ALIAS_SUFFIX = "_live"
+# 文本命名向量 -> 生成文本向量的 payload 字段（以后可加入 ocr 等）
+CAPTION_VECTOR_NAME = "caption"
+TEXT_VECTOR_FIELDS = {CAPTION_VECTOR_NAME: ("description", "tags")}
+# 生成文本向量使用的指令（与文本检索的查询指令相同）
+TEXT_VECTOR_INSTRUCTION = "Represent this text for retrieval."
+# 图片向量与文本向量的服务端融合方式：rrf 按名次 | dbsf 按分数分布归一化后相加
+FUSION_METHODS = ("rrf", "dbsf")
+# 关键词检索的稀疏向量名
+LEXICAL_VECTOR_NAME = "lexical"
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+GRPC_COMPRESSIONS = ("none", "gzip")
+
+# 不超过该点数的写入按增量更新统计缓存（需先读取原有标签），更大的批量写入只标记缓存过期
+STATS_DELTA_MAX_BATCH = 256
+# 标签计数表最多包含的标签数
+TAG_FACET_LIMIT = 10000
+# 写入缓冲中记录所属租户的键（缓冲线程按租户分组写入）
+_BUFFER_TENANT_KEY = "_tenant"
+
+# 写入步骤产出的请求：(客户端方法名, 参数)，见 VectorDBService.upsert_steps
+WriteRequest = Tuple[str, Dict[str, Any]]
+WriteSteps = Generator[WriteRequest, Any, bool]
+
+# 由 created_at 派生的日期字段（weekday: 1=周一 ... 7=周日；month_day = month * 100 + day）
+DATE_PART_FIELDS = ("year", "month", "day", "weekday", "month_day")
+
+
+def date_part_fields(created_at: Any) -> Dict[str, int]:
+    """
+    由 created_at 派生日期字段，按时间值自身的日期（不做时区换算）
+
+    Args:
+        created_at: datetime 或 ISO 格式字符串
+
+    Returns:
+        日期字段字典，无法解析时返回空字典
+    """
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            return {}
+    if not isinstance(created_at, datetime):
+        return {}
+    return {
+        "year": created_at.year,
+        "month": created_at.month,
+        "day": created_at.day,
+        "weekday": created_at.isoweekday(),
+        "month_day": created_at.month * 100 + created_at.day,
+    }
+
+
+def _created_at(record: Dict[str, Any]) -> Optional[datetime]:
+    """记录的 created_at（带时区的换算为 UTC，与 Qdrant 的 datetime 排序一致），缺失或无法解析时为 None"""
+    created = (record.get("metadata") or {}).get("created_at")
+    try:
+        created = datetime.fromisoformat(created) if isinstance(created, str) else created
+    except ValueError:
+        return None
+    if not isinstance(created, datetime):
+        return None
+    return created.astimezone(timezone.utc).replace(tzinfo=None) if created.tzinfo else created
+
+
+def text_vector_input(name: str, payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    由 payload 拼接生成文本向量的文本
+
+    Args:
+        name: 文本向量名（TEXT_VECTOR_FIELDS 的键）
+        payload: 记录的元数据
+
+    Returns:
+        拼接后的文本，来源字段都为空时返回 None
+    """
+    parts = []
+    for field in TEXT_VECTOR_FIELDS[name]:
+        value = (payload or {}).get(field)
+        if isinstance(value, list):
+            value = "、".join(str(item) for item in value if item)
+        if value and str(value).strip():
+            parts.append(str(value).strip())
+    return "；".join(parts) or None
+
+
+@dataclass
+class CollectionOptions:
+    """
+    集合的存储与索引选项
+    作用于建 HNSW 索引的向量（单向量集合的匿名向量，多分辨率集合的前缀向量）；
+    多分辨率集合的完整向量始终落盘、不建图、不量化
+    """
+    quantization: str = "none"  # none | scalar（int8）| binary
+    quantization_always_ram: bool = True  # 量化向量常驻内存
+    on_disk: bool = False  # 原始 float32 向量落盘（启用量化时检索主要读量化向量）
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: int = 0  # 检索时的 hnsw_ef，0 表示使用服务端默认值
+    rescore: bool = True  # 量化检索后用原始向量重新打分
+    oversampling: float = 2.0  # 量化检索的候选倍数
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"不支持的量化方式: {self.quantization}，可选 {QUANTIZATION_MODES}")
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "CollectionOptions":
+        """从 Settings 构造"""
+        return cls(
+            quantization=settings.VECTOR_QUANTIZATION,
+            quantization_always_ram=settings.VECTOR_QUANTIZATION_ALWAYS_RAM,
+            on_disk=settings.VECTOR_ON_DISK,
+            hnsw_m=settings.VECTOR_HNSW_M,
+            hnsw_ef_construct=settings.VECTOR_HNSW_EF_CONSTRUCT,
+            search_ef=settings.VECTOR_SEARCH_EF,
+            rescore=settings.VECTOR_QUANTIZATION_RESCORE,
+            oversampling=settings.VECTOR_QUANTIZATION_OVERSAMPLING
+        )
+
+    def quantization_config(self) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+        """量化配置，none 时返回 None"""
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=qdrant_models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=self.quantization_always_ram))
+        return None
+
+    def hnsw_config(self) -> HnswConfigDiff:
+        return HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def search_params(self) -> Optional[SearchParams]:
+        """检索参数（hnsw_ef、量化重打分），全部为默认值时返回 None"""
+        params: Dict[str, Any] = {}
+        if self.search_ef > 0:
+            params["hnsw_ef"] = self.search_ef
+        if self.quantization != "none":
+            params["quantization"] = QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        return SearchParams(**params) if params else None
+
+
+@dataclass
+class ConnectionOptions:
+    """
+    服务端模式（docker/cloud）的传输与连接选项
+    gRPC 以 protobuf 二进制传输向量，省去 REST 对每个 float 的 JSON 编解码；压缩只作用于 gRPC
+    """
+    prefer_grpc: bool = False
+    grpc_port: int = 6334
+    timeout: int = 0  # 请求超时秒数，0 表示使用 qdrant-client 默认值
+    keepalive: float = 30.0  # REST 空闲连接保留秒数 / gRPC 请求期间的 keepalive ping 间隔，0 表示不复用 REST 连接
+    grpc_compression: str = "none"  # none | gzip
+    grpc_max_message_mb: int = 64  # gRPC 单条消息上限（批量取回完整向量时超过默认的 4MB）
+
+    def __post_init__(self):
+        if self.grpc_compression not in GRPC_COMPRESSIONS:
+            raise ValueError(f"不支持的 gRPC 压缩方式: {self.grpc_compression}，可选 {GRPC_COMPRESSIONS}")
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "ConnectionOptions":
+        """从 Settings 构造"""
+        return cls(
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+            keepalive=settings.QDRANT_KEEPALIVE,
+            grpc_compression=settings.QDRANT_GRPC_COMPRESSION
+        )
+
+    def client_kwargs(self, pool_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        QdrantClient / AsyncQdrantClient 的传输参数
+
+        Args:
+            pool_size: REST 连接池大小，None 表示不限
+
+        Returns:
+            构造参数（不含 host/port/api_key）
+        """
+        max_bytes = self.grpc_max_message_mb * 1024 * 1024
+        grpc_options: Dict[str, Any] = {
+            "grpc.max_send_message_length": max_bytes,
+            "grpc.max_receive_message_length": max_bytes,
+        }
+        if self.keepalive > 0:
+            # 只在有进行中的请求时发送 ping，避免服务端以 too_many_pings 断开空闲连接
+            grpc_options["grpc.keepalive_time_ms"] = int(self.keepalive * 1000)
+            grpc_options["grpc.keepalive_timeout_ms"] = 10000
+            grpc_options["grpc.keepalive_permit_without_calls"] = 0
+
+        kwargs: Dict[str, Any] = {
+            "prefer_grpc": self.prefer_grpc,
+            "grpc_port": self.grpc_port,
+            "grpc_options": grpc_options,
+            # 显式给出连接池配置：qdrant-client 对 localhost 默认关闭 keep-alive（Docker 部署常见）
+            "limits": httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size if self.keepalive > 0 else 0,
+                keepalive_expiry=self.keepalive if self.keepalive > 0 else None
+            ),
+        }
+        if self.timeout > 0:
+            kwargs["timeout"] = self.timeout
+        if self.grpc_compression == "gzip":
+            import grpc
+            kwargs["grpc_compression"] = grpc.Compression.Gzip
+        return kwargs
+
 
-class VectorDBService:
+@dataclass
+class VectorDBConfig:
+    """
+    向量数据库配置（VectorDBService.initialize 的参数）
+    连接、集合结构、写入缓冲、NumPy 引擎、统计缓存、多租户和混合检索选项
+    """
+    mode: str = "local"  # local（本地文件）| docker | cloud
+    path: Optional[str] = None  # 本地模式 / NumPy 引擎的存储路径
+    host: str = "localhost"  # docker/cloud 模式的主机地址
+    port: int = 6333
+    api_key: Optional[str] = None  # 云服务API密钥
+    collection_name: str = "smart_album"
+    vector_dimension: int = 2048
+    coarse_dimension: int = 0  # Matryoshka 前缀向量维度，0 表示不使用多分辨率结构
+    coarse_oversampling: float = 4.0  # 第一阶段候选数相对 top_k 的倍数
+    upsert_buffer_size: int = 0  # 写入缓冲的批次大小，0 表示 upsert 直接写入
+    upsert_buffer_delay: float = 0.05  # 写入缓冲的最长等待秒数
+    backend: str = "qdrant"  # qdrant | numpy（进程内 NumPy 引擎，存储在 path 下，忽略 mode）
+    numpy_dtype: str = "float32"  # NumPy 引擎的向量存储精度 float16 | float32
+    numpy_ivf_min_points: int = 50000  # NumPy 引擎启用 IVF 的点数阈值，0 表示始终精确检索
+    numpy_ivf_lists: int = 0  # NumPy 引擎的 IVF 分桶数，0 表示自动
+    numpy_ivf_probes: int = 16  # NumPy 引擎每次检索扫描的分桶数
+    collection_options: CollectionOptions = field(default_factory=CollectionOptions)  # 新建集合的量化/落盘/HNSW 选项
+    connection_options: ConnectionOptions = field(default_factory=ConnectionOptions)  # docker/cloud 模式的传输选项
+    stats_cache_ttl: float = 0.0  # 集合统计缓存的有效秒数，0 表示不缓存
+    approximate_count: bool = False  # count() 默认是否返回近似值（有统计缓存时取缓存，否则 exact=False）
+    tenant_mode: str = "none"  # none | payload（共用集合，按 tenant_id 分区）| collection（每个租户一个集合）
+    text_vectors: List[str] = field(default_factory=list)  # 新建集合附加的文本命名向量（TEXT_VECTOR_FIELDS 的键）
+    fusion: str = "rrf"  # 图片向量与文本向量的融合方式 rrf | dbsf
+    lexical: bool = False  # 新建集合是否附加关键词稀疏向量
+    lexical_weight: float = 1.0  # RRF 融合中关键词一路相对向量召回的权重，0 表示检索时不使用关键词
+
+    def __post_init__(self):
+        if self.backend not in ("qdrant", "numpy"):
+            raise ValueError(f"不支持的向量存储后端: {self.backend}")
+        if self.tenant_mode not in TENANT_MODES:
+            raise ValueError(f"不支持的租户模式: {self.tenant_mode}，可选 {TENANT_MODES}")
+        if self.tenant_mode == "payload" and self.backend == "numpy":
+            raise ValueError("NumPy 引擎不支持 payload 租户模式，请使用 collection 模式")
+        unknown = [name for name in self.text_vectors if name not in TEXT_VECTOR_FIELDS]
+        if unknown:
+            raise ValueError(f"不支持的文本向量: {unknown}，可选 {list(TEXT_VECTOR_FIELDS)}")
+        if self.fusion not in FUSION_METHODS:
+            raise ValueError(f"不支持的融合方式: {self.fusion}，可选 {FUSION_METHODS}")
+        if self.lexical_weight < 0:
+            raise ValueError(f"关键词权重不能为负数: {self.lexical_weight}")
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "VectorDBConfig":
+        """从 Settings 构造"""
+        return cls(
+            mode=settings.QDRANT_MODE,
+            path=settings.NUMPY_VECTOR_PATH if settings.VECTOR_DB_BACKEND == "numpy" else settings.QDRANT_PATH,
+            host=settings.QDRANT_HOST,
+            port=settings.QDRANT_PORT,
+            api_key=settings.QDRANT_API_KEY,
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            vector_dimension=settings.VECTOR_DIMENSION,
+            coarse_dimension=settings.VECTOR_COARSE_DIMENSION,
+            coarse_oversampling=settings.VECTOR_COARSE_OVERSAMPLING,
+            upsert_buffer_size=settings.UPSERT_BUFFER_SIZE,
+            upsert_buffer_delay=settings.UPSERT_BUFFER_DELAY,
+            backend=settings.VECTOR_DB_BACKEND,
+            numpy_dtype=settings.NUMPY_VECTOR_DTYPE,
+            numpy_ivf_min_points=settings.NUMPY_IVF_MIN_POINTS,
+            numpy_ivf_lists=settings.NUMPY_IVF_LISTS,
+            numpy_ivf_probes=settings.NUMPY_IVF_PROBES,
+            collection_options=CollectionOptions.from_settings(settings),
+            connection_options=ConnectionOptions.from_settings(settings),
+            stats_cache_ttl=settings.VECTOR_STATS_CACHE_TTL,
+            approximate_count=settings.VECTOR_APPROXIMATE_COUNT,
+            tenant_mode=settings.TENANT_MODE,
+            text_vectors=[CAPTION_VECTOR_NAME] if settings.VECTOR_CAPTION_ENABLED else [],
+            fusion=settings.VECTOR_FUSION,
+            lexical=settings.VECTOR_LEXICAL_ENABLED,
+            lexical_weight=settings.VECTOR_LEXICAL_WEIGHT
+        )
+
+
+def _quantization_mode(config: Any) -> str:
+    """Qdrant 返回的量化配置对应的模式名"""
+    if isinstance(config, ScalarQuantization):
+        return "scalar"
+    if isinstance(config, BinaryQuantization):
+        return "binary"
+    if isinstance(config, qdrant_models.ProductQuantization):
+        return "product"
+    return "none"
+
+
+class VectorDBService(SnapshotMixin):
     """
     Qdrant向量数据库服务类
     提供向量存储、检索、更新、删除等CRUD操作
@@ -45,110 +449,662 @@ class VectorDBService:
 
     def __init__(self):
         self._initialized = getattr(self, '_initialized', False)
-        self._collection_name: Optional[str] = None
+        self._base_collection_name: Optional[str] = None  # 配置的集合名（collection 模式的租户集合以此为前缀）
+        self._serving_collection: Optional[str] = None  # 默认租户（及 payload 模式所有租户）实际读写的集合或别名
+        self._shadow: Optional[Any] = None  # 迁移期间的写入观察者（on_upsert / on_update / on_delete）
         self._vector_dimension: int = 2048
-
-    def initialize(
-        self,
-        mode: str = "local",
-        path: Optional[str] = None,
-        host: str = "localhost",
-        port: int = 6333,
-        api_key: Optional[str] = None,
-        collection_name: str = "smart_album",
-        vector_dimension: int = 2048,
-        **kwargs
-    ) -> None:
+        self._coarse_dimension: int = 0  # 配置的前缀维度（用于新建集合）
+        self._coarse_oversampling: float = 4.0
+        self._multires: bool = False  # 当前集合是否为多分辨率结构
+        self._image_vector: Optional[str] = None  # 当前集合的图片向量名，None 表示单个匿名向量
+        self._text_vector_names: List[str] = []  # 配置的文本向量（用于新建集合）
+        self._text_vectors: List[str] = []  # 当前集合实际包含的文本向量
+        self._fusion: str = "rrf"
+        self._lexical_enabled: bool = False  # 配置是否启用关键词向量（用于新建集合）
+        self._lexical: bool = False  # 当前集合是否包含关键词向量
+        self._lexical_weight: float = 1.0
+        self._mode: str = "local"
+        self._backend: str = "qdrant"
+        self._options: CollectionOptions = CollectionOptions()
+        self._upsert_buffer: Optional[UpsertBuffer] = getattr(self, '_upsert_buffer', None)
+        self._stats_ttl: float = 0.0
+        self._tenant_stats: Dict[Optional[str], CollectionStats] = getattr(self, '_tenant_stats', {})
+        self._approximate_count: bool = False
+        self._tenant_mode: str = "none"
+        self._tenant_collections: set = set()  # collection 模式下已确认存在的租户集合
+        self._tenant_lock = threading.Lock()
+        self._server_url: Optional[str] = None  # 服务端模式的 REST 地址（快照传输使用）
+        self._api_key: Optional[str] = None
+        self._endpoint: Optional[Dict[str, Any]] = None  # 服务端模式的地址和认证参数（异步客户端复用）
+        self._connection_options: ConnectionOptions = ConnectionOptions()
+
+    def initialize(self, config: Optional[VectorDBConfig] = None, **options: Any) -> None:
         """
         初始化向量数据库连接
 
         Args:
-            mode: 部署模式 - "local"(本地文件) | "docker"(Docker部署) | "cloud"(云服务)
-            path: 本地模式下的存储路径
-            host: Docker/云服务模式下的主机地址
-            port: Docker/云服务模式下的端口
-            api_key: 云服务API密钥
-            collection_name: 集合名称
-            vector_dimension: 向量维度
+            config: 向量数据库配置，见 VectorDBConfig
+            **options: 未传 config 时按这些字段构造 VectorDBConfig（如 mode="local", path=...）
+
+        Raises:
+            ValueError: 同时传入 config 和 options，或配置不合法
         """
         if self._initialized and self._client is not None:
             logger.info("向量数据库已初始化，跳过重复初始化")
             return
 
-        self._collection_name = collection_name
-        self._vector_dimension = vector_dimension
-
-        logger.info(f"正在初始化Qdrant向量数据库，模式: {mode}")
+        if config is None:
+            config = VectorDBConfig(**options)
+        elif options:
+            raise ValueError(f"传入 config 时不能再指定选项: {sorted(options)}")
+
+        mode, backend = config.mode, config.backend
+        self._base_collection_name = config.collection_name
+        self._vector_dimension = config.vector_dimension
+        self._coarse_dimension = config.coarse_dimension if 0 < config.coarse_dimension < config.vector_dimension else 0
+        self._coarse_oversampling = max(1.0, config.coarse_oversampling)
+        self._mode = mode
+        self._backend = backend
+        self._options = config.collection_options
+        self._approximate_count = config.approximate_count
+        self._connection_options = config.connection_options
+        self._tenant_mode = config.tenant_mode
+        self._tenant_collections = set()
+        self._text_vector_names = list(config.text_vectors)
+        self._fusion = config.fusion
+        self._lexical_enabled = config.lexical
+        self._lexical_weight = config.lexical_weight
+
+        if config.lexical and config.fusion == "dbsf" and config.lexical_weight not in (0, 1):
+            logger.warning("DBSF 融合不支持权重，关键词权重只区分是否参与融合")
+        logger.info(f"正在初始化向量数据库，后端: {backend}，模式: {mode}")
+
+        if backend == "numpy":
+            # 进程内 NumPy 引擎：单向量结构，不使用 Matryoshka 前缀向量、文本向量和关键词向量
+            storage_path = Path(config.path) if config.path else Path("./numpy_vectors")
+            self._coarse_dimension = 0
+            self._text_vector_names = []
+            self._lexical_enabled = False
+            self._client = NumpyVectorClient(
+                path=str(storage_path),
+                dtype=config.numpy_dtype,
+                ivf_min_points=config.numpy_ivf_min_points,
+                ivf_lists=config.numpy_ivf_lists,
+                ivf_probes=config.numpy_ivf_probes
+            )
+            logger.info(f"NumPy 向量引擎初始化完成，存储路径: {storage_path}，精度: {config.numpy_dtype}")
 
-        if mode == "local":
+        elif mode == "local":
             # 本地文件模式
-            storage_path = Path(path) if path else Path("./qdrant_data")
+            storage_path = Path(config.path) if config.path else Path("./qdrant_data")
             storage_path.mkdir(parents=True, exist_ok=True)
             self._client = QdrantClient(path=str(storage_path))
             logger.info(f"Qdrant本地模式初始化完成，存储路径: {storage_path}")
 
         elif mode == "docker":
             # Docker部署模式
-            self._client = QdrantClient(host=host, port=port)
-            logger.info(f"Qdrant Docker模式初始化完成，连接: {host}:{port}")
+            self._endpoint = {"host": config.host, "port": config.port}
+            self._client = QdrantClient(**self.connection_params())
+            self._server_url = f"http://{config.host}:{config.port}"
+            logger.info(f"Qdrant Docker模式初始化完成，连接: {config.host}:{config.port}，{self._transport_label()}")
 
         elif mode == "cloud":
             # 云服务模式
-            self._client = QdrantClient(
-                host=host,
-                port=port,
-                api_key=api_key,
-                https=True
-            )
-            logger.info(f"Qdrant云服务模式初始化完成")
+            self._endpoint = {
+                "host": config.host, "port": config.port, "api_key": config.api_key, "https": True
+            }
+            self._client = QdrantClient(**self.connection_params())
+            self._server_url = f"https://{config.host}:{config.port}"
+            self._api_key = config.api_key
+            logger.info(f"Qdrant云服务模式初始化完成，{self._transport_label()}")
         else:
             raise ValueError(f"不支持的Qdrant模式: {mode}")
 
-        # 确保集合存在
-        self._ensure_collection()
+        # 确保集合存在（默认租户的集合）
+        self._serving_collection = self._resolve_serving_collection()
+        with tenant_scope(DEFAULT_TENANT):
+            self._ensure_collection()
+
+        if config.upsert_buffer_size > 0:
+            self._upsert_buffer = UpsertBuffer(
+                self._write_buffered,
+                max_batch=config.upsert_buffer_size,
+                max_delay=config.upsert_buffer_delay
+            )
+            logger.info(
+                f"向量写入缓冲已启用 (batch: {config.upsert_buffer_size}, delay: {config.upsert_buffer_delay}s)"
+            )
+
+        self._stats_ttl = config.stats_cache_ttl
+        if config.stats_cache_ttl > 0:
+            logger.info(
+                f"集合统计缓存已启用 (ttl: {config.stats_cache_ttl}s, approximate_count: {config.approximate_count})"
+            )
+
+        if config.tenant_mode != "none":
+            logger.info(f"多租户已启用 (mode: {config.tenant_mode})")
+
         self._initialized = True
 
+    @property
+    def _collection_name(self) -> Optional[str]:
+        """当前租户使用的集合名（collection 模式下首次访问时创建）"""
+        if self._tenant_mode != "collection":
+            return self._serving_collection
+        tenant = get_current_tenant()
+        if tenant == DEFAULT_TENANT:
+            return self._serving_collection
+        name = f"{self._base_collection_name}__{tenant}"
+        if name not in self._tenant_collections:
+            self._ensure_tenant_collection(name)
+        return name
+
+    def _ensure_tenant_collection(self, name: str) -> None:
+        """创建或检查租户集合，结构与默认集合相同（多分辨率 / 单向量，文本向量，关键词向量）"""
+        with self._tenant_lock:
+            if name in self._tenant_collections:
+                return
+            if not self._client.collection_exists(name):
+                logger.info(f"创建租户集合: {name}")
+                self._create_collection(
+                    name,
+                    self._vectors_config(multires=self._multires, text_vectors=self._text_vectors, lexical=self._lexical),
+                    self._sparse_vectors_config(self._lexical)
+                )
+            else:
+                params = self._client.get_collection(name).config.params
+                vectors = params.vectors
+                multires = isinstance(vectors, dict) and COARSE_VECTOR_NAME in vectors
+                if multires != self._multires or self._text_vectors_of(vectors) != self._text_vectors \
+                        or self._has_lexical(params) != self._lexical:
+                    raise RuntimeError(f"租户集合 {name} 的向量结构与默认集合不一致")
+            self._tenant_collections.add(name)
+
+    def _resolve_serving_collection(self) -> str:
+        """已通过迁移切换到别名时读写使用别名，否则使用配置的集合名"""
+        alias = self.live_alias
+        if self._backend == "qdrant":
+            aliases = self._client.get_aliases().aliases
+            if any(a.alias_name == alias for a in aliases):
+                logger.info(f"集合经由别名 {alias} 访问")
+                return alias
+        return self._base_collection_name
+
+    @property
+    def live_alias(self) -> str:
+        """迁移切换使用的别名"""
+        return f"{self._base_collection_name}{LIVE_ALIAS_SUFFIX}"
+
+    def physical_collection(self) -> str:
+        """当前读写的实际集合名（解析别名）"""
+        if self._serving_collection != self.live_alias:
+            return self._serving_collection
+        for alias in self._client.get_aliases().aliases:
+            if alias.alias_name == self.live_alias:
+                return alias.collection_name
+        raise RuntimeError(f"别名 {self.live_alias} 不存在")
+
+    def switch_serving(self, name: str) -> None:
+        """切换读写的集合或别名（迁移切换后调用），按其结构重新确定检索方式"""
+        with tenant_scope(DEFAULT_TENANT):
+            self._serving_collection = name
+            self._detect_layout()
+        self._invalidate_all_stats()
+
+    def set_shadow(self, observer: Optional[Any]) -> None:
+        """
+        设置迁移期间的写入观察者，None 表示取消
+
+        观察者的 on_upsert(points) / on_update(ids, payload) / on_delete(ids) 在写入成功后同步调用，
+        异常只记录日志，不影响本次写入的结果
+        """
+        self._shadow = observer
+
+    def _notify_shadow(self, event: str, *args: Any) -> None:
+        observer = self._shadow
+        if observer is None:
+            return
+        try:
+            getattr(observer, event)(*args)
+        except Exception as e:
+            logger.warning(f"迁移同步写入失败（{event}）: {e}")
+
+    # ==================== 按集合名读写（集合迁移、回填使用） ====================
+
+    @property
+    def backend(self) -> str:
+        """向量引擎：qdrant 或 numpy"""
+        return self._backend
+
+    @property
+    def base_collection_name(self) -> str:
+        """配置的集合名（不含租户后缀和别名后缀）"""
+        return self._base_collection_name
+
+    @property
+    def vector_dimension(self) -> int:
+        """当前集合的完整向量维度"""
+        return self._vector_dimension
+
+    def collection_exists(self, name: str) -> bool:
+        """集合（或别名）是否存在"""
+        return self._client.collection_exists(name)
+
+    def create_collection(self, name: str, dimension: Optional[int] = None) -> None:
+        """
+        按当前配置（多分辨率、文本向量、关键词向量、索引选项）新建集合
+
+        Args:
+            name: 集合名
+            dimension: 完整向量维度，默认为当前维度
+        """
+        self._create_collection(name, self._vectors_config(dimension=dimension), self._sparse_vectors_config())
+
+    def drop_collection(self, name: str) -> None:
+        """删除集合（Qdrant 同时删除指向它的别名）"""
+        self._client.delete_collection(name)
+
+    def collection_layout(self, name: str) -> Tuple[Union[VectorParams, Dict[str, VectorParams]], List[str], bool]:
+        """集合的向量配置、包含的文本向量，以及是否有关键词向量（向 point_vector 传入向量配置即可写入该集合）"""
+        params = self._client.get_collection(name).config.params
+        return params.vectors, self._text_vectors_of(params.vectors), self._has_lexical(params)
+
+    def count_collection(self, name: str) -> int:
+        """集合的精确记录数（不区分租户）"""
+        return self._client.count(collection_name=name, exact=True).count
+
+    def existing_ids(self, name: str, ids: List[Union[int, str]]) -> set:
+        """ids 中在集合里存在的记录ID"""
+        return {point.id for point in self._client.retrieve(collection_name=name, ids=ids, with_payload=False)}
+
+    def upsert_points(self, name: str, points: List[PointStruct], wait: bool = True) -> None:
+        """写入其他集合（向量由 point_vector 按该集合的向量配置构造），不通知迁移观察者"""
+        self._client.upsert(collection_name=name, points=points, wait=wait)
+
+    def update_point_vectors(self, name: str, points: List[PointVectors], wait: bool = True) -> None:
+        """更新集合中记录的部分命名向量（其他向量和 payload 不变）"""
+        self._client.update_vectors(collection_name=name, points=points, wait=wait)
+
+    def delete_points(self, name: str, ids: List[Union[int, str]], wait: bool = True) -> None:
+        """删除其他集合中的记录"""
+        self._client.delete(collection_name=name, points_selector=qdrant_models.PointIdsList(points=ids), wait=wait)
+
+    def set_points_payload(
+        self,
+        name: str,
+        ids: List[Union[int, str]],
+        payload: Dict[str, Any],
+        lexical: bool = False,
+        wait: bool = True
+    ) -> None:
+        """
+        合并修改其他集合中记录的 payload
+
+        Args:
+            name: 集合名
+            ids: 记录ID
+            payload: 要修改的字段
+            lexical: 集合有关键词向量时为 True，修改了 LEXICAL_FIELDS 时按合并后的 payload 重新生成关键词向量
+            wait: 是否等待写入完成
+        """
+        self._client.set_payload(collection_name=name, payload=payload, points=ids, wait=wait or lexical)
+        if lexical and any(field in payload for field in LEXICAL_FIELDS):
+            points = self._client.retrieve(collection_name=name, ids=ids, with_payload=list(LEXICAL_FIELDS))
+            self._client.update_vectors(collection_name=name, points=self._lexical_updates(points), wait=wait)
+
+    def overwrite_payloads(self, name: str, records: List[Dict[str, Any]], lexical: bool = False) -> None:
+        """
+        用记录的 metadata 覆盖其他集合中同ID记录的 payload（一个请求），并等待写入完成
+
+        Args:
+            name: 集合名
+            records: {"id", "metadata"} 列表
+            lexical: 集合有关键词向量时为 True，按新的 payload 重新生成关键词向量
+        """
+        self._client.batch_update_points(collection_name=name, update_operations=[
+            qdrant_models.OverwritePayloadOperation(
+                overwrite_payload=qdrant_models.SetPayload(payload=r["metadata"] or {}, points=[r["id"]])
+            )
+            for r in records
+        ], wait=True)
+        if lexical:
+            self._client.update_vectors(collection_name=name, points=[
+                PointVectors(id=r["id"], vector={LEXICAL_VECTOR_NAME: lexical_vector(r["metadata"])}) for r in records
+            ], wait=True)
+
+    def neighbour_ids(self, name: str, id: Union[int, str], using: Optional[str], limit: int) -> set:
+        """集合中与记录 id 最相似的 limit 条记录（不含其本身）"""
+        response = self._client.query_points(
+            collection_name=name,
+            query=id,
+            using=using,
+            query_filter=Filter(must_not=[HasIdCondition(has_id=[id])]),
+            limit=limit,
+            with_payload=False
+        )
+        return {point.id for point in response.points}
+
+    def switch_live_alias(self, name: str) -> None:
+        """在一个请求中删除旧别名并创建新别名（Qdrant 原子执行），把别名指向集合 name，然后经由别名读写"""
+        alias = self.live_alias
+        operations = []
+        if any(a.alias_name == alias for a in self._client.get_aliases().aliases):
+            operations.append(qdrant_models.DeleteAliasOperation(
+                delete_alias=qdrant_models.DeleteAlias(alias_name=alias)
+            ))
+        operations.append(qdrant_models.CreateAliasOperation(
+            create_alias=qdrant_models.CreateAlias(collection_name=name, alias_name=alias)
+        ))
+        self._client.update_collection_aliases(change_aliases_operations=operations)
+        self.switch_serving(alias)
+
     def _ensure_collection(self) -> None:
-        """确保集合存在，不存在则创建"""
+        """确保集合存在，不存在则创建（经由别名访问时别名指向的集合已存在）"""
         collections = self._client.get_collections().collections
         collection_names = [c.name for c in collections]
 
-        if self._collection_name not in collection_names:
+        if self._collection_name == self.live_alias:
+            if self._tenant_mode == "payload":
+                self._create_tenant_index(self._collection_name)
+        elif self._collection_name not in collection_names:
             logger.info(f"创建集合: {self._collection_name}")
-            self._client.create_collection(
-                collection_name=self._collection_name,
-                vectors_config=VectorParams(
-                    size=self._vector_dimension,
-                    distance=Distance.COSINE
-                )
-            )
-            # 创建payload索引以支持过滤
+            self._create_collection(self._collection_name, self._vectors_config(), self._sparse_vectors_config())
+        elif self._tenant_mode == "payload":
+            self._create_tenant_index(self._collection_name)
+
+        self._detect_layout()
+
+    def _create_collection(
+        self,
+        name: str,
+        vectors_config: Union[VectorParams, Dict[str, VectorParams]],
+        sparse_vectors_config: Optional[Dict[str, SparseVectorParams]] = None
+    ) -> None:
+        """按当前选项创建集合及 payload 索引"""
+        hnsw_config = self._options.hnsw_config()
+        if self._tenant_mode == "payload":
+            # 只为每个租户单独建图（payload_m），不建全局图：检索必带租户过滤，延迟不受其他租户数据量影响
+            hnsw_config = HnswConfigDiff(m=0, payload_m=self._options.hnsw_m, ef_construct=self._options.hnsw_ef_construct)
+        self._client.create_collection(
+            collection_name=name,
+            vectors_config=vectors_config,
+            sparse_vectors_config=sparse_vectors_config,
+            hnsw_config=hnsw_config
+        )
+        if self._tenant_mode == "payload":
+            self._create_tenant_index(name)
+        # 创建payload索引以支持过滤
+        self._client.create_payload_index(
+            collection_name=name,
+            field_name="tags",
+            field_schema=qdrant_models.PayloadSchemaType.KEYWORD
+        )
+        self._client.create_payload_index(
+            collection_name=name,
+            field_name="created_at",
+            field_schema=qdrant_models.PayloadSchemaType.DATETIME
+        )
+        self._client.create_payload_index(
+            collection_name=name,
+            field_name="updated_at",
+            field_schema=qdrant_models.PayloadSchemaType.DATETIME
+        )
+        self.create_date_part_indexes(name)
+
+    def _create_tenant_index(self, name: str) -> None:
+        """租户字段索引（is_tenant：按租户组织存储，已存在时 Qdrant 直接返回）"""
+        self._client.create_payload_index(
+            collection_name=name,
+            field_name=TENANT_FIELD,
+            field_schema=KeywordIndexParams(type="keyword", is_tenant=True)
+        )
+
+    def create_date_part_indexes(self, name: Optional[str] = None) -> None:
+        """为派生日期字段创建整数索引（已存在时 Qdrant 直接返回）"""
+        for field in DATE_PART_FIELDS:
             self._client.create_payload_index(
-                collection_name=self._collection_name,
-                field_name="tags",
-                field_schema=qdrant_models.PayloadSchemaType.KEYWORD
+                collection_name=name or self._collection_name,
+                field_name=field,
+                field_schema=qdrant_models.PayloadSchemaType.INTEGER
             )
-            self._client.create_payload_index(
-                collection_name=self._collection_name,
-                field_name="created_at",
-                field_schema=qdrant_models.PayloadSchemaType.DATETIME
+
+    def _vectors_config(
+        self,
+        multires: Optional[bool] = None,
+        dimension: Optional[int] = None,
+        text_vectors: Optional[List[str]] = None,
+        lexical: Optional[bool] = None
+    ) -> Union[VectorParams, Dict[str, VectorParams]]:
+        """
+        新建集合的向量配置
+
+        Args:
+            multires: False 时强制单向量结构（与已有的单向量默认集合一致）
+            dimension: 完整向量维度，默认为当前维度（迁移到其他维度时指定）
+            text_vectors: 附加的文本向量，默认取初始化配置；有文本向量时图片向量为命名向量 image
+            lexical: 集合是否有关键词向量（见 _sparse_vectors_config），默认取初始化配置；有时图片向量同样为命名向量
+        """
+        options = self._options
+        dimension = dimension or self._vector_dimension
+        text_vectors = self._text_vector_names if text_vectors is None else text_vectors
+        lexical = self._lexical_enabled if lexical is None else lexical
+
+        def indexed(size: int) -> VectorParams:
+            return VectorParams(
+                size=size,
+                distance=Distance.COSINE,
+                on_disk=options.on_disk,
+                quantization_config=options.quantization_config()
             )
 
+        if not 0 < self._coarse_dimension < dimension or multires is False:
+            if not text_vectors and not lexical:
+                return indexed(dimension)
+            config = {FULL_VECTOR_NAME: indexed(dimension)}
+        else:
+            config = {
+                # 完整向量只参与候选重排：落盘并关闭 HNSW 图（m=0），不占用索引内存
+                FULL_VECTOR_NAME: VectorParams(
+                    size=dimension,
+                    distance=Distance.COSINE,
+                    on_disk=True,
+                    hnsw_config=HnswConfigDiff(m=0)
+                ),
+                COARSE_VECTOR_NAME: indexed(self._coarse_dimension),
+            }
+        # 文本向量与图片向量来自同一个模型，维度相同
+        for name in text_vectors:
+            config[name] = indexed(dimension)
+        return config
+
+    def _sparse_vectors_config(self, lexical: Optional[bool] = None) -> Optional[Dict[str, SparseVectorParams]]:
+        """新建集合的稀疏向量配置（关键词向量的 IDF 由 Qdrant 统计），lexical 默认取初始化配置"""
+        lexical = self._lexical_enabled if lexical is None else lexical
+        if not lexical:
+            return None
+        return {LEXICAL_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+    @staticmethod
+    def _has_lexical(collection_params: Any) -> bool:
+        """集合参数中是否有关键词向量（NumPy 引擎的集合参数没有 sparse_vectors）"""
+        return LEXICAL_VECTOR_NAME in (getattr(collection_params, "sparse_vectors", None) or {})
+
+    @staticmethod
+    def _text_vectors_of(vectors_config: Any) -> List[str]:
+        """向量配置中包含的文本向量"""
+        if not isinstance(vectors_config, dict):
+            return []
+        return [name for name in TEXT_VECTOR_FIELDS if name in vectors_config]
+
+    def _detect_layout(self) -> None:
+        """根据集合实际结构确定检索方式（已有集合不受 VECTOR_COARSE_DIMENSION 影响）"""
+        params = self._client.get_collection(self._collection_name).config.params
+        vectors = params.vectors
+        full = vectors.get(FULL_VECTOR_NAME) if isinstance(vectors, dict) else vectors
+        if full is not None and full.size != self._vector_dimension:
+            # 以集合实际维度为准（迁移到其他维度后配置尚未更新）
+            logger.warning(f"集合 {self._collection_name} 的向量维度为 {full.size}，与配置的 {self._vector_dimension} 不同")
+            self._vector_dimension = full.size
+        self._image_vector = FULL_VECTOR_NAME if isinstance(vectors, dict) and FULL_VECTOR_NAME in vectors else None
+        self._text_vectors = self._text_vectors_of(vectors)
+        if self._text_vectors:
+            logger.info(f"集合 {self._collection_name} 包含文本向量 {self._text_vectors}（融合方式: {self._fusion}）")
+        elif self._text_vector_names:
+            logger.info(f"集合 {self._collection_name} 没有文本向量，通过集合迁移（/vectors/migration）重建后生效")
+        self._lexical = self._has_lexical(params)
+        if self._lexical:
+            logger.info(f"集合 {self._collection_name} 包含关键词向量（权重: {self._lexical_weight}）")
+        elif self._lexical_enabled:
+            logger.info(f"集合 {self._collection_name} 没有关键词向量，通过集合迁移（/vectors/migration）重建后生效")
+        if isinstance(vectors, dict) and COARSE_VECTOR_NAME in vectors and FULL_VECTOR_NAME in vectors:
+            self._multires = True
+            self._coarse_dimension = vectors[COARSE_VECTOR_NAME].size
+            logger.info(
+                f"集合 {self._collection_name} 使用多分辨率向量 "
+                f"(coarse: {self._coarse_dimension}, full: {self._vector_dimension})"
+            )
+        else:
+            self._multires = False
+            if self._coarse_dimension:
+                logger.info(f"集合 {self._collection_name} 为单向量结构，使用完整向量单阶段检索")
+
+    def point_vector(
+        self,
+        vector: VectorLike,
+        vectors_config: Optional[Union[VectorParams, Dict[str, VectorParams]]] = None,
+        text_vectors: Optional[Dict[str, VectorLike]] = None,
+        lexical: Optional[qdrant_models.SparseVector] = None
+    ) -> Union[List[float], Dict[str, Any]]:
+        """
+        构造写入 Qdrant 的向量：多分辨率集合同时写入完整向量和前缀向量
+
+        Args:
+            vector: 完整向量
+            vectors_config: 目标集合的向量配置，默认为当前集合（写入迁移目标集合时指定）
+            text_vectors: 文本向量名 -> 向量，集合中没有的文本向量被忽略
+            lexical: 关键词向量（目标集合有关键词向量时由调用方按 payload 生成，见 _lexical_vector）
+        """
+        if vectors_config is None:
+            named = self._image_vector is not None
+            coarse_dimension = self._coarse_dimension if self._multires else 0
+            names = self._text_vectors
+        else:
+            named = isinstance(vectors_config, dict)
+            coarse_dimension = vectors_config[COARSE_VECTOR_NAME].size \
+                if named and COARSE_VECTOR_NAME in vectors_config else 0
+            names = self._text_vectors_of(vectors_config)
+        if not named:
+            return to_list(vector)
+        full = as_float32(vector)
+        point_vector = {FULL_VECTOR_NAME: to_list(full)}
+        if coarse_dimension:
+            point_vector[COARSE_VECTOR_NAME] = to_list(l2_normalize(full[:coarse_dimension]))
+        for name in names:
+            if text_vectors and text_vectors.get(name) is not None:
+                point_vector[name] = to_list(text_vectors[name])
+        if lexical is not None:
+            point_vector[LEXICAL_VECTOR_NAME] = lexical
+        return point_vector
+
+    def _lexical_vector(self, payload: Optional[Dict[str, Any]]) -> Optional[qdrant_models.SparseVector]:
+        """当前集合有关键词向量时按 payload 生成，否则返回 None"""
+        return lexical_vector(payload) if self._lexical else None
+
+    @property
+    def _full_vector_selector(self) -> Union[bool, List[str]]:
+        """读取完整向量时的 with_vectors（命名向量集合只取图片向量）"""
+        return [FULL_VECTOR_NAME] if self._image_vector else True
+
+    def _vector_selector(self, with_vectors: bool, with_text_vectors: bool) -> Union[bool, List[str]]:
+        """scroll 的 with_vectors：完整向量，以及可选的文本向量"""
+        if with_text_vectors and self._text_vectors:
+            return ([FULL_VECTOR_NAME] if with_vectors else []) + self._text_vectors
+        return self._full_vector_selector if with_vectors else False
+
+    @property
+    def text_vectors(self) -> List[str]:
+        """当前集合包含的文本向量"""
+        return list(self._text_vectors)
+
+    @property
+    def has_lexical(self) -> bool:
+        """当前集合是否包含关键词向量"""
+        return self._lexical
+
+    @staticmethod
+    def _full_vector(vector: Any) -> Any:
+        """从 Qdrant 返回的向量中取出完整向量"""
+        if isinstance(vector, dict):
+            return vector.get(FULL_VECTOR_NAME)
+        return vector
+
     @property
     def is_initialized(self) -> bool:
         """检查是否已初始化"""
         return self._initialized and self._client is not None
 
+    def connection_params(self, pool_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        服务端模式（docker/cloud）的客户端构造参数（地址 + 传输选项），本地模式和 NumPy 引擎为 None
+
+        Args:
+            pool_size: REST 连接池大小，None 表示不限
+        """
+        if self._endpoint is None:
+            return None
+        return {**self._endpoint, **self._connection_options.client_kwargs(pool_size)}
+
+    def _transport_label(self) -> str:
+        options = self._connection_options
+        if not options.prefer_grpc:
+            return "传输: REST"
+        return f"传输: gRPC (port: {options.grpc_port}, compression: {options.grpc_compression})"
+
     @property
     def collection_name(self) -> str:
         """获取集合名称"""
         return self._collection_name
 
+    @property
+    def tenant_mode(self) -> str:
+        """租户模式：none | payload | collection"""
+        return self._tenant_mode
+
+    @property
+    def _stats(self) -> Optional[CollectionStats]:
+        """当前租户的统计缓存，未启用时为 None"""
+        if self._stats_ttl <= 0:
+            return None
+        key = get_current_tenant() if self._tenant_mode != "none" else None
+        stats = self._tenant_stats.get(key)
+        if stats is None:
+            with self._tenant_lock:
+                stats = self._tenant_stats.get(key)
+                if stats is None:
+                    stats = CollectionStats(partial(self._load_tenant_stats, key), ttl=self._stats_ttl)
+                    self._tenant_stats[key] = stats
+        return stats
+
+    def _load_tenant_stats(self, tenant: Optional[str]) -> StatsSnapshot:
+        """统计缓存的 loader：可能在后台刷新线程中执行，显式切换到所属租户"""
+        with tenant_scope(tenant):
+            return self._load_stats()
+
+    def _invalidate_all_stats(self) -> None:
+        for stats in list(self._tenant_stats.values()):
+            stats.invalidate()
+
     def get_collection_info(self) -> Dict[str, Any]:
-        """获取集合信息"""
+        """获取集合信息（启用统计缓存时返回缓存值）"""
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
+        if self._stats is not None:
+            return dict(self._stats.get().info)
+        return self._collection_info()
+
+    def _collection_info(self) -> Dict[str, Any]:
+        """从向量库读取集合信息"""
         info = self._client.get_collection(self._collection_name)
         
         # Qdrant 新版 API 的 CollectionInfo 结构
@@ -163,28 +1119,179 @@ class VectorDBService:
             # 兼容旧版 API
             vectors_count = getattr(info, 'vectors_count', 0)
             points_count = getattr(info, 'points_count', 0)
-        
-        return {
+        else:
+            # qdrant-client >= 1.13 去掉了 vectors_count，每个点每个命名向量各一条
+            points_count = info.points_count or 0
+            vectors_count = points_count * self._vectors_per_point
+
+        result = {
             "name": self._collection_name,
             "vectors_count": vectors_count,
             "points_count": points_count,
             "status": info.status.value if hasattr(info.status, 'value') else str(info.status),
-            "vector_dimension": self._vector_dimension
+            "vector_dimension": self._vector_dimension,
+            "coarse_dimension": self._coarse_dimension if self._multires else None,
+            "text_vectors": self.text_vectors,
+            "lexical": self._lexical
         }
+        if self._tenant_mode != "none":
+            result["tenant"] = get_current_tenant()
+        if self._tenant_mode == "payload":
+            # 共用集合：记录数只统计本租户
+            points_count = self._client.count(
+                collection_name=self._collection_name,
+                count_filter=self.build_filter(),
+                exact=True
+            ).count
+            result.update(points_count=points_count, vectors_count=points_count * self._vectors_per_point)
+        return result
+
+    @property
+    def _vectors_per_point(self) -> int:
+        """每个点的向量数（文本向量按每个点都有估算）"""
+        return 1 + self._multires + len(self._text_vectors) + self._lexical
+
+    def _load_stats(self) -> StatsSnapshot:
+        """读取集合信息和标签计数表（统计缓存的 loader）"""
+        info = self._collection_info()
+        try:
+            response = self._client.facet(
+                collection_name=self._collection_name,
+                key="tags",
+                facet_filter=self.build_filter(),
+                limit=TAG_FACET_LIMIT,
+                exact=False
+            )
+        except Exception as e:
+            # Qdrant < 1.12 没有 facet，带标签的计数回退到 count(exact=False)
+            logger.warning(f"标签计数表不可用: {e}")
+            return StatsSnapshot(info=info, points_count=info["points_count"])
+
+        return StatsSnapshot(
+            info=info,
+            points_count=info["points_count"],
+            tag_counts={hit.value: hit.count for hit in response.hits},
+            tags_complete=len(response.hits) < TAG_FACET_LIMIT
+        )
+
+    def _track_stats(self, ids: List[Union[int, str]]) -> bool:
+        """写入后是否按增量更新统计缓存；未启用缓存时为 False，批量过大时改为标记过期"""
+        if self._stats is None:
+            return False
+        if len(ids) > STATS_DELTA_MAX_BATCH:
+            self._stats.invalidate()
+            return False
+        return True
+
+    def _tags_of(self, existing: Dict[Any, Dict[str, Any]]) -> Dict[str, set]:
+        """已有记录（_existing_steps 的结果）-> 记录ID（字符串）到原有标签集合"""
+        return {str(id): self._tag_set(payload) for id, payload in existing.items()}
+
+    def _apply_stats_delta(
+        self,
+        before: Optional[Dict[str, set]],
+        after: Dict[str, Optional[set]]
+    ) -> None:
+        """
+        按写入前后的标签更新统计缓存
+
+        Args:
+            before: 记录ID（字符串）-> 写入前的标签集合，只含已存在的记录
+            after: 记录ID（字符串）-> 写入后的标签集合，None 表示记录已删除
+        """
+        if self._stats is None or before is None:
+            return
+        points = 0
+        tags = Counter()
+        for id, new_tags in after.items():
+            old_tags = before.get(id)
+            if old_tags is not None:
+                tags.subtract(old_tags)
+            if new_tags is not None:
+                tags.update(new_tags)
+            points += (new_tags is not None) - (old_tags is not None)
+        self._stats.apply_delta(points, tags)
+
+    @staticmethod
+    def _tag_set(payload: Optional[Dict[str, Any]]) -> set:
+        tags = (payload or {}).get("tags") or []
+        return set(tags if isinstance(tags, list) else [tags])
+
+    def apply_collection_options(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        把当前 CollectionOptions 应用到已有集合（量化、原始向量落盘、HNSW 参数）
+
+        Qdrant 收到更新后在后台重建段，期间集合状态为 yellow，检索不中断；
+        本地模式会忽略这些配置（update_collection 返回 False）
+
+        Args:
+            dry_run: 只比较当前配置与目标配置，不执行更新
+
+        Returns:
+            {"current": ..., "desired": ..., "changed": [...], "applied": bool}
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+        if self._backend != "qdrant":
+            raise RuntimeError(f"{self._backend} 后端不支持集合配置迁移")
+
+        config = self._client.get_collection(self._collection_name).config
+        vector_name = COARSE_VECTOR_NAME if self._multires else (self._image_vector or DEFAULT_VECTOR_NAME)
+        vectors = config.params.vectors
+        params = vectors[vector_name] if isinstance(vectors, dict) else vectors
+
+        current = {
+            "quantization": _quantization_mode(params.quantization_config or config.quantization_config),
+            "on_disk": bool(params.on_disk),
+            "hnsw_m": config.hnsw_config.m,
+            "hnsw_ef_construct": config.hnsw_config.ef_construct,
+        }
+        options = self._options
+        desired = {
+            "quantization": options.quantization,
+            "on_disk": options.on_disk,
+            "hnsw_m": options.hnsw_m,
+            "hnsw_ef_construct": options.hnsw_ef_construct,
+        }
+        changed = [key for key in desired if current[key] != desired[key]]
+
+        applied = False
+        if changed and not dry_run:
+            applied = self._client.update_collection(
+                collection_name=self._collection_name,
+                vectors_config={
+                    name: VectorParamsDiff(
+                        on_disk=options.on_disk,
+                        quantization_config=options.quantization_config() or qdrant_models.Disabled.DISABLED
+                    )
+                    for name in [vector_name, *self._text_vectors]
+                },
+                hnsw_config=options.hnsw_config()
+            )
+            logger.info(f"集合 {self._collection_name} 配置更新: {changed}, 结果: {applied}")
+
+        return {"current": current, "desired": desired, "changed": changed, "applied": bool(applied)}
 
     def upsert(
         self,
         id: str,
-        vector: List[float],
-        metadata: Dict[str, Any]
+        vector: VectorLike,
+        metadata: Dict[str, Any],
+        durable: bool = False,
+        text_vectors: Optional[Dict[str, VectorLike]] = None
     ) -> bool:
         """
         插入或更新单个向量记录
 
+        启用写入缓冲时，记录与其他调用方的写入合并提交，本方法等待所在批次提交完成后返回；
+        批次以 wait=False 提交时服务端接收即返回，durable=True 则等待服务端应用完成。
+
         Args:
             id: 唯一标识符
-            vector: 向量数据
+            vector: 向量数据（float32 数组或列表）
             metadata: 元数据
+            durable: 是否等待服务端应用完成（仅写入缓冲启用时有区别，直接写入总是等待）
+            text_vectors: 文本向量名 -> 向量（见 TEXT_VECTOR_FIELDS），未提供时由 backfill_text_vectors 补齐
 
         Returns:
             操作是否成功
@@ -192,31 +1299,25 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        # 处理datetime字段
-        payload = self._prepare_payload(metadata)
+        record = {"id": id, "vector": vector, "metadata": metadata}
+        if text_vectors:
+            record["text_vectors"] = text_vectors
+        if self._upsert_buffer is not None:
+            return self.submit_buffered(record, durable=durable).result()
 
-        point = PointStruct(
-            id=id,
-            vector=vector,
-            payload=payload
-        )
-
-        result = self._client.upsert(
-            collection_name=self._collection_name,
-            points=[point],
-            wait=True
-        )
-        return result.status == qdrant_models.UpdateStatus.COMPLETED
+        return self.upsert_batch([record])
 
     def upsert_batch(
         self,
-        records: List[Dict[str, Any]]
+        records: List[Dict[str, Any]],
+        wait: bool = True
     ) -> bool:
         """
         批量插入或更新向量记录
 
         Args:
-            records: 记录列表，每个记录包含id、vector、metadata
+            records: 记录列表，每个记录包含id、vector、metadata，可选 text_vectors（文本向量名 -> 向量）
+            wait: 是否等待服务端应用完成；False 时服务端接收即返回
 
         Returns:
             操作是否成功
@@ -224,33 +1325,204 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
+        return self._run_steps(self.upsert_steps(records, wait))
+
+    def upsert_steps(self, records: List[Dict[str, Any]], wait: bool = True) -> WriteSteps:
+        """
+        批量写入的步骤（生成器）：依次产出 (客户端方法名, 参数) 请求并接收其结果，最终返回写入是否成功
+
+        租户检查、统计缓存增量和迁移同步都在步骤中完成，同步服务和 AsyncQdrantClient 只负责执行请求
+        （见 _run_steps），请求失败时把异常 throw 回步骤。update_metadata_steps / delete_steps 相同。
+
+        统计缓存：payload 租户模式的归属检查本来就要读取已有记录，顺带读取原有标签；其他模式不为统计
+        额外读取，按新增记录计入并标记过期，覆盖已有记录造成的偏差由下一次读取触发的后台刷新纠正。
+
+        Raises:
+            ValueError: payload 租户模式下有记录ID已被其他租户使用
+        """
+        points = self._points(records)
+        ids = [point.id for point in points]
+        track = self._track_stats(ids)
+        _, foreign, existing = yield from self._existing_steps(ids, tags=track and self._tenant_mode == "payload")
+        self._reject_foreign(foreign)
+        result = yield "upsert", {"collection_name": self._collection_name, "points": points, "wait": wait}
+        success = self._write_completed(result, wait)
+        if success:
+            if track:
+                after = {str(point.id): self._tag_set(point.payload) for point in points}
+                if existing is None:
+                    self._apply_stats_delta({}, after)
+                    self._stats.invalidate()
+                else:
+                    self._apply_stats_delta(self._tags_of(existing), after)
+            self._notify_shadow("on_upsert", points)
+        return success
+
+    def _run_steps(self, steps: Generator[WriteRequest, Any, T]) -> T:
+        """用同步客户端执行写入步骤，返回步骤的结果"""
+        try:
+            method, kwargs = next(steps)
+            while True:
+                try:
+                    response = getattr(self._client, method)(**kwargs)
+                except Exception as e:
+                    method, kwargs = steps.throw(e)
+                else:
+                    method, kwargs = steps.send(response)
+        except StopIteration as done:
+            return done.value
+
+    def _lookup_request(self, ids: List[Union[int, str]], fields: List[str]) -> WriteRequest:
+        """写入前读取已有记录部分字段的请求"""
+        return "retrieve", {
+            "collection_name": self._collection_name,
+            "ids": list(ids),
+            "with_payload": fields,
+            "with_vectors": False
+        }
+
+    @staticmethod
+    def _write_completed(result: Any, wait: bool = True) -> bool:
+        """写入请求是否成功；wait=False 时服务端接收即视为成功"""
+        if wait:
+            return result.status == qdrant_models.UpdateStatus.COMPLETED
+        return result.status in (qdrant_models.UpdateStatus.ACKNOWLEDGED, qdrant_models.UpdateStatus.COMPLETED)
+
+    def _points(self, records: List[Dict[str, Any]]) -> List[PointStruct]:
+        """把 {id, vector, metadata} 记录转换为写入用的 PointStruct（关键词向量由 payload 生成）"""
         points = []
         for record in records:
             payload = self._prepare_payload(record.get("metadata", {}))
-            point = PointStruct(
+            points.append(PointStruct(
                 id=record["id"],
-                vector=record["vector"],
+                vector=self.point_vector(
+                    record["vector"], text_vectors=record.get("text_vectors"), lexical=self._lexical_vector(payload)
+                ),
                 payload=payload
-            )
-            points.append(point)
+            ))
+        return points
+
+    def submit_buffered(self, record: Dict[str, Any], durable: bool = False) -> Future:
+        """把记录提交到写入缓冲（记下当前租户，缓冲线程按租户分组写入），返回批次提交的 Future"""
+        tenant = get_current_tenant()
+        record = {**record, _BUFFER_TENANT_KEY: tenant}
+        return self._upsert_buffer.submit(record, durable=durable, key=(tenant, record["id"]))
+
+    def _write_buffered(self, records: List[Dict[str, Any]], durable: bool) -> bool:
+        """写入缓冲的批量提交函数（缓冲线程中执行，按记录所属租户分组写入）"""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            groups.setdefault(record.get(_BUFFER_TENANT_KEY, DEFAULT_TENANT), []).append(record)
+        success = True
+        for tenant, group in groups.items():
+            with tenant_scope(tenant):
+                success = self.upsert_batch(group, wait=durable) and success
+        return success
 
-        result = self._client.upsert(
-            collection_name=self._collection_name,
-            points=points,
-            wait=True
-        )
-        return result.status == qdrant_models.UpdateStatus.COMPLETED
+    @property
+    def upsert_buffered(self) -> bool:
+        """是否启用了写入缓冲（单条写入经由 submit_buffered 合并提交）"""
+        return self._upsert_buffer is not None
+
+    def flush_upserts(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写出写入缓冲中的所有记录
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            是否在超时前写完（未启用缓冲时返回 True）
+        """
+        if self._upsert_buffer is None:
+            return True
+        return self._upsert_buffer.flush(timeout)
+
+    def get_upsert_buffer_metrics(self) -> Optional[Dict[str, Any]]:
+        """获取写入缓冲的批次大小和写入耗时指标，未启用时返回 None"""
+        if self._upsert_buffer is None:
+            return None
+        return self._upsert_buffer.get_metrics()
 
     def _prepare_payload(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """准备payload，处理特殊类型"""
+        """准备payload，处理特殊类型，由 created_at 派生日期字段，并记录写入时间 updated_at（增量导出使用）"""
         payload = {}
         for key, value in metadata.items():
             if isinstance(value, datetime):
                 payload[key] = value.isoformat()
             else:
                 payload[key] = value
+        if "created_at" in metadata:
+            payload.update(date_part_fields(metadata["created_at"]))
+        payload["updated_at"] = datetime.now().isoformat()
+        if self._tenant_mode == "payload":
+            payload[TENANT_FIELD] = get_current_tenant()
         return payload
 
+    def _owns(self, payload: Optional[Dict[str, Any]]) -> bool:
+        """payload 模式下记录是否属于当前租户（没有 tenant_id 的记录属于默认租户），其他模式总是 True"""
+        if self._tenant_mode != "payload":
+            return True
+        return (payload or {}).get(TENANT_FIELD, DEFAULT_TENANT) == get_current_tenant()
+
+    def _existing_steps(
+        self,
+        ids: List[Union[int, str]],
+        tags: bool = False,
+        fields: List[str] = ()
+    ) -> Generator[WriteRequest, Any, Tuple[List[Union[int, str]], List[Union[int, str]], Optional[Dict[Any, Dict[str, Any]]]]]:
+        """
+        写入步骤：写入前一次读取已有记录需要的字段（payload 租户模式下的归属、统计缓存的原有标签、
+        重新生成关键词向量的来源字段），都不需要时不发请求
+
+        Args:
+            ids: 记录ID
+            tags: 是否读取原有标签（只为统计缓存读取时，读取失败改为标记过期）
+            fields: 其他需要的 payload 字段
+
+        Returns:
+            (可写入的记录ID：payload 模式下为属于当前租户的已存在记录，其他模式为 ids；
+             属于其他租户的记录ID；已存在的本租户记录ID -> 读取的 payload，未读取时为 None)
+        """
+        payload_mode = self._tenant_mode == "payload"
+        lookup = ([TENANT_FIELD] if payload_mode else []) + (["tags"] if tags else []) + list(fields)
+        if not lookup:
+            return list(ids), [], None
+        try:
+            points = yield self._lookup_request(ids, lookup)
+        except Exception as e:
+            if payload_mode or fields:
+                raise
+            logger.warning(f"读取原有标签失败，统计缓存改为标记过期: {e}")
+            self._stats.invalidate()
+            return list(ids), [], None
+        existing, foreign = {}, []
+        for point in points:
+            if self._owns(point.payload):
+                existing[point.id] = point.payload or {}
+            else:
+                foreign.append(point.id)
+        return (list(existing) if payload_mode else list(ids)), foreign, existing
+
+    @staticmethod
+    def _reject_foreign(foreign: List[Union[int, str]]) -> None:
+        """
+        payload 模式下拒绝覆盖其他租户的记录
+
+        Raises:
+            ValueError: 有记录ID已被其他租户使用
+        """
+        if foreign:
+            raise ValueError(f"记录ID已被其他租户使用: {foreign[:5]}")
+
+    def _owned_ids(self, ids: List[Union[int, str]]) -> List[Union[int, str]]:
+        """payload 模式下筛出属于当前租户的已存在记录ID，其他模式原样返回"""
+        return self._run_steps(self._existing_steps(ids))[0]
+
+    def _check_writable(self, ids: List[Union[int, str]]) -> None:
+        """payload 模式下拒绝覆盖其他租户的记录"""
+        self._reject_foreign(self._run_steps(self._existing_steps(ids))[1])
+
     def get(self, id: str) -> Optional[Dict[str, Any]]:
         """
         根据ID获取向量记录
@@ -264,22 +1536,8 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        results = self._client.retrieve(
-            collection_name=self._collection_name,
-            ids=[id],
-            with_vectors=True,
-            with_payload=True
-        )
-
-        if not results:
-            return None
-
-        point = results[0]
-        return {
-            "id": point.id,
-            "vector": point.vector,
-            "metadata": point.payload
-        }
+        records = self.owned_records(self._client.retrieve(**self.retrieve_request([id])))
+        return records[0] if records else None
 
     def get_batch(self, ids: List[str]) -> List[Dict[str, Any]]:
         """
@@ -294,26 +1552,34 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        results = self._client.retrieve(
-            collection_name=self._collection_name,
-            ids=ids,
-            with_vectors=True,
-            with_payload=True
-        )
+        return self.owned_records(self._client.retrieve(**self.retrieve_request(ids)))
 
+    def retrieve_request(self, ids: List[Union[int, str]]) -> Dict[str, Any]:
+        """按ID读取完整记录（含完整向量）的 retrieve 参数"""
+        return {
+            "collection_name": self._collection_name,
+            "ids": list(ids),
+            "with_vectors": self._full_vector_selector,
+            "with_payload": True
+        }
+
+    def owned_records(self, points: List[Any]) -> List[Dict[str, Any]]:
+        """把 retrieve 返回的记录转换为 {id, vector, metadata}，payload 租户模式下只保留当前租户的记录"""
         return [
             {
                 "id": point.id,
-                "vector": point.vector,
+                "vector": self._full_vector(point.vector),
                 "metadata": point.payload
             }
-            for point in results
+            for point in points
+            if self._owns(point.payload)
         ]
 
     def update_metadata(
         self,
         id: str,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        text_vectors: Optional[Dict[str, VectorLike]] = None
     ) -> bool:
         """
         更新记录的元数据
@@ -321,22 +1587,88 @@ class VectorDBService:
         Args:
             id: 记录ID
             metadata: 新的元数据（仅更新提供的字段）
+            text_vectors: 按更新后的内容重新生成的文本向量（见 stale_text_vectors）；
+                来源字段被修改但未提供的文本向量会被删除，由 backfill_text_vectors 补齐
 
         Returns:
             操作是否成功
         """
-        if not self.is_initialized:
-            raise RuntimeError("向量数据库未初始化")
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+
+        return self._run_steps(self.update_metadata_steps(id, metadata, text_vectors))
+
+    def update_metadata_steps(
+        self,
+        id: Union[int, str],
+        metadata: Dict[str, Any],
+        text_vectors: Optional[Dict[str, VectorLike]] = None
+    ) -> WriteSteps:
+        """
+        更新元数据的步骤（见 upsert_steps），来源字段被修改的文本向量替换为 text_vectors 中的新向量（未提供的删除），
+        关键词向量重新生成
 
+        归属、原有标签和关键词来源字段在写入前一次读取，关键词向量按读取的字段与新字段合并后生成
+        """
         payload = self._prepare_payload(metadata)
-
-        result = self._client.set_payload(
-            collection_name=self._collection_name,
-            payload=payload,
-            points=[id],
-            wait=True
+        track = "tags" in payload and self._track_stats([id])
+        lexical = self._lexical_changed(payload)
+        owned, _, existing = yield from self._existing_steps(
+            [id], tags=track, fields=list(LEXICAL_FIELDS) if lexical else []
         )
-        return result.status == qdrant_models.UpdateStatus.COMPLETED
+        if not owned:
+            return False
+
+        result = yield "set_payload", {
+            "collection_name": self._collection_name,
+            "payload": payload,
+            "points": [id],
+            "wait": True
+        }
+        if not self._write_completed(result):
+            return False
+        if track and existing:
+            self._apply_stats_delta(self._tags_of(existing), {str(key): self._tag_set(payload) for key in existing})
+        stale = self.stale_text_vectors(payload)
+        text_vectors = text_vectors or {}
+        vector = {name: to_list(text_vectors[name]) for name in stale if text_vectors.get(name) is not None}
+        missing = [name for name in stale if name not in vector]
+        if missing:
+            yield "delete_vectors", {
+                "collection_name": self._collection_name,
+                "vectors": missing,
+                "points": [id],
+                "wait": True
+            }
+        if lexical and existing:
+            vector[LEXICAL_VECTOR_NAME] = lexical_vector({**next(iter(existing.values())), **payload})
+        if vector:
+            yield "update_vectors", {
+                "collection_name": self._collection_name,
+                "points": [PointVectors(id=id, vector=vector)],
+                "wait": True
+            }
+        self._notify_shadow("on_update", [id], payload)
+        return True
+
+    def _lexical_changed(self, payload: Dict[str, Any]) -> bool:
+        """修改 payload 后是否需要重新生成关键词向量（来源字段被修改）"""
+        return self._lexical and any(field in payload for field in LEXICAL_FIELDS)
+
+    @staticmethod
+    def _lexical_updates(points: List[Any]) -> List[PointVectors]:
+        """按记录（含 LEXICAL_FIELDS）当前的 payload 重新生成关键词向量"""
+        return [
+            PointVectors(id=point.id, vector={LEXICAL_VECTOR_NAME: lexical_vector(point.payload)})
+            for point in points
+        ]
+
+    def stale_text_vectors(self, metadata: Dict[str, Any]) -> List[str]:
+        """修改这些元数据字段后失效的文本向量（来源字段被修改），需要按更新后的内容重新生成"""
+        return [
+            name for name in self._text_vectors
+            if any(field in metadata for field in TEXT_VECTOR_FIELDS[name])
+        ]
 
     def delete(self, id: str) -> bool:
         """
@@ -351,12 +1683,7 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        result = self._client.delete(
-            collection_name=self._collection_name,
-            points_selector=qdrant_models.PointIdsList(points=[id]),
-            wait=True
-        )
-        return result.status == qdrant_models.UpdateStatus.COMPLETED
+        return self.delete_batch([id])
 
     def delete_batch(self, ids: List[str]) -> bool:
         """
@@ -371,23 +1698,41 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        result = self._client.delete(
-            collection_name=self._collection_name,
-            points_selector=qdrant_models.PointIdsList(points=ids),
-            wait=True
-        )
-        return result.status == qdrant_models.UpdateStatus.COMPLETED
+        return self._run_steps(self.delete_steps(ids))
+
+    def delete_steps(self, ids: List[Union[int, str]]) -> WriteSteps:
+        """批量删除的步骤（见 upsert_steps），payload 租户模式下只删除当前租户的记录"""
+        track = self._track_stats(ids)
+        ids, _, existing = yield from self._existing_steps(ids, tags=track)
+        if not ids:
+            return True
+        result = yield "delete", {
+            "collection_name": self._collection_name,
+            "points_selector": qdrant_models.PointIdsList(points=ids),
+            "wait": True
+        }
+        success = self._write_completed(result)
+        if success:
+            if track and existing is not None:
+                self._apply_stats_delta(self._tags_of(existing), {str(key): None for key in existing})
+            self._notify_shadow("on_delete", ids)
+        return success
 
     def search(
         self,
-        query_vector: List[float],
+        query_vector: VectorLike,
         top_k: int = 10,
         score_threshold: Optional[float] = None,
         filter_tags: Optional[List[str]] = None,
         filter_conditions: Optional[Dict[str, Any]] = None,
         filter_created_at_from: Optional[datetime] = None,
         filter_created_at_to: Optional[datetime] = None,
-        filter_ids: Optional[List[Union[int, str]]] = None
+        filter_ids: Optional[List[Union[int, str]]] = None,
+        oversampling: Optional[float] = None,
+        exclude_ids: Optional[List[Union[int, str]]] = None,
+        fuse_text: bool = False,
+        query_text: Optional[str] = None,
+        lexical_weight: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         向量相似度搜索
@@ -395,12 +1740,23 @@ class VectorDBService:
         使用 qdrant-client >= 1.7.0 推荐的 query_points() 方法
         替代已废弃的 search() 方法
 
+        多分辨率集合分两阶段：先用前缀向量召回 top_k * oversampling 个候选（过滤在此阶段完成），
+        再由 Qdrant 服务端用完整向量对候选精确重排，一次请求完成。
+        本地模式没有 HNSW，prefetch 会对全部点计算完整向量相似度，因此改为取回候选的完整向量在本进程内重排。
+        fuse_text=True 且集合有文本向量时，图片向量和文本向量各召回候选后由服务端融合（见 _fusion_request），
+        传入 query_text 且集合有关键词向量时关键词召回同样参与融合，此时返回的 score 是融合分数
+
         Args:
-            query_vector: 查询向量
+            query_vector: 查询向量（float32 数组或列表）
             top_k: 返回结果数量
-            score_threshold: 相似度阈值
+            score_threshold: 相似度阈值（作用于完整向量的相似度）
             filter_tags: 标签过滤
             filter_conditions: 其他过滤条件
+            oversampling: 第一阶段候选倍数，默认取初始化配置
+            exclude_ids: 排除的记录ID（must_not 条件，在检索阶段排除而非事后过滤）
+            fuse_text: 查询为文本时设为 True，同时检索文本向量（集合没有文本向量时忽略）
+            query_text: 查询原文，用于关键词召回（集合没有关键词向量时忽略）
+            lexical_weight: 关键词一路在 RRF 中的权重，默认取初始化配置，0 表示不使用关键词
 
         Returns:
             搜索结果列表
@@ -412,10 +1768,269 @@ class VectorDBService:
         if self._client is None:
             raise RuntimeError("Qdrant 客户端未正确初始化，_client 为 None")
 
-        # 构建过滤条件
-        query_filter = None
+        query_filter = self.build_filter(
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to,
+            filter_ids=filter_ids,
+            exclude_ids=exclude_ids
+        )
+
+        # 使用新版 API: query_points() 替代已废弃的 search()
+        # 关键变化:
+        #   1. 参数名: query_vector -> query
+        #   2. 返回值: List[ScoredPoint] -> QueryResponse (需要 .points 获取列表)
+        lexical = self._lexical_query(query_text, lexical_weight)
+        try:
+            if (fuse_text and self._text_vectors) or lexical:
+                request = self._fusion_request(
+                    query_vector, top_k, score_threshold, oversampling, query_filter, fuse_text, lexical
+                )
+                response = self._client.query_points(
+                    collection_name=self._collection_name,
+                    prefetch=request.prefetch,
+                    query=request.query,
+                    limit=request.limit,
+                    with_payload=True
+                )
+                results = response.points
+            elif not self._multires:
+                response = self._client.query_points(
+                    collection_name=self._collection_name,
+                    query=to_list(query_vector),  # 新版 API 使用 query 而非 query_vector
+                    using=self._image_vector,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                    query_filter=query_filter,
+                    search_params=self._options.search_params(),
+                    with_payload=True
+                )
+                # query_points 返回 QueryResponse 对象，通过 .points 获取结果列表
+                results = response.points
+            else:
+                full = as_float32(query_vector)
+                candidates = max(top_k, int(round(top_k * (oversampling or self._coarse_oversampling))))
+                if self._mode == "local":
+                    results = self._rerank_locally(full, candidates, top_k, score_threshold, query_filter)
+                else:
+                    response = self._client.query_points(
+                        collection_name=self._collection_name,
+                        prefetch=Prefetch(
+                            query=to_list(l2_normalize(full[:self._coarse_dimension])),
+                            using=COARSE_VECTOR_NAME,
+                            filter=query_filter,
+                            params=self._options.search_params(),
+                            limit=candidates
+                        ),
+                        query=to_list(full),
+                        using=FULL_VECTOR_NAME,
+                        limit=top_k,
+                        score_threshold=score_threshold,
+                        with_payload=True
+                    )
+                    results = response.points
+        except Exception as e:
+            logger.error(f"Qdrant query_points 查询失败: {e}")
+            logger.error(f"参数: collection={self._collection_name}, limit={top_k}, "
+                         f"score_threshold={score_threshold}, filter={query_filter}")
+            raise
+
+        return [
+            {
+                "id": point.id,
+                "score": point.score,
+                "metadata": point.payload
+            }
+            for point in results
+        ]
+
+    def search_batch(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        批量向量搜索：多个查询合并为一次 query_batch_points 请求
+
+        每个查询有独立的过滤条件和返回数量，结果按查询顺序分组返回。
+        本地模式的多分辨率集合需要在本进程内重排，逐个调用 search。
+
+        Args:
+            queries: 查询列表，每个元素的键与 search 的参数相同（query_vector 必填）
+
+        Returns:
+            与 queries 一一对应的搜索结果列表
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+        if not queries:
+            return []
+
+        if self._multires and self._mode == "local":
+            return [self.search(**query) for query in queries]
+
+        requests = [self.query_request(**query) for query in queries]
+        try:
+            responses = self._client.query_batch_points(
+                collection_name=self._collection_name,
+                requests=requests
+            )
+        except Exception as e:
+            logger.error(f"Qdrant query_batch_points 查询失败: {e}")
+            logger.error(f"参数: collection={self._collection_name}, queries={len(requests)}")
+            raise
+
+        return [
+            [
+                {
+                    "id": point.id,
+                    "score": point.score,
+                    "metadata": point.payload
+                }
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+    def query_request(
+        self,
+        query_vector: VectorLike,
+        top_k: int = 10,
+        score_threshold: Optional[float] = None,
+        oversampling: Optional[float] = None,
+        fuse_text: bool = False,
+        query_text: Optional[str] = None,
+        lexical_weight: Optional[float] = None,
+        **filters
+    ) -> QueryRequest:
+        """构建单个查询请求（批量检索和异步服务使用，与 search 的检索方式一致）"""
+        query_filter = self.build_filter(**filters)
+        lexical = self._lexical_query(query_text, lexical_weight)
+        if (fuse_text and self._text_vectors) or lexical:
+            return self._fusion_request(
+                query_vector, top_k, score_threshold, oversampling, query_filter, fuse_text, lexical
+            )
+        if not self._multires:
+            return QueryRequest(
+                query=to_list(query_vector),
+                using=self._image_vector,
+                filter=query_filter,
+                params=self._options.search_params(),
+                limit=top_k,
+                score_threshold=score_threshold,
+                with_payload=True
+            )
+
+        full = as_float32(query_vector)
+        candidates = max(top_k, int(round(top_k * (oversampling or self._coarse_oversampling))))
+        return QueryRequest(
+            prefetch=Prefetch(
+                query=to_list(l2_normalize(full[:self._coarse_dimension])),
+                using=COARSE_VECTOR_NAME,
+                filter=query_filter,
+                params=self._options.search_params(),
+                limit=candidates
+            ),
+            query=to_list(full),
+            using=FULL_VECTOR_NAME,
+            limit=top_k,
+            score_threshold=score_threshold,
+            with_payload=True
+        )
+
+    def _fusion_request(
+        self,
+        query_vector: VectorLike,
+        top_k: int,
+        score_threshold: Optional[float],
+        oversampling: Optional[float],
+        query_filter: Optional[Filter],
+        fuse_text: bool = True,
+        lexical: Optional[tuple[qdrant_models.SparseVector, float]] = None
+    ) -> QueryRequest:
+        """
+        图片向量与文本向量融合检索：每个向量各召回 top_k * oversampling 个候选（多分辨率集合的图片向量
+        先用前缀向量召回再按完整向量重排），服务端按 RRF / DBSF 融合后返回 top_k，一次请求完成。
+        score_threshold 作用于各路候选的相似度（不作用于关键词召回，BM25 分数与相似度不可比）。
+        lexical 为 _lexical_query 的结果时加入关键词召回，其权重不为 1 时按加权 RRF 融合（DBSF 不支持权重）
+        """
+        full = as_float32(query_vector)
+        candidates = max(top_k, int(round(top_k * (oversampling or self._coarse_oversampling))))
+        params = self._options.search_params()
+        if self._multires:
+            image = Prefetch(
+                prefetch=Prefetch(
+                    query=to_list(l2_normalize(full[:self._coarse_dimension])),
+                    using=COARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    params=params,
+                    limit=candidates
+                ),
+                query=to_list(full),
+                using=FULL_VECTOR_NAME,
+                score_threshold=score_threshold,
+                limit=candidates
+            )
+        else:
+            image = Prefetch(
+                query=to_list(full),
+                using=FULL_VECTOR_NAME,
+                filter=query_filter,
+                params=params,
+                score_threshold=score_threshold,
+                limit=candidates
+            )
+        texts = [
+            Prefetch(
+                query=to_list(full),
+                using=name,
+                filter=query_filter,
+                params=params,
+                score_threshold=score_threshold,
+                limit=candidates
+            )
+            for name in (self._text_vectors if fuse_text else [])
+        ]
+        prefetch = [image, *texts]
+        weights = [1.0] * len(prefetch)
+        if lexical:
+            sparse, weight = lexical
+            prefetch.append(Prefetch(query=sparse, using=LEXICAL_VECTOR_NAME, filter=query_filter, limit=candidates))
+            weights.append(weight)
+        if self._fusion == "rrf" and any(weight != 1.0 for weight in weights):
+            query = RrfQuery(rrf=Rrf(weights=weights))
+        else:
+            query = FusionQuery(fusion=Fusion.RRF if self._fusion == "rrf" else Fusion.DBSF)
+        return QueryRequest(prefetch=prefetch, query=query, limit=top_k, with_payload=True)
+
+    def _lexical_query(
+        self,
+        query_text: Optional[str],
+        lexical_weight: Optional[float] = None
+    ) -> Optional[tuple[qdrant_models.SparseVector, float]]:
+        """
+        关键词召回的 (查询稀疏向量, 权重)；集合没有关键词向量、权重为 0 或查询中没有可检索的词元时返回 None
+        """
+        weight = self._lexical_weight if lexical_weight is None else lexical_weight
+        if not self._lexical or not query_text or weight <= 0:
+            return None
+        sparse = lexical_query(query_text)
+        return (sparse, weight) if sparse is not None else None
+
+    def build_filter(
+        self,
+        filter_tags: Optional[List[str]] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_ids: Optional[List[Union[int, str]]] = None,
+        exclude_ids: Optional[List[Union[int, str]]] = None,
+        filter_updated_at_from: Optional[datetime] = None
+    ) -> Optional[Filter]:
+        """构建检索过滤条件（payload 租户模式下总是带当前租户条件），无条件时返回 None"""
         conditions = []
 
+        tenant_condition = self._tenant_condition()
+        if tenant_condition is not None:
+            conditions.append(tenant_condition)
+
         if filter_ids:
             conditions.append(HasIdCondition(has_id=filter_ids))
 
@@ -447,28 +2062,112 @@ class VectorDBService:
                 )
             )
 
-        if conditions:
-            query_filter = Filter(must=conditions)
+        if filter_updated_at_from:
+            conditions.append(
+                FieldCondition(
+                    key="updated_at",
+                    range=DatetimeRange(gte=filter_updated_at_from),
+                )
+            )
 
-        # 使用新版 API: query_points() 替代已废弃的 search()
-        # 关键变化:
-        #   1. 参数名: query_vector -> query
-        #   2. 返回值: List[ScoredPoint] -> QueryResponse (需要 .points 获取列表)
+        if not conditions and not exclude_ids:
+            return None
+        return Filter(
+            must=conditions or None,
+            must_not=[HasIdCondition(has_id=exclude_ids)] if exclude_ids else None
+        )
+
+    def _tenant_condition(self) -> Optional[Union[FieldCondition, Filter]]:
+        """payload 模式下当前租户的过滤条件，其他模式为 None"""
+        if self._tenant_mode != "payload":
+            return None
+        tenant = get_current_tenant()
+        match = FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant))
+        if tenant != DEFAULT_TENANT:
+            return match
+        # 启用多租户之前写入的记录没有 tenant_id，归默认租户
+        return Filter(should=[match, IsEmptyCondition(is_empty=PayloadField(key=TENANT_FIELD))])
+
+    def search_by_id(
+        self,
+        id: Union[int, str],
+        top_k: int = 10,
+        score_threshold: Optional[float] = None,
+        filter_tags: Optional[List[str]] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        oversampling: Optional[float] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        以库中已有记录的向量检索相似记录（不含该记录本身）
+
+        直接使用已存储的向量（query-by-id），不需要重新生成 Embedding；
+        记录本身通过 must_not 条件在检索阶段排除，结果数不会因此少一条。
+
+        Args:
+            id: 作为查询的记录ID
+            top_k: 返回结果数量
+            score_threshold: 相似度阈值
+            filter_tags: 标签过滤
+            filter_conditions: 其他过滤条件
+            oversampling: 第一阶段候选倍数（多分辨率集合），默认取初始化配置
+
+        Returns:
+            搜索结果列表；记录不存在时返回 None
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+
+        if not self._owned_ids([id]):
+            return None
+        filters = dict(filter_tags=filter_tags, filter_conditions=filter_conditions)
+        if self._multires and self._mode == "local":
+            # 本地模式的多分辨率检索在本进程内重排，需要完整向量
+            record = self.get(id)
+            if record is None:
+                return None
+            return self.search(record["vector"], top_k=top_k, score_threshold=score_threshold,
+                               oversampling=oversampling, exclude_ids=[id], **filters)
+
+        query_filter = self.build_filter(exclude_ids=[id], **filters)
         try:
-            response = self._client.query_points(
+            if not self._multires:
+                response = self._client.query_points(
+                    collection_name=self._collection_name,
+                    query=id,
+                    using=self._image_vector,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                    query_filter=query_filter,
+                    search_params=self._options.search_params(),
+                    with_payload=True
+                )
+            else:
+                candidates = max(top_k, int(round(top_k * (oversampling or self._coarse_oversampling))))
+                response = self._client.query_points(
+                    collection_name=self._collection_name,
+                    prefetch=Prefetch(
+                        query=id,
+                        using=COARSE_VECTOR_NAME,
+                        filter=query_filter,
+                        params=self._options.search_params(),
+                        limit=candidates
+                    ),
+                    query=id,
+                    using=FULL_VECTOR_NAME,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+        except Exception:
+            # 查询点不存在时 Qdrant 返回错误，确认后按“不存在”处理
+            exists = self._client.retrieve(
                 collection_name=self._collection_name,
-                query=query_vector,  # 新版 API 使用 query 而非 query_vector
-                limit=top_k,
-                score_threshold=score_threshold,
-                query_filter=query_filter,
-                with_payload=True
+                ids=[id],
+                with_payload=False,
+                with_vectors=False
             )
-            # query_points 返回 QueryResponse 对象，通过 .points 获取结果列表
-            results = response.points
-        except Exception as e:
-            logger.error(f"Qdrant query_points 查询失败: {e}")
-            logger.error(f"参数: collection={self._collection_name}, limit={top_k}, "
-                         f"score_threshold={score_threshold}, filter={query_filter}")
+            if not exists:
+                return None
             raise
 
         return [
@@ -477,16 +2176,52 @@ class VectorDBService:
                 "score": point.score,
                 "metadata": point.payload
             }
-            for point in results
+            for point in response.points
         ]
 
+    def _rerank_locally(
+        self,
+        full: np.ndarray,
+        candidates: int,
+        top_k: int,
+        score_threshold: Optional[float],
+        query_filter: Optional[Filter]
+    ) -> List[ScoredPoint]:
+        """前缀向量召回候选并取回完整向量，在本进程内按完整向量相似度重排"""
+        response = self._client.query_points(
+            collection_name=self._collection_name,
+            query=to_list(l2_normalize(full[:self._coarse_dimension])),
+            using=COARSE_VECTOR_NAME,
+            query_filter=query_filter,
+            limit=candidates,
+            search_params=self._options.search_params(),
+            with_payload=True,
+            with_vectors=[FULL_VECTOR_NAME]
+        )
+        points = response.points
+        if not points:
+            return []
+
+        scores = cosine_similarity(full, as_float32_matrix([p.vector[FULL_VECTOR_NAME] for p in points]))
+        results = []
+        for i in np.argsort(-scores)[:top_k]:
+            score = float(scores[i])
+            if score_threshold is not None and score < score_threshold:
+                break
+            point = points[i]
+            point.score = score
+            point.vector = None
+            results.append(point)
+        return results
+
     def scroll(
         self,
         limit: int = 100,
         offset: Optional[str] = None,
         filter_tags: Optional[List[str]] = None,
         filter_created_at_from: Optional[datetime] = None,
-        filter_created_at_to: Optional[datetime] = None
+        filter_created_at_to: Optional[datetime] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None
     ) -> tuple[List[Dict[str, Any]], Optional[str]]:
         """
         分页遍历所有记录
@@ -495,6 +2230,7 @@ class VectorDBService:
             limit: 每页数量
             offset: 偏移量（上次返回的next_offset）
             filter_tags: 标签过滤
+            filter_conditions: 其他字段的精确匹配条件（如 {"month_day": 118}）
 
         Returns:
             (记录列表, 下一页偏移量)
@@ -502,55 +2238,258 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        query_filter = None
-        conditions = []
-        if filter_tags:
-            conditions.append(
-                FieldCondition(
-                    key="tags",
-                    match=MatchAny(any=filter_tags)
-                )
-            )
+        query_filter = self.build_filter(
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to
+        )
 
-        if filter_created_at_from or filter_created_at_to:
-            conditions.append(
-                FieldCondition(
-                    key="created_at",
-                    range=DatetimeRange(
-                        gte=filter_created_at_from,
-                        lt=filter_created_at_to,
-                    ),
-                )
-            )
+        return self.scroll_page(limit, offset, query_filter)
+
+    def newest(
+        self,
+        limit: int,
+        filter_tags: Optional[List[str]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按 created_at 倒序取最新的 limit 条记录（没有 created_at 的记录不参与排序）
+
+        Qdrant 按 created_at 的 datetime 索引排序，只读取 limit 条；NumPy 引擎不支持 order_by，遍历后在内存中排序。
+
+        Args:
+            limit: 返回数量
+            filter_tags: 标签过滤
+            filter_conditions: 其他字段的精确匹配条件
+
+        Returns:
+            记录列表 {"id", "metadata"}
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
 
-        if conditions:
-            query_filter = Filter(must=conditions)
+        filters = dict(
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to
+        )
+        if self._backend == "numpy":
+            records = (r for r in self.iter_points(batch_size=1024, **filters) if _created_at(r) is not None)
+            return heapq.nlargest(limit, records, key=_created_at)
+        results, _ = self._client.scroll(
+            **self.scroll_request(limit, None, self.build_filter(**filters)),
+            order_by=OrderBy(key="created_at", direction=Direction.DESC)
+        )
+        return self.page_records(results)
 
+    def scroll_page(
+        self,
+        limit: int,
+        offset: Optional[Any],
+        query_filter: Optional[Filter],
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        with_text_vectors: bool = False,
+        collection: Optional[str] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[Any]]:
+        """
+        读取一页记录；with_payload=False 时记录不含 metadata，with_vectors=True 时附带完整向量，
+        with_text_vectors=True 时附带文本向量；collection 为读取的集合，默认为当前集合（query_filter 不含租户条件时不区分租户）
+        """
         results, next_offset = self._client.scroll(
-            collection_name=self._collection_name,
-            limit=limit,
-            offset=offset,
-            scroll_filter=query_filter,
-            with_payload=True,
-            with_vectors=False
+            **self.scroll_request(limit, offset, query_filter, with_payload, with_vectors, with_text_vectors, collection)
         )
+        return self.page_records(results, with_payload, with_vectors, with_text_vectors), next_offset
 
-        records = [
-            {
-                "id": point.id,
-                "metadata": point.payload
-            }
-            for point in results
-        ]
+    def scroll_request(
+        self,
+        limit: int,
+        offset: Optional[Any],
+        query_filter: Optional[Filter],
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        with_text_vectors: bool = False,
+        collection: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """读取一页记录的 scroll 参数（过滤条件由 build_filter 生成，collection 默认为当前集合）"""
+        return {
+            "collection_name": collection or self._collection_name,
+            "limit": limit,
+            "offset": offset,
+            "scroll_filter": query_filter,
+            "with_payload": with_payload,
+            "with_vectors": self._vector_selector(with_vectors, with_text_vectors)
+        }
+
+    def page_records(
+        self,
+        points: List[Any],
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        with_text_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """把 scroll 返回的记录转换为 {id, metadata, vector, text_vectors}（字段取舍同 scroll_request）"""
+        records = []
+        for point in points:
+            record = {"id": point.id}
+            if with_payload is not False:
+                record["metadata"] = point.payload
+            if with_vectors:
+                record["vector"] = self._full_vector(point.vector)
+            if with_text_vectors:
+                vectors = point.vector if isinstance(point.vector, dict) else {}
+                record["text_vectors"] = {
+                    name: vectors[name] for name in self._text_vectors if vectors.get(name) is not None
+                }
+            records.append(record)
+        return records
+
+    def iter_points(
+        self,
+        batch_size: int = 256,
+        limit: Optional[int] = None,
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        filter_tags: Optional[List[str]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        filter_ids: Optional[List[Union[int, str]]] = None,
+        filter_updated_at_from: Optional[datetime] = None,
+        prefetch: bool = True,
+        with_text_vectors: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式遍历记录
+
+        按 batch_size 分页读取，逐条产出；prefetch 时调用方处理当前页期间，下一页已在后台线程中请求。
+        提前结束迭代（break / close）不会再请求后续页面。
+
+        Args:
+            batch_size: 每页记录数（只取 ID 或少量字段时可调大，附带向量时宜调小）
+            limit: 最多产出的记录数，None 表示全部
+            with_payload: True 返回完整 metadata，字段名列表只返回这些字段，False 只返回 ID
+            with_vectors: 是否附带完整向量
+            filter_tags: 标签过滤
+            filter_conditions: 其他字段的精确匹配条件
+            filter_ids: 只遍历这些ID
+            filter_updated_at_from: 只遍历该时间之后写入或修改的记录
+            prefetch: 是否预取下一页
+            with_text_vectors: 是否附带文本向量（{文本向量名: 向量}，只含记录已有的文本向量）
+
+        Yields:
+            {"id", "metadata"(with_payload 非 False 时), "vector"(with_vectors 时), "text_vectors"(with_text_vectors 时)}
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
 
-        return records, next_offset
+        fetch = partial(
+            self.scroll_page,
+            query_filter=self.build_filter(
+                filter_tags=filter_tags,
+                filter_conditions=filter_conditions,
+                filter_created_at_from=filter_created_at_from,
+                filter_created_at_to=filter_created_at_to,
+                filter_ids=filter_ids,
+                filter_updated_at_from=filter_updated_at_from
+            ),
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+            with_text_vectors=with_text_vectors
+        )
+        batch_size = max(1, batch_size)
+        remaining = limit
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scroll-prefetch") if prefetch else None
+        try:
+            records, offset = fetch(batch_size if remaining is None else min(batch_size, remaining), None)
+            while True:
+                if remaining is not None:
+                    records = records[:remaining]
+                    remaining -= len(records)
+                if offset is None or remaining == 0:
+                    yield from records
+                    return
+
+                page_size = batch_size if remaining is None else min(batch_size, remaining)
+                # 预取线程不继承 contextvar（当前租户等），在调用方上下文的副本中执行
+                pending = executor.submit(contextvars.copy_context().run, fetch, page_size, offset) if executor else None
+                yield from records
+                records, offset = pending.result() if pending else fetch(page_size, offset)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aiter_points(
+        self,
+        batch_size: int = 256,
+        limit: Optional[int] = None,
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        filter_tags: Optional[List[str]] = None,
+        filter_created_at_from: Optional[datetime] = None,
+        filter_created_at_to: Optional[datetime] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        filter_ids: Optional[List[Union[int, str]]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        iter_points 的异步版本，按页产出记录列表
+
+        每页在 vector_db 线程池中读取；调用方处理当前页期间下一页已提交（始终预取一页）。
+
+        Args:
+            参数含义与 iter_points 相同
+
+        Yields:
+            一页记录
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
 
-    def count(self, filter_tags: Optional[List[str]] = None) -> int:
+        query_filter = self.build_filter(
+            filter_tags=filter_tags,
+            filter_conditions=filter_conditions,
+            filter_created_at_from=filter_created_at_from,
+            filter_created_at_to=filter_created_at_to,
+            filter_ids=filter_ids
+        )
+        batch_size = max(1, batch_size)
+        remaining = limit
+
+        def fetch(page_size: int, offset: Optional[Any]) -> asyncio.Future:
+            return asyncio.ensure_future(run_in_executor(
+                VECTOR_DB_POOL, self.scroll_page, page_size, offset, query_filter, with_payload, with_vectors
+            ))
+
+        pending = fetch(batch_size if remaining is None else min(batch_size, remaining), None)
+        try:
+            while pending is not None:
+                records, offset = await pending
+                pending = None
+                if remaining is not None:
+                    records = records[:remaining]
+                    remaining -= len(records)
+                if offset is not None and remaining != 0:
+                    pending = fetch(batch_size if remaining is None else min(batch_size, remaining), offset)
+                if records:
+                    yield records
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def count(self, filter_tags: Optional[List[str]] = None, exact: Optional[bool] = None) -> int:
         """
         统计记录数量
 
+        近似模式下，无过滤和单标签过滤直接取统计缓存（总数 / 标签计数表），
+        其余情况使用 Qdrant 的 exact=False 计数。
+
         Args:
             filter_tags: 标签过滤
+            exact: 是否精确计数，默认取初始化时的 approximate_count 配置
 
         Returns:
             记录数量
@@ -558,30 +2497,56 @@ class VectorDBService:
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        query_filter = None
-        if filter_tags:
-            query_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="tags",
-                        match=MatchAny(any=filter_tags)
-                    )
-                ]
-            )
+        cached = self.cached_count(filter_tags, exact)
+        if cached is not None:
+            return cached
+        return self._client.count(**self.count_request(filter_tags, exact)).count
 
-        result = self._client.count(
-            collection_name=self._collection_name,
-            count_filter=query_filter,
-            exact=True
-        )
-        return result.count
+    def count_request(self, filter_tags: Optional[List[str]] = None, exact: Optional[bool] = None) -> Dict[str, Any]:
+        """count 的请求参数（exact 为 None 时取 approximate_count 配置）"""
+        return {
+            "collection_name": self._collection_name,
+            "count_filter": self.build_filter(filter_tags=filter_tags),
+            "exact": not self._approximate_count if exact is None else exact
+        }
+
+    def cached_count(self, filter_tags: Optional[List[str]] = None, exact: Optional[bool] = None) -> Optional[int]:
+        """近似计数时从统计缓存取无过滤或单标签的计数，精确计数或缓存无法回答时返回 None"""
+        if exact is None:
+            exact = not self._approximate_count
+        if exact or self._stats is None:
+            return None
+        if not filter_tags:
+            return self._stats.get().points_count
+        if len(filter_tags) == 1:
+            return self._stats.tag_count(filter_tags[0])
+        return None
 
     def delete_collection(self) -> bool:
         """删除整个集合"""
         if not self.is_initialized:
             raise RuntimeError("向量数据库未初始化")
 
-        return self._client.delete_collection(self._collection_name)
+        name = self._collection_name
+        self._invalidate_all_stats()
+        self._tenant_collections.discard(name)
+        return self._client.delete_collection(name)
+
+    def close(self) -> None:
+        """关闭客户端连接（先写完写入缓冲中的记录；本地模式会释放存储目录锁）"""
+        if self._upsert_buffer is not None:
+            self._upsert_buffer.close()
+            self._upsert_buffer = None
+        for stats in self._tenant_stats.values():
+            stats.close()
+        self._tenant_stats.clear()
+        self._stats_ttl = 0.0
+        self._tenant_collections.clear()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._initialized = False
+        logger.info("向量数据库连接已关闭")
 
     def recreate_collection(self) -> None:
         """重建集合"""
@@ -590,11 +2555,12 @@ class VectorDBService:
 
         self._client.recreate_collection(
             collection_name=self._collection_name,
-            vectors_config=VectorParams(
-                size=self._vector_dimension,
-                distance=Distance.COSINE
-            )
+            vectors_config=self._vectors_config(),
+            sparse_vectors_config=self._sparse_vectors_config(),
+            hnsw_config=self._options.hnsw_config()
         )
+        self._detect_layout()
+        self._invalidate_all_stats()
 
 
 # 全局服务实例
@@ -0,0 +1,448 @@
+"""
+向量集合快照
+备份与恢复向量集合，恢复速度取决于磁盘和向量库写入，不需要重新生成 Embedding
+
+两种快照：
+- qdrant：Qdrant 服务端原生快照（docker/cloud 模式），从服务端流式下载到本地目录，恢复时流式上传
+- portable：可移植导出，任何模式和后端都可用（本地模式、NumPy 引擎没有原生快照），
+  也可用于跨模式迁移（如本地模式 -> Docker）。可只导出某时间点之后写入的记录（增量）
+
+portable 文件格式：
+    b"LXDUMP2\\n"
+    重复：uint64（小端）帧长度 + SAV1 帧（见 models.vector_wire，float32 完整向量，附带 ids 和 metadata）
+    每个记录帧之后可跟若干文本向量帧（元数据块含 "vector": 文本向量名 和 ids，只含有该向量的记录）
+旧版 b"LXDUMP1\\n" 文件没有文本向量帧，仍可读取。
+
+每个快照文件旁有同名 .json 清单（类型、集合、记录数、大小、SHA-256 等）。
+写入时边写边计算校验和，先写到 .partial 临时文件，完成后再改名；恢复前先整体校验。
+增量导出只包含新增和修改的记录，不包含删除。
+
+VectorDBService 的 create_snapshot / restore_snapshot / list_snapshots 由本模块的 SnapshotMixin 提供。
+"""
+
+import json
+import struct
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, asdict, field
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+import numpy as np
+from qdrant_client.http import models as qdrant_models
+from qdrant_client.http.models import PointStruct
+
+from .tenancy import TENANT_FIELD, get_current_tenant
+from ..models.vector_wire import encode_vectors, decode_vectors
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KINDS = ("qdrant", "portable")
+DUMP_MAGIC = b"LXDUMP2\n"
+_LEGACY_DUMP_MAGICS = (b"LXDUMP1\n",)
+_FRAME_LENGTH = struct.Struct("<Q")
+_CHUNK_SIZE = 1 << 20
+_SUFFIXES = {"qdrant": ".snapshot", "portable": ".lxdump"}
+
+
+@dataclass
+class SnapshotManifest:
+    """快照清单"""
+    name: str
+    kind: str
+    collection: str
+    created_at: str
+    size: int = 0
+    sha256: str = ""
+    points: Optional[int] = None  # qdrant 快照不统计
+    since: Optional[str] = None  # 增量导出的起始时间
+    vector_dimension: Optional[int] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @staticmethod
+    def path_for(snapshot_path: Path) -> Path:
+        return snapshot_path.with_name(snapshot_path.name + ".json")
+
+    def save(self, snapshot_path: Path) -> None:
+        self.path_for(snapshot_path).write_text(
+            json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    @classmethod
+    def load(cls, snapshot_path: Path) -> "SnapshotManifest":
+        manifest = cls.path_for(snapshot_path)
+        if not manifest.exists():
+            raise ValueError(f"快照清单不存在: {manifest}")
+        return cls(**json.loads(manifest.read_text(encoding="utf-8")))
+
+
+def snapshot_file(directory: Path, collection: str, kind: str) -> Path:
+    """生成新快照的文件路径（集合名 + UTC 时间戳）"""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    return Path(directory) / f"{collection}-{stamp}{_SUFFIXES[kind]}"
+
+
+def list_manifests(directory: Path) -> List[Dict[str, Any]]:
+    """列出目录中的快照清单（按创建时间倒序），跳过没有对应文件的清单"""
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    manifests = []
+    for path in directory.glob("*.json"):
+        snapshot = path.with_suffix("")
+        if not snapshot.exists():
+            continue
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["path"] = str(snapshot)
+        manifests.append(data)
+    manifests.sort(key=lambda m: m["created_at"], reverse=True)
+    return manifests
+
+
+class _HashingWriter:
+    """写入文件的同时计算 SHA-256 和字节数"""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+
+
+def _write_atomically(path: Path, write) -> Tuple[int, str]:
+    """写入 .partial 临时文件后改名；write(writer) 负责写入内容。返回 (字节数, SHA-256)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    try:
+        with open(partial, "wb") as f:
+            writer = _HashingWriter(f)
+            write(writer)
+        partial.replace(path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return writer.size, writer.sha256.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_snapshot(snapshot_path: Path) -> SnapshotManifest:
+    """
+    按清单校验快照文件的大小和 SHA-256
+
+    Raises:
+        ValueError: 清单缺失或校验失败
+    """
+    snapshot_path = Path(snapshot_path)
+    manifest = SnapshotManifest.load(snapshot_path)
+    if not snapshot_path.exists():
+        raise ValueError(f"快照文件不存在: {snapshot_path}")
+    size = snapshot_path.stat().st_size
+    if size != manifest.size:
+        raise ValueError(f"快照大小不符: {snapshot_path}（清单 {manifest.size}，实际 {size}）")
+    checksum = file_sha256(snapshot_path)
+    if checksum != manifest.sha256:
+        raise ValueError(f"快照校验和不符: {snapshot_path}")
+    return manifest
+
+
+# ---------- portable 格式 ----------
+
+def write_dump(path: Path, pages: Iterable[List[Dict[str, Any]]]) -> Tuple[int, int, str]:
+    """
+    把记录页写为 portable 快照
+
+    Args:
+        path: 目标文件
+        pages: 记录页，每条记录包含 id、vector（完整向量）、metadata，可选 text_vectors（文本向量名 -> 向量）
+
+    Returns:
+        (记录数, 字节数, SHA-256)
+    """
+    points = 0
+
+    def write(writer: _HashingWriter) -> None:
+        nonlocal points
+        writer.write(DUMP_MAGIC)
+        for records in pages:
+            if not records:
+                continue
+            frame = encode_vectors(
+                np.stack([np.asarray(r["vector"], dtype=np.float32) for r in records]),
+                ids=[r["id"] for r in records],
+                metadata=[r.get("metadata") or {} for r in records]
+            )
+            writer.write(_FRAME_LENGTH.pack(len(frame)))
+            writer.write(frame)
+            for name, ids, vectors in _text_vector_columns(records):
+                frame = encode_vectors(np.stack(vectors), ids=ids, vector=name)
+                writer.write(_FRAME_LENGTH.pack(len(frame)))
+                writer.write(frame)
+            points += len(records)
+
+    size, checksum = _write_atomically(path, write)
+    return points, size, checksum
+
+
+def _text_vector_columns(records: List[Dict[str, Any]]) -> Iterator[Tuple[str, List[Any], List[np.ndarray]]]:
+    """按文本向量名分组：(名称, 有该向量的记录ID, 向量)"""
+    columns: Dict[str, Tuple[List[Any], List[np.ndarray]]] = {}
+    for record in records:
+        for name, vector in (record.get("text_vectors") or {}).items():
+            if vector is not None:
+                ids, vectors = columns.setdefault(name, ([], []))
+                ids.append(record["id"])
+                vectors.append(np.asarray(vector, dtype=np.float32))
+    for name, (ids, vectors) in columns.items():
+        yield name, ids, vectors
+
+
+def read_dump(
+    path: Path
+) -> Iterator[Tuple[List[Any], np.ndarray, List[Dict[str, Any]], List[Dict[str, np.ndarray]]]]:
+    """逐页读取 portable 快照，产出 (ids, 向量矩阵, metadata 列表, 文本向量列表（与 ids 对应，文本向量名 -> 向量）)"""
+    page = None
+    with open(path, "rb") as f:
+        if f.read(len(DUMP_MAGIC)) not in (DUMP_MAGIC, *_LEGACY_DUMP_MAGICS):
+            raise ValueError(f"不是 portable 快照文件: {path}")
+        while True:
+            header = f.read(_FRAME_LENGTH.size)
+            if not header:
+                break
+            if len(header) != _FRAME_LENGTH.size:
+                raise ValueError(f"快照文件不完整: {path}")
+            (length,) = _FRAME_LENGTH.unpack(header)
+            frame = f.read(length)
+            if len(frame) != length:
+                raise ValueError(f"快照文件不完整: {path}")
+            vectors, meta = decode_vectors(frame)
+            name = meta.get("vector")
+            if name is None:
+                if page is not None:
+                    yield page
+                ids = meta.get("ids", [])
+                page = (ids, vectors, meta.get("metadata", []), [{} for _ in ids])
+                continue
+            if page is None:
+                raise ValueError(f"快照文件格式错误（文本向量帧前没有记录帧）: {path}")
+            positions = {id: i for i, id in enumerate(page[0])}
+            for id, vector in zip(meta.get("ids", []), vectors):
+                page[3][positions[id]][name] = vector
+    if page is not None:
+        yield page
+
+
+# ---------- Qdrant 服务端快照传输 ----------
+
+def download_snapshot(url: str, path: Path, headers: Dict[str, str], timeout: float = 60.0) -> Tuple[int, str]:
+    """流式下载服务端快照到本地文件，返回 (字节数, SHA-256)"""
+    def write(writer: _HashingWriter) -> None:
+        with httpx.stream("GET", url, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes(_CHUNK_SIZE):
+                writer.write(chunk)
+
+    return _write_atomically(path, write)
+
+
+def upload_snapshot(url: str, path: Path, headers: Dict[str, str], checksum: str, timeout: float = 600.0) -> None:
+    """流式上传快照文件并由服务端恢复（服务端同样校验 checksum）"""
+    with open(path, "rb") as f:
+        response = httpx.post(
+            url,
+            params={"priority": "snapshot", "wait": "true", "checksum": checksum},
+            headers=headers,
+            files={"snapshot": (path.name, f, "application/octet-stream")},
+            timeout=timeout
+        )
+    response.raise_for_status()
+
+
+def batched(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """把逐条产出的记录按 size 分组"""
+    page: List[Dict[str, Any]] = []
+    for record in records:
+        page.append(record)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+# ---------- VectorDBService 的快照操作 ----------
+
+class SnapshotMixin:
+    """
+    VectorDBService 的快照创建与恢复（create_snapshot / restore_snapshot / list_snapshots）
+    依赖 VectorDBService 的客户端、当前集合和向量结构，只作为其基类使用
+    """
+
+    def create_snapshot(
+        self,
+        directory: Union[str, Path],
+        since: Optional[datetime] = None,
+        portable: bool = False,
+        batch_size: int = 512
+    ) -> Dict[str, Any]:
+        """
+        创建集合快照并保存到本地目录
+
+        服务端模式（且非增量、未指定 portable）使用 Qdrant 原生快照：服务端生成后流式下载，
+        按服务端给出的校验和核对，下载完成后删除服务端上的快照文件。
+        其余情况按页流式导出完整向量和 payload（portable 格式）。
+
+        Args:
+            directory: 快照保存目录
+            since: 只导出该时间之后写入或修改的记录（按 updated_at，不含删除）
+            portable: 服务端模式下也使用可移植格式（可恢复到任意模式/后端）
+            batch_size: portable 导出的每页记录数
+
+        Returns:
+            快照清单（含 path）
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+
+        # 写入缓冲中尚未提交的记录也要进入快照
+        self.flush_upserts()
+
+        native = not portable and since is None and self._backend == "qdrant" and self._server_url is not None
+        kind = "qdrant" if native else "portable"
+        path = snapshot_file(Path(directory), self._collection_name, kind)
+        manifest = SnapshotManifest(
+            name=path.name,
+            kind=kind,
+            collection=self._collection_name,
+            created_at=datetime.now().isoformat(),
+            since=since.isoformat() if since else None,
+            vector_dimension=self._vector_dimension
+        )
+
+        if native:
+            description = self._client.create_snapshot(collection_name=self._collection_name, wait=True)
+            url = f"{self._server_url}/collections/{self._collection_name}/snapshots/{description.name}"
+            try:
+                manifest.size, manifest.sha256 = download_snapshot(url, path, self._http_headers())
+            finally:
+                self._client.delete_snapshot(collection_name=self._collection_name, snapshot_name=description.name)
+            if description.checksum and description.checksum != manifest.sha256:
+                path.unlink(missing_ok=True)
+                raise RuntimeError(f"快照下载校验失败: {description.name}")
+            manifest.extra["server_snapshot"] = description.name
+        else:
+            records = self.iter_points(
+                batch_size=batch_size, with_vectors=True, with_text_vectors=True, filter_updated_at_from=since
+            )
+            manifest.points, manifest.size, manifest.sha256 = write_dump(path, batched(records, batch_size))
+
+        manifest.save(path)
+        logger.info(f"集合快照已创建: {path} ({kind}, {manifest.size} bytes, points: {manifest.points})")
+        return {**asdict(manifest), "path": str(path)}
+
+    def restore_snapshot(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """
+        从快照恢复集合（先按清单校验大小和 SHA-256）
+
+        - qdrant 快照：流式上传到服务端恢复（仅服务端模式）
+        - portable 全量快照：重建集合后按帧（导出时的页大小）写入，向量直接来自快照，不调用 Embedding；
+          payload 租户模式下集合由所有租户共用，只删除并恢复当前租户的记录
+        - portable 增量快照：在现有集合上覆盖写入
+
+        Args:
+            path: 快照文件路径（旁边需有 .json 清单）
+
+        Returns:
+            {"name", "kind", "full", "restored"(portable 写入的记录数)}
+        """
+        if not self.is_initialized:
+            raise RuntimeError("向量数据库未初始化")
+
+        path = Path(path)
+        manifest = verify_snapshot(path)
+        restored = None
+
+        if manifest.kind == "qdrant":
+            if self._backend != "qdrant" or self._server_url is None:
+                raise RuntimeError("Qdrant 原生快照只能恢复到 docker/cloud 模式")
+            url = f"{self._server_url}/collections/{self._collection_name}/snapshots/upload"
+            upload_snapshot(url, path, self._http_headers(), manifest.sha256)
+            self._detect_layout()
+        else:
+            if manifest.vector_dimension != self._vector_dimension:
+                raise ValueError(
+                    f"快照向量维度 {manifest.vector_dimension} 与当前配置 {self._vector_dimension} 不一致"
+                )
+            if self._tenant_mode == "payload":
+                # 快照中的记录恢复到当前租户，清空前先确认不会覆盖其他租户的同ID记录
+                for ids, *_ in read_dump(path):
+                    self._check_writable(ids)
+            if manifest.since is None:
+                self._clear_for_restore()
+            restored = 0
+            for ids, vectors, metadata, text_vectors in read_dump(path):
+                if self._tenant_mode == "payload":
+                    metadata = [{**(payload or {}), TENANT_FIELD: get_current_tenant()} for payload in metadata]
+                self._client.upsert(
+                    collection_name=self._collection_name,
+                    points=[
+                        PointStruct(
+                            id=id,
+                            vector=self.point_vector(vector, text_vectors=texts, lexical=self._lexical_vector(payload)),
+                            payload=payload
+                        )
+                        for id, vector, payload, texts in zip(ids, vectors, metadata, text_vectors)
+                    ],
+                    wait=True
+                )
+                restored += len(ids)
+
+        if self._stats is not None:
+            self._stats.invalidate()
+        logger.info(f"集合已从快照恢复: {path} ({manifest.kind}, restored: {restored})")
+        return {"name": manifest.name, "kind": manifest.kind, "full": manifest.since is None, "restored": restored}
+
+    def _clear_for_restore(self) -> None:
+        """
+        全量恢复前清空数据：payload 租户模式只删除当前租户的记录；其他情况删除实际集合后按当前配置重建
+        （含 payload 索引），经由别名访问时先解析别名，重建后恢复别名（删除集合时 Qdrant 会一并删除别名）
+        """
+        if self._tenant_mode == "payload":
+            self._client.delete(
+                collection_name=self._collection_name,
+                points_selector=qdrant_models.FilterSelector(filter=self.build_filter()),
+                wait=True
+            )
+            return
+        name = self._collection_name
+        physical = self.physical_collection() if name == self.live_alias else name
+        self._client.delete_collection(physical)
+        self._create_collection(physical, self._vectors_config(), self._sparse_vectors_config())
+        if physical != name:
+            self._client.update_collection_aliases(change_aliases_operations=[
+                qdrant_models.CreateAliasOperation(
+                    create_alias=qdrant_models.CreateAlias(collection_name=physical, alias_name=name)
+                )
+            ])
+        self._detect_layout()
+
+    @staticmethod
+    def list_snapshots(directory: Union[str, Path]) -> List[Dict[str, Any]]:
+        """列出目录中的快照清单（按创建时间倒序）"""
+        return list_manifests(Path(directory))
+
+    def _http_headers(self) -> Dict[str, str]:
+        return {"api-key": self._api_key} if self._api_key else {}
@@ -0,0 +1,99 @@
+"""
+向量工具模块
+服务内部统一使用连续内存的 float32 NumPy 数组传递向量，
+只在 JSON 响应和 Qdrant 请求这两个边界处转换为 Python 列表
+
+2560 维向量以 List[float] 表示约占 80KB（每个元素是独立的 Python float 对象），
+float32 数组只需 10KB，且归一化、相似度等计算可以直接向量化
+"""
+
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+
+# 服务内部的向量类型：单个向量为一维数组，批量向量为二维数组（每行一个向量）
+Vector = np.ndarray
+
+VectorLike = Union[np.ndarray, Sequence[float]]
+
+_EPSILON = 1e-12
+
+
+def as_float32(vector: Any) -> np.ndarray:
+    """
+    转换为连续内存的 float32 数组（已满足要求时不复制）
+
+    Args:
+        vector: 列表、元组、NumPy 数组或 torch Tensor（需已在 CPU 上）
+
+    Returns:
+        float32 数组
+    """
+    if hasattr(vector, "detach"):
+        # torch.Tensor：避免经由 Python 列表中转
+        vector = vector.detach().float().cpu().numpy()
+    return np.ascontiguousarray(vector, dtype=np.float32)
+
+
+def as_float32_matrix(vectors: Any) -> np.ndarray:
+    """
+    转换为二维 float32 矩阵（每行一个向量）
+
+    Args:
+        vectors: 向量列表或二维数组
+
+    Returns:
+        形状为 (n, dim) 的 float32 数组
+    """
+    if isinstance(vectors, (list, tuple)):
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        if not isinstance(vectors[0], (int, float)):
+            return np.stack([as_float32(v) for v in vectors])
+    return np.atleast_2d(as_float32(vectors))
+
+
+def l2_normalize(vectors: VectorLike, copy: bool = True) -> np.ndarray:
+    """
+    L2 归一化，支持单个向量和按行归一化的二维矩阵
+
+    Args:
+        vectors: 向量或向量矩阵
+        copy: 为 False 时在原数组上修改（输入须为 float32 数组）
+
+    Returns:
+        归一化后的 float32 数组
+    """
+    arr = as_float32(vectors)
+    if copy and arr is vectors:
+        arr = arr.copy()
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    np.maximum(norms, _EPSILON, out=norms)
+    arr /= norms
+    return arr
+
+
+def cosine_similarity(query: VectorLike, candidates: VectorLike) -> Union[float, np.ndarray]:
+    """
+    余弦相似度
+
+    Args:
+        query: 查询向量（一维）
+        candidates: 单个向量（一维）或候选向量矩阵（二维，每行一个）
+
+    Returns:
+        一维输入返回 float，二维输入返回每行的相似度数组
+    """
+    q = l2_normalize(query)
+    c = l2_normalize(candidates)
+    scores = c @ q
+    if scores.ndim == 0:
+        return float(scores)
+    return scores
+
+
+def to_list(vector: VectorLike) -> List[float]:
+    """转换为 Python 列表（仅在 JSON 响应 / Qdrant 请求边界使用）"""
+    if isinstance(vector, np.ndarray):
+        return vector.tolist()
+    return list(vector)
@@ -0,0 +1,149 @@
+"""
+async 路由并发检索基准测试
+对比在 async 处理函数中直接调用同步 search_by_text（阻塞事件循环）与 await search_by_text_async
+（在 embedding 线程池中执行）的并发吞吐和事件循环延迟
+
+使用 offline Embedding Provider + Qdrant 本地模式，并在向量生成处注入固定延迟模拟 DashScope 往返耗时。
+事件循环延迟由一个 10ms 心跳任务测量，反映同一进程中 ASR websocket 等其他连接受到的影响。
+
+用法:
+    python benchmarks/bench_async_search_concurrency.py
+    python benchmarks/bench_async_search_concurrency.py --latency-ms 150 --concurrency 1 8 32 --requests 64
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERY_WORDS = ["海边", "日落", "红色", "跑车", "猫", "山", "雪", "城市", "夜景", "花", "森林", "咖啡"]
+HEARTBEAT_SECONDS = 0.01
+
+
+def make_image(rng: np.random.Generator, size: int = 128) -> bytes:
+    base = rng.integers(0, 256, size=3)
+    pixels = np.clip(base + rng.normal(0, 25, size=(size, size, 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def setup_services(args, rng):
+    from app.config import get_settings
+    from app.services import get_storage_service, get_vector_db_service, get_embedding_service, get_search_service
+
+    settings = get_settings()
+    storage = get_storage_service()
+    storage.initialize(settings.STORAGE_PATH)
+    vector_db = get_vector_db_service()
+    vector_db.initialize(
+        mode="local",
+        path=settings.QDRANT_PATH,
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        vector_dimension=settings.VECTOR_DIMENSION,
+    )
+    embedding = get_embedding_service()
+    embedding.initialize()
+    search = get_search_service()
+    search.initialize()
+
+    for i in range(args.images):
+        info = storage.save_image(make_image(rng), f"bench_{i}.jpg")
+        search.index_image(
+            image_id=info["id"],
+            image_path=info["full_path"],
+            metadata={"filename": info["filename"], "file_path": info["file_path"],
+                      "created_at": info["created_at"], "tags": [], "description": ""},
+        )
+
+    # 入库完成后再注入上游延迟，只影响检索阶段
+    client = embedding._api_client
+    generate = client.generate_embedding
+
+    def delayed_generate(*a, **kw):
+        time.sleep(args.latency_ms / 1000)
+        return generate(*a, **kw)
+
+    client.generate_embedding = delayed_generate
+    return search, vector_db
+
+
+async def run_round(search, queries, concurrency: int, use_async: bool):
+    """以固定并发执行一轮查询，返回 (总耗时秒, 最大心跳延迟毫秒)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal max_lag
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + HEARTBEAT_SECONDS
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            max_lag = max(max_lag, loop.time() - expected)
+
+    async def handler(query):
+        async with semaphore:
+            if use_async:
+                return await search.search_by_text_async(query_text=query, top_k=10)
+            return search.search_by_text(query_text=query, top_k=10)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(q) for q in queries))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, max_lag * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=200, help="入库图片数量")
+    parser.add_argument("--requests", type=int, default=48, help="每轮查询数")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=100, help="模拟的上游向量生成延迟")
+    parser.add_argument("--dimension", type=int, default=1024)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "EMBEDDING_API_PROVIDER": "offline",
+        "QDRANT_MODE": "local",
+        "QDRANT_PATH": os.path.join(tmp.name, "qdrant"),
+        "STORAGE_PATH": os.path.join(tmp.name, "images"),
+        "VECTOR_DIMENSION": str(args.dimension),
+        "VECTOR_COARSE_DIMENSION": "0",
+    })
+
+    rng = np.random.default_rng(0)
+    search, vector_db = setup_services(args, rng)
+    queries = [" ".join(rng.choice(QUERY_WORDS, size=2)) for _ in range(args.requests)]
+
+    from app.config import get_settings
+    from app.services.executors import shutdown_executors
+
+    print(f"requests={args.requests}, upstream latency={args.latency_ms:g}ms, "
+          f"embedding workers={get_settings().EMBEDDING_EXECUTOR_WORKERS}\n")
+    print(f"{'mode':<10}{'concurrency':>12}{'req/s':>10}{'total s':>10}{'max loop lag ms':>18}")
+    for concurrency in args.concurrency:
+        for mode, use_async in (("blocking", False), ("async", True)):
+            elapsed, lag = asyncio.run(run_round(search, queries, concurrency, use_async))
+            print(f"{mode:<10}{concurrency:>12}{args.requests / elapsed:>10.1f}{elapsed:>10.2f}{lag:>18.1f}")
+
+    shutdown_executors()
+    vector_db.close()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
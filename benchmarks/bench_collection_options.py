@@ -0,0 +1,113 @@
+"""
+集合量化 / 落盘 / HNSW 参数基准（需要 Qdrant 服务端，本地模式会忽略这些配置）
+对每种集合配置写入同一批聚类分布的合成向量，等待索引完成后比较：
+- 估算常驻内存：原始向量（未落盘时）+ 量化向量（always_ram）+ HNSW 第 0 层邻接表
+- 检索延迟 p50/p95 与 Recall@10（以 float32 精确检索为基准），并扫描检索时的 hnsw_ef 与量化候选倍数
+
+用法:
+    python benchmarks/bench_collection_options.py --host localhost
+    python benchmarks/bench_collection_options.py --points 50000 --dim 2560 --ef 64 128 --oversampling 1 2 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from dataclasses import replace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService, CollectionOptions
+from app.services.vector_utils import l2_normalize
+
+CONFIGS = {
+    "float32-ram": CollectionOptions(),
+    "float32-m32": CollectionOptions(hnsw_m=32, hnsw_ef_construct=200),
+    "scalar-disk": CollectionOptions(quantization="scalar", on_disk=True),
+    "binary-disk": CollectionOptions(quantization="binary", on_disk=True),
+}
+
+
+def estimate_ram_mb(options: CollectionOptions, points: int, dim: int) -> float:
+    total = 0 if options.on_disk else points * dim * 4
+    if options.quantization_always_ram:
+        total += {"none": 0, "scalar": points * dim, "binary": points * dim // 8}[options.quantization]
+    total += points * options.hnsw_m * 2 * 4
+    return total / 1e6
+
+
+def wait_indexed(service: VectorDBService, timeout: float = 600) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if service.get_collection_info()["status"] == "green":
+            return
+        time.sleep(0.5)
+    raise RuntimeError("等待索引完成超时")
+
+
+def measure(service, queries, truth):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = service.search(query, top_k=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({r["id"] for r in results} & expected)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], hits / (10 * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ef", type=int, nargs="+", default=[0, 128])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, args.points // 500), args.dim)).astype(np.float32)
+    vectors = l2_normalize(centers[rng.integers(0, len(centers), args.points)]
+                           + 0.5 * rng.standard_normal((args.points, args.dim)).astype(np.float32))
+    queries = l2_normalize(vectors[rng.integers(0, args.points, args.queries)]
+                           + 0.2 * rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+    truth = [set(np.argpartition(-(vectors @ q), 10)[:10].tolist()) for q in queries]
+
+    print(f"points={args.points}, dim={args.dim}, queries={args.queries}, server={args.host}:{args.port}\n")
+    print(f"{'config':<16}{'ef':>6}{'overs.':>8}{'est. RAM MB':>13}{'p50 ms':>10}{'p95 ms':>10}{'recall':>10}")
+
+    for name in args.configs:
+        options = CONFIGS[name]
+        VectorDBService._instance = None
+        service = VectorDBService()
+        service.initialize(mode="docker", host=args.host, port=args.port, collection_name=f"bench_opts_{name}",
+                           vector_dimension=args.dim, coarse_dimension=0, collection_options=options)
+        service.recreate_collection()
+        for start in range(0, args.points, 512):
+            service.upsert_batch([
+                {"id": i, "vector": vectors[i], "metadata": {}}
+                for i in range(start, min(start + 512, args.points))
+            ])
+        wait_indexed(service)
+
+        oversampling = args.oversampling if options.quantization != "none" else [options.oversampling]
+        for ef in args.ef:
+            for factor in oversampling:
+                # 检索参数只影响查询，同一集合上直接切换
+                service._options = replace(options, search_ef=ef, oversampling=factor)
+                p50, p95, recall = measure(service, queries, truth)
+                print(f"{name:<16}{ef or '-':>6}{factor if options.quantization != 'none' else '-':>8}"
+                      f"{estimate_ram_mb(options, args.points, args.dim):>13.1f}{p50:>10.2f}{p95:>10.2f}{recall:>10.3f}")
+
+        service.delete_collection()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
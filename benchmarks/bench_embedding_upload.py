@@ -0,0 +1,127 @@
+"""
+Embedding 图片上传基准测试
+对比预处理（EXIF 校正 + 按 MAX_PIXELS 降采样 + 重新编码）前后的上行字节数和端到端 Embedding 延迟
+
+用法:
+    python benchmarks/bench_embedding_upload.py                      # 合成手机照片，模拟上行链路
+    python benchmarks/bench_embedding_upload.py --images ./photos    # 使用本地图片目录
+    python benchmarks/bench_embedding_upload.py --live               # 真实调用 DashScope（需配置 ALIYUN_EMBEDDING_API_KEY）
+"""
+
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import get_settings
+from app.services.image_preprocess import prepare_image_for_upload, shutdown_preprocess_pool
+
+
+def synthesize_photos(directory: Path, count: int, width: int, height: int) -> list:
+    """生成带 EXIF 方向标签的手机尺寸照片（渐变 + 噪声，压缩率接近真实照片）"""
+    rng = np.random.default_rng(0)
+    paths = []
+    yy, xx = np.mgrid[0:height, 0:width]
+    for i in range(count):
+        base = np.stack([
+            (xx * (i + 1) / width * 255) % 255,
+            (yy / height * 255),
+            ((xx + yy) / (width + height) * 255),
+        ], axis=-1)
+        noise = rng.normal(0, 18, size=base.shape)
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        image = Image.fromarray(pixels, "RGB")
+        exif = image.getexif()
+        exif[0x0112] = 6  # 竖拍：顺时针旋转 90°
+        path = directory / f"phone_{i:03d}.jpg"
+        image.save(path, format="JPEG", quality=95, exif=exif)
+        paths.append(path)
+    return paths
+
+
+def original_payload(path: Path) -> str:
+    """不做预处理时提交的数据（原图 base64，与 SDK 上传原文件的字节量同级）"""
+    return base64.b64encode(path.read_bytes()).decode("ascii")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=str, help="图片目录（默认合成手机照片）")
+    parser.add_argument("--count", type=int, default=8, help="合成照片数量")
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--uplink-mbps", type=float, default=20.0, help="模拟上行带宽 (Mbit/s)")
+    parser.add_argument("--model-ms", type=float, default=350.0, help="模拟模型推理耗时 (ms)")
+    parser.add_argument("--live", action="store_true", help="真实调用 DashScope API")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    tmp = None
+    if args.images:
+        paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"})
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        paths = synthesize_photos(Path(tmp.name), args.count, args.width, args.height)
+
+    client = None
+    if args.live:
+        from app.services.aliyun_embedding_client import get_aliyun_client
+        client = get_aliyun_client()
+        client.initialize()
+
+    uplink_bps = args.uplink_mbps * 1_000_000 / 8
+    before_bytes, after_bytes = [], []
+    before_ms, after_ms, prep_ms = [], [], []
+
+    # 预热进程池，避免首个样本计入进程启动时间
+    prepare_image_for_upload(str(paths[0]))
+
+    for path in paths:
+        raw = original_payload(path)
+        before_bytes.append(len(raw))
+
+        t0 = time.perf_counter()
+        prepared = prepare_image_for_upload(str(path))
+        prep = (time.perf_counter() - t0) * 1000
+        prep_ms.append(prep)
+        after_bytes.append(len(prepared["data_uri"]))
+
+        if client is not None:
+            client._preprocess = False
+            t0 = time.perf_counter()
+            client.generate_embedding(image=str(path))
+            before_ms.append((time.perf_counter() - t0) * 1000)
+            client._preprocess = True
+            t0 = time.perf_counter()
+            client.generate_embedding(image=str(path))
+            after_ms.append((time.perf_counter() - t0) * 1000)
+        else:
+            before_ms.append(len(raw) / uplink_bps * 1000 + args.model_ms)
+            after_ms.append(prep + len(prepared["data_uri"]) / uplink_bps * 1000 + args.model_ms)
+
+    mode = "live DashScope" if client is not None else f"simulated {args.uplink_mbps} Mbit/s uplink + {args.model_ms} ms model"
+    print(f"images: {len(paths)}  MAX_PIXELS: {settings.MAX_PIXELS}  quality: {settings.EMBEDDING_IMAGE_QUALITY}  mode: {mode}")
+    print(f"{'':24}{'before':>14}{'after':>14}{'ratio':>10}")
+    mb_before = statistics.mean(before_bytes) / 1e6
+    mb_after = statistics.mean(after_bytes) / 1e6
+    print(f"{'bytes on wire (MB/img)':24}{mb_before:>14.3f}{mb_after:>14.3f}{mb_before / mb_after:>9.1f}x")
+    p50_b, p50_a = statistics.median(before_ms), statistics.median(after_ms)
+    print(f"{'embed latency p50 (ms)':24}{p50_b:>14.1f}{p50_a:>14.1f}{p50_b / p50_a:>9.1f}x")
+    print(f"{'preprocess p50 (ms)':24}{'-':>14}{statistics.median(prep_ms):>14.1f}")
+
+    shutdown_preprocess_pool()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+本地 CPU 推理引擎基准测试
+在固定图片集上对比全精度模型与 CPU 引擎（int8 动态量化 / 可选 torch.compile）的
+单条延迟、批量吞吐、模型内存以及检索一致性
+
+检索一致性：分别用两个模型对同一组图片和文本查询编码，比较每个查询的 Top-K 图片集合的重合率，
+以及同一输入两种向量之间的余弦相似度
+
+需要安装 torch 并将模型放在 MODEL_PATH（默认 ./qwen3-vl-embedding-2B）
+
+用法:
+    python benchmarks/bench_local_cpu_engine.py
+    python benchmarks/bench_local_cpu_engine.py --images ./photos --threads 8 --compile
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import get_settings
+from app.services.vector_utils import as_float32_matrix
+
+QUERIES = [
+    "海边的日落", "一只猫", "城市夜景", "雪山", "生日蛋糕",
+    "红色的花", "森林小路", "一碗面条", "蓝天白云", "室内的书架",
+]
+
+
+def synthesize_images(directory: Path, count: int, seed: int = 0) -> list:
+    """生成固定的合成图片集（色块 + 渐变 + 噪声），保证多次运行输入一致"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    yy, xx = np.mgrid[0:448, 0:448]
+    for i in range(count):
+        base = rng.integers(0, 255, size=3)
+        pixels = np.stack([
+            (base[0] + xx * (i % 5 + 1) / 448 * 120) % 255,
+            (base[1] + yy / 448 * 160) % 255,
+            np.full(xx.shape, base[2]),
+        ], axis=-1)
+        pixels += rng.normal(0, 12, size=pixels.shape)
+        path = directory / f"fixed_{i:03d}.jpg"
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def encode(process, inputs, batch: int):
+    """逐条计时 + 整批计时"""
+    latencies = []
+    singles = []
+    for inp in inputs:
+        start = time.perf_counter()
+        singles.append(as_float32_matrix(process([inp]))[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for i in range(0, len(inputs), batch):
+        process(inputs[i:i + batch])
+    throughput = len(inputs) / (time.perf_counter() - start)
+    return np.stack(singles), latencies, throughput
+
+
+def topk_overlap(image_a, image_b, query_a, query_b, k: int) -> float:
+    """两个模型各自检索的 Top-K 图片集合的平均重合率"""
+    top_a = np.argsort(-(query_a @ image_a.T), axis=1)[:, :k]
+    top_b = np.argsort(-(query_b @ image_b.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(top_a, top_b)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=str, default=get_settings().MODEL_PATH)
+    parser.add_argument("--images", type=str, help="图片目录（默认生成固定合成图片）")
+    parser.add_argument("--count", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--compile", action="store_true", help="CPU 引擎启用 torch.compile")
+    args = parser.parse_args()
+
+    try:
+        import torch
+    except ImportError:
+        print("需要安装 torch 才能运行本地模型基准测试")
+        sys.exit(1)
+    if not Path(args.model).exists():
+        print(f"模型目录不存在: {args.model}")
+        sys.exit(1)
+
+    from app.services.local_cpu_engine import CPUEmbeddingEngine, SCRIPTS_PATH, configure_cpu_threads, model_size_bytes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.images:
+            paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"})
+            paths = paths[:args.count]
+        else:
+            paths = synthesize_images(Path(tmp), args.count)
+
+        image_inputs = [{"image": str(p), "instruction": "Represent this image for retrieval."} for p in paths]
+        query_inputs = [{"text": q, "instruction": "Represent this text for retrieval."} for q in QUERIES]
+
+        threads = configure_cpu_threads(args.threads)
+        print(f"images={len(paths)}, queries={len(QUERIES)}, batch={args.batch}, threads={threads}\n")
+
+        # 全精度基线（fp32，eager）
+        sys.path.insert(0, str(SCRIPTS_PATH))
+        from qwen3_vl_embedding import Qwen3VLEmbedder
+        baseline = Qwen3VLEmbedder(model_path=args.model, device="cpu")
+        baseline.model.eval()
+
+        def baseline_process(inputs):
+            with torch.inference_mode():
+                return baseline.process(inputs, normalize=True)
+
+        results = {}
+        results["fp32"] = (
+            model_size_bytes(baseline.model),
+            *encode(baseline_process, image_inputs, args.batch),
+            encode(baseline_process, query_inputs, args.batch)[0],
+        )
+        del baseline
+
+        engine = CPUEmbeddingEngine.load(
+            args.model, num_threads=args.threads, quantize=True,
+            compile_graph=args.compile, max_batch=args.batch
+        )
+        label = "int8" + ("+compile" if engine.compiled else "")
+        results[label] = (
+            model_size_bytes(engine.model),
+            *encode(engine.process, image_inputs, args.batch),
+            encode(engine.process, query_inputs, args.batch)[0],
+        )
+
+    print(f"{'engine':<16}{'model MB':>10}{'p50 ms':>10}{'p95 ms':>10}{'img/s':>10}")
+    for name, (size, _, latencies, throughput, _) in results.items():
+        latencies = sorted(latencies)
+        print(f"{name:<16}{size / 2**20:>10.0f}{statistics.median(latencies):>10.1f}"
+              f"{latencies[int(len(latencies) * 0.95) - 1]:>10.1f}{throughput:>10.2f}")
+
+    _, img_full, _, _, q_full = results["fp32"]
+    _, img_fast, _, _, q_fast = results[label]
+    cosine = np.sum(img_full * img_fast, axis=1)
+    print(f"\n同一图片向量余弦相似度: mean={cosine.mean():.4f}, min={cosine.min():.4f}")
+    print(f"文本查询 Top-{args.top_k} 重合率: {topk_overlap(img_full, img_fast, q_full, q_fast, args.top_k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Matryoshka 多分辨率检索基准测试
+对比单向量集合（完整维度单阶段检索）与多分辨率集合（前缀向量召回 + 完整向量重排）的
+检索延迟、Recall@K 和常驻索引内存
+
+合成数据模拟 Matryoshka 表示学习的特点：信息集中在靠前的维度，越靠后的维度方差越小。
+真实模型的召回损失需用真实向量评估（--vectors 传入 .npy 矩阵）。
+
+用法:
+    python benchmarks/bench_matryoshka_search.py
+    python benchmarks/bench_matryoshka_search.py --points 20000 --coarse 256 512 --oversampling 2 4 8
+    python benchmarks/bench_matryoshka_search.py --vectors embeddings.npy
+    python benchmarks/bench_matryoshka_search.py --host localhost --port 6333    # Qdrant 服务端（HNSW 生效）
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_utils import l2_normalize
+
+# Qdrant HNSW 默认参数，用于估算图结构内存（每个点约 m * 2 条 4 字节链接）
+HNSW_M = 16
+
+
+def synthesize(points: int, queries: int, dim: int, seed: int = 0):
+    """生成信息量按维度递减的向量，查询为库内向量加噪声"""
+    rng = np.random.default_rng(seed)
+    latent = 64
+    basis = rng.standard_normal((latent, dim)).astype(np.float32)
+    basis *= (1.0 / np.sqrt(np.arange(1, dim + 1, dtype=np.float32)))[None, :] ** 0.5
+    data = rng.standard_normal((points, latent)).astype(np.float32) @ basis
+    data += 0.05 * rng.standard_normal(data.shape).astype(np.float32)
+    data = l2_normalize(data)
+
+    picks = rng.choice(points, size=queries, replace=False)
+    query = data[picks] + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+    return data, l2_normalize(query)
+
+
+def ground_truth(data: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """完整维度精确 Top-K"""
+    scores = queries @ data.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def build(service: VectorDBService, args, name: str, dim: int, coarse: int, data: np.ndarray):
+    """(重新)初始化服务并写入数据"""
+    service.close()
+    if args.host:
+        service.initialize(mode="docker", host=args.host, port=args.port, collection_name=name,
+                           vector_dimension=dim, coarse_dimension=coarse)
+        service.recreate_collection()
+    else:
+        service.initialize(mode="local", path=tempfile.mkdtemp(prefix="bench_mrl_"), collection_name=name,
+                           vector_dimension=dim, coarse_dimension=coarse)
+    batch = 256
+    for start in range(0, len(data), batch):
+        service.upsert_batch([
+            {"id": start + i, "vector": vec, "metadata": {}}
+            for i, vec in enumerate(data[start:start + batch])
+        ])
+
+
+def run_queries(service: VectorDBService, queries: np.ndarray, truth: np.ndarray, k: int, oversampling=None):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = service.search(query, top_k=k, oversampling=oversampling)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({r["id"] for r in results} & set(expected.tolist()))
+    latencies.sort()
+    return hits / truth.size, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def resident_bytes(points: int, dim: int, coarse: int) -> int:
+    """服务端常驻内存估算：参与 HNSW 的向量 + 图结构（多分辨率时完整向量落盘）"""
+    indexed_dim = coarse or dim
+    return points * (indexed_dim * 4 + HNSW_M * 2 * 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=2560)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--coarse", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--vectors", type=str, help="真实向量矩阵 .npy（形状 (n, dim)），查询取其中随机行")
+    parser.add_argument("--host", type=str, help="Qdrant 服务端地址（默认本地模式）")
+    parser.add_argument("--port", type=int, default=6333)
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = l2_normalize(np.load(args.vectors))
+        rng = np.random.default_rng(0)
+        queries = data[rng.choice(len(data), size=min(args.queries, len(data)), replace=False)]
+    else:
+        data, queries = synthesize(args.points, args.queries, args.dim)
+    points, dim = data.shape
+    truth = ground_truth(data, queries, args.top_k)
+
+    service = VectorDBService()
+    print(f"points={points}, dim={dim}, queries={len(queries)}, top_k={args.top_k}, "
+          f"backend={'server ' + args.host if args.host else 'local'}\n")
+    print(f"{'layout':<22}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}{'resident MB':>14}")
+
+    build(service, args, "bench_single", dim, 0, data)
+    recall, p50, p95 = run_queries(service, queries, truth, args.top_k)
+    print(f"{'single ' + str(dim):<22}{recall:>10.3f}{p50:>10.2f}{p95:>10.2f}"
+          f"{resident_bytes(points, dim, 0) / 2**20:>14.1f}")
+
+    for coarse in args.coarse:
+        build(service, args, f"bench_mrl_{coarse}", dim, coarse, data)
+        for oversampling in args.oversampling:
+            recall, p50, p95 = run_queries(service, queries, truth, args.top_k, oversampling)
+            label = f"{coarse}->{dim} x{oversampling:g}"
+            print(f"{label:<22}{recall:>10.3f}{p50:>10.2f}{p95:>10.2f}"
+                  f"{resident_bytes(points, dim, coarse) / 2**20:>14.1f}")
+
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
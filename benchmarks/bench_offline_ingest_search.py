@@ -0,0 +1,178 @@
+"""
+离线入库与检索基准测试
+使用 offline Embedding Provider + Qdrant 本地模式，在无网络、无 GPU 的 CI 机器上压测完整的索引和检索链路
+
+用法:
+    python benchmarks/bench_offline_ingest_search.py --images 500 --queries 200
+    python benchmarks/bench_offline_ingest_search.py --http      # 经由 FastAPI 路由（上传 + /search/text）
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERY_WORDS = ["海边", "日落", "红色", "跑车", "猫", "山", "雪", "城市", "夜景", "花", "森林", "咖啡"]
+
+
+def make_image(rng: np.random.Generator, size: int = 256) -> bytes:
+    """生成随机色块图片，同一色系的图片在离线向量空间中相近"""
+    base = rng.integers(0, 256, size=3)
+    pixels = np.clip(base + rng.normal(0, 25, size=(size, size, 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95
+
+
+def report(name: str, samples_ms, count: int, elapsed: float):
+    p50, p95 = percentiles(samples_ms)
+    print(f"{name:18}{count:>8}{count / elapsed:>12.1f}{p50:>10.2f}{p95:>10.2f}")
+
+
+def run_services(args, rng):
+    from app.config import get_settings
+    from app.services import (
+        get_storage_service, get_vector_db_service, get_embedding_service, get_search_service
+    )
+
+    settings = get_settings()
+    storage = get_storage_service()
+    storage.initialize(settings.STORAGE_PATH)
+    vector_db = get_vector_db_service()
+    vector_db.initialize(
+        mode="local",
+        path=settings.QDRANT_PATH,
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        vector_dimension=settings.VECTOR_DIMENSION,
+        coarse_dimension=settings.VECTOR_COARSE_DIMENSION,
+        coarse_oversampling=settings.VECTOR_COARSE_OVERSAMPLING,
+    )
+    get_embedding_service().initialize()
+    search = get_search_service()
+    search.initialize()
+
+    ids, ingest_ms = [], []
+    start = time.perf_counter()
+    for i in range(args.images):
+        content = make_image(rng)
+        t0 = time.perf_counter()
+        info = storage.save_image(content, f"bench_{i}.jpg")
+        search.index_image(
+            image_id=info["id"],
+            image_path=info["full_path"],
+            metadata={"filename": info["filename"], "file_path": info["file_path"],
+                      "created_at": info["created_at"], "tags": [], "description": ""},
+        )
+        ingest_ms.append((time.perf_counter() - t0) * 1000)
+        ids.append(info["id"])
+    ingest_elapsed = time.perf_counter() - start
+
+    text_ms = []
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        query = " ".join(rng.choice(QUERY_WORDS, size=2))
+        t0 = time.perf_counter()
+        search.search_by_text(query_text=query, top_k=args.top_k)
+        text_ms.append((time.perf_counter() - t0) * 1000)
+    text_elapsed = time.perf_counter() - start
+
+    image_ms = []
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        search.search_by_image_id(image_id=str(rng.choice(ids)), top_k=args.top_k)
+        image_ms.append((time.perf_counter() - t0) * 1000)
+    image_elapsed = time.perf_counter() - start
+
+    vector_db.close()
+    return (ingest_ms, ingest_elapsed), (text_ms, text_elapsed), (image_ms, image_elapsed)
+
+
+def run_http(args, rng):
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    with TestClient(create_app()) as client:
+        ids, ingest_ms = [], []
+        start = time.perf_counter()
+        for i in range(args.images):
+            content = make_image(rng)
+            t0 = time.perf_counter()
+            resp = client.post(
+                "/api/v1/storage/upload",
+                files={"file": (f"bench_{i}.jpg", content, "image/jpeg")},
+                data={"auto_index": "true", "async_index": "false"},
+            )
+            resp.raise_for_status()
+            ingest_ms.append((time.perf_counter() - t0) * 1000)
+            ids.append(resp.json()["data"]["id"])
+        ingest_elapsed = time.perf_counter() - start
+
+        text_ms = []
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            query = " ".join(rng.choice(QUERY_WORDS, size=2))
+            t0 = time.perf_counter()
+            client.get("/api/v1/search/text", params={"query": query, "top_k": args.top_k}).raise_for_status()
+            text_ms.append((time.perf_counter() - t0) * 1000)
+        text_elapsed = time.perf_counter() - start
+
+        image_ms = []
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            client.get(f"/api/v1/search/image/{rng.choice(ids)}", params={"top_k": args.top_k}).raise_for_status()
+            image_ms.append((time.perf_counter() - t0) * 1000)
+        image_elapsed = time.perf_counter() - start
+
+    return (ingest_ms, ingest_elapsed), (text_ms, text_elapsed), (image_ms, image_elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=300, help="入库图片数量")
+    parser.add_argument("--queries", type=int, default=100, help="每类查询次数")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dimension", type=int, default=2560)
+    parser.add_argument("--http", action="store_true", help="经由 FastAPI 路由执行")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "EMBEDDING_API_PROVIDER": "offline",
+        "QDRANT_MODE": "local",
+        "QDRANT_PATH": os.path.join(tmp.name, "qdrant"),
+        "STORAGE_PATH": os.path.join(tmp.name, "images"),
+        "POINTCLOUD_STORAGE_PATH": os.path.join(tmp.name, "pointclouds"),
+        "VECTOR_DIMENSION": str(args.dimension),
+        "AGENT_ENABLED": "false",
+    })
+
+    rng = np.random.default_rng(0)
+    ingest, text, image = run_http(args, rng) if args.http else run_services(args, rng)
+
+    print(f"mode: {'http' if args.http else 'service'}  dimension: {args.dimension}")
+    print(f"{'stage':18}{'count':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    report("ingest", ingest[0], args.images, ingest[1])
+    report("search text", text[0], args.queries, text[1])
+    report("search image_id", image[0], args.queries, image[1])
+
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Qdrant 传输方式基准（需要 Qdrant 服务端，同时开放 REST 和 gRPC 端口）
+对 REST、gRPC、gRPC + gzip 分别写入同一批合成向量并检索，比较：
+- upsert_batch 吞吐（点/秒）与客户端 CPU 时间（JSON / protobuf 编码开销）
+- 单条 search 延迟 p50/p95 与 QPS
+- get_batch（取回完整向量）吞吐
+
+高维向量（默认 2560 维）下 REST 需要把每个 float 编码为 JSON 文本，gRPC 直接传输二进制；
+gzip 对随机浮点数据压缩率低，主要在带宽受限的云服务上才值得开启。
+
+用法:
+    python benchmarks/bench_qdrant_transport.py --host localhost
+    python benchmarks/bench_qdrant_transport.py --host localhost --points 20000 --dim 2560 --batch 256
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService, ConnectionOptions
+from app.services.vector_utils import l2_normalize
+
+TRANSPORTS = {
+    "rest": lambda grpc_port: ConnectionOptions(),
+    "grpc": lambda grpc_port: ConnectionOptions(prefer_grpc=True, grpc_port=grpc_port),
+    "grpc-gzip": lambda grpc_port: ConnectionOptions(prefer_grpc=True, grpc_port=grpc_port, grpc_compression="gzip"),
+}
+
+
+def timed(fn):
+    """返回 (结果, 墙钟秒数, 客户端 CPU 秒数)"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def run(args, name: str, vectors: np.ndarray, queries: np.ndarray) -> dict:
+    VectorDBService._instance = None
+    service = VectorDBService()
+    service.initialize(mode="docker", host=args.host, port=args.port, collection_name=f"bench_transport_{name}",
+                       vector_dimension=args.dim, coarse_dimension=args.coarse,
+                       connection_options=TRANSPORTS[name](args.grpc_port))
+    service.recreate_collection()
+    try:
+        def upsert_all():
+            for start in range(0, len(vectors), args.batch):
+                service.upsert_batch([
+                    {"id": i, "vector": vectors[i], "metadata": {"tags": [f"t{i % 10}"]}}
+                    for i in range(start, min(start + args.batch, len(vectors)))
+                ])
+
+        _, upsert_wall, upsert_cpu = timed(upsert_all)
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            service.search(query, top_k=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        ids = list(range(min(len(vectors), 4096)))
+
+        def retrieve_all():
+            for start in range(0, len(ids), 64):
+                service.get_batch(ids[start:start + 64])
+
+        _, get_wall, get_cpu = timed(retrieve_all)
+
+        return {
+            "upsert_pts_s": len(vectors) / upsert_wall,
+            "upsert_cpu_s": upsert_cpu,
+            "search_p50": statistics.median(latencies),
+            "search_p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+            "search_qps": len(latencies) / (sum(latencies) / 1000),
+            "get_pts_s": len(ids) / get_wall,
+            "get_cpu_s": get_cpu,
+        }
+    finally:
+        service.delete_collection()
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--grpc-port", type=int, default=6334)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=2560)
+    parser.add_argument("--coarse", type=int, default=0, help="Matryoshka 前缀维度，0 表示单向量集合")
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--transports", nargs="+", default=list(TRANSPORTS), choices=list(TRANSPORTS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = l2_normalize(rng.standard_normal((args.points, args.dim)).astype(np.float32))
+    queries = l2_normalize(rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+
+    print(f"points={args.points}, dim={args.dim}, batch={args.batch}, queries={args.queries}, "
+          f"server={args.host}:{args.port}/{args.grpc_port}\n")
+    print(f"{'transport':<12}{'upsert pts/s':>14}{'upsert CPU s':>14}{'search p50':>12}{'p95 ms':>10}"
+          f"{'QPS':>9}{'get pts/s':>12}{'get CPU s':>11}")
+    for name in args.transports:
+        r = run(args, name, vectors, queries)
+        print(f"{name:<12}{r['upsert_pts_s']:>14.0f}{r['upsert_cpu_s']:>14.2f}{r['search_p50']:>12.2f}"
+              f"{r['search_p95']:>10.2f}{r['search_qps']:>9.0f}{r['get_pts_s']:>12.0f}{r['get_cpu_s']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
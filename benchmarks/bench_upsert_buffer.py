@@ -0,0 +1,87 @@
+"""
+向量写入缓冲基准测试
+模拟上传突发：多个线程各自逐条 upsert（对应后台索引任务），对比直接写入与写入缓冲的
+总吞吐、单次 upsert 延迟以及实际发出的批次数
+
+本地模式下写入是进程内操作，缓冲的收益主要体现在 Qdrant 服务端（--host），
+每次直接写入都需要一次网络往返和一次 wait=True 的段刷新。
+
+用法:
+    python benchmarks/bench_upsert_buffer.py
+    python benchmarks/bench_upsert_buffer.py --host localhost --port 6333 --points 5000 --threads 32
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_utils import l2_normalize
+
+
+def run(args, vectors: np.ndarray, buffer_size: int):
+    service = VectorDBService()
+    service.close()
+    name = f"bench_upsert_{buffer_size}"
+    common = dict(collection_name=name, vector_dimension=vectors.shape[1],
+                  upsert_buffer_size=buffer_size, upsert_buffer_delay=args.delay)
+    if args.host:
+        service.initialize(mode="docker", host=args.host, port=args.port, **common)
+        service.recreate_collection()
+    else:
+        service.initialize(mode="local", path=tempfile.mkdtemp(prefix="bench_upsert_"), **common)
+
+    # 本地模式的存储（sqlite）不支持多线程并发写入，直接写入时需串行；写入缓冲本身由单线程提交
+    lock = threading.Lock() if not args.host and buffer_size == 0 else contextlib.nullcontext()
+
+    def upsert(i: int) -> float:
+        start = time.perf_counter()
+        with lock:
+            service.upsert(i, vectors[i], {"filename": f"{i}.jpg", "tags": []})
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = sorted(pool.map(upsert, range(len(vectors))))
+    elapsed = time.perf_counter() - start
+
+    metrics = service.get_upsert_buffer_metrics()
+    service.close()
+    flushes = metrics["flushes"] if metrics else len(vectors)
+    return len(vectors) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], flushes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--buffer", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--host", type=str, help="Qdrant 服务端地址（默认本地模式）")
+    parser.add_argument("--port", type=int, default=6333)
+    args = parser.parse_args()
+
+    vectors = l2_normalize(np.random.default_rng(0).standard_normal((args.points, args.dim)).astype(np.float32))
+    print(f"points={args.points}, dim={args.dim}, threads={args.threads}, delay={args.delay}s, "
+          f"backend={'server ' + args.host if args.host else 'local'}\n")
+    print(f"{'mode':<14}{'points/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'requests':>10}")
+
+    for size in [0] + args.buffer:
+        throughput, p50, p95, flushes = run(args, vectors, size)
+        label = "direct" if size == 0 else f"buffer {size}"
+        print(f"{label:<14}{throughput:>10.0f}{p50:>10.2f}{p95:>10.2f}{flushes:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+向量表示基准测试
+对比 List[float]（旧实现）与 float32 NumPy 数组（现实现）在批量索引链路上的内存占用和 CPU 耗时
+
+测量内容：
+1. 解码 API 响应后持有一批 Embedding 结果的常驻内存（tracemalloc）及解码耗时
+2. 归一化 + 余弦相似度计算
+3. 写入 Qdrant（内存模式，包含 PointStruct 构造与序列化）
+
+用法:
+    python benchmarks/bench_vector_memory.py
+    python benchmarks/bench_vector_memory.py --batch 1024 --dim 2560
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams, PointStruct
+
+from app.services.vector_utils import as_float32_matrix, l2_normalize, cosine_similarity, to_list
+
+
+def api_responses(batch: int, dim: int, seed: int = 0) -> list:
+    """模拟 DashScope 返回的 JSON 响应体（每个向量一个）"""
+    rng = np.random.default_rng(seed)
+    return [json.dumps(vec) for vec in rng.standard_normal((batch, dim)).astype(np.float32).tolist()]
+
+
+def measure_time(fn, repeat: int = 3):
+    """返回 (结果, 最快一次耗时秒)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def measure_memory(fn):
+    """返回 (结果, 结果常驻字节)：计算结束后仍被引用的内存"""
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+# ==================== 旧实现：Python 列表 ====================
+
+def list_hold(responses):
+    return [json.loads(body) for body in responses]
+
+
+def list_normalize(vectors):
+    out = []
+    for vec in vectors:
+        norm = math.sqrt(sum(x * x for x in vec)) or 1e-12
+        out.append([x / norm for x in vec])
+    return out
+
+
+def list_cosine(query, vectors):
+    return [sum(a * b for a, b in zip(query, vec)) for vec in vectors]
+
+
+# ==================== 现实现：float32 数组 ====================
+
+def array_hold(responses):
+    return as_float32_matrix([np.asarray(json.loads(body), dtype=np.float32) for body in responses])
+
+
+def array_normalize(vectors):
+    return l2_normalize(vectors)
+
+
+def array_cosine(query, vectors):
+    return cosine_similarity(query, vectors)
+
+
+def upsert(client: QdrantClient, collection: str, vectors, convert):
+    points = [
+        PointStruct(id=i, vector=convert(vec), payload={"i": i})
+        for i, vec in enumerate(vectors)
+    ]
+    client.upsert(collection_name=collection, points=points, wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=512, help="批量大小")
+    parser.add_argument("--dim", type=int, default=2560, help="向量维度")
+    args = parser.parse_args()
+
+    responses = api_responses(args.batch, args.dim)
+
+    print(f"batch={args.batch}, dim={args.dim}\n")
+    print(f"{'阶段':<16}{'List[float]':>18}{'float32':>18}{'提升':>10}")
+
+    lists, m_list = measure_memory(lambda: list_hold(responses))
+    arrays, m_arr = measure_memory(lambda: array_hold(responses))
+    print(f"{'常驻内存':<13}{m_list / 2**20:>15.1f} MB{m_arr / 2**20:>15.1f} MB{m_list / max(m_arr, 1):>9.1f}x")
+
+    _, t_list = measure_time(lambda: list_hold(responses))
+    _, t_arr = measure_time(lambda: array_hold(responses))
+    print(f"{'解码响应':<13}{t_list * 1000:>15.1f} ms{t_arr * 1000:>15.1f} ms{t_list / max(t_arr, 1e-9):>9.1f}x")
+
+    normed_lists, t_list = measure_time(lambda: list_normalize(lists))
+    normed_arrays, t_arr = measure_time(lambda: array_normalize(arrays))
+    print(f"{'归一化':<14}{t_list * 1000:>15.1f} ms{t_arr * 1000:>15.1f} ms{t_list / max(t_arr, 1e-9):>9.1f}x")
+
+    _, t_list = measure_time(lambda: list_cosine(normed_lists[0], normed_lists))
+    _, t_arr = measure_time(lambda: array_cosine(normed_arrays[0], normed_arrays))
+    print(f"{'余弦相似度':<12}{t_list * 1000:>15.1f} ms{t_arr * 1000:>15.1f} ms{t_list / max(t_arr, 1e-9):>9.1f}x")
+
+    # 写入 Qdrant 时两者都要转成列表，这里确认边界转换不会带来额外开销
+    client = QdrantClient(":memory:")
+    for name in ("lists", "arrays"):
+        client.create_collection(name, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+    _, t_list = measure_time(lambda: upsert(client, "lists", normed_lists, list), repeat=1)
+    _, t_arr = measure_time(lambda: upsert(client, "arrays", normed_arrays, to_list), repeat=1)
+    print(f"{'Qdrant 写入':<13}{t_list * 1000:>15.1f} ms{t_arr * 1000:>15.1f} ms{t_list / max(t_arr, 1e-9):>9.1f}x")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
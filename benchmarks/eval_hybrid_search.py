@@ -0,0 +1,162 @@
+"""
+关键词 + 向量混合检索离线评估
+对比只用向量召回（lexical_weight=0）与不同关键词权重下 RRF 融合的 Recall@K、MRR 和检索延迟
+
+合成数据按主题生成向量和元数据（文件名、主题标签、含主题词和专有名词的描述），查询分三类：
+- semantic：主题词，查询向量接近主题中心，相关记录为该主题的所有图片
+- filename：某张图片的文件名（"IMG_2041"），文件名的 Embedding 几乎不含信息，查询向量为随机向量
+- keyword：描述中只出现一次的专有名词，查询向量只与目标图片弱相关
+真实效果用 --eval-set 在 .env 配置的集合上评估（集合需已启用关键词向量，见 VECTOR_LEXICAL_ENABLED）。
+
+用法:
+    python benchmarks/eval_hybrid_search.py
+    python benchmarks/eval_hybrid_search.py --points 5000 --weights 0 0.5 1 2 4
+    python benchmarks/eval_hybrid_search.py --eval-set queries.jsonl    # 每行 {"query": ..., "relevant": [ID, ...]}，可附 "vector"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_utils import l2_normalize
+
+TOPICS = [
+    "海边", "日落", "雪山", "猫咪", "小狗", "生日", "婚礼", "樱花", "夜景", "火锅",
+    "森林", "瀑布", "地铁", "咖啡", "书店", "烟花", "长城", "熊猫", "枫叶", "草原",
+]
+# 专有名词的用字（三个字随机组合，与主题词不重叠）
+NAME_CHARS = "嘉琪思远明轩梓涵若曦浩然雨桐子墨俊杰欣怡宇航诗"
+
+
+def synthesize(points: int, queries: int, dim: int, seed: int = 0):
+    """生成记录（向量 + 元数据）和三类查询 (类型, 文本, 查询向量, 相关ID集合)"""
+    rng = np.random.default_rng(seed)
+    centroids = l2_normalize(rng.standard_normal((len(TOPICS), dim)).astype(np.float32))
+    topics = rng.integers(0, len(TOPICS), points)
+    vectors = l2_normalize(centroids[topics] + 1.5 * l2_normalize(rng.standard_normal((points, dim)).astype(np.float32)))
+
+    names, records = set(), []
+    for i in range(points):
+        while True:
+            name = "".join(rng.choice(list(NAME_CHARS), size=3))
+            if name not in names:
+                names.add(name)
+                break
+        topic = TOPICS[topics[i]]
+        other = TOPICS[rng.integers(0, len(TOPICS))]
+        records.append({
+            "id": i,
+            "vector": vectors[i],
+            "metadata": {
+                "filename": f"IMG_{1000 + i}.JPG",
+                "tags": [topic],
+                "description": f"{name}在{topic}，远处是{other}",
+            }
+        })
+
+    def noisy(vector, scale):
+        return l2_normalize(vector + scale * l2_normalize(rng.standard_normal(dim).astype(np.float32)))
+
+    cases = []
+    for t in rng.integers(0, len(TOPICS), queries):
+        cases.append(("semantic", TOPICS[t], noisy(centroids[t], 1.0), set(np.flatnonzero(topics == t).tolist())))
+    for i in rng.choice(points, size=queries, replace=False):
+        record = records[i]
+        cases.append(("filename", record["metadata"]["filename"].rsplit(".", 1)[0],
+                      l2_normalize(rng.standard_normal(dim).astype(np.float32)), {int(i)}))
+    for i in rng.choice(points, size=queries, replace=False):
+        record = records[i]
+        cases.append(("keyword", record["metadata"]["description"][:3], noisy(vectors[i], 3.0), {int(i)}))
+    return records, cases
+
+
+def load_eval_set(path: str):
+    """读取真实评估集，缺少查询向量时用 Embedding 服务生成"""
+    cases, missing = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            cases.append([item.get("type", "eval"), item["query"], item.get("vector"), set(item["relevant"])])
+            if item.get("vector") is None:
+                missing.append(cases[-1])
+    if missing:
+        from app.config import get_settings
+        from app.services.embedding_service import get_embedding_service
+        embedding = get_embedding_service()
+        embedding.initialize(model_path=get_settings().MODEL_PATH)
+        for case in missing:
+            case[2] = embedding.generate_text_embedding(text=case[1], instruction="Represent this text for retrieval.")
+    return [tuple(case) for case in cases]
+
+
+def evaluate(service: VectorDBService, cases, k: int, weight: float):
+    """按查询类型统计 Recall@K（相关记录多于 K 时以 K 为分母）、MRR 和检索延迟"""
+    stats = defaultdict(lambda: {"recall": [], "rr": [], "ms": []})
+    for kind, text, vector, relevant in cases:
+        start = time.perf_counter()
+        results = service.search(vector, top_k=k, fuse_text=True, query_text=text, lexical_weight=weight)
+        elapsed = (time.perf_counter() - start) * 1000
+        ids = [r["id"] for r in results]
+        hits = [rank for rank, id in enumerate(ids, 1) if id in relevant]
+        for key in (kind, "all"):
+            stats[key]["recall"].append(len(hits) / min(k, len(relevant)))
+            stats[key]["rr"].append(1.0 / hits[0] if hits else 0.0)
+            stats[key]["ms"].append(elapsed)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100, help="每类查询的数量")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--weights", type=float, nargs="+", default=[0, 0.5, 1, 2, 4],
+                        help="关键词一路的 RRF 权重，0 表示只用向量召回")
+    parser.add_argument("--eval-set", type=str, help="真实评估集 JSONL，在 .env 配置的集合上评估")
+    args = parser.parse_args()
+
+    if args.eval_set:
+        from app.cli import init_vector_db
+        service = init_vector_db()
+        if not service.has_lexical:
+            print("集合没有关键词向量（需启用 VECTOR_LEXICAL_ENABLED 并迁移 / 回填）")
+            service.close()
+            return
+        cases = load_eval_set(args.eval_set)
+        print(f"collection={service.collection_name}, queries={len(cases)}, top_k={args.top_k}\n")
+    else:
+        records, cases = synthesize(args.points, args.queries, args.dim)
+        service = VectorDBService()
+        service.initialize(mode="local", path=tempfile.mkdtemp(prefix="bench_hybrid_"), collection_name="bench_hybrid",
+                           vector_dimension=args.dim, lexical=True)
+        for start in range(0, len(records), 256):
+            service.upsert_batch(records[start:start + 256])
+        print(f"points={len(records)}, dim={args.dim}, queries={len(cases)}, top_k={args.top_k}, backend=local\n")
+
+    print(f"{'weight':<8}{'type':<10}{'recall@k':>10}{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for weight in args.weights:
+        stats = evaluate(service, cases, args.top_k, weight)
+        for kind, values in sorted(stats.items(), key=lambda item: item[0] == "all"):
+            latencies = sorted(values["ms"])
+            print(f"{weight:<8g}{kind:<10}{statistics.mean(values['recall']):>10.3f}{statistics.mean(values['rr']):>8.3f}"
+                  f"{statistics.median(latencies):>10.2f}{latencies[max(0, int(len(latencies) * 0.95) - 1)]:>10.2f}")
+        print()
+
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import AsyncQdrantClient
+
+from app.services.async_vector_db_service import AsyncVectorDBService
+from app.services.search_service import SearchService
+from app.services.vector_db_service import VectorDBService
+
+
+class _AsyncVectorDBTestCase(unittest.TestCase):
+    coarse_dimension = 0
+    lexical = False
+
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+
+        VectorDBService._instance = None
+        self.vector_db = VectorDBService()
+        self.vector_db.initialize(mode="local", path=path, collection_name="test", vector_dimension=32,
+                                  coarse_dimension=self.coarse_dimension, lexical=self.lexical)
+        self.addCleanup(self.vector_db.close)
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+
+        AsyncVectorDBService._instance = None
+        self.addCleanup(setattr, AsyncVectorDBService, "_instance", None)
+        self.service = AsyncVectorDBService()
+        self.service.initialize(self.vector_db)
+
+        self.vectors = np.random.default_rng(0).standard_normal((20, 32)).astype(np.float32)
+        self.records = [
+            {"id": i, "vector": vec, "metadata": {"tags": ["even" if i % 2 == 0 else "odd"]}}
+            for i, vec in enumerate(self.vectors)
+        ]
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+
+class TestAsyncVectorDBServiceLocal(_AsyncVectorDBTestCase):
+    """本地模式：在线程池中调用同步服务"""
+
+    def test_methods_match_sync_service(self):
+        self.assertFalse(self.service.is_native)
+
+        async def scenario():
+            self.assertTrue(await self.service.upsert_batch(self.records))
+            self.assertTrue(await self.service.upsert(20, self.vectors[0], {"tags": ["even"]}))
+            self.assertTrue(await self.service.update_metadata(3, {"tags": ["even"]}))
+            self.assertTrue(await self.service.delete(5))
+            return (
+                await self.service.search(self.vectors[7], top_k=3),
+                await self.service.search_batch([{"query_vector": self.vectors[2], "top_k": 2, "filter_tags": ["odd"]}]),
+                await self.service.count(),
+                await self.service.count(filter_tags=["even"], exact=True),
+                await self.service.get(3),
+                await self.service.get(5),
+                await self.service.scroll(limit=100, filter_tags=["odd"])
+            )
+
+        results, grouped, total, even, record, deleted, (odd, _) = self.run_async(scenario())
+        self.assertEqual(results[0]["id"], 7)
+        self.assertEqual(results, self.vector_db.search(self.vectors[7], top_k=3))
+        self.assertTrue(all(r["id"] % 2 == 1 for r in grouped[0]))
+        self.assertEqual((total, even), (20, 12))
+        self.assertEqual(record["metadata"]["tags"], ["even"])
+        self.assertEqual(len(record["vector"]), 32)
+        self.assertIsNone(deleted)
+        self.assertEqual(sorted(r["id"] for r in odd), [1, 7, 9, 11, 13, 15, 17, 19])
+
+    def test_requires_initialized_sync_service(self):
+        self.vector_db.close()
+        self.assertFalse(self.service.is_initialized)
+        with self.assertRaises(RuntimeError):
+            self.run_async(self.service.count())
+
+
+class TestAsyncVectorDBServiceNative(_AsyncVectorDBTestCase):
+    """AsyncQdrantClient 路径（内存模式客户端，请求由同步服务构建）"""
+    coarse_dimension = 8
+
+    def setUp(self):
+        super().setUp()
+        client = AsyncQdrantClient(location=":memory:")
+        self.run_async(client.create_collection("test", vectors_config=self.vector_db._vectors_config()))
+        self.service._client = client
+        self.vector_db.upsert_batch(self.records)
+
+    def test_native_requests_match_sync_service(self):
+        self.assertTrue(self.service.is_native)
+
+        async def scenario():
+            self.assertTrue(await self.service.upsert_batch(self.records))
+            single = await self.service.search(self.vectors[7], top_k=3, oversampling=8)
+            grouped = await self.service.search_batch([
+                {"query_vector": self.vectors[2], "top_k": 4, "filter_tags": ["odd"], "oversampling": 8},
+                {"query_vector": self.vectors[9], "top_k": 3, "exclude_ids": [9], "oversampling": 8},
+            ])
+            self.assertTrue(await self.service.update_metadata(4, {"tags": ["beach"]}))
+            self.assertTrue(await self.service.delete_batch([6, 8]))
+            page, _ = await self.service.scroll(limit=100, filter_tags=["even"])
+            return (
+                single, grouped, page,
+                await self.service.count(exact=True),
+                await self.service.get(4),
+                await self.service.retrieve([6, 10])
+            )
+
+        single, grouped, page, total, record, retrieved = self.run_async(scenario())
+        sync = self.vector_db
+        self.assertEqual([r["id"] for r in single], [r["id"] for r in sync.search(self.vectors[7], top_k=3, oversampling=8)])
+        for result, query in zip(grouped, [
+            {"query_vector": self.vectors[2], "top_k": 4, "filter_tags": ["odd"], "oversampling": 8},
+            {"query_vector": self.vectors[9], "top_k": 3, "exclude_ids": [9], "oversampling": 8},
+        ]):
+            self.assertEqual([r["id"] for r in result], [r["id"] for r in sync.search(**query)])
+        self.assertEqual(sorted(r["id"] for r in page), [0, 2, 10, 12, 14, 16, 18])
+        self.assertEqual(total, 18)
+        self.assertEqual(record["metadata"]["tags"], ["beach"])
+        self.assertEqual(len(record["vector"]), 32)
+        self.assertEqual([r["id"] for r in retrieved], [10])
+
+
+    def test_failed_lookup_is_handled_by_write_steps(self):
+        # 读取原有标签失败时由写入步骤处理（统计缓存标记过期），写入照常进行
+        async def scenario():
+            with patch.object(self.service._client, "retrieve", side_effect=RuntimeError("timeout")):
+                self.assertTrue(await self.service.upsert_batch(self.records[:3]))
+            return await self.service.count(exact=True)
+
+        self.assertEqual(self.run_async(scenario()), 3)
+
+
+class TestAsyncLexicalNative(_AsyncVectorDBTestCase):
+    """AsyncQdrantClient 路径下的关键词向量写入、更新和融合检索"""
+    lexical = True
+
+    def setUp(self):
+        super().setUp()
+        client = AsyncQdrantClient(location=":memory:")
+        self.run_async(client.create_collection("test", vectors_config=self.vector_db._vectors_config(),
+                                                sparse_vectors_config=self.vector_db._sparse_vectors_config()))
+        self.service._client = client
+        for i, record in enumerate(self.records):
+            record["metadata"]["filename"] = f"DSC{i:04d}.jpg"
+
+    def test_lexical_write_update_and_search(self):
+        query = -self.vectors[5]
+
+        async def scenario():
+            await self.service.upsert_batch(self.records)
+            dense = await self.service.search(query, top_k=5, query_text="雪山")
+            await self.service.update_metadata(5, {"description": "雪山"})
+            return dense, await self.service.search(query, top_k=5, query_text="雪山"), \
+                await self.service.search(query, top_k=5, query_text="DSC0005")
+
+        dense, hybrid, by_filename = self.run_async(scenario())
+        self.assertNotIn(5, [r["id"] for r in dense])
+        self.assertEqual(hybrid[0]["id"], 5)
+        self.assertEqual(by_filename[0]["id"], 5)
+
+
+class TestSearchServiceAsyncPath(_AsyncVectorDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.vector_db.upsert_batch(self.records)
+        self.embedding = MagicMock(is_initialized=True)
+        self.embedding.generate_text_embedding.return_value = self.vectors[4]
+        self.embedding.generate_image_embedding.return_value = self.vectors[11]
+        SearchService._instance = None
+        self.addCleanup(setattr, SearchService, "_instance", None)
+        self.search = SearchService()
+        self.search.initialize(embedding_service=self.embedding, vector_db_service=self.vector_db,
+                               storage_service=MagicMock(), async_vector_db_service=self.service)
+
+    def test_text_search_index_and_remove(self):
+        async def scenario():
+            results = await self.search.search_by_text_async("海边", top_k=3, filter_tags=["even"])
+            indexed = await self.search.index_image_async(image_id=30, image_path="/tmp/a.jpg", metadata={"tags": []})
+            removed = await self.search.remove_from_index_async(2)
+            return results, indexed, removed
+
+        results, indexed, removed = self.run_async(scenario())
+        self.assertEqual(results[0]["id"], 4)
+        self.assertEqual(results[0]["preview_url"], "/api/v1/storage/images/4")
+        self.assertTrue(indexed and removed)
+        self.assertEqual(self.vector_db.get(30)["metadata"]["tags"], [])
+        self.assertIsNone(self.vector_db.get(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
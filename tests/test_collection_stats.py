@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import threading
+import unittest
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.collection_stats import CollectionStats, StatsSnapshot
+
+
+class SlowLoader:
+    def __init__(self):
+        self.calls = 0
+        self.points = 10
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(2)
+        return StatsSnapshot(info={"points_count": self.points}, points_count=self.points,
+                             tag_counts={"cat": 3}, tags_complete=True)
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestCollectionStats(unittest.TestCase):
+    def test_cached_within_ttl_and_deltas(self):
+        loader = SlowLoader()
+        stats = CollectionStats(loader, ttl=60)
+        self.addCleanup(stats.close)
+
+        self.assertEqual(stats.get().points_count, 10)
+        stats.get()
+        self.assertEqual(loader.calls, 1)
+
+        stats.apply_delta(2, Counter({"cat": -1, "dog": 2}))
+        snapshot = stats.get()
+        self.assertEqual((snapshot.points_count, snapshot.info["points_count"]), (12, 12))
+        self.assertEqual((stats.tag_count("cat"), stats.tag_count("dog"), stats.tag_count("bird")), (2, 2, 0))
+        stats.apply_delta(-2, Counter({"dog": -2}))
+        self.assertEqual(stats.get().tag_counts, {"cat": 2})
+        self.assertEqual(loader.calls, 1)
+
+    def test_invalidate_serves_stale_and_refreshes_once(self):
+        loader = SlowLoader()
+        stats = CollectionStats(loader, ttl=60)
+        self.addCleanup(stats.close)
+        stats.get()
+
+        loader.points = 500
+        loader.release.clear()
+        stats.invalidate()
+        self.assertEqual([stats.get().points_count for _ in range(5)], [10] * 5)
+        loader.release.set()
+        self.assertTrue(wait_until(lambda: stats.get().points_count == 500))
+        self.assertEqual(loader.calls, 2)
+
+    def test_write_during_refresh_keeps_cache_stale(self):
+        loader = SlowLoader()
+        stats = CollectionStats(loader, ttl=60)
+        self.addCleanup(stats.close)
+        stats.get()
+
+        loader.release.clear()
+        stats.invalidate()
+        stats.get()
+        stats.apply_delta(1, Counter())
+        loader.release.set()
+        self.assertTrue(wait_until(lambda: loader.calls == 2 and not stats._refreshing))
+        stats.get()
+        self.assertTrue(wait_until(lambda: loader.calls == 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding_service import get_embedding_service
+from app.services.executors import shutdown_executors
+from app.routers import embedding as embedding_router
+
+
+class FakeBatch:
+    """按输入文本生成向量；文本为 slow 的批次延迟返回，为 bad 的批次抛出异常"""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs, normalize=True):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            texts = [inp["text"] for inp in inputs]
+            if "slow" in texts:
+                time.sleep(0.2)
+            else:
+                time.sleep(0.02)
+            if "bad" in texts:
+                raise RuntimeError("upstream failed")
+            return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestEmbeddingStream(unittest.TestCase):
+    def setUp(self):
+        self.service = get_embedding_service()
+        self.fake = FakeBatch()
+        patcher = patch.object(self.service, "generate_embeddings_batch", side_effect=self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutdown_executors)
+
+    def collect(self, inputs, **kwargs):
+        async def run():
+            return [item async for item in self.service.iter_embeddings_async(inputs, **kwargs)]
+        return asyncio.run(run())
+
+    def test_yields_every_batch_in_completion_order(self):
+        inputs = [{"text": "slow"}] + [{"text": f"t{i}"} for i in range(7)]
+        batches = self.collect(inputs, batch_size=2, concurrency=4)
+
+        self.assertEqual(batches[-1][0], range(0, 2))
+        indices = sorted(i for r, _ in batches for i in r)
+        self.assertEqual(indices, list(range(8)))
+        self.assertLessEqual(self.fake.peak, 4)
+
+    def test_failed_batch_is_reported_without_stopping(self):
+        inputs = [{"text": "a"}, {"text": "bad"}, {"text": "c"}]
+        results = {r.start: res for r, res in self.collect(inputs, batch_size=1, concurrency=2)}
+
+        self.assertIsInstance(results[1], RuntimeError)
+        np.testing.assert_array_equal(results[2], [[1.0, 1.0]])
+
+    def test_closing_early_stops_submitting(self):
+        inputs = [{"text": f"t{i}"} for i in range(40)]
+
+        async def run():
+            batches = self.service.iter_embeddings_async(inputs, batch_size=2, concurrency=2)
+            first = await batches.__anext__()
+            await batches.aclose()
+            return first
+
+        asyncio.run(run())
+        shutdown_executors()
+        self.assertLessEqual(self.fake.calls, 3)
+
+    def test_route_streams_ndjson(self):
+        app = FastAPI()
+        app.include_router(embedding_router.router)
+        app.dependency_overrides[embedding_router.get_services] = lambda: (self.service, MagicMock())
+
+        body = {"inputs": [{"text": "slow"}, {"text": "bad"}, {"text": "abc"}]}
+        with patch.object(embedding_router, "get_settings") as settings:
+            settings.return_value.EMBEDDING_STREAM_BATCH_SIZE = 1
+            settings.return_value.EMBEDDING_STREAM_CONCURRENCY = 3
+            response = TestClient(app).post("/embedding/generate/stream", json=body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        lines = {row["index"]: row for row in map(json.loads, response.text.splitlines())}
+        self.assertEqual(lines[0]["embedding"], [4.0, 1.0])
+        self.assertEqual(lines[2]["dimension"], 2)
+        self.assertIn("error", lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
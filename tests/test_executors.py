@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import asyncio
+import unittest
+import contextvars
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.executors import (
+    EMBEDDING_POOL,
+    VECTOR_DB_POOL,
+    get_executor,
+    run_in_executor,
+    shutdown_executors,
+)
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class TestExecutors(unittest.TestCase):
+    def tearDown(self):
+        shutdown_executors()
+
+    def test_blocking_calls_overlap_and_keep_loop_responsive(self):
+        async def scenario():
+            ticks = 0
+
+            async def heartbeat():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            beat = asyncio.create_task(heartbeat())
+            start = time.perf_counter()
+            await asyncio.gather(*(run_in_executor(EMBEDDING_POOL, time.sleep, 0.2) for _ in range(4)))
+            elapsed = time.perf_counter() - start
+            beat.cancel()
+            return elapsed, ticks
+
+        elapsed, ticks = asyncio.run(scenario())
+        self.assertLess(elapsed, 0.6)
+        self.assertGreater(ticks, 5)
+
+    def test_context_and_kwargs_propagate(self):
+        def work(a, b=0):
+            return request_id.get(), a + b
+
+        async def scenario():
+            request_id.set("req-1")
+            return await run_in_executor(VECTOR_DB_POOL, work, 1, b=2)
+
+        self.assertEqual(asyncio.run(scenario()), ("req-1", 3))
+
+    def test_exceptions_propagate(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run_in_executor(EMBEDDING_POOL, fail))
+
+    def test_pools_are_separate_and_reused(self):
+        self.assertIs(get_executor(EMBEDDING_POOL), get_executor(EMBEDDING_POOL))
+        self.assertIsNot(get_executor(EMBEDDING_POOL), get_executor(VECTOR_DB_POOL))
+        with self.assertRaises(ValueError):
+            get_executor("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import io
+import sys
+import asyncio
+import unittest
+
+import httpx
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_fetch_service import (
+    ImageFetchService,
+    ImageFetchError,
+    ImageTooLargeError,
+    sniff_image_type,
+)
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestImageFetchService(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.png = png_bytes()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            await asyncio.sleep(0.02)
+            path = request.url.path
+            if path == "/cat.png":
+                if request.headers.get("If-None-Match") == '"v1"':
+                    return httpx.Response(304)
+                return httpx.Response(200, content=self.png, headers={"ETag": '"v1"'})
+            if path == "/page.html":
+                return httpx.Response(200, content=b"<html>not an image</html>")
+            if path == "/huge.jpg":
+                # 无 Content-Length 的分块响应，只能在读取中途中止
+                async def body():
+                    yield b"\xff\xd8\xff" + b"\0" * 1021
+                    for _ in range(100):
+                        yield b"\0" * 1024
+                return httpx.Response(200, content=body())
+            return httpx.Response(404)
+
+        ImageFetchService._instance = None
+        self.service = ImageFetchService()
+        self.service._transport = httpx.MockTransport(handler)
+        self.service._max_bytes = 16 * 1024
+        self.addCleanup(setattr, ImageFetchService, "_instance", None)
+
+    def run_async(self, coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                await self.service.close()
+        return asyncio.run(wrapper())
+
+    def test_sniff(self):
+        self.assertEqual(sniff_image_type(self.png[:12]), ("image/png", ".png"))
+        self.assertEqual(sniff_image_type(b"RIFF\0\0\0\0WEBPVP8 "), ("image/webp", ".webp"))
+        self.assertIsNone(sniff_image_type(b"<html></html>"))
+
+    def test_concurrent_calls_share_one_download_and_hit_cache(self):
+        async def scenario():
+            url = "http://img.test/cat.png"
+            first = await asyncio.gather(*(self.service.fetch(url) for _ in range(5)))
+            again = await self.service.fetch(url)
+            return first, again
+
+        first, again = self.run_async(scenario())
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(all(image.content == self.png for image in first))
+        self.assertEqual(again.content_type, "image/png")
+        stats = self.service.get_stats()
+        self.assertEqual((stats["deduplicated"], stats["hits"]), (4, 1))
+
+    def test_expired_entry_is_revalidated_with_etag(self):
+        async def scenario():
+            url = "http://img.test/cat.png"
+            await self.service.fetch(url)
+            self.service._cache[url].expires_at = 0
+            return await self.service.fetch(url)
+
+        image = self.run_async(scenario())
+        self.assertEqual(image.content, self.png)
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.service.get_stats()["revalidated"], 1)
+
+    def test_rejects_oversized_and_non_image(self):
+        with self.assertRaises(ImageTooLargeError):
+            self.run_async(self.service.fetch("http://img.test/huge.jpg"))
+        with self.assertRaises(ImageFetchError):
+            self.run_async(self.service.fetch("http://img.test/page.html"))
+        with self.assertRaises(ImageFetchError):
+            self.run_async(self.service.fetch("file:///etc/passwd"))
+        self.assertEqual(self.service.get_stats()["cached_urls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
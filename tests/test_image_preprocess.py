@@ -0,0 +1,68 @@
+import io
+import os
+import sys
+import base64
+import tempfile
+import unittest
+
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_preprocess import smart_resize, preprocess_image, preprocess_image_file
+
+MIN_PIXELS = 4 * 32 * 32
+MAX_PIXELS = 1800 * 32 * 32
+
+
+def _decode(data_uri: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(data_uri.split(",", 1)[1])))
+
+
+class TestImagePreprocess(unittest.TestCase):
+    def test_smart_resize_respects_budget(self):
+        h, w = smart_resize(3024, 4032, MIN_PIXELS, MAX_PIXELS)
+        self.assertLessEqual(h * w, MAX_PIXELS)
+        self.assertEqual(h % 32, 0)
+        self.assertEqual(w % 32, 0)
+        self.assertAlmostEqual(w / h, 4032 / 3024, delta=0.05)
+
+    def test_large_image_downscaled(self):
+        image = Image.new("RGB", (4032, 3024), (200, 120, 40))
+        result = preprocess_image(image, MIN_PIXELS, MAX_PIXELS, quality=85)
+        self.assertTrue(result["resized"])
+        self.assertLessEqual(result["width"] * result["height"], MAX_PIXELS)
+        decoded = _decode(result["data_uri"])
+        self.assertEqual(decoded.format, "JPEG")
+        self.assertEqual(decoded.size, (result["width"], result["height"]))
+
+    def test_exif_orientation_applied(self):
+        image = Image.new("RGB", (640, 320), (10, 20, 30))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rotated.jpg")
+            image.save(path, format="JPEG", exif=exif)
+            result = preprocess_image_file(path, MIN_PIXELS, MAX_PIXELS, quality=85)
+        self.assertEqual((result["width"], result["height"]), (320, 640))
+
+    def test_small_image_passthrough(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), (0, 128, 255)).save(buffer, format="PNG")
+        content = buffer.getvalue()
+        with Image.open(io.BytesIO(content)) as image:
+            result = preprocess_image(image, MIN_PIXELS, MAX_PIXELS, quality=85, original_bytes=content)
+        self.assertFalse(result["resized"])
+        self.assertTrue(result["data_uri"].startswith("data:image/png;base64,"))
+        self.assertEqual(result["encoded_bytes"], len(content))
+
+    def test_rgba_converted_to_rgb(self):
+        image = Image.new("RGBA", (2000, 2000), (255, 0, 0, 0))
+        result = preprocess_image(image, MIN_PIXELS, MAX_PIXELS, quality=85)
+        decoded = _decode(result["data_uri"])
+        self.assertEqual(decoded.mode, "RGB")
+        self.assertEqual(decoded.getpixel((0, 0)), (255, 255, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lexical import BM25_K1, lexical_query, lexical_tokens, lexical_vector, token_index, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    def test_cjk_unigrams_and_bigrams(self):
+        self.assertEqual(tokenize("海边日落"), ["海", "边", "日", "落", "海边", "边日", "日落"])
+        self.assertEqual(tokenize("猫"), ["猫"])
+
+    def test_words_and_compounds(self):
+        self.assertEqual(tokenize("IMG_2041 ＡＢＣ, 2023年"), ["img_2041", "img", "2041", "abc", "2023", "年"])
+        self.assertEqual(tokenize("!!"), [])
+        self.assertEqual(tokenize(None), [])
+
+    def test_payload_tokens(self):
+        tokens = lexical_tokens({"filename": "IMG_2041.JPG", "tags": ["猫"], "description": "小猫", "other": "x"})
+        self.assertEqual(tokens, ["img_2041", "img", "2041", "猫", "小", "猫", "小猫"])
+
+
+class TestLexicalVector(unittest.TestCase):
+    def test_bm25_term_frequency(self):
+        vector = lexical_vector({"tags": ["猫"], "description": "小猫"})
+        weights = dict(zip(vector.indices, vector.values))
+        self.assertEqual(vector.indices, sorted(vector.indices))
+        # 重复词元的权重更高，但饱和于 k1 + 1
+        self.assertGreater(weights[token_index("猫")], weights[token_index("小")])
+        self.assertLess(weights[token_index("猫")], BM25_K1 + 1)
+        self.assertEqual(lexical_vector({}).indices, [])
+
+    def test_query(self):
+        query = lexical_query("猫 猫")
+        self.assertEqual(dict(zip(query.indices, query.values)), {token_index("猫"): 2.0})
+        self.assertIsNone(lexical_query("..."))
+
+
+if __name__ == "__main__":
+    unittest.main()
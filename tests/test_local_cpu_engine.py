@@ -0,0 +1,110 @@
+import os
+import sys
+import types
+import zlib
+import copy
+import importlib.util
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import get_settings
+from app.services.embedding_service import EmbeddingService, _use_cpu_engine
+from app.services.local_cpu_engine import CPUEmbeddingEngine, quantize_linear_int8
+
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+# int8 动态量化后每条向量与 fp32 向量的最低余弦相似度
+MIN_INT8_COSINE = 0.98
+
+
+def fake_torch(cuda: bool) -> MagicMock:
+    torch = MagicMock()
+    torch.cuda.is_available.return_value = cuda
+    return torch
+
+
+class TestDeviceSelection(unittest.TestCase):
+    def test_explicit_device(self):
+        self.assertTrue(_use_cpu_engine("cpu"))
+        self.assertTrue(_use_cpu_engine("cpu:0"))
+        self.assertFalse(_use_cpu_engine("cuda:0"))
+        self.assertFalse(_use_cpu_engine("0"))
+
+    def test_default_device_follows_cuda(self):
+        with patch.dict(sys.modules, {"torch": fake_torch(cuda=True)}):
+            self.assertFalse(_use_cpu_engine(None))
+        with patch.dict(sys.modules, {"torch": fake_torch(cuda=False)}):
+            self.assertTrue(_use_cpu_engine(None))
+
+    def test_gpu_host_without_device_uses_cuda_device(self):
+        # CLI 调用 initialize(model_path=...) 时不传设备，应回退到 CUDA_DEVICE 而不是 CPU 引擎
+        embedder = MagicMock()
+        module = types.SimpleNamespace(Qwen3VLEmbedder=embedder)
+        service = EmbeddingService()
+        self.addCleanup(setattr, service, "_embedder", service._embedder)
+        with patch.dict(sys.modules, {"torch": fake_torch(cuda=True), "qwen3_vl_embedding": module}), \
+                patch.object(CPUEmbeddingEngine, "load") as load:
+            service._initialize_local(model_path="/models/x")
+        load.assert_not_called()
+        embedder.assert_called_once_with(model_path="/models/x", device=get_settings().CUDA_DEVICE)
+
+
+class FakeEmbedder:
+    """按文本生成固定特征，经小型 MLP 得到向量（与 Qwen3VLEmbedder 的 process / model 接口一致）"""
+
+    def __init__(self, dim: int = 64):
+        import torch
+
+        torch.manual_seed(0)
+        self.model = torch.nn.Sequential(
+            torch.nn.Linear(dim, 256), torch.nn.GELU(), torch.nn.Linear(256, dim)
+        ).eval()
+        self.model.config = types.SimpleNamespace(hidden_size=dim)
+        self.dim = dim
+        self.calls = []
+
+    def process(self, inputs, normalize=True):
+        import torch
+
+        self.calls.append(len(inputs))
+        features = np.stack([
+            np.random.default_rng(zlib.crc32(item["text"].encode("utf-8"))).standard_normal(self.dim)
+            for item in inputs
+        ]).astype(np.float32)
+        output = self.model(torch.from_numpy(features))
+        return torch.nn.functional.normalize(output, dim=-1) if normalize else output
+
+
+@unittest.skipUnless(TORCH_AVAILABLE, "需要 torch")
+class TestCPUEmbeddingEngine(unittest.TestCase):
+    def setUp(self):
+        self.inputs = [{"text": f"photo {i}"} for i in range(20)]
+
+    def test_micro_batches_fill_a_fresh_matrix(self):
+        embedder = FakeEmbedder()
+        engine = CPUEmbeddingEngine(embedder, max_batch=8)
+        first = engine.process(self.inputs)
+        self.assertEqual(first.shape, (20, 64))
+        self.assertEqual(first.dtype, np.float32)
+        self.assertEqual(embedder.calls, [8, 8, 4])
+        # 每次调用返回独立的矩阵，后续调用不会改写之前的结果
+        kept = first.copy()
+        engine.process(self.inputs[:3])
+        np.testing.assert_array_equal(first, kept)
+
+    def test_int8_agrees_with_fp32(self):
+        embedder = FakeEmbedder()
+        quantized = copy.deepcopy(embedder)
+        quantize_linear_int8(quantized.model)
+
+        expected = CPUEmbeddingEngine(embedder).process(self.inputs)
+        actual = CPUEmbeddingEngine(quantized, quantized=True).process(self.inputs)
+        cosine = np.sum(expected * actual, axis=1)
+        self.assertGreaterEqual(cosine.min(), MIN_INT8_COSINE)
+
+
+if __name__ == "__main__":
+    unittest.main()
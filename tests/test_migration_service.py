@@ -0,0 +1,251 @@
+import os
+import sys
+import time
+import zlib
+import shutil
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routers import vector_db as vector_db_router
+from app.services import migration_service
+from app.services.migration_service import MigrationService, MigrationState
+from app.services.storage_service import StorageService
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_utils import l2_normalize
+
+
+class TestMigrationService(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        self.state_path = os.path.join(self.path, "migrations", "state.json")
+
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        self.vector_db = VectorDBService()
+        self.vector_db.initialize(mode="local", path=os.path.join(self.path, "qdrant"), collection_name="test",
+                                  vector_dimension=16)
+        self.addCleanup(self.vector_db.close)
+
+        StorageService._instance = None
+        self.addCleanup(setattr, StorageService, "_instance", None)
+        self.storage = StorageService()
+        self.storage.initialize(os.path.join(self.path, "images"))
+
+        # 按图片ID返回固定向量，重建后的向量与原集合相同
+        self.table = {}
+        self.rng = np.random.default_rng(0)
+        self.embedding = MagicMock(vector_dimension=16)
+        self.embedding.generate_embeddings_batch.side_effect = self.embed
+        self.ids = [self.add_image() for _ in range(10)]
+        # 不在图片存储中的外部向量无法重建
+        self.vector_db.upsert_batch([{"id": 100, "vector": self.rng.standard_normal(16), "metadata": {}}])
+
+        self.migration = self.create_migration()
+
+    def create_migration(self) -> MigrationService:
+        MigrationService._instance = None
+        self.addCleanup(setattr, MigrationService, "_instance", None)
+        migration = MigrationService()
+        migration.initialize(self.vector_db, self.storage, self.embedding, self.state_path,
+                             batch_size=2, concurrency=2, max_missing_ratio=0.2)
+        self.addCleanup(migration.close)
+        return migration
+
+    def embed(self, inputs):
+        return np.stack([
+            self.table[Path(item["image"]).stem] if "image" in item else self.text_vector(item["text"])
+            for item in inputs
+        ])
+
+    @staticmethod
+    def text_vector(text: str) -> np.ndarray:
+        seed = zlib.crc32(text.encode("utf-8"))
+        return l2_normalize(np.random.default_rng(seed).standard_normal(16).astype(np.float32))
+
+    def add_image(self) -> str:
+        image = Image.new("RGB", (4, 4), tuple(int(c) for c in self.rng.integers(0, 255, 3)))
+        path = os.path.join(self.path, "src.png")
+        image.save(path)
+        with open(path, "rb") as f:
+            saved = self.storage.save_image(f.read(), "src.png")
+        vector = l2_normalize(self.rng.standard_normal(16).astype(np.float32))
+        self.table[saved["id"]] = vector
+        self.vector_db.upsert(saved["id"], vector, {"tags": ["a"]})
+        return saved["id"]
+
+    def wait_for(self, status: str, timeout: float = 20.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            current = self.migration.get_status()
+            if current["status"] == status:
+                return current
+            self.assertNotEqual(current["status"], "failed", current["error"])
+            time.sleep(0.05)
+        self.fail(f"迁移未进入 {status}: {self.migration.get_status()}")
+
+    def target_ids(self, target: str) -> set:
+        points, _ = self.vector_db._client.scroll(collection_name=target, limit=100)
+        return {str(point.id) for point in points}
+
+    def test_rebuild_dual_write_verify_swap_and_rollback(self):
+        started = self.migration.start()
+        target = started["target"]
+        self.assertEqual(started["source"], "test")
+        status = self.wait_for("ready")
+        self.assertEqual((status["processed"], status["written"], status["missing"]), (11, 10, 1))
+        self.assertEqual(status["progress"], 1.0)
+
+        # 迁移期间的写入同步到影子集合
+        added = self.add_image()
+        self.vector_db.update_metadata(self.ids[0], {"tags": ["b"]})
+        self.vector_db.delete(self.ids[1])
+        self.assertTrue(self.migration.flush(timeout=10))
+        expected = set(self.ids[:1] + self.ids[2:] + [added])
+        self.assertEqual(self.target_ids(target), expected)
+        point = self.vector_db._client.retrieve(collection_name=target, ids=[self.ids[0]])[0]
+        self.assertEqual(point.payload["tags"], ["b"])
+
+        with self.assertRaises(ValueError):
+            self.migration.swap()
+        result = self.migration.verify()
+        self.assertTrue(result["passed"])
+        # 原集合的近邻中有无法重建的外部向量
+        self.assertEqual(result["recall_at_10"], 0.9)
+
+        self.assertEqual(self.migration.swap()["status"], "swapped")
+        self.assertEqual(self.vector_db.collection_name, "test_live")
+        self.assertEqual(self.vector_db.physical_collection(), target)
+        self.assertEqual(self.vector_db.search(self.table[added], top_k=1)[0]["id"], added)
+        self.assertEqual(self.vector_db.count(exact=True), 10)
+        self.embedding.swap_client.assert_not_called()
+
+        self.migration.rollback()
+        self.assertEqual(self.vector_db.physical_collection(), "test")
+        self.assertEqual(self.vector_db.count(exact=True), 11)
+        self.assertEqual(MigrationState.load(Path(self.state_path)).status, "rolled_back")
+
+    def test_change_dimension_swaps_client(self):
+        client = MagicMock()
+        client.get_vector_dimension.return_value = 8
+        client.generate_embeddings_batch.side_effect = lambda inputs: [
+            l2_normalize(self.table[Path(item["image"]).stem][:8]) for item in inputs
+        ]
+        self.embedding.derive_client.return_value = client
+
+        self.assertEqual(self.migration.start(dimension=8)["dimension"], 8)
+        self.embedding.derive_client.assert_called_once_with(model_name=None, dimension=8)
+        self.wait_for("ready")
+        self.migration.swap(force=True)
+        self.embedding.swap_client.assert_called_once_with(client)
+        self.assertEqual(self.vector_db._vector_dimension, 8)
+        self.assertEqual(len(self.vector_db.search(np.ones(8), top_k=3)), 3)
+
+    def test_swap_keeps_dual_write_until_queue_drains(self):
+        self.migration.start()
+        status = self.wait_for("ready")
+        # 别名切换后双写队列未能清空：报错但不停止双写，再次调用 swap 完成切换
+        with patch.object(self.migration, "flush", side_effect=[True, False]):
+            with self.assertRaises(RuntimeError):
+                self.migration.swap(force=True)
+        self.assertEqual(self.vector_db.physical_collection(), status["target"])
+        self.assertEqual(self.migration.get_status()["status"], "ready")
+        self.assertTrue(self.migration.get_status()["running"])
+        with self.assertRaises(ValueError):
+            self.migration.cancel()
+
+        added = self.add_image()
+        self.assertEqual(self.migration.swap(force=True)["status"], "swapped")
+        self.assertEqual(self.vector_db.physical_collection(), status["target"])
+        self.assertEqual(self.vector_db.search(self.table[added], top_k=1)[0]["id"], added)
+
+    def test_verify_samples_whole_collection(self):
+        status = self.migration.start()
+        self.wait_for("ready")
+        points, _ = self.vector_db._client.scroll(collection_name=status["target"], limit=100)
+        order = [point.id for point in points]
+        # 每页 2 条：抽样覆盖所有页，不只是前几页
+        with patch.object(migration_service, "_SAMPLE_PAGE_SIZE", 2):
+            sample = self.migration._sample_ids(status["target"], 4)
+        self.assertEqual(len(set(sample)), 4)
+        self.assertTrue(set(sample) <= set(order))
+        self.assertNotEqual(set(sample), set(order[:4]))
+        self.assertEqual(len(self.migration._sample_ids(status["target"], 50)), 10)
+
+    def test_migration_routes(self):
+        patcher = patch.object(vector_db_router, "get_migration_service", return_value=self.migration)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.include_router(vector_db_router.router)
+        client = TestClient(app)
+
+        response = client.get("/vectors/migration")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["data"])
+
+        response = client.post("/vectors/migration", json={})
+        self.assertEqual(response.status_code, 200)
+        target = response.json()["data"]["target"]
+        self.wait_for("ready")
+        self.assertEqual(client.get("/vectors/migration").json()["data"]["target"], target)
+        self.assertEqual(client.post("/vectors/migration/cancel").json()["data"]["status"], "cancelled")
+
+    def test_migration_rebuilds_caption_vectors(self):
+        # 开启 caption 后经迁移重建，文本向量由目标模型生成
+        self.vector_db._text_vector_names = ["caption"]
+        self.migration.start()
+        self.wait_for("ready")
+        self.vector_db.update_metadata(self.ids[0], {"description": "雪山日出"})
+        self.assertTrue(self.migration.flush(timeout=10))
+        self.assertTrue(self.migration.verify()["passed"])
+        self.migration.swap()
+
+        self.assertEqual(self.vector_db.text_vectors, ["caption"])
+        captions = {r["id"]: r["text_vectors"] for r in self.vector_db.iter_points(with_text_vectors=True)}
+        self.assertEqual(set(captions), set(self.ids))
+        np.testing.assert_allclose(captions[self.ids[0]]["caption"], self.text_vector("雪山日出；a"), rtol=1e-5)
+        np.testing.assert_allclose(captions[self.ids[1]]["caption"], self.text_vector("a"), rtol=1e-5)
+        results = self.vector_db.search(self.text_vector("a"), top_k=3, fuse_text=True)
+        self.assertEqual(len(results), 3)
+
+    def test_migration_adds_lexical_vectors(self):
+        # 已有集合没有关键词向量，开启配置后经迁移重建
+        self.vector_db._lexical_enabled = True
+        self.migration.start()
+        self.wait_for("ready")
+        self.vector_db.update_metadata(self.ids[0], {"description": "雪山"})
+        self.assertTrue(self.migration.flush(timeout=10))
+        self.assertTrue(self.migration.verify()["passed"])
+        self.migration.swap()
+        self.assertTrue(self.vector_db.has_lexical)
+        results = self.vector_db.search(-self.table[self.ids[0]], top_k=5, query_text="雪山")
+        self.assertEqual(results[0]["id"], self.ids[0])
+
+    def test_resume_from_checkpoint(self):
+        self.migration.start()
+        self.migration.close()
+        self.assertEqual(MigrationState.load(Path(self.state_path)).source_points, 11)
+
+        self.migration = self.create_migration()
+        status = self.wait_for("ready")
+        self.assertEqual(self.target_ids(status["target"]), set(self.ids))
+        with self.assertRaises(ValueError):
+            self.migration.start()
+        self.migration.cancel()
+        self.assertFalse(self.vector_db._client.collection_exists(status["target"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
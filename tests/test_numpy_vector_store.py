@@ -0,0 +1,146 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.numpy_vector_store import NumpyVectorClient
+from app.services.vector_db_service import VectorDBService
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct, VectorParams, Distance
+
+UUIDS = [f"00000000-0000-0000-0000-{i:012d}" for i in range(60)]
+
+
+def make_records(vectors):
+    return [
+        {
+            "id": UUIDS[i],
+            "vector": vec,
+            "metadata": {
+                "tags": ["even" if i % 2 == 0 else "odd"] + (["cat"] if i % 5 == 0 else []),
+                "created_at": datetime(2024, 1 + i % 12, 1 + i % 28, 12),
+                "filename": f"{i}.jpg",
+            },
+        }
+        for i, vec in enumerate(vectors)
+    ]
+
+
+class TestNumpyBackend(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        self.vectors = np.random.default_rng(0).standard_normal((60, 32)).astype(np.float32)
+
+    def service(self, backend, subdir, **kwargs):
+        VectorDBService._instance = None
+        service = VectorDBService()
+        service.initialize(mode="local", path=os.path.join(self.path, subdir), collection_name="test",
+                           vector_dimension=32, coarse_dimension=0, backend=backend, **kwargs)
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        return service
+
+    def test_filters_match_qdrant_local(self):
+        qdrant = self.service("qdrant", "qdrant")
+        qdrant.upsert_batch(make_records(self.vectors))
+        queries = [
+            dict(filter_tags=["cat"]),
+            dict(filter_tags=["odd", "cat"], filter_conditions={"filename": "5.jpg"}),
+            dict(filter_created_at_from=datetime(2024, 3, 1), filter_created_at_to=datetime(2024, 7, 1)),
+            dict(filter_ids=UUIDS[10:30], filter_tags=["even"]),
+        ]
+        expected = [[r["id"] for r in qdrant.search(self.vectors[3], top_k=8, **q)] for q in queries]
+        expected_scroll = {r["id"] for r in qdrant.scroll(limit=100, filter_tags=["cat"])[0]}
+        qdrant.close()
+
+        service = self.service("numpy", "numpy", numpy_dtype="float32")
+        service.upsert_batch(make_records(self.vectors))
+        for query, ids in zip(queries, expected):
+            self.assertEqual([r["id"] for r in service.search(self.vectors[3], top_k=8, **query)], ids, query)
+        self.assertEqual({r["id"] for r in service.scroll(limit=100, filter_tags=["cat"])[0]}, expected_scroll)
+        self.assertEqual(service.count(filter_tags=["cat"]), 12)
+        service.close()
+
+    def test_crud_and_reopen(self):
+        service = self.service("numpy", "numpy")
+        service.upsert_batch(make_records(self.vectors))
+        service.update_metadata(UUIDS[4], {"tags": ["beach"]})
+        service.delete_batch(UUIDS[:2])
+        service.upsert(UUIDS[5], self.vectors[6], {"tags": ["moved"]})
+        service.close()
+
+        service = self.service("numpy", "numpy", stats_cache_ttl=60, approximate_count=True)
+        self.assertEqual(service.get_collection_info()["points_count"], 58)
+        self.assertEqual(service.count(filter_tags=["beach"]), 1)
+        self.assertEqual(service.count(filter_tags=["cat"]), service.count(filter_tags=["cat"], exact=True))
+        self.assertIsNone(service.get(UUIDS[0]))
+        self.assertEqual(service.get(UUIDS[4])["metadata"]["tags"], ["beach"])
+        self.assertEqual(service.get(UUIDS[4])["metadata"]["filename"], "4.jpg")
+        top = service.search(self.vectors[6], top_k=2)
+        self.assertEqual({r["id"] for r in top}, {UUIDS[5], UUIDS[6]})
+        self.assertAlmostEqual(top[0]["score"], 1.0, places=2)
+
+        pages, offset = [], None
+        while True:
+            records, offset = service.scroll(limit=25, offset=offset)
+            pages.append(records)
+            if offset is None:
+                break
+        self.assertEqual([len(p) for p in pages], [25, 25, 8])
+
+        grouped = service.search_batch([
+            {"query_vector": self.vectors[6], "top_k": 2},
+            {"query_vector": self.vectors[10], "top_k": 3, "filter_tags": ["cat"]},
+        ])
+        self.assertEqual([r["id"] for r in grouped[0]], [r["id"] for r in top])
+        self.assertEqual(grouped[1][0]["id"], UUIDS[10])
+
+        similar = service.search_by_id(UUIDS[6], top_k=3)
+        self.assertEqual(similar[0]["id"], UUIDS[5])
+        self.assertNotIn(UUIDS[6], [r["id"] for r in similar])
+        self.assertIsNone(service.search_by_id(UUIDS[0]))
+        service.close()
+
+
+class TestNumpyVectorClientIVF(unittest.TestCase):
+    def test_ivf_recall_and_filtered_fallback(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+        rng = np.random.default_rng(1)
+        centers = rng.standard_normal((20, 48))
+        vectors = (centers[rng.integers(0, 20, 4000)] + 0.3 * rng.standard_normal((4000, 48))).astype(np.float32)
+
+        client = NumpyVectorClient(path, dtype="float32", ivf_min_points=1000, ivf_lists=32, ivf_probes=6)
+        client.create_collection("c", vectors_config=VectorParams(size=48, distance=Distance.COSINE))
+        client.upsert("c", [PointStruct(id=i, vector=v.tolist(), payload={"group": i % 100}) for i, v in enumerate(vectors)])
+
+        exact = NumpyVectorClient(os.path.join(path, "exact"), dtype="float32", ivf_min_points=0)
+        exact.create_collection("c", vectors_config=VectorParams(size=48, distance=Distance.COSINE))
+        exact.upsert("c", [PointStruct(id=i, vector=v.tolist()) for i, v in enumerate(vectors)])
+
+        hits = 0
+        for query in vectors[:50]:
+            got = {p.id for p in client.query_points("c", query=query.tolist(), limit=10).points}
+            want = {p.id for p in exact.query_points("c", query=query.tolist(), limit=10).points}
+            hits += len(got & want)
+        self.assertGreater(hits / 500, 0.9)
+        self.assertEqual(client.get_collection("c").indexed_vectors_count, 4000)
+
+        # 过滤后只剩 40 个点，走精确检索
+        selective = Filter(must=[FieldCondition(key="group", match=MatchValue(value=7))])
+        points = client.query_points("c", query=vectors[7].tolist(), limit=5, query_filter=selective).points
+        self.assertEqual(points[0].id, 7)
+        self.assertTrue(all(p.id % 100 == 7 for p in points))
+        client.close()
+        exact.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
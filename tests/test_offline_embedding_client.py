@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.offline_embedding_client import OfflineEmbeddingClient
+
+
+class TestOfflineEmbeddingClient(unittest.TestCase):
+    @patch('app.services.offline_embedding_client.get_settings')
+    def setUp(self, mock_get_settings):
+        mock_settings = MagicMock()
+        mock_settings.VECTOR_DIMENSION = 256
+        mock_settings.OFFLINE_EMBEDDING_SEED = 7
+        mock_get_settings.return_value = mock_settings
+        OfflineEmbeddingClient._instance = None
+        self.client = OfflineEmbeddingClient()
+        self.client.initialize()
+
+    def test_dimension_and_normalization(self):
+        vector = self.client.generate_embedding(text="海边日落")
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertEqual(vector.shape, (256,))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+    def test_deterministic(self):
+        a = self.client.generate_embedding(text="红色跑车")
+        b = self.client.generate_embedding(text="红色跑车")
+        np.testing.assert_array_equal(a, b)
+
+    def test_text_similarity_tracks_overlap(self):
+        a = np.array(self.client.generate_embedding(text="海边 日落 照片"))
+        b = np.array(self.client.generate_embedding(text="日落时的海边"))
+        c = np.array(self.client.generate_embedding(text="雪山 滑雪"))
+        self.assertGreater(a @ b, a @ c)
+
+    def test_image_similarity_tracks_content(self):
+        rng = np.random.default_rng(0)
+
+        def noisy(color):
+            pixels = np.clip(np.array(color) + rng.normal(0, 10, size=(64, 64, 3)), 0, 255)
+            return Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+        red_1 = np.array(self.client.generate_embedding(image=noisy((220, 30, 30))))
+        red_2 = np.array(self.client.generate_embedding(image=noisy((210, 40, 35))))
+        blue = np.array(self.client.generate_embedding(image=noisy((20, 40, 220))))
+        self.assertGreater(red_1 @ red_2, red_1 @ blue)
+
+    def test_image_path_matches_pil_image(self):
+        image = Image.new("RGB", (80, 60), (12, 200, 90))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "img.png")
+            image.save(path)
+            from_path = self.client.generate_embedding(image=path)
+        from_pil = self.client.generate_embedding(image=image)
+        np.testing.assert_allclose(from_path, from_pil, atol=1e-6)
+
+    def test_batch_returns_float32_matrix(self):
+        vectors = self.client.generate_embeddings_batch([{"text": "猫"}, {"text": "狗"}])
+        self.assertEqual(vectors.shape, (2, 256))
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_remote_url_falls_back_to_hash(self):
+        a = self.client.generate_embedding(image="https://example.com/a.jpg")
+        b = self.client.generate_embedding(image="https://example.com/b.jpg")
+        np.testing.assert_array_equal(a, self.client.generate_embedding(image="https://example.com/a.jpg"))
+        self.assertFalse(np.array_equal(a, b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.outbound_governor import (
+    OutboundGovernor,
+    TokenBucket,
+    CircuitBreaker,
+    CircuitOpenError,
+    OutboundDeadlineExceeded,
+    OutboundQueueFullError,
+)
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    """轮询等待条件成立，避免依赖固定 sleep 时长"""
+    end = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > end:
+            raise AssertionError("等待条件超时")
+        time.sleep(0.005)
+
+
+def make_governor(**overrides):
+    settings = MagicMock()
+    settings.OUTBOUND_MAX_CONCURRENCY = 4
+    settings.OUTBOUND_MAX_QUEUE = 16
+    settings.OUTBOUND_QUEUE_TIMEOUT = 5.0
+    settings.OUTBOUND_DEFAULT_RPS = 0
+    settings.OUTBOUND_BURST = 10
+    settings.OUTBOUND_RATE_LIMITS = {}
+    settings.OUTBOUND_BREAKER_FAILURES = 3
+    settings.OUTBOUND_BREAKER_COOLDOWN = 30.0
+    settings.OUTBOUND_BREAKER_HALF_OPEN_CALLS = 1
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    OutboundGovernor._instance = None
+    with patch('app.services.outbound_governor.get_settings', return_value=settings):
+        governor = OutboundGovernor()
+    OutboundGovernor._instance = None
+    return governor
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reserve_waits_after_burst(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+
+    def test_drain(self):
+        bucket = TokenBucket(rate=1, capacity=5)
+        bucket.drain()
+        self.assertGreater(bucket.reserve(), 0.5)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_half_open_close(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05, half_open_calls=1)
+        breaker.record_failure()
+        self.assertTrue(breaker.record_failure())
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())   # 探测请求
+        self.assertFalse(breaker.allow())  # 半开状态只放行一个
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01, half_open_calls=1)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TestOutboundGovernor(unittest.TestCase):
+    def test_circuit_opens_on_server_errors(self):
+        governor = make_governor()
+        for _ in range(3):
+            governor.call("m", lambda: _Response(503))
+        fn = MagicMock()
+        with self.assertRaises(CircuitOpenError):
+            governor.call("m", fn)
+        fn.assert_not_called()
+        metrics = governor.get_metrics()["models"]["m"]
+        self.assertEqual(metrics["circuit_state"], "open")
+        self.assertEqual(metrics["rejected_circuit_open"], 1)
+
+    def test_client_errors_do_not_trip(self):
+        governor = make_governor()
+
+        def bad_request():
+            raise _HTTPError(400)
+
+        for _ in range(5):
+            with self.assertRaises(_HTTPError):
+                governor.call("m", bad_request)
+        self.assertEqual(governor.get_metrics()["models"]["m"]["circuit_state"], "closed")
+
+    def test_throttled_response_counted(self):
+        governor = make_governor(OUTBOUND_DEFAULT_RPS=100)
+        governor.call("m", lambda: _Response(429))
+        metrics = governor.get_metrics()["models"]["m"]
+        self.assertEqual(metrics["throttled"], 1)
+        self.assertEqual(metrics["failed"], 1)
+
+    def test_concurrency_cap(self):
+        governor = make_governor(OUTBOUND_MAX_CONCURRENCY=2)
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def work():
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.02)
+            with lock:
+                state["current"] -= 1
+
+        threads = [threading.Thread(target=governor.call, args=("m", work)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(governor.get_metrics()["in_flight"], 0)
+
+    def test_deadline_and_queue_full(self):
+        governor = make_governor(OUTBOUND_MAX_CONCURRENCY=1, OUTBOUND_MAX_QUEUE=1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        holder = threading.Thread(target=governor.call, args=("m", release.wait))
+        holder.start()
+        wait_until(lambda: governor.get_metrics()["in_flight"] == 1)
+
+        waiter_error = []
+
+        def queued():
+            try:
+                governor.call("m", lambda: None, deadline=0.5)
+            except Exception as e:
+                waiter_error.append(e)
+
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        wait_until(lambda: governor.get_metrics()["queued"] == 1)
+        with self.assertRaises(OutboundQueueFullError):
+            governor.call("m", lambda: None)
+
+        waiter.join()
+        self.assertIsInstance(waiter_error[0], OutboundDeadlineExceeded)
+        release.set()
+        holder.join()
+        self.assertEqual(governor.get_metrics()["in_flight"], 0)
+        self.assertEqual(governor.call("m", lambda: "ok"), "ok")
+
+    def test_queue_full_releases_half_open_probe(self):
+        governor = make_governor(OUTBOUND_MAX_CONCURRENCY=1, OUTBOUND_MAX_QUEUE=0,
+                                 OUTBOUND_BREAKER_FAILURES=1, OUTBOUND_BREAKER_COOLDOWN=0.05)
+        with self.assertRaises(_HTTPError):
+            governor.call("m", self._raise_503)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        holder = threading.Thread(target=governor.call, args=("other", release.wait))
+        holder.start()
+        wait_until(lambda: governor.get_metrics()["in_flight"] == 1)
+
+        time.sleep(0.06)
+        # 半开探测请求因队列已满未发出，探测名额应归还，否则熔断器一直停在 half_open
+        with self.assertRaises(OutboundQueueFullError):
+            governor.call("m", lambda: "ok")
+        with self.assertRaises(OutboundQueueFullError):
+            governor.call("m", lambda: "ok")
+
+        release.set()
+        holder.join()
+        self.assertEqual(governor.call("m", lambda: "ok"), "ok")
+        self.assertEqual(governor.get_metrics()["models"]["m"]["circuit_state"], "closed")
+
+    def test_cancelled_async_call_releases_half_open_probe(self):
+        governor = make_governor(OUTBOUND_DEFAULT_RPS=1, OUTBOUND_BURST=1,
+                                 OUTBOUND_BREAKER_FAILURES=1, OUTBOUND_BREAKER_COOLDOWN=0.05)
+        with self.assertRaises(_HTTPError):
+            governor.call("m", self._raise_503)
+        time.sleep(0.06)
+
+        async def ok():
+            return "ok"
+
+        async def main():
+            # 令牌已用完，探测请求在限流等待中被取消
+            task = asyncio.ensure_future(governor.call_async("m", ok))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return await governor.call_async("m", ok)
+
+        self.assertEqual(asyncio.run(main()), "ok")
+        self.assertEqual(governor.get_metrics()["models"]["m"]["circuit_state"], "closed")
+
+    @staticmethod
+    def _raise_503():
+        raise _HTTPError(503)
+
+    def test_async_calls_share_cap(self):
+        governor = make_governor(OUTBOUND_MAX_CONCURRENCY=2)
+        state = {"current": 0, "peak": 0}
+
+        async def work(i):
+            state["current"] += 1
+            state["peak"] = max(state["peak"], state["current"])
+            await asyncio.sleep(0.01)
+            state["current"] -= 1
+            return i
+
+        async def main():
+            return await asyncio.gather(*(governor.call_async("m", work, i) for i in range(6)))
+
+        self.assertEqual(asyncio.run(main()), list(range(6)))
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(governor.get_metrics()["models"]["m"]["succeeded"], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
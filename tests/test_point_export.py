@@ -0,0 +1,92 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_db_service import VectorDBService
+from app.services.executors import shutdown_executors
+from app.routers import vector_db as vector_db_router
+from app.models import parquet_available
+
+UUIDS = [f"00000000-0000-0000-0000-{i:012d}" for i in range(30)]
+
+
+class TestPointIteration(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+        self.addCleanup(shutdown_executors)
+
+        VectorDBService._instance = None
+        self.service = VectorDBService()
+        self.service.initialize(mode="local", path=path, collection_name="test", vector_dimension=32,
+                                coarse_dimension=8)
+        self.addCleanup(self.service.close)
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+
+        self.vectors = np.random.default_rng(0).standard_normal((30, 32)).astype(np.float32)
+        self.service.upsert_batch([
+            {"id": UUIDS[i], "vector": vec,
+             "metadata": {"tags": ["even" if i % 2 == 0 else "odd"], "filename": f"{i}.jpg", "file_path": f"/p/{i}.jpg"}}
+            for i, vec in enumerate(self.vectors)
+        ])
+
+    def test_iter_points_pages_projection_and_limit(self):
+        records = list(self.service.iter_points(batch_size=7))
+        self.assertEqual([r["id"] for r in records], UUIDS)
+
+        ids_only = list(self.service.iter_points(batch_size=4, with_payload=False, filter_tags=["odd"], prefetch=False))
+        self.assertEqual(ids_only, [{"id": UUIDS[i]} for i in range(1, 30, 2)])
+
+        projected = list(self.service.iter_points(batch_size=4, limit=10, with_payload=["filename"], with_vectors=True))
+        self.assertEqual(len(projected), 10)
+        self.assertEqual(projected[3]["metadata"], {"filename": "3.jpg"})
+        self.assertEqual(len(projected[3]["vector"]), 32)
+
+        iterator = self.service.iter_points(batch_size=5)
+        self.assertEqual(next(iterator)["id"], UUIDS[0])
+        iterator.close()
+
+    def test_export_endpoint(self):
+        patcher = patch.object(vector_db_router, "get_vector_db_service", return_value=self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.include_router(vector_db_router.router)
+        client = TestClient(app)
+
+        response = client.get("/vectors/export", params={"tags": "even", "fields": "filename", "batch_size": 4})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(lines[:2], [{"id": UUIDS[0], "metadata": {"filename": "0.jpg"}},
+                                     {"id": UUIDS[2], "metadata": {"filename": "2.jpg"}}])
+        self.assertEqual(len(lines), 15)
+
+        self.assertEqual(client.get("/vectors/export", params={"format": "csv"}).status_code, 400)
+
+        if parquet_available():
+            import pyarrow.parquet as pq
+            response = client.get("/vectors/export", params={"format": "parquet", "with_vectors": True,
+                                                             "batch_size": 8, "limit": 20})
+            table = pq.read_table(io.BytesIO(response.content))
+            self.assertEqual(table.num_rows, 20)
+            self.assertEqual(pq.ParquetFile(io.BytesIO(response.content)).num_row_groups, 3)
+            self.assertEqual(json.loads(table.column("payload")[5].as_py())["filename"], "5.jpg")
+            expected = self.vectors[5] / np.linalg.norm(self.vectors[5])
+            np.testing.assert_allclose(table.column("vector")[5].as_py(), expected, rtol=1e-5, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import warnings
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_service import SearchService
+from app.services.vector_db_service import VectorDBService
+
+
+class TestSearchByImageId(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+
+        VectorDBService._instance = None
+        self.vector_db = VectorDBService()
+        self.vector_db.initialize(mode="local", path=path, collection_name="test", vector_dimension=16)
+        self.addCleanup(self.vector_db.close)
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+
+        self.vectors = np.random.default_rng(0).standard_normal((12, 16)).astype(np.float32)
+        self.vector_db.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"tags": []}} for i, vec in enumerate(self.vectors)
+        ])
+
+        self.embedding = MagicMock(is_initialized=True)
+        self.embedding.generate_image_embedding.return_value = self.vectors[3]
+        self.storage = MagicMock()
+        SearchService._instance = None
+        self.addCleanup(setattr, SearchService, "_instance", None)
+        self.search = SearchService()
+        self.search.initialize(embedding_service=self.embedding, vector_db_service=self.vector_db,
+                               storage_service=self.storage)
+
+    def test_indexed_image_does_not_call_embedding(self):
+        results = self.search.search_by_image_id(3, top_k=5)
+        self.assertEqual(len(results), 5)
+        self.assertNotIn(3, [r["id"] for r in results])
+        self.assertEqual(results[0]["preview_url"], f"/api/v1/storage/images/{results[0]['id']}")
+        self.embedding.generate_image_embedding.assert_not_called()
+
+    def test_unindexed_image_falls_back_to_embedding(self):
+        self.storage.get_image_path.return_value = "/tmp/missing.jpg"
+        results = self.search.search_by_image_id(99, top_k=3)
+        self.assertEqual(results[0]["id"], 3)
+        self.embedding.generate_image_embedding.assert_called_once()
+
+        self.storage.get_image_path.return_value = None
+        with self.assertRaises(ValueError):
+            self.search.search_by_image_id(99)
+
+    def test_search_batch_embeds_once_and_groups_results(self):
+        self.embedding.generate_embeddings_batch.return_value = self.vectors[[2, 5]]
+        grouped = self.search.search_batch([
+            {"query_text": "海边", "top_k": 3},
+            {"query_text": "猫", "top_k": 2, "instruction": "Find cats."},
+        ])
+        self.embedding.generate_embeddings_batch.assert_called_once_with([
+            {"text": "海边", "instruction": "Represent this text for retrieval."},
+            {"text": "猫", "instruction": "Find cats."},
+        ])
+        self.assertEqual([len(r) for r in grouped], [3, 2])
+        self.assertEqual([grouped[0][0]["id"], grouped[1][0]["id"]], [2, 5])
+        self.assertTrue(all("preview_url" in r for results in grouped for r in results))
+
+        with self.assertRaises(ValueError):
+            self.search.search_batch([{"query_text": ""}])
+
+    def test_search_by_meta_returns_newest_with_full_metadata(self):
+        for i in range(12):
+            self.vector_db.update_metadata(i, {"created_at": datetime(2020 + i % 5, 1 + i % 3, 18), "tags": ["x"] if i % 2 else []})
+        # 由 Qdrant 按 created_at 排序，不在客户端遍历集合
+        with patch.object(self.vector_db, "iter_points", side_effect=AssertionError("全量遍历")):
+            results = self.search.search_by_meta(tags=["x"], top_k=3)
+            self.assertEqual([r["id"] for r in results], [9, 3, 7])
+            self.assertEqual(results[0]["metadata"]["tags"], ["x"])
+            self.assertEqual([r["id"] for r in self.search.search_by_meta(date_text="1月18日", top_k=2)], [9, 3])
+
+    def test_newest_on_numpy_backend(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+        VectorDBService._instance = None
+        vector_db = VectorDBService()
+        vector_db.initialize(mode="local", path=path, collection_name="test", vector_dimension=16, backend="numpy")
+        self.addCleanup(vector_db.close)
+        vector_db.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"created_at": datetime(2020 + i % 5, 1 + i % 3, 18)} if i else {}}
+            for i, vec in enumerate(self.vectors)
+        ])
+        self.assertEqual([r["id"] for r in vector_db.newest(3)], [4, 9, 8])
+
+
+class TestCaptionVectors(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        self.vector_db = VectorDBService()
+        self.vector_db.initialize(mode="local", path=path, collection_name="test", vector_dimension=16,
+                                  text_vectors=["caption"])
+        self.addCleanup(self.vector_db.close)
+
+        rng = np.random.default_rng(0)
+        self.embedding = MagicMock(is_initialized=True)
+        self.embedding.generate_embeddings_batch.side_effect = lambda inputs: rng.standard_normal((len(inputs), 16))
+        SearchService._instance = None
+        self.addCleanup(setattr, SearchService, "_instance", None)
+        self.search = SearchService()
+        self.search.initialize(embedding_service=self.embedding, vector_db_service=self.vector_db,
+                               storage_service=MagicMock())
+
+    def caption_ids(self):
+        points, _ = self.vector_db._client.scroll("test", limit=10, with_vectors=["caption"])
+        return sorted(point.id for point in points if point.vector)
+
+    def test_index_writes_caption_vectors_and_backfill(self):
+        self.assertTrue(self.search.index_images_batch([
+            {"id": 1, "path": "/a.jpg", "metadata": {"description": "海边日落", "tags": []}},
+            {"id": 2, "path": "/b.jpg", "metadata": {"tags": []}},
+            {"id": 3, "path": "/c.jpg", "metadata": {"tags": ["猫"]}},
+        ]))
+        # 图片向量一次、文本向量一次
+        self.assertEqual(self.embedding.generate_embeddings_batch.call_count, 2)
+        self.assertEqual(self.embedding.generate_embeddings_batch.call_args[0][0], [
+            {"text": "海边日落", "instruction": "Represent this text for retrieval."},
+            {"text": "猫", "instruction": "Represent this text for retrieval."},
+        ])
+        self.assertEqual(self.caption_ids(), [1, 3])
+
+        self.vector_db.update_metadata(2, {"description": "雪山"})
+        self.assertEqual(self.search.backfill_text_vectors()["caption"], {"scanned": 1, "updated": 1, "skipped": 0})
+        self.assertEqual(self.caption_ids(), [1, 2, 3])
+
+
+    def test_update_metadata_reembeds_caption(self):
+        self.search.index_images_batch([
+            {"id": 1, "path": "/a.jpg", "metadata": {"description": "海边日落", "tags": []}},
+            {"id": 2, "path": "/b.jpg", "metadata": {"description": "雪山", "tags": []}},
+        ])
+        self.embedding.generate_embeddings_batch.reset_mock()
+
+        # 只改标签：按合并后的描述和标签重新生成，记录不会缺少文本向量
+        self.assertTrue(self.search.update_metadata(1, {"tags": ["猫"]}))
+        self.embedding.generate_embeddings_batch.assert_called_once_with(
+            [{"text": "海边日落；猫", "instruction": "Represent this text for retrieval."}]
+        )
+        self.assertEqual(self.caption_ids(), [1, 2])
+        self.assertEqual(self.vector_db.get(1)["metadata"]["tags"], ["猫"])
+
+        # 不涉及来源字段的修改不生成向量；来源字段清空后删除文本向量
+        self.assertTrue(self.search.update_metadata(2, {"extra": {"k": 1}}))
+        self.assertTrue(self.search.update_metadata(2, {"description": ""}))
+        self.assertEqual(self.embedding.generate_embeddings_batch.call_count, 1)
+        self.assertEqual(self.caption_ids(), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
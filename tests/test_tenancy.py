@@ -0,0 +1,207 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.storage_service import StorageService
+from app.services.tenancy import (
+    DEFAULT_TENANT,
+    TENANT_FIELD,
+    get_current_tenant,
+    normalize_tenant_id,
+    tenant_scope,
+)
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_backfill import backfill_date_fields
+
+
+class TestTenantContext(unittest.TestCase):
+    def test_scope_and_validation(self):
+        self.assertEqual(get_current_tenant(), DEFAULT_TENANT)
+        with tenant_scope("alice"):
+            self.assertEqual(get_current_tenant(), "alice")
+            with tenant_scope(None):
+                self.assertEqual(get_current_tenant(), DEFAULT_TENANT)
+            self.assertEqual(get_current_tenant(), "alice")
+        self.assertEqual(get_current_tenant(), DEFAULT_TENANT)
+        self.assertEqual(normalize_tenant_id("  "), DEFAULT_TENANT)
+        for bad in ("../etc", "a b", "x" * 65):
+            with self.assertRaises(ValueError):
+                normalize_tenant_id(bad)
+
+
+class _TenantVectorDBTestCase(unittest.TestCase):
+    tenant_mode = "none"
+    upsert_buffer_size = 0
+
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        self.service = VectorDBService()
+        self.service.initialize(mode="local", path=self.path, collection_name="test", vector_dimension=16,
+                                tenant_mode=self.tenant_mode, upsert_buffer_size=self.upsert_buffer_size,
+                                stats_cache_ttl=60)
+        self.addCleanup(self.service.close)
+        self.vectors = np.random.default_rng(0).standard_normal((12, 16)).astype(np.float32)
+
+    def write(self, tenant, ids, tag):
+        with tenant_scope(tenant):
+            self.service.upsert_batch([
+                {"id": i, "vector": self.vectors[i], "metadata": {"tags": [tag]}} for i in ids
+            ])
+
+
+class TestPayloadTenancy(_TenantVectorDBTestCase):
+    tenant_mode = "payload"
+
+    def setUp(self):
+        super().setUp()
+        self.write(None, [0, 1], "legacy")
+        self.write("alice", [2, 3, 4, 5], "a")
+        self.write("bob", [6, 7, 8], "b")
+
+    def test_reads_are_isolated(self):
+        with tenant_scope("alice"):
+            self.assertEqual(self.service.count(exact=True), 4)
+            self.assertEqual(self.service.count(exact=False), 4)
+            results = self.service.search(self.vectors[7], top_k=10)
+            self.assertEqual(sorted(r["id"] for r in results), [2, 3, 4, 5])
+            self.assertIsNone(self.service.get(7))
+            self.assertEqual([r["id"] for r in self.service.get_batch([3, 7])], [3])
+            self.assertIsNone(self.service.search_by_id(7))
+            self.assertEqual(sorted(r["id"] for r in self.service.iter_points(batch_size=1)), [2, 3, 4, 5])
+            self.assertEqual(self.service.get(3)["metadata"][TENANT_FIELD], "alice")
+        # 没有 tenant_id 的记录归默认租户
+        self.assertEqual(self.service.count(exact=True), 2)
+        self.assertEqual(self.service.get(0)["metadata"][TENANT_FIELD], DEFAULT_TENANT)
+        with tenant_scope("carol"):
+            self.assertEqual(self.service.count(exact=True), 0)
+
+    def test_writes_cannot_touch_other_tenants(self):
+        with tenant_scope("bob"):
+            with self.assertRaises(ValueError):
+                self.service.upsert_batch([{"id": 2, "vector": self.vectors[2], "metadata": {}}])
+            self.assertFalse(self.service.update_metadata(3, {"tags": ["stolen"]}))
+            self.assertTrue(self.service.delete_batch([2, 3, 6]))
+            self.assertEqual(self.service.count(exact=True), 2)
+        with tenant_scope("alice"):
+            self.assertEqual(self.service.count(exact=True), 4)
+            self.assertEqual(self.service.get(3)["metadata"]["tags"], ["a"])
+
+    def test_backfill_date_fields_covers_all_tenants(self):
+        # 直接写入 created_at（不经派生），模拟派生字段出现之前的旧数据
+        self.service._client.set_payload(collection_name="test", payload={"created_at": "2021-01-18T08:00:00"},
+                                         points=[0, 3, 7], wait=True)
+        self.assertEqual(backfill_date_fields(self.service)["updated"], 3)
+        with tenant_scope("alice"):
+            self.assertEqual(self.service.get(3)["metadata"]["month_day"], 118)
+        with tenant_scope("bob"):
+            self.assertEqual(self.service.get(7)["metadata"]["month_day"], 118)
+
+    def test_overwrite_reads_existing_points_once(self):
+        with tenant_scope("alice"):
+            self.assertEqual(self.service.count(filter_tags=["a"], exact=False), 4)
+            # 归属检查和原有标签在同一次读取中完成，统计缓存按实际增量更新
+            with patch.object(self.service._client, "retrieve", wraps=self.service._client.retrieve) as retrieve:
+                self.service.upsert_batch([
+                    {"id": 3, "vector": self.vectors[3], "metadata": {"tags": ["z"]}},
+                    {"id": 9, "vector": self.vectors[9], "metadata": {"tags": ["z"]}},
+                ])
+            self.assertEqual(retrieve.call_count, 1)
+            self.assertEqual(self.service.count(filter_tags=["a"], exact=False), 3)
+            self.assertEqual(self.service.count(filter_tags=["z"], exact=False), 2)
+            self.assertEqual(self.service.count(exact=False), 5)
+
+    def test_full_restore_keeps_other_tenants(self):
+        snapshots = os.path.join(self.path, "snapshots")
+        with tenant_scope("alice"):
+            snapshot = self.service.create_snapshot(snapshots)
+            self.assertEqual(snapshot["points"], 4)
+            self.service.delete(2)
+            self.service.upsert(9, self.vectors[9], {"tags": ["a"]})
+            self.assertEqual(self.service.restore_snapshot(snapshot["path"])["restored"], 4)
+            self.assertEqual(sorted(r["id"] for r in self.service.iter_points()), [2, 3, 4, 5])
+        with tenant_scope("bob"):
+            self.assertEqual(self.service.count(exact=True), 3)
+            # 恢复不能覆盖其他租户的同ID记录
+            with self.assertRaises(ValueError):
+                self.service.restore_snapshot(snapshot["path"])
+            self.assertEqual(self.service.count(exact=True), 3)
+        self.assertEqual(self.service.count(exact=True), 2)
+
+
+class TestPayloadTenancyBuffered(_TenantVectorDBTestCase):
+    tenant_mode = "payload"
+    upsert_buffer_size = 8
+
+    def test_buffer_keeps_record_tenant(self):
+        with tenant_scope("alice"):
+            future = self.service.submit_buffered({"id": 1, "vector": self.vectors[1], "metadata": {}})
+        self.assertTrue(self.service.upsert(2, self.vectors[2], {}))
+        self.assertTrue(future.result(timeout=5))
+        with tenant_scope("alice"):
+            self.assertEqual([r["id"] for r in self.service.get_batch([1, 2])], [1])
+        self.assertEqual([r["id"] for r in self.service.get_batch([1, 2])], [2])
+
+
+class TestCollectionTenancy(_TenantVectorDBTestCase):
+    tenant_mode = "collection"
+
+    def test_tenant_collections_created_lazily(self):
+        self.write(None, [0, 1], "legacy")
+        self.assertFalse(self.service._client.collection_exists("test__alice"))
+        self.write("alice", [0, 2, 3], "a")
+        self.assertTrue(self.service._client.collection_exists("test__alice"))
+        with tenant_scope("alice"):
+            self.assertEqual(self.service.collection_name, "test__alice")
+            self.assertEqual(self.service.count(exact=True), 3)
+            self.assertEqual(self.service.count(filter_tags=["a"]), 3)
+            self.assertEqual(self.service.get(0)["metadata"]["tags"], ["a"])
+            self.assertEqual(self.service.get_collection_info()["tenant"], "alice")
+        self.assertEqual(self.service.count(exact=True), 2)
+        self.assertEqual(self.service.get(0)["metadata"]["tags"], ["legacy"])
+        self.assertIsNone(self.service.get(2))
+
+
+class TestStorageTenancy(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        StorageService._instance = None
+        self.addCleanup(setattr, StorageService, "_instance", None)
+        self.storage = StorageService()
+        self.storage.initialize(self.path)
+        image = Image.new("RGB", (4, 4))
+        path = os.path.join(self.path, "src.png")
+        image.save(path)
+        with open(path, "rb") as f:
+            self.content = f.read()
+        os.remove(path)
+
+    def test_tenant_roots_are_isolated(self):
+        legacy = self.storage.save_image(self.content, "a.png")
+        with tenant_scope("alice"):
+            saved = self.storage.save_image(self.content, "b.png")
+            self.assertTrue(saved["full_path"].startswith(os.path.join(self.path, "_tenants", "alice")))
+            self.assertFalse(saved["file_path"].startswith("_tenants"))
+            self.assertIsNone(self.storage.get_image_path(legacy["id"]))
+            self.assertEqual([i["id"] for i in self.storage.list_images()[0]], [saved["id"]])
+        self.assertIsNone(self.storage.get_image_path(saved["id"]))
+        self.assertEqual(self.storage.list_images()[1], 1)
+        self.assertEqual(self.storage.get_storage_stats()["total_images"], 1)
+        self.assertFalse(self.storage.delete_image(saved["id"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
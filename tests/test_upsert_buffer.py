@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.upsert_buffer import UpsertBuffer
+
+
+class RecordingWriter:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, records, wait):
+        self.batches.append(([r["id"] for r in records], wait))
+        if self.fail:
+            raise RuntimeError("qdrant unavailable")
+        return True
+
+
+class TestUpsertBuffer(unittest.TestCase):
+    def make(self, writer, **kwargs):
+        buffer = UpsertBuffer(writer, **kwargs)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_flushes_by_size(self):
+        writer = RecordingWriter()
+        buffer = self.make(writer, max_batch=4, max_delay=10)
+        futures = [buffer.submit({"id": i}) for i in range(8)]
+
+        self.assertTrue(all(f.result(timeout=2) for f in futures))
+        self.assertEqual([ids for ids, _ in writer.batches], [[0, 1, 2, 3], [4, 5, 6, 7]])
+        self.assertEqual({wait for _, wait in writer.batches}, {False})
+
+    def test_flushes_by_time_and_coalesces_same_id(self):
+        writer = RecordingWriter()
+        buffer = self.make(writer, max_batch=100, max_delay=0.05)
+        first = buffer.submit({"id": "a", "v": 1})
+        second = buffer.submit({"id": "a", "v": 2})
+        start = time.monotonic()
+
+        self.assertTrue(second.result(timeout=2))
+        self.assertTrue(first.result(timeout=0))
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+        self.assertEqual(writer.batches, [(["a"], False)])
+        self.assertEqual(buffer.get_metrics()["coalesced"], 1)
+
+    def test_durable_submit_writes_with_wait(self):
+        writer = RecordingWriter()
+        buffer = self.make(writer, max_batch=100, max_delay=10)
+        buffer.submit({"id": 1})
+        self.assertTrue(buffer.submit({"id": 2}, durable=True).result(timeout=2))
+        self.assertEqual(writer.batches, [([1, 2], True)])
+
+    def test_errors_reach_every_waiter(self):
+        buffer = self.make(RecordingWriter(fail=True), max_batch=2, max_delay=10)
+        futures = [buffer.submit({"id": i}) for i in range(2)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=2)
+        self.assertEqual(buffer.get_metrics()["errors"], 1)
+
+    def test_concurrent_callers_share_batches(self):
+        writer = RecordingWriter()
+        buffer = self.make(writer, max_batch=50, max_delay=0.05)
+        threads = [threading.Thread(target=lambda i=i: buffer.submit({"id": i}).result()) for i in range(100)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        metrics = buffer.get_metrics()
+        self.assertEqual(metrics["points"], 100)
+        self.assertLessEqual(metrics["flushes"], 10)
+        self.assertGreater(metrics["avg_batch_size"], 5)
+
+    def test_close_flushes_pending_and_rejects_new(self):
+        writer = RecordingWriter()
+        buffer = UpsertBuffer(writer, max_batch=100, max_delay=60)
+        future = buffer.submit({"id": 1})
+        buffer.close(timeout=2)
+
+        self.assertTrue(future.result(timeout=0))
+        with self.assertRaises(RuntimeError):
+            buffer.submit({"id": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,418 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import threading
+import warnings
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grpc
+from qdrant_client import QdrantClient, AsyncQdrantClient
+
+from app.config import get_settings
+from app.services.vector_db_service import (
+    VectorDBService,
+    VectorDBConfig,
+    CollectionOptions,
+    ConnectionOptions,
+    text_vector_input,
+)
+from app.services.vector_backfill import backfill_date_fields, backfill_text_vectors, backfill_lexical_vectors
+from qdrant_client.http.models import BinaryQuantization, PointStruct, RrfQuery, FusionQuery
+
+
+class TestVectorDBServiceLocal(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        VectorDBService._instance = None
+        self.service = VectorDBService()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((40, 64)).astype(np.float32)
+
+    def tearDown(self):
+        self.service.close()
+        VectorDBService._instance = None
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _init(self, coarse_dimension):
+        self.service.initialize(VectorDBConfig(
+            mode="local",
+            path=self.path,
+            collection_name="test",
+            vector_dimension=64,
+            coarse_dimension=coarse_dimension
+        ))
+
+    def _fill(self):
+        self.service.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"tags": ["even" if i % 2 == 0 else "odd"]}}
+            for i, vec in enumerate(self.vectors)
+        ])
+
+    def test_multires_layout_and_search(self):
+        self._init(coarse_dimension=16)
+        self.assertEqual(self.service.get_collection_info()["coarse_dimension"], 16)
+        self._fill()
+
+        results = self.service.search(self.vectors[7], top_k=3)
+        self.assertEqual(results[0]["id"], 7)
+        self.assertAlmostEqual(results[0]["score"], 1.0, places=5)
+
+        filtered = self.service.search(self.vectors[7], top_k=3, filter_tags=["even"])
+        self.assertTrue(all(r["id"] % 2 == 0 for r in filtered))
+
+        record = self.service.get(7)
+        self.assertEqual(len(record["vector"]), 64)
+
+    def test_multires_scores_use_full_vector(self):
+        self._init(coarse_dimension=16)
+        self._fill()
+        query = self.vectors[3]
+        results = self.service.search(query, top_k=5, oversampling=8)
+        normed = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        expected = normed @ (query / np.linalg.norm(query))
+        for r in results:
+            self.assertAlmostEqual(r["score"], float(expected[r["id"]]), places=4)
+
+    def test_existing_single_vector_collection_kept(self):
+        self._init(coarse_dimension=0)
+        self._fill()
+        self.service.close()
+
+        self._init(coarse_dimension=16)
+        self.assertIsNone(self.service.get_collection_info()["coarse_dimension"])
+        self.assertEqual(self.service.search(self.vectors[5], top_k=1)[0]["id"], 5)
+
+    def test_buffered_upserts_from_many_threads(self):
+        self.service.initialize(
+            mode="local",
+            path=self.path,
+            collection_name="test",
+            vector_dimension=64,
+            upsert_buffer_size=16,
+            upsert_buffer_delay=0.05
+        )
+        results = []
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(
+                self.service.upsert(i, self.vectors[i], {"tags": []})
+            ))
+            for i in range(40)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [True] * 40)
+        self.assertEqual(self.service.count(), 40)
+        metrics = self.service.get_upsert_buffer_metrics()
+        self.assertEqual(metrics["points"], 40)
+        self.assertLess(metrics["flushes"], 40)
+
+    def test_collection_options(self):
+        options = CollectionOptions(quantization="binary", on_disk=True, search_ef=64)
+        self.service.initialize(mode="local", path=self.path, collection_name="test", vector_dimension=64,
+                                coarse_dimension=16, collection_options=options)
+        vectors = self.service._client.get_collection("test").config.params.vectors
+        self.assertIsInstance(vectors["image_coarse"].quantization_config, BinaryQuantization)
+        self.assertTrue(vectors["image_coarse"].on_disk)
+        self.assertIsNone(vectors["image"].quantization_config)
+        self._fill()
+        self.assertEqual(self.service.search(self.vectors[3], top_k=1)[0]["id"], 3)
+        self.assertEqual(self.service.apply_collection_options(dry_run=True)["changed"], [])
+
+        # 已有集合按新配置比较差异
+        self.service.close()
+        self.service.initialize(mode="local", path=self.path, collection_name="test", vector_dimension=64,
+                                collection_options=CollectionOptions(quantization="scalar", hnsw_m=32))
+        result = self.service.apply_collection_options(dry_run=True)
+        self.assertEqual(result["changed"], ["quantization", "on_disk", "hnsw_m"])
+        self.assertEqual(result["current"]["quantization"], "binary")
+        self.assertFalse(result["applied"])
+
+        with self.assertRaises(ValueError):
+            CollectionOptions(quantization="pq")
+
+    def test_date_part_fields_and_backfill(self):
+        self._init(coarse_dimension=0)
+        self.service.upsert(0, self.vectors[0], {"created_at": datetime(2023, 1, 18, 9, 30)})
+        self.assertEqual(
+            {k: self.service.get(0)["metadata"][k] for k in ("year", "month", "day", "weekday", "month_day")},
+            {"year": 2023, "month": 1, "day": 18, "weekday": 3, "month_day": 118}
+        )
+
+        # 模拟旧数据：直接写入，没有派生字段
+        self.service._client.upsert("test", [
+            PointStruct(id=i, vector=self.vectors[i].tolist(), payload={"created_at": f"{2015 + i}-01-18T10:00:00"})
+            for i in range(1, 4)
+        ] + [PointStruct(id=4, vector=self.vectors[4].tolist(), payload={"created_at": "2020-02-18T10:00:00"}),
+             PointStruct(id=5, vector=self.vectors[5].tolist(), payload={})])
+        self.assertEqual(backfill_date_fields(self.service, batch_size=2), {"scanned": 6, "updated": 4, "skipped": 1})
+        self.assertEqual(backfill_date_fields(self.service)["updated"], 0)
+
+        records, _ = self.service.scroll(limit=10, filter_conditions={"month_day": 118})
+        self.assertEqual(sorted(r["id"] for r in records), [0, 1, 2, 3])
+        results = self.service.search(self.vectors[4], top_k=10, filter_conditions={"month_day": 218})
+        self.assertEqual([r["id"] for r in results], [4])
+
+
+    def test_search_by_id_uses_stored_vector_and_excludes_itself(self):
+        for coarse in (0, 16):
+            self.service.close()
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._init(coarse_dimension=coarse)
+            self._fill()
+
+            by_id = self.service.search_by_id(7, top_k=5, oversampling=8)
+            by_vector = self.service.search(self.vectors[7], top_k=6, oversampling=8)
+            self.assertEqual(len(by_id), 5)
+            self.assertNotIn(7, [r["id"] for r in by_id])
+            self.assertEqual([r["id"] for r in by_id], [r["id"] for r in by_vector][1:])
+            self.assertTrue(all(r["id"] % 2 == 1 for r in self.service.search_by_id(7, top_k=5, filter_tags=["odd"])))
+            self.assertIsNone(self.service.search_by_id(999))
+
+    def test_search_batch_matches_single_searches(self):
+        for coarse in (0, 16):
+            self.service.close()
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._init(coarse_dimension=coarse)
+            self._fill()
+
+            queries = [
+                {"query_vector": self.vectors[1], "top_k": 3},
+                {"query_vector": self.vectors[2], "top_k": 5, "filter_tags": ["odd"]},
+                {"query_vector": self.vectors[9], "top_k": 4, "exclude_ids": [9]},
+            ]
+            grouped = self.service.search_batch(queries)
+            self.assertEqual([len(r) for r in grouped], [3, 5, 4])
+            for query, results in zip(queries, grouped):
+                self.assertEqual([r["id"] for r in results], [r["id"] for r in self.service.search(**query)])
+            self.assertTrue(all(r["id"] % 2 == 1 for r in grouped[1]))
+            self.assertEqual(self.service.search_batch([]), [])
+
+    def test_stats_cache_counts_follow_writes(self):
+        self.service.initialize(mode="local", path=self.path, collection_name="test", vector_dimension=64,
+                                stats_cache_ttl=60, approximate_count=True)
+        self._fill()
+        self.assertEqual(self.service.count(), 40)
+        self.assertEqual(self.service.count(filter_tags=["even"]), 20)
+
+        self.service.update_metadata(0, {"tags": ["odd", "beach"]})
+        self.service.delete(1)
+        self.service.upsert(40, self.vectors[0], {"tags": ["even"]})
+        expected = {"even": 20, "odd": 20, "beach": 1, "cat": 0}
+        self.assertEqual({tag: self.service.count(filter_tags=[tag]) for tag in expected}, expected)
+        self.assertEqual({tag: self.service.count(filter_tags=[tag], exact=True) for tag in expected}, expected)
+        self.assertEqual(self.service.count(), 40)
+
+        # 覆盖已有记录：写入前不读取原有标签，缓存先按新增计入，标记过期后由后台刷新纠正
+        with patch.object(self.service._client, "retrieve", wraps=self.service._client.retrieve) as retrieve:
+            self.service.upsert(2, self.vectors[2], {"tags": ["beach"]})
+        retrieve.assert_not_called()
+        expected = {"even": 19, "odd": 20, "beach": 2, "cat": 0}
+        self.assertEqual({tag: self.service.count(filter_tags=[tag], exact=True) for tag in expected}, expected)
+        deadline = time.monotonic() + 5
+        while ({tag: self.service.count(filter_tags=[tag]) for tag in expected} != expected
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.assertEqual({tag: self.service.count(filter_tags=[tag]) for tag in expected}, expected)
+        self.assertEqual(self.service.count(), 40)
+        self.assertEqual(self.service.get_collection_info()["points_count"], 40)
+        self.assertEqual(self.service.count(filter_tags=["odd", "beach"]), 21)
+
+
+class TestTextVectors(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        rng = np.random.default_rng(1)
+        self.vectors = rng.standard_normal((20, 32)).astype(np.float32)
+        self.query = rng.standard_normal(32).astype(np.float32)
+
+    def _init(self, coarse_dimension, fusion="rrf"):
+        service = VectorDBService()
+        service.initialize(mode="local", path=self.path, collection_name="test", vector_dimension=32,
+                           coarse_dimension=coarse_dimension, text_vectors=["caption"], fusion=fusion)
+        self.addCleanup(service.close)
+        # 只有 5 号有文本向量，且与查询完全一致
+        service.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"tags": ["t"], "description": f"photo {i}"},
+             "text_vectors": {"caption": self.query} if i == 5 else None}
+            for i, vec in enumerate(self.vectors)
+        ])
+        return service
+
+    def test_text_vector_input(self):
+        self.assertEqual(text_vector_input("caption", {"description": " 海边日落 ", "tags": ["旅行", "", "海"]}),
+                         "海边日落；旅行、海")
+        self.assertIsNone(text_vector_input("caption", {"description": "", "tags": []}))
+
+    def _fused_search(self, coarse_dimension, fusion="rrf"):
+        """5 号的图片向量与查询最不相似，只能经由文本向量进入结果"""
+        service = self._init(coarse_dimension, fusion)
+        self.assertEqual(service.get_collection_info()["text_vectors"], ["caption"])
+        self.assertNotIn(5, [r["id"] for r in service.search(self.query, top_k=5)])
+        fused = [r["id"] for r in service.search(self.query, top_k=5, fuse_text=True)]
+        self.assertEqual(len(fused), 5)
+        self.assertIn(5, fused)
+        batch = service.search_batch([{"query_vector": self.query, "top_k": 5, "fuse_text": True}])
+        self.assertEqual([r["id"] for r in batch[0]], fused)
+        self.assertEqual(len(service.get(3)["vector"]), 32)
+        self.assertEqual(len(service.search_by_id(3, top_k=4)), 4)
+        return fused
+
+    def test_fused_search(self):
+        self.assertEqual(self._fused_search(0)[0], 5)
+
+    def test_fused_search_multires(self):
+        self.assertEqual(self._fused_search(16)[0], 5)
+
+    def test_fused_search_dbsf(self):
+        self._fused_search(0, fusion="dbsf")
+
+    def test_metadata_change_drops_text_vector_and_backfill(self):
+        service = self._init(0)
+        service.update_metadata(5, {"description": "changed"})
+        self.assertNotEqual(service.search(self.query, top_k=1, fuse_text=True)[0]["id"], 5)
+        service.update_metadata(7, {"description": "", "tags": []})
+
+        texts = []
+
+        def embed(batch):
+            texts.extend(batch)
+            return [self.query if text.startswith("changed") else -self.query for text in batch]
+
+        stats = backfill_text_vectors(service, embed, batch_size=8)
+        self.assertEqual(stats["caption"], {"scanned": 20, "updated": 19, "skipped": 1})
+        self.assertIn("changed；t", texts)
+        point = service._client.retrieve(collection_name="test", ids=[5], with_vectors=["caption"])[0]
+        np.testing.assert_allclose(point.vector["caption"], self.query / np.linalg.norm(self.query), atol=1e-5)
+        # 已补齐的记录不再处理
+        self.assertEqual(backfill_text_vectors(service, embed)["caption"], {"scanned": 1, "updated": 0, "skipped": 1})
+
+
+class TestLexicalVectors(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, True)
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        rng = np.random.default_rng(2)
+        self.vectors = rng.standard_normal((20, 32)).astype(np.float32)
+        # 3 号和 7 号的图片向量与查询最不相似，只能经由关键词进入结果
+        self.query = -(self.vectors[3] + self.vectors[7])
+
+        self.service = VectorDBService()
+        self.service.initialize(mode="local", path=path, collection_name="test", vector_dimension=32, lexical=True)
+        self.addCleanup(self.service.close)
+        metadata = [{"filename": f"DSC{i:04d}.jpg", "tags": ["t"]} for i in range(20)]
+        metadata[3].update(description="海边日落")
+        metadata[4].update(description="海边的灯塔")
+        metadata[7].update(filename="IMG_2041.JPG")
+        self.service.upsert_batch([
+            {"id": i, "vector": vec, "metadata": meta} for i, (vec, meta) in enumerate(zip(self.vectors, metadata))
+        ])
+
+    def ids(self, query_text=None, **kwargs):
+        return [r["id"] for r in self.service.search(self.query, top_k=5, query_text=query_text, **kwargs)]
+
+    def test_hybrid_search(self):
+        self.assertTrue(self.service.get_collection_info()["lexical"])
+        dense = self.ids()
+        self.assertNotIn(7, dense)
+        self.assertEqual(self.ids("IMG_2041")[0], 7)
+        self.assertEqual(self.ids("日落")[0], 3)
+        self.assertNotIn(4, self.ids("日落"))
+        # 权重为 0 或查询中没有词元时只做向量检索
+        self.assertEqual(self.ids("IMG_2041", lexical_weight=0), dense)
+        self.assertEqual(self.ids("!!"), dense)
+        batch = self.service.search_batch([{"query_vector": self.query, "top_k": 5, "query_text": "IMG_2041"}])
+        self.assertEqual([r["id"] for r in batch[0]], self.ids("IMG_2041"))
+        self.assertEqual(len(self.service.get(7)["vector"]), 32)
+
+    def test_weighted_rrf(self):
+        request = self.service.query_request(self.query, query_text="日落", lexical_weight=2.0)
+        self.assertIsInstance(request.query, RrfQuery)
+        self.assertEqual(request.query.rrf.weights, [1.0, 2.0])
+        self.assertIsInstance(self.service.query_request(self.query, query_text="日落").query, FusionQuery)
+        self.assertEqual(self.ids("日落", lexical_weight=3.0)[0], 3)
+
+    def test_metadata_change_and_backfill(self):
+        self.service.update_metadata(7, {"description": "雪山"})
+        self.assertEqual(self.ids("雪山")[0], 7)
+        # 文件名不在本次修改中，关键词向量按完整 payload 重新生成
+        self.assertEqual(self.ids("IMG_2041")[0], 7)
+
+        self.service._client.delete_vectors(collection_name="test", vectors=["lexical"], points=[3, 7])
+        self.assertNotIn(3, self.ids("日落"))
+        self.assertEqual(backfill_lexical_vectors(self.service, batch_size=1), {"scanned": 2, "updated": 2})
+        self.assertEqual(self.ids("日落")[0], 3)
+        self.assertEqual(backfill_lexical_vectors(self.service), {"scanned": 0, "updated": 0})
+
+class TestConnectionOptions(unittest.TestCase):
+    def test_client_kwargs(self):
+        kwargs = ConnectionOptions().client_kwargs()
+        self.assertFalse(kwargs["prefer_grpc"])
+        self.assertNotIn("timeout", kwargs)
+        self.assertNotIn("grpc_compression", kwargs)
+        self.assertEqual(kwargs["limits"].keepalive_expiry, 30.0)
+
+        options = ConnectionOptions(prefer_grpc=True, grpc_port=7334, timeout=5, keepalive=0, grpc_compression="gzip")
+        kwargs = options.client_kwargs(pool_size=8)
+        self.assertEqual((kwargs["grpc_port"], kwargs["timeout"]), (7334, 5))
+        self.assertEqual(kwargs["grpc_compression"], grpc.Compression.Gzip)
+        self.assertEqual((kwargs["limits"].max_connections, kwargs["limits"].max_keepalive_connections), (8, 0))
+        self.assertNotIn("grpc.keepalive_time_ms", kwargs["grpc_options"])
+        self.assertEqual(kwargs["grpc_options"]["grpc.max_receive_message_length"], 64 * 1024 * 1024)
+
+        # 构造客户端不发起连接，只验证参数被接受
+        for client_class in (QdrantClient, AsyncQdrantClient):
+            client_class(host="localhost", check_compatibility=False, **kwargs)
+
+        with self.assertRaises(ValueError):
+            ConnectionOptions(grpc_compression="deflate")
+
+
+class TestVectorDBConfig(unittest.TestCase):
+    def test_from_settings(self):
+        settings = get_settings()
+        config = VectorDBConfig.from_settings(settings)
+        self.assertEqual(config.collection_name, settings.QDRANT_COLLECTION_NAME)
+        self.assertEqual(config.collection_options, CollectionOptions.from_settings(settings))
+        self.assertEqual(config.connection_options, ConnectionOptions.from_settings(settings))
+        self.assertEqual(config.text_vectors, ["caption"] if settings.VECTOR_CAPTION_ENABLED else [])
+
+    def test_validation(self):
+        for options in (
+            {"backend": "faiss"},
+            {"tenant_mode": "schema"},
+            {"backend": "numpy", "tenant_mode": "payload"},
+            {"text_vectors": ["ocr"]},
+            {"fusion": "sum"},
+            {"lexical_weight": -1},
+        ):
+            with self.subTest(**options), self.assertRaises(ValueError):
+                VectorDBConfig(**options)
+
+    def test_initialize_rejects_config_with_options(self):
+        VectorDBService._instance = None
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        with self.assertRaises(ValueError):
+            VectorDBService().initialize(VectorDBConfig(), collection_name="test")
+
+
+if __name__ == '__main__':
+    unittest.main()
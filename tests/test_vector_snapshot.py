@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client.http.models import CreateAlias, CreateAliasOperation
+
+from app.services.vector_db_service import VectorDBService
+from app.services.vector_snapshot import verify_snapshot
+from app.services.executors import shutdown_executors
+
+
+class TestVectorSnapshot(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", UserWarning)  # 本地模式不支持 payload 索引
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        self.addCleanup(shutdown_executors)
+        self.addCleanup(setattr, VectorDBService, "_instance", None)
+        self.snapshots = os.path.join(self.path, "snapshots")
+        self.vectors = np.random.default_rng(0).standard_normal((30, 32)).astype(np.float32)
+
+    def open(self, backend, subdir):
+        VectorDBService._instance = None
+        service = VectorDBService()
+        service.initialize(mode="local", path=os.path.join(self.path, subdir), collection_name="test",
+                           vector_dimension=32, coarse_dimension=8, backend=backend)
+        return service
+
+    def check_roundtrip(self, backend):
+        service = self.open(backend, backend)
+        service.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"tags": ["t"], "created_at": datetime(2024, 1, 1 + i % 28)}}
+            for i, vec in enumerate(self.vectors)
+        ])
+        full = service.create_snapshot(self.snapshots, batch_size=8)
+        self.assertEqual((full["kind"], full["points"], full["since"]), ("portable", 30, None))
+
+        time.sleep(0.01)
+        since = datetime.now()
+        service.update_metadata(3, {"tags": ["edited"]})
+        service.upsert(30, self.vectors[0], {"tags": ["new"]})
+        incremental = service.create_snapshot(self.snapshots, since=since)
+        self.assertEqual(incremental["points"], 2)
+        expected = service.search(self.vectors[5], top_k=5)
+        service.close()
+
+        # 从空集合恢复：全量 + 增量
+        shutil.rmtree(os.path.join(self.path, backend))
+        service = self.open(backend, backend)
+        self.addCleanup(service.close)
+        self.assertEqual(service.restore_snapshot(full["path"])["restored"], 30)
+        self.assertEqual(service.restore_snapshot(incremental["path"])["restored"], 2)
+        self.assertEqual(service.count(), 31)
+        self.assertEqual(service.get(3)["metadata"]["tags"], ["edited"])
+        self.assertEqual(service.get(7)["metadata"]["month_day"], 108)
+        actual = service.search(self.vectors[5], top_k=5)
+        self.assertEqual([r["id"] for r in actual], [r["id"] for r in expected])
+        np.testing.assert_allclose([r["score"] for r in actual], [r["score"] for r in expected], rtol=1e-5)
+
+        listed = service.list_snapshots(self.snapshots)
+        self.assertEqual([m["name"] for m in listed[:2]], [incremental["name"], full["name"]])
+
+    def test_roundtrip_qdrant_local(self):
+        self.check_roundtrip("qdrant")
+
+    def test_roundtrip_numpy(self):
+        self.check_roundtrip("numpy")
+
+    def test_corrupted_snapshot_is_rejected(self):
+        service = self.open("qdrant", "qdrant")
+        self.addCleanup(service.close)
+        service.upsert_batch([{"id": i, "vector": vec, "metadata": {}} for i, vec in enumerate(self.vectors[:5])])
+        snapshot = service.create_snapshot(self.snapshots)
+        with open(snapshot["path"], "r+b") as f:
+            f.seek(-3, os.SEEK_END)
+            f.write(b"xyz")
+
+        with self.assertRaises(ValueError):
+            verify_snapshot(snapshot["path"])
+        with self.assertRaises(ValueError):
+            service.restore_snapshot(snapshot["path"])
+        self.assertEqual(service.count(), 5)
+
+    def test_roundtrip_keeps_text_vectors(self):
+        VectorDBService._instance = None
+        service = VectorDBService()
+        service.initialize(mode="local", path=os.path.join(self.path, "caption"), collection_name="test",
+                           vector_dimension=32, text_vectors=["caption"])
+        self.addCleanup(service.close)
+        # 只有偶数ID有文本向量（余弦距离写入时归一化）
+        captions = self.vectors[::-1] / np.linalg.norm(self.vectors[::-1], axis=1, keepdims=True)
+        service.upsert_batch([
+            {"id": i, "vector": vec, "metadata": {"tags": ["t"]},
+             "text_vectors": {"caption": captions[i]} if i % 2 == 0 else None}
+            for i, vec in enumerate(self.vectors[:6])
+        ])
+        snapshot = service.create_snapshot(self.snapshots, batch_size=4)
+        service.delete_batch(list(range(6)))
+
+        self.assertEqual(service.restore_snapshot(snapshot["path"])["restored"], 6)
+        restored = {r["id"]: r["text_vectors"] for r in service.iter_points(with_text_vectors=True)}
+        self.assertEqual(sorted(restored), list(range(6)))
+        for i, text_vectors in restored.items():
+            if i % 2:
+                self.assertEqual(text_vectors, {})
+            else:
+                np.testing.assert_allclose(text_vectors["caption"], captions[i], rtol=1e-5, atol=1e-6)
+
+    def test_full_restore_through_live_alias(self):
+        service = self.open("qdrant", "qdrant")
+        self.addCleanup(service.close)
+        service.upsert_batch([{"id": i, "vector": vec, "metadata": {}} for i, vec in enumerate(self.vectors[:5])])
+        service._client.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name="test", alias_name="test_live"))
+        ])
+        service.switch_serving("test_live")
+        snapshot = service.create_snapshot(self.snapshots)
+        service.delete(0)
+
+        self.assertEqual(service.restore_snapshot(snapshot["path"])["restored"], 5)
+        self.assertEqual(service.collection_name, "test_live")
+        self.assertEqual(service.physical_collection(), "test")
+        self.assertEqual(service.count(exact=True), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
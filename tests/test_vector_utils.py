@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_utils import as_float32, as_float32_matrix, l2_normalize, cosine_similarity, to_list
+
+
+class TestVectorUtils(unittest.TestCase):
+    def test_as_float32_avoids_copy(self):
+        arr = np.arange(4, dtype=np.float32)
+        self.assertIs(as_float32(arr), arr)
+        converted = as_float32([1, 2, 3])
+        self.assertEqual(converted.dtype, np.float32)
+        self.assertTrue(converted.flags["C_CONTIGUOUS"])
+
+    def test_as_float32_matrix(self):
+        matrix = as_float32_matrix([np.ones(3), [0.0, 1.0, 2.0]])
+        self.assertEqual(matrix.shape, (2, 3))
+        self.assertEqual(as_float32_matrix([1.0, 2.0]).shape, (1, 2))
+
+    def test_l2_normalize_rows(self):
+        matrix = np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
+        normed = l2_normalize(matrix)
+        np.testing.assert_allclose(normed[0], [0.6, 0.8], rtol=1e-6)
+        np.testing.assert_array_equal(normed[1], [0.0, 0.0])
+        # 默认不修改输入
+        self.assertEqual(matrix[0, 0], 3.0)
+
+    def test_l2_normalize_in_place(self):
+        vector = np.array([3.0, 4.0], dtype=np.float32)
+        self.assertIs(l2_normalize(vector, copy=False), vector)
+        np.testing.assert_allclose(vector, [0.6, 0.8], rtol=1e-6)
+
+    def test_cosine_similarity(self):
+        self.assertAlmostEqual(cosine_similarity([1, 0], [2, 0]), 1.0, places=6)
+        scores = cosine_similarity([1, 0], [[1, 0], [0, 1], [-1, 0]])
+        np.testing.assert_allclose(scores, [1.0, 0.0, -1.0], atol=1e-6)
+
+    def test_to_list(self):
+        result = to_list(np.array([0.5, 1.5], dtype=np.float32))
+        self.assertEqual(result, [0.5, 1.5])
+        self.assertIsInstance(result[0], float)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import io
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.vector_wire import (
+    NPY_MEDIA_TYPE,
+    SAV1_MEDIA_TYPE,
+    WireFormat,
+    decode_vectors,
+    encode_npy,
+    encode_vectors,
+    negotiate_vector_format,
+)
+from app.routers import embedding as embedding_router
+from app.services.embedding_service import get_embedding_service
+from app.services.executors import shutdown_executors
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_json_is_default(self):
+        for accept in (None, "", "*/*", "application/json", "application/json, */*;q=0.8"):
+            self.assertIsNone(negotiate_vector_format(accept), accept)
+
+    def test_binary_formats(self):
+        self.assertEqual(negotiate_vector_format("application/octet-stream"), WireFormat(SAV1_MEDIA_TYPE))
+        self.assertEqual(
+            negotiate_vector_format("application/x-npy; dtype=float16"),
+            WireFormat(NPY_MEDIA_TYPE, "float16"),
+        )
+
+    def test_q_values_and_unknown_dtype(self):
+        self.assertIsNone(negotiate_vector_format("application/json, application/octet-stream;q=0.5"))
+        self.assertEqual(
+            negotiate_vector_format("application/json;q=0.5, application/octet-stream").media_type,
+            SAV1_MEDIA_TYPE,
+        )
+        self.assertIsNone(negotiate_vector_format("application/octet-stream; dtype=int8"))
+
+
+class TestCodec(unittest.TestCase):
+    def test_sav1_roundtrip_with_ids_and_metadata(self):
+        matrix = np.random.default_rng(0).standard_normal((3, 7)).astype(np.float32)
+        payload = encode_vectors(matrix, ids=["a", "b", 3], metadata=[{"tags": ["猫"]}, {}, {}])
+
+        decoded, meta = decode_vectors(payload)
+        np.testing.assert_array_equal(decoded, matrix)
+        self.assertEqual(meta["ids"], ["a", "b", 3])
+        self.assertEqual(meta["metadata"][0], {"tags": ["猫"]})
+        self.assertEqual((len(payload) - matrix.nbytes) % 8, 0)
+
+    def test_float16_and_single_vector(self):
+        vector = np.linspace(-1, 1, 9, dtype=np.float32)
+        decoded, meta = decode_vectors(encode_vectors(vector, dtype="float16"))
+
+        self.assertEqual(decoded.shape, (1, 9))
+        self.assertEqual(decoded.dtype, np.dtype("<f2"))
+        np.testing.assert_allclose(decoded[0], vector, atol=1e-3)
+        self.assertEqual(meta, {})
+
+    def test_rejects_foreign_payload(self):
+        with self.assertRaises(ValueError):
+            decode_vectors(b"NOPE" + b"\0" * 32)
+
+    def test_npy(self):
+        matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+        np.testing.assert_array_equal(np.load(io.BytesIO(encode_npy(matrix))), matrix)
+
+
+class TestEmbeddingRoute(unittest.TestCase):
+    def setUp(self):
+        service = get_embedding_service()
+        matrix = np.arange(6, dtype=np.float32).reshape(2, 3)
+        patcher = patch.object(service, "generate_embeddings_batch", return_value=matrix)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutdown_executors)
+
+        app = FastAPI()
+        app.include_router(embedding_router.router)
+        app.dependency_overrides[embedding_router.get_services] = lambda: (service, MagicMock())
+        self.client = TestClient(app)
+        self.matrix = matrix
+        self.body = {"inputs": [{"text": "a"}, {"text": "b"}]}
+
+    def test_binary_response(self):
+        response = self.client.post(
+            "/embedding/generate", json=self.body, headers={"Accept": "application/octet-stream"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith(SAV1_MEDIA_TYPE))
+        decoded, _ = decode_vectors(response.content)
+        np.testing.assert_array_equal(decoded, self.matrix)
+
+    def test_json_response_unchanged(self):
+        response = self.client.post("/embedding/generate", json=self.body)
+        self.assertEqual(response.json()["data"][1]["embedding"], [3.0, 4.0, 5.0])
+
+
+if __name__ == "__main__":
+    unittest.main()